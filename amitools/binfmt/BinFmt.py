@@ -1,10 +1,13 @@
+import io
 from .elf.BinFmtELF import BinFmtELF
 from .hunk.BinFmtHunk import BinFmtHunk
 
 
 class BinFmt:
-    def __init__(self):
+    def __init__(self, image_cache=None):
+        """image_cache is an optional BinImageCache for parsed images"""
         self.formats = [BinFmtHunk(), BinFmtELF()]
+        self.image_cache = image_cache
 
     def get_format(self, path):
         """get instance of BinFmt loader or None"""
@@ -35,6 +38,19 @@ class BinFmt:
 
     def load_image_fobj(self, fobj):
         """load a binary file and return a BinImage. unknown format returns None"""
+        cache = self.image_cache
+        if cache is not None:
+            data = fobj.read()
+            key = cache.get_key(data)
+            bin_img = cache.load(key)
+            if bin_img is None:
+                bin_img = self._load_image_fobj(io.BytesIO(data))
+                if bin_img is not None:
+                    cache.save(key, bin_img)
+            return bin_img
+        return self._load_image_fobj(fobj)
+
+    def _load_image_fobj(self, fobj):
         f = self.get_format_fobj(fobj)
         if f is not None:
             return f.load_image_fobj(fobj)
@@ -0,0 +1,205 @@
+import os
+import sys
+import array
+import marshal
+import hashlib
+
+from .BinImage import *
+
+# increment if the stored data changes
+CACHE_FORMAT_VERSION = 1
+
+CACHE_MAGIC = b"BIC1"
+
+# relocs with these parameters only store their offset
+DEFAULT_RELOC = (BIN_IMAGE_RELOC_32, 2, 0)
+
+
+class BinImageCache:
+    """store parsed BinImages in a cache directory
+
+    An entry is keyed by a hash of the file contents and the cache format
+    version. It holds the segments, relocations, symbols and debug lines of
+    the image in a compact marshal dump. The file data of the original
+    format parser is not stored.
+
+    If max_size (in bytes) is given then the least recently used entries
+    are removed when the cache grows beyond it.
+    """
+
+    def __init__(self, cache_dir, max_size=None):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # the marshal format depends on the python version
+        self.version = b"%d:%d.%d" % (
+            CACHE_FORMAT_VERSION,
+            sys.version_info[0],
+            sys.version_info[1],
+        )
+
+    def get_key(self, data):
+        """return cache key of the file data"""
+        h = hashlib.sha1(self.version)
+        h.update(data)
+        return h.hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, key + ".bic")
+
+    def load(self, key):
+        """return the cached BinImage of a key or None"""
+        path = self._get_path(key)
+        try:
+            with open(path, "rb") as fh:
+                raw = fh.read()
+            if raw[:4] != CACHE_MAGIC:
+                raise ValueError("invalid magic")
+            bin_img = self._decode(marshal.loads(raw[4:]))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, EOFError, TypeError, IndexError):
+            # drop broken entry
+            self._remove(path)
+            self.misses += 1
+            return None
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return bin_img
+
+    def save(self, key, bin_img):
+        """store a BinImage and return True if it was stored"""
+        raw = CACHE_MAGIC + marshal.dumps(self._encode(bin_img))
+        path = self._get_path(key)
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as fh:
+                fh.write(raw)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            return False
+        if self.max_size is not None:
+            self.evict(self.max_size)
+        return True
+
+    def evict(self, max_size):
+        """remove least recently used entries until max_size bytes are left"""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".bic"):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+                        total += st.st_size
+        except OSError:
+            return
+        if total <= max_size:
+            return
+        entries.sort()
+        for mtime, size, path in entries:
+            self._remove(path)
+            total -= size
+            if total <= max_size:
+                break
+
+    def clear(self):
+        self.evict(0)
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # ----- encoding -----
+
+    def _encode(self, bin_img):
+        segs = []
+        for seg in bin_img.get_segments():
+            data = seg.data
+            if data is not None:
+                data = bytes(data)
+            segs.append(
+                (
+                    seg.seg_type,
+                    seg.size,
+                    data,
+                    seg.flags,
+                    self._encode_relocs(seg),
+                    self._encode_symtab(seg.get_symtab()),
+                    self._encode_debug_line(seg.get_debug_line()),
+                )
+            )
+        return (bin_img.file_type, segs)
+
+    def _encode_relocs(self, seg):
+        result = []
+        for to_seg in seg.get_reloc_to_segs():
+            relocs = seg.get_reloc(to_seg).get_relocs()
+            offsets = array.array("I", [r.offset for r in relocs])
+            params = [(r.type, r.width, r.addend) for r in relocs]
+            if all(p == DEFAULT_RELOC for p in params):
+                params = None
+            result.append((to_seg.id, offsets.tobytes(), params))
+        return result
+
+    def _encode_symtab(self, symtab):
+        if symtab is None:
+            return None
+        return [(s.offset, s.name, s.file_name) for s in symtab.get_symbols()]
+
+    def _encode_debug_line(self, debug_line):
+        if debug_line is None:
+            return None
+        files = []
+        for df in debug_line.get_files():
+            entries = [(e.offset, e.src_line, e.flags) for e in df.get_entries()]
+            files.append((df.src_file, df.dir_name, df.base_offset, entries))
+        return files
+
+    def _decode(self, obj):
+        file_type, segs = obj
+        bin_img = BinImage(file_type)
+        for seg_type, size, data, flags, _, _, _ in segs:
+            bin_img.add_segment(Segment(seg_type, size, data, flags))
+        all_segs = bin_img.get_segments()
+        for seg, seg_obj in zip(all_segs, segs):
+            relocs, symtab, debug_line = seg_obj[4:]
+            for to_id, offsets, params in relocs:
+                to_seg = all_segs[to_id]
+                rl = Relocations(to_seg)
+                offsets = array.array("I", offsets)
+                if params is None:
+                    rl.entries = [Reloc(offset) for offset in offsets]
+                else:
+                    rl.entries = [
+                        Reloc(offset, *param) for offset, param in zip(offsets, params)
+                    ]
+                seg.add_reloc(to_seg, rl)
+            if symtab is not None:
+                st = SymbolTable()
+                for offset, name, file_name in symtab:
+                    st.add_symbol(Symbol(offset, name, file_name))
+                seg.set_symtab(st)
+            if debug_line is not None:
+                dl = DebugLine()
+                for src_file, dir_name, base_offset, entries in debug_line:
+                    df = DebugLineFile(src_file, dir_name, base_offset)
+                    for offset, src_line, flags in entries:
+                        df.add_entry(DebugLineEntry(offset, src_line, flags))
+                    dl.add_file(df)
+                seg.set_debug_line(dl)
+        return bin_img
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 #
 # vamos [optoins] <amiga binary> [args ...]
+# vamos --server[=<socket>] [options]
 #
 # run an m68k AmigaOS binary
 #
@@ -12,13 +13,25 @@ from amitools.vamos.main import main as vmain
 from amitools.vamos.main import main_profile
 
 
-def main(args=None):
-    cfg_files = (
+def get_cfg_files():
+    return (
         # first look in current dir
         os.path.join(os.getcwd(), ".vamosrc"),
         # then in home dir
         os.path.expanduser("~/.vamosrc"),
     )
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    # server mode?
+    if args and args[0].split("=")[0] == "--server":
+        from amitools.vamos.server import server_main
+
+        socket_path = args[0][9:] or None
+        return server_main(get_cfg_files, args[1:], socket_path=socket_path)
+    cfg_files = get_cfg_files()
     # profile run?
     if "VAMOS_PROFILE" in os.environ:
         vamos_profile = os.environ["VAMOS_PROFILE"]
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+#
+# vamosc [options] <amiga binary> [args ...]
+#
+# run an m68k AmigaOS binary in a running vamos server (vamos --server).
+# if no server is running then vamos is run directly.
+
+import sys
+from amitools.vamos.client import VamosClient, REPLY_REJECTED
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    client = VamosClient()
+    try:
+        ret_code = client.run(args)
+    except (FileNotFoundError, ConnectionRefusedError):
+        # no server running
+        ret_code = REPLY_REJECTED
+    except (OSError, EOFError) as e:
+        print("vamosc: can't run in vamos server: %s" % e, file=sys.stderr)
+        return 1
+    if ret_code != REPLY_REJECTED:
+        return ret_code
+    # fall back to a regular vamos run
+    from amitools.tools.vamos import main as vamos_main
+
+    return vamos_main(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
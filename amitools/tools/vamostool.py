@@ -17,7 +17,13 @@ def main(args=None):
         # then in home dir
         os.path.expanduser("~/.vamosrc"),
     )
-    tools = [PathTool(), TypeTool(), LibProfilerTool()]
+    tools = [
+        PathTool(),
+        TypeTool(),
+        LibProfilerTool(),
+        BatchTool(cfg_files),
+        TraceTool(),
+    ]
     return tools_main(tools, cfg_files, args)
 
 
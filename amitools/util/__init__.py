@@ -1 +1,2 @@
 from .slotarray import SlotArray
+from .lrucache import LRUCache
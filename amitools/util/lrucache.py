@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    """a dict of limited size that drops the least recently used entries.
+
+    hits and misses of get() are counted.
+    """
+
+    def __init__(self, max_size=256):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """return value of key and mark it as recently used"""
+        entries = self._entries
+        try:
+            value = entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self._max_size:
+            entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
@@ -42,6 +42,14 @@ class SlotArray:
         self._first_free = slot_id
         self._num_free += 1
 
+    def get_state(self):
+        """return a copy of the slots for set_state()"""
+        return (list(self._array), self._num_free, self._first_free)
+
+    def set_state(self, state):
+        array, self._num_free, self._first_free = state
+        self._array = list(array)
+
     def __len__(self):
         """return length of total array"""
         return len(self._array)
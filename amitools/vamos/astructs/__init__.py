@@ -6,5 +6,6 @@ from .pointer import BPTR, APTR, BPTR_VOID, APTR_VOID, PointerType
 from .array import ARRAY, ArrayIter
 from .string import CSTR, BSTR
 from .dump import TypeDumper
+from .codec import StructCodec, StructRecord
 from .bitfield import BitField, BitFieldType
 from .enum import Enum, EnumType
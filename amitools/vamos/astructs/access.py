@@ -1,37 +1,140 @@
 from .astruct import AmigaStruct
-from .pointer import BCPLPointerType
+from .scalar import ScalarType
+from .pointer import PointerType, BCPLPointerType
+from .enum import Enum
+from .bitfield import BitField
+
+
+class FieldAccessor(object):
+    """precomputed access to a (dotted) field name of a struct type.
+
+    kind is one of the KIND_* constants: scalars and pointers are directly
+    read and written at the offset, all other fields use the field instance.
+    """
+
+    KIND_FIELD = 0
+    KIND_SCALAR = 1
+    KIND_APTR = 2
+    KIND_BPTR = 3
+
+    __slots__ = ("name", "offset", "kind", "width", "signed", "write_direct")
+
+    def __init__(self, name, offset, field_type):
+        self.name = name
+        self.offset = offset
+        self.width = None
+        self.signed = False
+        self.write_direct = False
+        if issubclass(field_type, BCPLPointerType):
+            self.kind = self.KIND_BPTR
+            self.write_direct = True
+        elif issubclass(field_type, PointerType):
+            self.kind = self.KIND_APTR
+            self.write_direct = True
+        elif issubclass(field_type, ScalarType):
+            self.kind = self.KIND_SCALAR
+            self.width = field_type.get_mem_width()
+            self.signed = field_type.is_signed()
+            # enums and bit fields validate or convert values on write
+            self.write_direct = not issubclass(field_type, (Enum, BitField))
+        else:
+            self.kind = self.KIND_FIELD
 
 
 class AccessStruct(object):
     _size_to_width = [None, 0, 1, None, 2]
+    # struct type -> name -> FieldAccessor
+    _accessor_cache = {}
 
     def __init__(self, mem, struct_def, struct_addr):
         self.mem = mem
-        self.struct = struct_def(mem, struct_addr)
+        self.struct_def = struct_def
+        self.struct_addr = struct_addr
+        self._struct = None
+        accessors = self._accessor_cache.get(struct_def)
+        if accessors is None:
+            accessors = {}
+            self._accessor_cache[struct_def] = accessors
+        self._accessors = accessors
+
+    @property
+    def struct(self):
+        # the struct instance is only needed for non direct fields
+        if self._struct is None:
+            self._struct = self.struct_def(self.mem, self.struct_addr)
+        return self._struct
 
     def w_s(self, name, val):
-        field, field_def = self._get_field_for_name(name)
-        # BPTR auto conversion
-        if issubclass(field_def.type, BCPLPointerType):
-            field.set_ref_addr(val)
+        acc = self._accessors.get(name)
+        if acc is None:
+            acc = self._get_accessor(name)
+        if acc.write_direct:
+            addr = self.struct_addr + acc.offset
+            kind = acc.kind
+            if kind == FieldAccessor.KIND_SCALAR:
+                if acc.signed:
+                    self.mem.writes(acc.width, addr, val)
+                else:
+                    self.mem.write(acc.width, addr, val)
+            elif kind == FieldAccessor.KIND_APTR:
+                self.mem.w32(addr, val)
+            else:
+                # BPTR auto conversion
+                self.mem.w32(addr, val >> 2)
         else:
+            field, field_def = self._get_field_for_name(name)
             field.set(val)
 
     def r_s(self, name):
-        field, field_def = self._get_field_for_name(name)
-        # BPTR auto conversion
-        if issubclass(field_def.type, BCPLPointerType):
-            val = field.get_ref_addr()
+        acc = self._accessors.get(name)
+        if acc is None:
+            acc = self._get_accessor(name)
+        kind = acc.kind
+        addr = self.struct_addr + acc.offset
+        if kind == FieldAccessor.KIND_SCALAR:
+            if acc.signed:
+                return self.mem.reads(acc.width, addr)
+            else:
+                return self.mem.read(acc.width, addr)
+        elif kind == FieldAccessor.KIND_APTR:
+            return self.mem.r32(addr)
+        elif kind == FieldAccessor.KIND_BPTR:
+            # BPTR auto conversion
+            return self.mem.r32(addr) << 2
         else:
-            val = field.get()
-        return val
+            field, field_def = self._get_field_for_name(name)
+            return field.get()
 
     def s_get_addr(self, name):
-        field, _ = self._get_field_for_name(name)
-        return field.get_addr()
+        acc = self._accessors.get(name)
+        if acc is None:
+            acc = self._get_accessor(name)
+        return self.struct_addr + acc.offset
 
     def get_size(self):
-        return self.struct.get_byte_size()
+        return self.struct_def.get_byte_size()
+
+    def _get_accessor(self, name):
+        # walk along field defs in name "bla.foo.bar" once per struct type
+        sdef = self.struct_def.sdef
+        offset = 0
+        field_def = None
+        for field_name in name.split("."):
+            if sdef is None:
+                raise KeyError(self, name)
+            field_def = sdef.find_field_def_by_name(field_name)
+            if not field_def:
+                raise KeyError(self, name)
+            offset += field_def.offset
+            # find potential next struct
+            field_type = field_def.type
+            if issubclass(field_type, AmigaStruct):
+                sdef = field_type.sdef
+            else:
+                sdef = None
+        acc = FieldAccessor(name, offset, field_def.type)
+        self._accessors[name] = acc
+        return acc
 
     def _get_field_for_name(self, name):
         struct = self.struct
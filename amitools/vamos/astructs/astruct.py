@@ -101,6 +101,7 @@ class AmigaStructFieldDefs:
         self._type_name = type_name
         self._field_defs = []
         self._name_to_field_def = {}
+        self._name_to_index = {}
         self._total_size = 0
         self._alias_names = {}
         self._alias_type = None
@@ -118,11 +119,14 @@ class AmigaStructFieldDefs:
         field_name = field_def.name
         self._field_defs.append(field_def)
         self._name_to_field_def[field_name] = field_def
+        self._name_to_index[field_name] = field_def.index
         self._total_size += field_def.size
         # find alias name
         alias_name = self._to_alias_name(field_def.name)
         if alias_name != field_name:
             self._alias_names[alias_name] = field_name
+            # real names always take precedence over aliases
+            self._name_to_index.setdefault(alias_name, field_def.index)
 
     def get_type_name(self):
         return self._type_name
@@ -136,6 +140,10 @@ class AmigaStructFieldDefs:
     def __getitem__(self, key):
         return self._field_defs[key]
 
+    def find_field_index_by_name(self, name):
+        """return index of field with name or alias name or None"""
+        return self._name_to_index.get(name)
+
     def find_field_def_by_name(self, name):
         fdef = self._name_to_field_def.get(name)
         if not fdef:
@@ -214,47 +222,56 @@ class AmigaStructFieldDefs:
 
 
 class AmigaStructFields:
+    """the field instances of a struct.
+
+    Fields are created on first access only, so wrapping a large struct
+    and using only some of its fields stays cheap.
+    """
+
     def __init__(self, astruct):
         self.astruct = astruct
         self.sdef = astruct.sdef
-        self._fields = []
-        self._name_to_field = {}
-        for field_def in self.sdef.get_field_defs():
-            field = self._create_field_type(field_def)
-            self._fields.append(field)
-            self._name_to_field[field_def.name] = field
+        self._fields = [None] * self.sdef.get_num_field_defs()
 
     def get_fields(self):
         """return all field instances"""
-        return self._fields
+        fields = self._fields
+        for index, field in enumerate(fields):
+            if field is None:
+                fields[index] = self._create_field_type(index)
+        return fields
 
     def get_field_by_index(self, index):
         """return the type instance associated with the field"""
-        return self._fields[index]
+        field = self._fields[index]
+        if field is None:
+            field = self._create_field_type(index)
+            self._fields[index] = field
+        return field
 
     def get_field_by_name(self, name):
-        return self._name_to_field.get(name)
+        field_def = self.sdef._name_to_field_def.get(name)
+        if field_def is None:
+            return None
+        return self.get_field_by_index(field_def.index)
 
     def get_field_by_name_or_alias(self, name, subfield_aliases=None):
-        field = self._name_to_field.get(name)
-        if field is None:
-            # alias name
-            alias_name = self.sdef.get_alias_name(name)
-            if alias_name:
-                field = self._name_to_field.get(alias_name)
-            # subfield alias
-            if field is None and subfield_aliases:
-                field_def_path = subfield_aliases.get(name)
-                if field_def_path:
-                    return self.find_sub_field_by_def_path(field_def_path)
-        return field
+        index = self.sdef._name_to_index.get(name)
+        if index is not None:
+            return self.get_field_by_index(index)
+        # subfield alias
+        if subfield_aliases:
+            field_def_path = subfield_aliases.get(name)
+            if field_def_path:
+                return self.find_sub_field_by_def_path(field_def_path)
+        return None
 
     def find_field_by_offset(self, offset):
         """return field, delta or None, 0"""
         field_def, delta = self.sdef.find_field_def_by_offset(offset)
         if not field_def:
             return None, 0
-        return self._fields[field_def.index], delta
+        return self.get_field_by_index(field_def.index), delta
 
     def find_sub_fields_by_offset(self, base_offset):
         """return [fields], delta or None, 0"""
@@ -309,14 +326,14 @@ class AmigaStructFields:
         offset = addr - self.astruct._addr
         return self.find_sub_fields_by_offset(offset)
 
-    def _create_field_type(self, field_def):
+    def _create_field_type(self, index):
         astruct = self.astruct
-        addr = astruct._addr + field_def.offset
-        base_offset = astruct._base_offset + field_def.offset
+        field_def = self.sdef._field_defs[index]
+        offset = field_def.offset
+        addr = astruct._addr + offset
+        base_offset = astruct._base_offset + offset
         cls_type = field_def.type.get_alias_type()
-        field = cls_type(
-            astruct._mem, addr, offset=field_def.offset, base_offset=base_offset
-        )
+        field = cls_type(astruct._mem, addr, offset=offset, base_offset=base_offset)
         return field
 
 
@@ -0,0 +1,216 @@
+import struct
+
+from .astruct import AmigaStruct
+from .scalar import ScalarType, ULONG, LONG, UWORD, WORD, UBYTE, BYTE
+from .pointer import PointerType, BCPLPointerType
+from .array import ArrayType
+
+
+class StructRecord:
+    """a lightweight snapshot of all fields of a struct.
+
+    Derived classes are generated for each struct type with slots for all
+    field names. Embedded structs are stored as nested records, byte arrays
+    as bytes and other arrays as lists.
+    """
+
+    __slots__ = ()
+    _field_names = ()
+    _type_name = None
+
+    def get_field_names(self):
+        return self._field_names
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        for name in self._field_names:
+            if getattr(self, name) != getattr(other, name):
+                return False
+        return True
+
+    def __repr__(self):
+        vals = ", ".join(
+            "{}={!r}".format(name, getattr(self, name)) for name in self._field_names
+        )
+        return "{}({})".format(self._type_name, vals)
+
+
+class ScalarCodec:
+    """code a single scalar or pointer value"""
+
+    def __init__(self, fmt, bcpl=False):
+        self.fmt = fmt
+        self.num_vals = 1
+        self.bcpl = bcpl
+
+    def new_value(self):
+        return 0
+
+    def decode(self, vals, pos):
+        val = vals[pos]
+        if self.bcpl:
+            val <<= 2
+        return val, pos + 1
+
+    def encode(self, val, out):
+        if self.bcpl:
+            val >>= 2
+        out.append(val)
+
+
+class BytesCodec:
+    """code an array of bytes as a bytes object"""
+
+    def __init__(self, size):
+        self.fmt = "%ds" % size
+        self.num_vals = 1
+        self.size = size
+
+    def new_value(self):
+        return bytes(self.size)
+
+    def decode(self, vals, pos):
+        return vals[pos], pos + 1
+
+    def encode(self, val, out):
+        out.append(val)
+
+
+class ArrayCodec:
+    """code an array of non byte elements as a list"""
+
+    def __init__(self, element_codec, size):
+        self.element_codec = element_codec
+        self.size = size
+        self.fmt = element_codec.fmt * size
+        self.num_vals = element_codec.num_vals * size
+
+    def new_value(self):
+        return [self.element_codec.new_value() for i in range(self.size)]
+
+    def decode(self, vals, pos):
+        result = []
+        decode = self.element_codec.decode
+        for i in range(self.size):
+            val, pos = decode(vals, pos)
+            result.append(val)
+        return result, pos
+
+    def encode(self, val, out):
+        assert len(val) == self.size
+        encode = self.element_codec.encode
+        for v in val:
+            encode(v, out)
+
+
+class StructCodec:
+    """read or write all fields of an AmigaStruct with a single memory transfer.
+
+    The codec is compiled once per struct type from its field defs into a
+    struct.Struct. Use read() to fetch a record of the struct in memory,
+    modify its fields and write() it back.
+
+    Like AccessStruct, BPTR fields are auto converted to byte addresses.
+    """
+
+    _scalar_fmts = {
+        ULONG: "L",
+        LONG: "l",
+        UWORD: "H",
+        WORD: "h",
+        UBYTE: "B",
+        BYTE: "b",
+    }
+    _codecs = {}
+
+    @classmethod
+    def for_struct(cls, struct_type):
+        """return the (cached) codec for the given struct type"""
+        codec = cls._codecs.get(struct_type)
+        if codec is None:
+            codec = cls(struct_type)
+            cls._codecs[struct_type] = codec
+        return codec
+
+    def __init__(self, struct_type):
+        assert issubclass(struct_type, AmigaStruct)
+        self.struct_type = struct_type
+        self.field_names = []
+        self.field_codecs = []
+        for field_def in struct_type.sdef.get_field_defs():
+            self.field_names.append(field_def.name)
+            self.field_codecs.append(self._get_type_codec(field_def.type))
+        self.fmt = "".join(c.fmt for c in self.field_codecs)
+        self.num_vals = sum(c.num_vals for c in self.field_codecs)
+        self.fields = list(zip(self.field_names, self.field_codecs))
+        self.record_type = type(
+            struct_type.sdef.get_type_name() + "Record",
+            (StructRecord,),
+            dict(
+                __slots__=tuple(self.field_names),
+                _field_names=tuple(self.field_names),
+                _type_name=struct_type.sdef.get_type_name(),
+            ),
+        )
+        self.struct = struct.Struct(">" + self.fmt)
+        assert self.struct.size == struct_type.get_byte_size()
+
+    def _get_type_codec(self, field_type):
+        if issubclass(field_type, AmigaStruct):
+            return StructCodec.for_struct(field_type)
+        elif issubclass(field_type, PointerType):
+            return ScalarCodec("L", issubclass(field_type, BCPLPointerType))
+        elif issubclass(field_type, ScalarType):
+            for base, fmt in self._scalar_fmts.items():
+                if issubclass(field_type, base):
+                    return ScalarCodec(fmt)
+        elif issubclass(field_type, ArrayType):
+            element_type = field_type.get_element_type()
+            size = field_type.get_array_size()
+            if element_type in (UBYTE, BYTE):
+                return BytesCodec(size)
+            return ArrayCodec(self._get_type_codec(element_type), size)
+        raise TypeError("can't code field type: %s" % field_type)
+
+    def get_size(self):
+        return self.struct.size
+
+    def new_value(self):
+        """return a new record with all fields cleared"""
+        rec = self.record_type()
+        for name, codec in self.fields:
+            setattr(rec, name, codec.new_value())
+        return rec
+
+    def decode(self, vals, pos):
+        rec = self.record_type()
+        for name, codec in self.fields:
+            val, pos = codec.decode(vals, pos)
+            setattr(rec, name, val)
+        return rec, pos
+
+    def encode(self, rec, out):
+        for name, codec in self.fields:
+            codec.encode(getattr(rec, name), out)
+
+    def unpack(self, data, offset=0):
+        """decode a record from a buffer"""
+        vals = self.struct.unpack_from(data, offset)
+        rec, _ = self.decode(vals, 0)
+        return rec
+
+    def pack(self, rec):
+        """encode a record into bytes"""
+        out = []
+        self.encode(rec, out)
+        return self.struct.pack(*out)
+
+    def read(self, mem, addr):
+        """read the struct at addr and return a record"""
+        data = mem.r_block(addr, self.struct.size)
+        return self.unpack(data)
+
+    def write(self, mem, addr, rec):
+        """write the record to the struct at addr"""
+        mem.w_block(addr, self.pack(rec))
@@ -0,0 +1,350 @@
+import io
+import os
+import sys
+import shlex
+import queue
+import shutil
+import tempfile
+import traceback
+import multiprocessing
+
+from .cfg import VamosMainParser, ProcessParser
+from .cfgcore import MainParser
+from .log import log_main, log_setup, log_reset, loggers
+from .session import VamosSession
+from .main import RET_CODE_CONFIG_ERROR
+
+
+class BatchResult(object):
+    """the result of a batch job: exit code, output and cycles"""
+
+    def __init__(self, args, exit_code, stdout=b"", stderr=b"", cycles=0):
+        self.args = args
+        self.exit_code = exit_code
+        self.stdout = stdout
+        self.stderr = stderr
+        self.cycles = cycles
+
+    def __repr__(self):
+        return "BatchResult(args=%r, exit_code=%d, cycles=%d)" % (
+            self.args,
+            self.exit_code,
+            self.cycles,
+        )
+
+    def to_dict(self):
+        return {
+            "args": self.args,
+            "exit_code": self.exit_code,
+            "stdout": self.stdout.decode("latin-1"),
+            "stderr": self.stderr.decode("latin-1"),
+            "cycles": self.cycles,
+        }
+
+
+class BatchWorker(object):
+    """run many jobs in a single vamos session.
+
+    The session is set up once and a snapshot is taken right after the base
+    libs are opened. Before each further job the snapshot is restored.
+
+    While the worker is set up, stdin is empty and stdout and stderr of
+    Python (and hence of the Amiga programs and the vamos log) are captured
+    for each job.
+    """
+
+    def __init__(self, cfg_files=None, args=None, cfg_dict=None):
+        self.cfg_files = cfg_files
+        self.args = args
+        self.cfg_dict = cfg_dict
+        self.session = None
+        self.snapshots = None
+        self.dirty = False
+        self.temp_dir = None
+        self.old_std = None
+        self.old_log = None
+
+    def setup(self):
+        """setup the session. return True if all went well"""
+        mp = VamosMainParser(proc=False)
+        if not mp.parse(self.cfg_files, self.args, self.cfg_dict):
+            return False
+        self._capture_std()
+        log_reset()
+        if not log_setup(mp.get_log_dict().logging):
+            return False
+        self._private_ram(mp)
+        self.session = VamosSession(mp)
+        if not self.session.setup():
+            return False
+        # snapshot the ready session
+        self.snapshots = (
+            self.session.slm.snapshot(),
+            self.session.mem_map.snapshot(),
+            self.session.machine.snapshot(),
+        )
+        return True
+
+    def shutdown(self):
+        try:
+            if self.session:
+                self._shutdown_session()
+        finally:
+            self.session = None
+            if self.temp_dir:
+                shutil.rmtree(self.temp_dir, ignore_errors=True)
+                self.temp_dir = None
+            self._release_std()
+
+    def _shutdown_session(self):
+        session = self.session
+        try:
+            if session.slm and session.slm.lib_mgr:
+                if self.snapshots:
+                    self._restore()
+                session.close_libs()
+        finally:
+            session.close_paths()
+            session.close_trace()
+            session.close_metrics()
+            if session.machine:
+                session.cleanup()
+
+    def run_job(self, args):
+        """run a single command line and return a BatchResult"""
+        if type(args) is str:
+            args = shlex.split(args)
+        self._reset_std()
+        if self.dirty:
+            self._restore()
+        self.session.run_state = None
+        proc_cfg = self._parse_proc(args)
+        if proc_cfg is None:
+            exit_code = RET_CODE_CONFIG_ERROR
+        else:
+            self.dirty = True
+            try:
+                exit_code = self.session.run(proc_cfg)
+            except Exception as e:
+                log_main.exception("batch: job failed: %s", e)
+                exit_code = 1
+            if exit_code is None:
+                exit_code = RET_CODE_CONFIG_ERROR
+        run_state = self.session.run_state
+        cycles = run_state.cycles if run_state else 0
+        stdout, stderr = self._read_std()
+        return BatchResult(list(args), exit_code, stdout, stderr, cycles)
+
+    def _restore(self):
+        lib_snap, map_snap, machine_snap = self.snapshots
+        self.session.slm.restore(lib_snap)
+        self.session.mem_map.restore(map_snap)
+        self.session.machine.restore(machine_snap)
+        self.dirty = False
+
+    def _parse_proc(self, args):
+        mp = MainParser()
+        proc = ProcessParser("vamos")
+        mp.add_parser(proc)
+        if not mp.parse(None, args):
+            return None
+        return proc.get_cfg_dict().process
+
+    def _private_ram(self, mp):
+        """each worker gets its own ram: volume to allow parallel runs"""
+        path_cfg = mp.get_path_dict()
+        auto_volumes = path_cfg.path.auto_volumes
+        if auto_volumes is None:
+            auto_volumes = ["ram"]
+        if "ram" not in [v.lower() for v in auto_volumes]:
+            return
+        volumes = path_cfg.volumes or []
+        for vol in volumes:
+            if vol.lower().startswith("ram:"):
+                return
+        self.temp_dir = tempfile.mkdtemp(prefix="vamos-batch-")
+        ram_dir = os.path.join(self.temp_dir, "ram")
+        path_cfg.volumes = volumes + ["ram:%s?temp" % ram_dir]
+
+    # ----- capture std streams -----
+
+    def _capture_std(self):
+        self.old_std = (sys.stdin, sys.stdout, sys.stderr)
+        self.old_log = [(l, list(l.handlers)) for l in loggers]
+        self.out_file = tempfile.TemporaryFile()
+        self.err_file = tempfile.TemporaryFile()
+        self.in_file = open(os.devnull, "rb")
+        sys.stdin = io.TextIOWrapper(self.in_file)
+        sys.stdout = io.TextIOWrapper(self.out_file, write_through=True)
+        sys.stderr = io.TextIOWrapper(self.err_file, write_through=True)
+
+    def _release_std(self):
+        if self.old_std is None:
+            return
+        sys.stdin, sys.stdout, sys.stderr = self.old_std
+        self.old_std = None
+        log_reset()
+        for l, handlers in self.old_log:
+            for h in handlers:
+                l.addHandler(h)
+        for f in (self.in_file, self.out_file, self.err_file):
+            f.close()
+
+    def _reset_std(self):
+        for f in (self.out_file, self.err_file):
+            f.seek(0)
+            f.truncate()
+
+    def _read_std(self):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        result = []
+        for f in (self.out_file, self.err_file):
+            f.seek(0)
+            result.append(f.read())
+        return result
+
+
+def _failed_result(job, stderr):
+    return BatchResult(job, RET_CODE_CONFIG_ERROR, stderr=stderr.encode("latin-1"))
+
+
+def _run_jobs(cfg_files, args, cfg_dict, items):
+    """run the (index, job) items in a worker and yield (index, result).
+
+    if the worker raises then the job fails with the traceback in stderr
+    and a new worker is set up for the next job.
+    """
+    worker = None
+    error = None
+    try:
+        for index, job in items:
+            if worker is None and error is None:
+                worker = BatchWorker(cfg_files, args, cfg_dict)
+                try:
+                    if not worker.setup():
+                        error = ""
+                except Exception:
+                    error = traceback.format_exc()
+            if error is not None:
+                result = _failed_result(job, error)
+            else:
+                try:
+                    result = worker.run_job(job)
+                except Exception:
+                    result = _failed_result(job, traceback.format_exc())
+                    _shutdown_worker(worker)
+                    worker = None
+            yield index, result
+    finally:
+        if worker:
+            _shutdown_worker(worker)
+
+
+def _shutdown_worker(worker):
+    try:
+        worker.shutdown()
+    except Exception as e:
+        log_main.error("batch: worker shutdown failed: %s", e)
+
+
+def _take_jobs(worker_id, job_queue, running):
+    """take jobs from the queue and mark the running job for the parent"""
+    while True:
+        item = job_queue.get()
+        if item is None:
+            break
+        running[worker_id] = item[0]
+        yield item
+
+
+def _worker_main(
+    worker_id, cfg_files, args, cfg_dict, job_queue, result_queue, running
+):
+    """main loop of a worker process"""
+    items = _take_jobs(worker_id, job_queue, running)
+    for index, result in _run_jobs(cfg_files, args, cfg_dict, items):
+        result_queue.put((index, result))
+
+
+def run_batch(jobs, cfg_files=None, args=None, cfg_dict=None, num_workers=None):
+    """run a list of jobs and return a list of BatchResults in job order.
+
+    jobs: list of command lines (arg lists or strings) like the binary and
+          its args given to vamos
+    cfg_files, args, cfg_dict: vamos config of the session, args must not
+          contain a binary
+    num_workers: number of worker processes. None=number of CPUs,
+          0=run all jobs in this process
+
+    jobs that raise an internal error or whose worker process died fail
+    with RET_CODE_CONFIG_ERROR and the reason in stderr.
+    """
+    jobs = [shlex.split(job) if type(job) is str else list(job) for job in jobs]
+    if not jobs:
+        return []
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    num_workers = min(num_workers, len(jobs))
+    results = [None] * len(jobs)
+    # run in this process
+    if num_workers == 0:
+        items = enumerate(jobs)
+        for index, result in _run_jobs(cfg_files, args, cfg_dict, items):
+            results[index] = result
+        return results
+    # run in worker processes
+    job_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue()
+    # index of the job each worker runs. set without delay unlike the queue
+    running = multiprocessing.Array("i", [-1] * num_workers, lock=False)
+    procs = []
+    for i in range(num_workers):
+        p = multiprocessing.Process(
+            target=_worker_main,
+            args=(i, cfg_files, args, cfg_dict, job_queue, result_queue, running),
+        )
+        p.start()
+        procs.append(p)
+    for index, job in enumerate(jobs):
+        job_queue.put((index, job))
+    for p in procs:
+        job_queue.put(None)
+    num_done = 0
+    while num_done < len(jobs):
+        try:
+            index, result = result_queue.get(timeout=1.0)
+            results[index] = result
+            num_done += 1
+            continue
+        except queue.Empty:
+            pass
+        # a dead worker flushed its results before. so drain them and then
+        # fail the job it was running
+        dead = [i for i, p in enumerate(procs) if not p.is_alive()]
+        try:
+            while True:
+                index, result = result_queue.get_nowait()
+                results[index] = result
+                num_done += 1
+        except queue.Empty:
+            pass
+        for worker_id in dead:
+            index = running[worker_id]
+            if index >= 0 and results[index] is None:
+                exit_code = procs[worker_id].exitcode
+                log_main.error("batch: worker %d died: %s", worker_id, exit_code)
+                msg = "batch: worker died with exit code %s\n" % exit_code
+                results[index] = _failed_result(jobs[index], msg)
+                num_done += 1
+        # no worker left to take the remaining jobs
+        if len(dead) == len(procs):
+            for index, job in enumerate(jobs):
+                if results[index] is None:
+                    results[index] = _failed_result(job, "batch: no worker left\n")
+            job_queue.cancel_join_thread()
+            break
+    for p in procs:
+        p.join()
+    log_main.info("batch: %d jobs done with %d workers", len(jobs), num_workers)
+    return results
@@ -5,4 +5,5 @@ from .trace import TraceParser
 from .machine import MachineParser
 from .proc import ProcessParser
 from .profile import ProfileParser
+from .loader import LoaderParser
 from .vamos import VamosMainParser
@@ -5,6 +5,7 @@ class LibsParser(Parser):
     def __init__(self):
         modes = ("auto", "vamos", "amiga", "fake", "off")
         expunges = ("last_close", "shutdown", "no_mem")
+        stubs = ("closure", "code")
         def_cfg = {
             "libs": {
                 "*.library": {
@@ -12,6 +13,7 @@ class LibsParser(Parser):
                     "version": 0,
                     "expunge": Value(str, "shutdown", enum=expunges),
                     "num_fake_funcs": 0,
+                    "stub": Value(str, "closure", enum=stubs),
                 }
             },
             "devs": {
@@ -20,6 +22,7 @@ class LibsParser(Parser):
                     "version": 0,
                     "expunge": Value(str, "shutdown", enum=expunges),
                     "num_fake_funcs": 0,
+                    "stub": Value(str, "closure", enum=stubs),
                 }
             },
         }
@@ -0,0 +1,57 @@
+from amitools.vamos.cfgcore import *
+
+
+class LoaderParser(Parser):
+    def __init__(self, ini_prefix=None):
+        def_cfg = {
+            "loader": {
+                "resident": ValueList(str),
+                "image_cache": 16,
+                "disk_cache": Value(str),
+                "disk_cache_size": 65536,
+            }
+        }
+        arg_cfg = {
+            "loader": {
+                "resident": Argument(
+                    "--resident",
+                    action="append",
+                    help="names of pure commands to keep resident when loaded",
+                ),
+                "image_cache": Argument(
+                    "--loader-image-cache",
+                    action="store",
+                    type=int,
+                    help="number of loaded binary images to keep (0=off)",
+                ),
+                "disk_cache": Argument(
+                    "--loader-disk-cache",
+                    action="store",
+                    help="directory to store parsed binaries in",
+                ),
+                "disk_cache_size": Argument(
+                    "--loader-disk-cache-size",
+                    action="store",
+                    type=int,
+                    help="max size of the disk cache in KiB (0=no limit)",
+                ),
+            }
+        }
+        ini_trafo = {
+            "loader": {
+                "resident": "resident",
+                "image_cache": "loader_image_cache",
+                "disk_cache": "loader_disk_cache",
+                "disk_cache_size": "loader_disk_cache_size",
+            }
+        }
+        Parser.__init__(
+            self,
+            "loader",
+            def_cfg,
+            arg_cfg,
+            "loader",
+            "binary loader options",
+            ini_trafo,
+            ini_prefix,
+        )
@@ -18,16 +18,20 @@ class MachineParser(Parser):
             "40",
         )
         hw_access = ("emu", "ignore", "abort", "disable")
+        mem_alloc = ("first_fit", "best_fit")
         def_cfg = {
             "machine": {
                 "cpu": Value(str, "68000", enum=cpus),
                 "max_cycles": 0,
                 "cycles_per_run": 1000,
+                "adaptive_slices": False,
                 "ram_size": 1024,
+                "metrics": Value(str),
             },
             "memmap": {
                 "hw_access": Value(str, "emu", enum=hw_access),
                 "old_dos_guard": False,
+                "mem_alloc": Value(str, "first_fit", enum=mem_alloc),
             },
         }
         arg_cfg = {
@@ -50,6 +54,11 @@ class MachineParser(Parser):
                     type=int,
                     help="cycles per block",
                 ),
+                "adaptive_slices": Argument(
+                    "--adaptive-slices",
+                    action="store_true",
+                    help="grow the cycles per block while no traps are called",
+                ),
                 "ram_size": Argument(
                     "-m",
                     "--ram-size",
@@ -57,6 +66,11 @@ class MachineParser(Parser):
                     type=int,
                     help="set RAM size in KiB",
                 ),
+                "metrics": Argument(
+                    "--metrics",
+                    action="store",
+                    help="write time split and counts of the run as JSON to file",
+                ),
             },
             "memmap": {
                 "hw_access": Argument(
@@ -70,6 +84,11 @@ class MachineParser(Parser):
                     action="store_true",
                     help="Reserve memory range to track access to BCPL addrs",
                 ),
+                "mem_alloc": Argument(
+                    "--mem-alloc",
+                    action="store",
+                    help="Memory allocator strategy (first_fit, best_fit)",
+                ),
             },
         }
         ini_trafo = {
@@ -77,9 +96,15 @@ class MachineParser(Parser):
                 "cpu": "cpu",
                 "max_cycles": "max_cycles",
                 "cycles_per_run": "cycles_per_run",
+                "adaptive_slices": "adaptive_slices",
                 "ram_size": "ram_size",
+                "metrics": "metrics",
+            },
+            "memmap": {
+                "hw_access": "hw_access",
+                "old_dos_guard": "old_dos_guard",
+                "mem_alloc": "mem_alloc",
             },
-            "memmap": {"hw_access": "hw_access", "old_dos_guard": "old_dos_guard"},
         }
         Parser.__init__(
             self,
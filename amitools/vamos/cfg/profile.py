@@ -7,6 +7,8 @@ class ProfileParser(Parser):
             "profile": {
                 "enabled": False,
                 "libs": {"names": ValueList(str), "calls": False},
+                "samples": {"enabled": False, "interval": 10000, "top": 20},
+                "caches": {"enabled": False},
                 "output": {"file": Value(str), "append": False, "dump": False},
             }
         }
@@ -27,6 +29,32 @@ class ProfileParser(Parser):
                         help="store each lib call individually",
                     ),
                 },
+                "samples": {
+                    "enabled": Argument(
+                        "--profile-samples",
+                        action="store_true",
+                        help="sample the PC to find hot spots in m68k code",
+                    ),
+                    "interval": Argument(
+                        "--profile-samples-interval",
+                        action="store",
+                        type=int,
+                        help="cycles between two samples",
+                    ),
+                    "top": Argument(
+                        "--profile-samples-top",
+                        action="store",
+                        type=int,
+                        help="number of hot spots to dump",
+                    ),
+                },
+                "caches": {
+                    "enabled": Argument(
+                        "--profile-caches",
+                        action="store_true",
+                        help="count hits and misses of the parse caches",
+                    ),
+                },
                 "output": {
                     "file": Argument(
                         "--profile-file",
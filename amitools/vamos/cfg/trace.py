@@ -10,6 +10,10 @@ class TraceParser(Parser):
                 "vamos_ram": False,
                 "reg_dump": False,
                 "labels": False,
+                "file": Value(str),
+                "size": 1048576,
+                "mmap": False,
+                "watch": ValueList(str),
             }
         }
         arg_cfg = {
@@ -44,6 +48,27 @@ class TraceParser(Parser):
                     action="store_true",
                     help="add memory labels for detailed infos",
                 ),
+                "file": Argument(
+                    "--trace-file",
+                    action="store",
+                    help="record the traces in a binary ring buffer file",
+                ),
+                "size": Argument(
+                    "--trace-size",
+                    action="store",
+                    type=int,
+                    help="number of events kept in the trace file",
+                ),
+                "mmap": Argument(
+                    "--trace-mmap",
+                    action="store_true",
+                    help="map the trace file into memory to keep it on a crash",
+                ),
+                "watch": Argument(
+                    "--watch",
+                    action="append",
+                    help="trace CPU accesses to memory range: addr[+size][/rw124]",
+                ),
             }
         }
         ini_trafo = {
@@ -53,6 +78,10 @@ class TraceParser(Parser):
                 "vamos_ram": "internal_memory_trace",
                 "reg_dump": "reg_dump",
                 "labels": "labels",
+                "file": "trace_file",
+                "size": "trace_size",
+                "mmap": "trace_mmap",
+                "watch": "mem_watch",
             }
         }
         Parser.__init__(
@@ -3,7 +3,7 @@ from amitools.vamos.cfg import *
 
 
 class VamosMainParser(MainParser):
-    def __init__(self, debug=None, *args, **kwargs):
+    def __init__(self, debug=None, *args, proc=True, **kwargs):
         MainParser.__init__(self, debug, *args, **kwargs)
         # log
         self.log = LogParser("vamos")
@@ -20,12 +20,18 @@ class VamosMainParser(MainParser):
         # machine
         self.machine = MachineParser("vamos")
         self.add_parser(self.machine)
-        # proc
-        self.proc = ProcessParser("vamos")
-        self.add_parser(self.proc)
+        # proc (not used in server mode)
+        if proc:
+            self.proc = ProcessParser("vamos")
+            self.add_parser(self.proc)
+        else:
+            self.proc = None
         # profile
         self.profile = ProfileParser()
         self.add_parser(self.profile)
+        # loader
+        self.loader = LoaderParser("vamos")
+        self.add_parser(self.loader)
 
     def get_log_dict(self):
         return self.log.get_cfg_dict()
@@ -43,7 +49,22 @@ class VamosMainParser(MainParser):
         return self.machine.get_cfg_dict()
 
     def get_proc_dict(self):
-        return self.proc.get_cfg_dict()
+        if self.proc:
+            return self.proc.get_cfg_dict()
+
+    def get_session_dicts(self):
+        """return the configs that define a session (all except log and proc)"""
+        return [
+            self.get_path_dict(),
+            self.get_libs_dict(),
+            self.get_trace_dict(),
+            self.get_machine_dict(),
+            self.get_profile_dict(),
+            self.get_loader_dict(),
+        ]
 
     def get_profile_dict(self):
         return self.profile.get_cfg_dict()
+
+    def get_loader_dict(self):
+        return self.loader.get_cfg_dict()
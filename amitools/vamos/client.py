@@ -0,0 +1,100 @@
+"""client side and wire protocol of the vamos fork server.
+
+Keep the imports of this module small: the client is meant to start fast.
+
+A request is a length prefixed JSON dict with the vamos args, the cwd and
+the environment of the client. The stdin, stdout and stderr file descriptors
+are passed along with the first message. The reply is the exit code or
+REPLY_REJECTED if the request has to be run without the server.
+"""
+
+import os
+import array
+import json
+import socket
+import struct
+
+DEFAULT_SOCKET = "~/.vamos/server.sock"
+SOCKET_ENV = "VAMOS_SERVER"
+# reply if the server can't run the request, e.g. due to a different config
+REPLY_REJECTED = -1
+
+_len_fmt = struct.Struct(">I")
+_ret_fmt = struct.Struct(">i")
+
+
+def get_socket_path(path=None):
+    """return the socket path: given, from environment or default"""
+    if not path:
+        path = os.environ.get(SOCKET_ENV, DEFAULT_SOCKET)
+    return os.path.abspath(os.path.expanduser(path))
+
+
+def _recv_all(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError("vamos server: connection closed")
+        data += chunk
+    return data
+
+
+def send_request(sock, args, cwd, env, fds):
+    payload = json.dumps({"args": list(args), "cwd": cwd, "env": dict(env)})
+    payload = payload.encode("utf-8")
+    msg = _len_fmt.pack(len(payload)) + payload
+    # the fds are transferred with the first bytes
+    fd_data = array.array("i", fds)
+    num = sock.sendmsg([msg[:1]], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fd_data)])
+    sock.sendall(msg[num:])
+
+
+def recv_request(sock):
+    """return (args, cwd, env, fds) of a request"""
+    fd_data = array.array("i")
+    first, ancdata, _, _ = sock.recvmsg(1, socket.CMSG_LEN(3 * fd_data.itemsize))
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fd_data.frombytes(data[: len(data) - (len(data) % fd_data.itemsize)])
+    fds = list(fd_data)
+    if not first:
+        raise EOFError("vamos server: connection closed")
+    head = first + _recv_all(sock, _len_fmt.size - 1)
+    (size,) = _len_fmt.unpack(head)
+    req = json.loads(_recv_all(sock, size).decode("utf-8"))
+    return req["args"], req["cwd"], req["env"], fds
+
+
+def send_reply(sock, exit_code):
+    sock.sendall(_ret_fmt.pack(exit_code))
+
+
+def recv_reply(sock):
+    (exit_code,) = _ret_fmt.unpack(_recv_all(sock, _ret_fmt.size))
+    return exit_code
+
+
+class VamosClient(object):
+    """run vamos commands in a vamos server"""
+
+    def __init__(self, socket_path=None):
+        self.socket_path = get_socket_path(socket_path)
+
+    def is_available(self):
+        return os.path.exists(self.socket_path)
+
+    def run(self, args, cwd=None, env=None, fds=(0, 1, 2)):
+        """run vamos with args in the server and return the exit code.
+
+        return REPLY_REJECTED if the server did not run the command.
+        raises OSError if the server can't be reached.
+        """
+        if cwd is None:
+            cwd = os.getcwd()
+        if env is None:
+            env = os.environ
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            send_request(sock, args, cwd, env, list(fds))
+            return recv_reply(sock)
@@ -1,86 +1,281 @@
 import logging
+from bisect import bisect_left, bisect_right
 from amitools.vamos.log import *
 
 
+class LabelBlock:
+    """a slice of the address sorted label index
+
+    All arrays are kept in parallel and sorted by start address. max_ends
+    holds the maximum end address of all labels up to the slot in this block.
+    """
+
+    __slots__ = ("addrs", "ends", "max_ends", "labels")
+
+    def __init__(self, addrs=None, ends=None, labels=None):
+        self.addrs = addrs or []
+        self.ends = ends or []
+        self.labels = labels or []
+        self.max_ends = list(self.ends)
+        self.update_max_ends(0, True)
+
+    def insert(self, pos, label):
+        end = label.end
+        max_ends = self.max_ends
+        if pos > 0 and max_ends[pos - 1] > end:
+            max_end = max_ends[pos - 1]
+        else:
+            max_end = end
+        self.addrs.insert(pos, label.addr)
+        self.ends.insert(pos, end)
+        self.labels.insert(pos, label)
+        max_ends.insert(pos, max_end)
+        # propagate new end to following slots
+        num = len(max_ends)
+        pos += 1
+        while pos < num and max_ends[pos] < end:
+            max_ends[pos] = end
+            pos += 1
+
+    def remove(self, pos):
+        del self.addrs[pos]
+        del self.ends[pos]
+        del self.labels[pos]
+        del self.max_ends[pos]
+        self.update_max_ends(pos)
+
+    def split(self):
+        half = len(self.addrs) // 2
+        other = LabelBlock(self.addrs[half:], self.ends[half:], self.labels[half:])
+        del self.addrs[half:]
+        del self.ends[half:]
+        del self.labels[half:]
+        del self.max_ends[half:]
+        return other
+
+    def update_max_ends(self, pos, full=False):
+        # recalc max ends from pos on until they match again
+        ends = self.ends
+        max_ends = self.max_ends
+        num = len(ends)
+        if pos > 0:
+            max_end = max_ends[pos - 1]
+        else:
+            max_end = None
+        while pos < num:
+            end = ends[pos]
+            if max_end is not None and max_end > end:
+                end = max_end
+            if not full and max_ends[pos] == end:
+                break
+            max_ends[pos] = end
+            max_end = end
+            pos += 1
+
+
 class LabelManager:
+    """keep all labels in an address sorted interval index
+
+    Labels are stored sorted by start address in blocks of bounded size,
+    so lookup, insert and remove are a bisect over the blocks and one inside
+    a block. To find the label covering an address with possibly nested
+    labels, the index keeps the maximum end address of all labels up to each
+    slot. A lookup walks back from the bisect position only as long as this
+    maximum still reaches beyond the address.
+
+    If labels overlap then the innermost one, i.e. the one with the highest
+    start address (and the latest added for equal starts), is returned.
+    """
+
+    block_size = 512
+
     def __init__(self):
-        self.first = None
-        self.last = None
+        self._blocks = []
+        # first addr of each block
+        self._mins = []
+        # max end of all labels up to and including each block
+        self._max_ends = []
+        self._num = 0
+        # called before labels are removed
+        self._remove_hooks = []
+
+    def add_remove_hook(self, func):
+        """call func() before labels are removed, e.g. to resolve addresses"""
+        self._remove_hooks.append(func)
+
+    def remove_remove_hook(self, func):
+        self._remove_hooks.remove(func)
+
+    def _call_remove_hooks(self):
+        for func in self._remove_hooks:
+            func()
 
-    # This is now all done manually with doubly linked
-    # lists. The reason for this is that the python built-in
-    # lists are ill-performing as the list grows larger,
-    # and this is a heavy-duty class.
     def add_label(self, range):
-        assert range.next == None
-        assert range.prev == None
-        if self.last == None:
-            assert self.first == None
-            self.last = range
-            self.first = range
+        addr = range.addr
+        blocks = self._blocks
+        if not blocks:
+            blocks.append(LabelBlock())
+            self._mins.append(addr)
+            self._max_ends.append(range.end)
+        b = bisect_right(self._mins, addr) - 1
+        if b < 0:
+            b = 0
+        blk = blocks[b]
+        pos = bisect_right(blk.addrs, addr)
+        blk.insert(pos, range)
+        if pos == 0:
+            self._mins[b] = addr
+        self._num += 1
+        if len(blk.addrs) > self.block_size * 2:
+            other = blk.split()
+            blocks.insert(b + 1, other)
+            self._mins.insert(b + 1, other.addrs[0])
+            self._max_ends.insert(b + 1, 0)
+            self._update_max_ends(b, True)
         else:
-            self.last.next = range
-            range.prev = self.last
-            self.last = range
+            self._update_max_ends(b)
 
     def remove_label(self, range):
-        if range.prev != None:
-            range.prev.next = range.next
-        if range.next != None:
-            range.next.prev = range.prev
-        if self.last == range:
-            self.last = range.prev
-        if self.first == range:
-            self.first = range.next
-        range.next = None
-        range.prev = None
+        loc = self._find_label(range)
+        if loc is None:
+            return
+        if self._remove_hooks:
+            self._call_remove_hooks()
+        b, pos = loc
+        blk = self._blocks[b]
+        blk.remove(pos)
+        self._num -= 1
+        if not blk.addrs:
+            del self._blocks[b]
+            del self._mins[b]
+            del self._max_ends[b]
+            self._update_max_ends(b, True)
+        else:
+            if pos == 0:
+                self._mins[b] = blk.addrs[0]
+            self._update_max_ends(b)
 
     def delete_labels_within(self, addr, size):
         # try to find compatible: release all labels within the given range
         # this is necessary because the label could be part of a puddle
         # that is released in one go.
-        r = self.first
-        while r != None:
-            if r.addr >= addr and r.addr + r.size <= addr + size:
-                s = r.next
-                self.remove_label(r)
-                r = s
+        end = addr + size
+        if self._remove_hooks:
+            self._call_remove_hooks()
+        blocks = self._blocks
+        mins = self._mins
+        # labels at addr may start in the block before the first min == addr
+        first = bisect_left(mins, addr) - 1
+        if first < 0:
+            first = 0
+        b = first
+        changed = False
+        while b < len(blocks) and mins[b] <= end:
+            blk = blocks[b]
+            lo = bisect_left(blk.addrs, addr)
+            hi = bisect_right(blk.addrs, end)
+            keep = [i for i in range(lo, hi) if blk.ends[i] > end]
+            if len(keep) != hi - lo:
+                changed = True
+                self._num -= hi - lo - len(keep)
+                blk.addrs[lo:hi] = [blk.addrs[i] for i in keep]
+                blk.ends[lo:hi] = [blk.ends[i] for i in keep]
+                blk.labels[lo:hi] = [blk.labels[i] for i in keep]
+                blk.max_ends[lo:hi] = [blk.max_ends[i] for i in keep]
+                blk.update_max_ends(lo, True)
+            if not blk.addrs:
+                del blocks[b]
+                del mins[b]
+                del self._max_ends[b]
             else:
-                r = r.next
+                mins[b] = blk.addrs[0]
+                b += 1
+        if changed:
+            self._update_max_ends(first, True)
 
     def get_all_labels(self):
-        ranges = []
-        r = self.first
-        while r != None:
-            ranges.append(r)
-            r = r.next
-        return ranges
+        result = []
+        for blk in self._blocks:
+            result += blk.labels
+        return result
+
+    def get_num_labels(self):
+        return self._num
+
+    def get_state(self):
+        """return the list of all labels for set_state()"""
+        return self.get_all_labels()
+
+    def set_state(self, labels):
+        """replace all labels with an address sorted label list"""
+        if self._remove_hooks:
+            self._call_remove_hooks()
+        self._blocks = []
+        self._mins = []
+        self._max_ends = []
+        self._num = len(labels)
+        size = self.block_size
+        for pos in range(0, len(labels), size):
+            part = labels[pos : pos + size]
+            blk = LabelBlock([l.addr for l in part], [l.end for l in part], list(part))
+            self._blocks.append(blk)
+            self._mins.append(blk.addrs[0])
+            self._max_ends.append(0)
+        self._update_max_ends(0, True)
 
     def dump(self):
-        r = self.first
-        while r != None:
+        for r in self.get_all_labels():
             print(r)
-            r = r.next
 
     # This is called quite often and hence
     # a bit speed critical. It finds the
     # range within which the given address
     # lies.
     def get_label(self, addr):
-        r = self.first
-        while r != None:
-            if r.addr <= addr and addr < r.end:
-                return r
-            r = r.next
+        b = bisect_right(self._mins, addr) - 1
+        if b < 0:
+            return None
+        blocks = self._blocks
+        max_ends = self._max_ends
+        blk = blocks[b]
+        pos = bisect_right(blk.addrs, addr) - 1
+        while max_ends[b] > addr:
+            ends = blk.ends
+            blk_max_ends = blk.max_ends
+            while pos >= 0 and blk_max_ends[pos] > addr:
+                if ends[pos] > addr:
+                    return blk.labels[pos]
+                pos -= 1
+            b -= 1
+            if b < 0:
+                break
+            blk = blocks[b]
+            pos = len(blk.addrs) - 1
         return None
 
     def get_intersecting_labels(self, addr, size):
+        end = addr + size
         result = []
-        r = self.first
-        while r != None:
-            if r.does_intersect(addr, size):
-                result.append(r)
-            r = r.next
+        b = bisect_right(self._mins, end) - 1
+        if b < 0:
+            return result
+        blocks = self._blocks
+        max_ends = self._max_ends
+        blk = blocks[b]
+        pos = bisect_right(blk.addrs, end) - 1
+        while max_ends[b] >= addr:
+            ends = blk.ends
+            blk_max_ends = blk.max_ends
+            while pos >= 0 and blk_max_ends[pos] >= addr:
+                if ends[pos] >= addr:
+                    result.append(blk.labels[pos])
+                pos -= 1
+            b -= 1
+            if b < 0:
+                break
+            blk = blocks[b]
+            pos = len(blk.addrs) - 1
+        result.reverse()
         return result
 
     def get_label_offset(self, addr):
@@ -90,3 +285,44 @@ class LabelManager:
         else:
             off = addr - r.addr
             return (r, off)
+
+    def _find_label(self, range):
+        addr = range.addr
+        blocks = self._blocks
+        b = bisect_left(self._mins, addr) - 1
+        if b < 0:
+            b = 0
+        while b < len(blocks):
+            blk = blocks[b]
+            addrs = blk.addrs
+            if addrs[0] > addr:
+                break
+            pos = bisect_left(addrs, addr)
+            num = len(addrs)
+            while pos < num and addrs[pos] == addr:
+                if blk.labels[pos] is range:
+                    return b, pos
+                pos += 1
+            if pos < num:
+                break
+            b += 1
+        return None
+
+    def _update_max_ends(self, b, full=False):
+        # recalc per block max ends until they match again
+        blocks = self._blocks
+        max_ends = self._max_ends
+        num = len(blocks)
+        if b > 0:
+            max_end = max_ends[b - 1]
+        else:
+            max_end = None
+        while b < num:
+            end = blocks[b].max_ends[-1]
+            if max_end is not None and max_end > end:
+                end = max_end
+            if not full and max_ends[b] == end:
+                break
+            max_ends[b] = end
+            max_end = end
+            b += 1
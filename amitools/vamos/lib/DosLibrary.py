@@ -1,11 +1,11 @@
 import time
 import ctypes
 import re
-import os
+import contextlib
 
 from amitools.vamos.machine.regs import *
 from amitools.vamos.libcore import LibImpl
-from amitools.vamos.astructs import AccessStruct
+from amitools.vamos.astructs import AccessStruct, StructCodec
 from amitools.vamos.libstructs import (
     DosLibraryStruct,
     DosInfoStruct,
@@ -24,6 +24,8 @@ from amitools.vamos.libstructs import (
     CLIStruct,
     DosPacketStruct,
     PathStruct,
+    ExAllControlStruct,
+    HookStruct,
 )
 from amitools.vamos.error import *
 from amitools.vamos.log import log_dos
@@ -57,6 +59,10 @@ class DosLibrary(LibImpl):
     GVF_LOCAL_ONLY = 0x200
     GVF_BINARY_VAR = 0x400
 
+    def __init__(self):
+        # host I/O is only timed once the lib is set up in a machine
+        self.host_io = contextlib.nullcontext()
+
     def get_struct_def(self):
         return DosLibraryStruct
 
@@ -68,6 +74,8 @@ class DosLibrary(LibImpl):
         self.io_err = 0
         self.mem_allocs = {}
         self.seg_lists = {}
+        # number of LoadSeg() calls that returned a shared resident seglist
+        self.seg_list_users = {}
         self.matches = {}
         self.rdargs = {}
         self.dos_objs = {}
@@ -95,6 +103,11 @@ class DosLibrary(LibImpl):
         self.file_mgr = FileManager(
             ctx.path_mgr, ctx.exec_lib.port_mgr, ctx.alloc, ctx.mem
         )
+        # charge file access to host I/O in the run metrics
+        metrics = ctx.machine.get_metrics()
+        metrics.add_counter("files", self.file_mgr.get_num_opened)
+        self.host_io = metrics.get_io_timer()
+        self.file_mgr.set_io_timer(self.host_io)
 
     def finish_lib(self, ctx):
         # finish file manager
@@ -118,6 +131,55 @@ class DosLibrary(LibImpl):
         # free DosInfo
         ctx.alloc.free_struct(self.dos_info)
 
+    def get_state(self):
+        return (
+            self.io_err,
+            dict(self.mem_allocs),
+            dict(self.seg_lists),
+            dict(self.seg_list_users),
+            dict(self.matches),
+            dict(self.rdargs),
+            dict(self.dos_objs),
+            dict(self.errstrings),
+            list(self.path),
+            list(self.resident),
+            dict(self.local_vars),
+            self.dos_list.get_state(),
+            self.lock_mgr.get_state(),
+            self.file_mgr.get_state(),
+        )
+
+    def set_state(self, state):
+        (
+            self.io_err,
+            mem_allocs,
+            seg_lists,
+            seg_list_users,
+            matches,
+            rdargs,
+            dos_objs,
+            errstrings,
+            path,
+            resident,
+            local_vars,
+            dos_list_state,
+            lock_state,
+            file_state,
+        ) = state
+        self.mem_allocs = dict(mem_allocs)
+        self.seg_lists = dict(seg_lists)
+        self.seg_list_users = dict(seg_list_users)
+        self.matches = dict(matches)
+        self.rdargs = dict(rdargs)
+        self.dos_objs = dict(dos_objs)
+        self.errstrings = dict(errstrings)
+        self.path = list(path)
+        self.resident = list(resident)
+        self.local_vars = dict(local_vars)
+        self.dos_list.set_state(dos_list_state)
+        self.lock_mgr.set_state(lock_state)
+        self.file_mgr.set_state(file_state)
+
     # helper
 
     def get_callee_pc(self, ctx):
@@ -132,7 +194,7 @@ class DosLibrary(LibImpl):
             errstring = dos_error_strings[self.io_err]
         else:
             errstring = "%d" % self.io_err
-        log_dos.info("IoErr: %d (%s)" % (self.io_err, errstring))
+        log_dos.info("IoErr: %d (%s)", self.io_err, errstring)
         return self.io_err
 
     def setioerr(self, ctx, err):
@@ -272,16 +334,17 @@ class DosLibrary(LibImpl):
         minutes = ds.r_s("ds_Minute")
         days = ds.r_s("ds_Days")
         seconds = ami_to_sys_time(AmiTime(days, minutes, ticks))
-        log_dos.info("SetFileDate: file=%s date=%d" % (name, seconds))
+        log_dos.info("SetFileDate: file=%s date=%d", name, seconds)
         sys_path = self.path_mgr.ami_to_sys_path(
             self.get_current_dir(ctx), name, searchMulti=True
         )
         if sys_path == None:
-            log_dos.info("file not found: '%s' -> '%s'" % (name, sys_path))
+            log_dos.info("file not found: '%s' -> '%s'", name, sys_path)
             self.setioerr(ctx, ERROR_OBJECT_NOT_FOUND)
             return self.DOSFALSE
         else:
-            os.utime(sys_path, (seconds, seconds))
+            with self.host_io:
+                self.path_mgr.get_backend(sys_path).utime(sys_path, (seconds, seconds))
             return self.DOSTRUE
 
     def SetComment(self, ctx):
@@ -396,15 +459,17 @@ class DosLibrary(LibImpl):
                         node.r_s("lv_Value"), buff_ptr, min(nodelen, size)
                     )
                     log_dos.info(
-                        'GetVar("%s", 0x%x) -> %0x06x'
-                        % (name, flags, node.r_s("lv_Value"))
+                        'GetVar("%s", 0x%x) -> %0x06x',
+                        name,
+                        flags,
+                        node.r_s("lv_Value"),
                     )
                     self.setioerr(ctx, nodelen)
                     return min(nodelen, size)
                 else:
                     value = ctx.mem.r_cstr(node.r_s("lv_Value"))
                     ctx.mem.w_cstr(buff_ptr, value[: size - 1])
-                    log_dos.info('GetVar("%s", 0x%x) -> %s' % (name, flags, value))
+                    log_dos.info('GetVar("%s", 0x%x) -> %s', name, flags, value)
                     self.setioerr(ctx, len(value))
                     return min(nodelen - 1, size - 1)
         return self.DOSFALSE
@@ -416,12 +481,10 @@ class DosLibrary(LibImpl):
         node = self.find_var(ctx, name, vtype)
         if node == None:
             self.setioerr(ctx, ERROR_OBJECT_NOT_FOUND)
-            log_dos.info('FindVar("%s", 0x%x) -> NULL' % (name, vtype))
+            log_dos.info('FindVar("%s", 0x%x) -> NULL', name, vtype)
             return 0
         else:
-            log_dos.info(
-                'FindVar("%s", 0x%x) -> %06lx' % (name, vtype, node.struct_addr)
-            )
+            log_dos.info('FindVar("%s", 0x%x) -> %06lx', name, vtype, node.struct_addr)
             return node.struct_addr
 
     def SetVar(self, ctx):
@@ -440,10 +503,10 @@ class DosLibrary(LibImpl):
         else:
             if flags & self.GVF_BINARY_VAR:
                 value = None
-                log_dos.info('SetVar("%s") to %0x6x' % (name, buff_ptr))
+                log_dos.info('SetVar("%s") to %0x6x', name, buff_ptr)
             else:
                 value = ctx.mem.r_cstr(buff_ptr)
-                log_dos.info('SetVar("%s") to %s' % (name, value))
+                log_dos.info('SetVar("%s") to %s', name, value)
                 size = len(value) + 1
             if not flags & self.GVF_GLOBAL_ONLY:
                 node = self.find_var(ctx, name, flags)
@@ -460,7 +523,7 @@ class DosLibrary(LibImpl):
         name = ctx.mem.r_cstr(name_ptr)
         if not flags & self.GVF_GLOBAL_ONLY:
             node = self.find_var(ctx, name, flags)
-            log_dos.info('DeleteVar("%s")' % name)
+            log_dos.info('DeleteVar("%s")', name)
             if node != None:
                 self.delete_var(ctx, node)
             return self.DOSTRUE
@@ -484,7 +547,7 @@ class DosLibrary(LibImpl):
             seg_addr = self.dos_info.access.r_s("di_NetHand")
         else:
             seg_addr = AccessStruct(ctx.mem, SegmentStruct, start).r_s("seg_Next")
-        log_dos.info("FindSegment(%s)" % needle)
+        log_dos.info("FindSegment(%s)", needle)
         while seg_addr != 0:
             segment = AccessStruct(ctx.mem, SegmentStruct, seg_addr)
             name_addr = seg_addr + SegmentStruct.sdef.seg_Name.offset
@@ -494,7 +557,7 @@ class DosLibrary(LibImpl):
                     not system and segment.r_s("seg_UC") > 0
                 ):
                     seg = segment.r_s("seg_Seg")
-                    log_dos.info("FindSegment(%s) -> %s" % (name, seg))
+                    log_dos.info("FindSegment(%s) -> %s", name, seg)
                     return seg_addr
             seg_addr = segment.r_s("seg_Next")
         return 0
@@ -513,7 +576,7 @@ class DosLibrary(LibImpl):
         segment.access.w_s("seg_Seg", seglist)
         ctx.mem.w_bstr(name_addr, name)
         self.dos_info.access.w_s("di_NetHand", seg_addr)
-        log_dos.info("AddSegment(%s,%06x) -> %06x" % (name, seglist, seg_addr))
+        log_dos.info("AddSegment(%s,%06x) -> %06x", name, seglist, seg_addr)
         self.resident.append(seg_addr)
         # Adding a resident command to the registered seglists.
         b_addr = seglist >> 2
@@ -525,23 +588,23 @@ class DosLibrary(LibImpl):
 
     def Cli(self, ctx):
         cli_addr = ctx.process.get_cli_struct()
-        log_dos.info("Cli() -> %06x" % cli_addr)
+        log_dos.info("Cli() -> %06x", cli_addr)
         return cli_addr
 
     def Input(self, ctx):
         inp_bptr = ctx.process.this_task.access.r_s("pr_CIS") >> 2
-        log_dos.info("Input() -> b%06x" % inp_bptr)
+        log_dos.info("Input() -> b%06x", inp_bptr)
         return inp_bptr
 
     def Output(self, ctx):
         out_bptr = ctx.process.this_task.access.r_s("pr_COS") >> 2
-        log_dos.info("Output() -> b%06x" % out_bptr)
+        log_dos.info("Output() -> b%06x", out_bptr)
         return out_bptr
 
     def SelectInput(self, ctx):
         fh_b_addr = ctx.cpu.r_reg(REG_D1)
         fh = self.file_mgr.get_by_b_addr(fh_b_addr)
-        log_dos.info("SelectInput(fh=%s)" % fh)
+        log_dos.info("SelectInput(fh=%s)", fh)
         cur_in = self.Input(ctx)
         ctx.process.set_input(fh)
         return cur_in
@@ -549,7 +612,7 @@ class DosLibrary(LibImpl):
     def SelectOutput(self, ctx):
         fh_b_addr = ctx.cpu.r_reg(REG_D1)
         fh = self.file_mgr.get_by_b_addr(fh_b_addr)
-        log_dos.info("SelectOutput(fh=%s)" % fh)
+        log_dos.info("SelectOutput(fh=%s)", fh)
         cur_out = self.Output(ctx)
         ctx.process.set_output(fh)
         return cur_out
@@ -574,9 +637,10 @@ class DosLibrary(LibImpl):
             log_dos.warning("open: invalid mode=%d!", mode)
             f_mode = "wb+"
 
-        fh = self.file_mgr.open(self.get_current_dir(ctx), name, f_mode)
+        with self.host_io:
+            fh = self.file_mgr.open(self.get_current_dir(ctx), name, f_mode)
         log_dos.info(
-            "Open: name='%s' (%s/%d/%s) -> %s" % (name, mode_name, mode, f_mode, fh)
+            "Open: name='%s' (%s/%d/%s) -> %s", name, mode_name, mode, f_mode, fh
         )
 
         if fh == None:
@@ -589,8 +653,9 @@ class DosLibrary(LibImpl):
         fh_b_addr = ctx.cpu.r_reg(REG_D1)
         if fh_b_addr != 0:
             fh = self.file_mgr.get_by_b_addr(fh_b_addr)
-            self.file_mgr.close(fh)
-            log_dos.info("Close: %s" % fh)
+            with self.host_io:
+                self.file_mgr.close(fh)
+            log_dos.info("Close: %s", fh)
             self.setioerr(ctx, 0)
         return self.DOSTRUE
 
@@ -600,10 +665,11 @@ class DosLibrary(LibImpl):
         size = ctx.cpu.r_reg(REG_D3)
 
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
-        data = fh.read(size)
-        ctx.mem.w_block(buf_ptr, data)
-        got = len(data)
-        log_dos.info("Read(%s, %06x, %d) -> %d" % (fh, buf_ptr, size, got))
+        # transfer directly into RAM if possible
+        mem_io = ctx.machine.get_mem_io()
+        with self.host_io:
+            got = mem_io.read_into(buf_ptr, size, fh.readinto, fh.read)
+        log_dos.info("Read(%s, %06x, %d) -> %d", fh, buf_ptr, size, got)
         return got
 
     def Write(self, ctx):
@@ -612,10 +678,11 @@ class DosLibrary(LibImpl):
         size = ctx.cpu.r_reg(REG_D3)
 
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
-        data = ctx.mem.r_block(buf_ptr, size)
-        fh.write(data)
+        data = ctx.machine.get_mem_io().read_block(buf_ptr, size)
+        with self.host_io:
+            fh.write(data)
         got = len(data)
-        log_dos.info("Write(%s, %06x, %d) -> %d" % (fh, buf_ptr, size, got))
+        log_dos.info("Write(%s, %06x, %d) -> %d", fh, buf_ptr, size, got)
         return size
 
     def FWrite(self, ctx):
@@ -623,15 +690,12 @@ class DosLibrary(LibImpl):
         buf_ptr = ctx.cpu.r_reg(REG_D2)
         size = ctx.cpu.r_reg(REG_D3)
         number = ctx.cpu.r_reg(REG_D4)
-        # Actually, this is buffered I/O, not unbuffered IO. For the
-        # time being, keep it unbuffered.
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
-        data = ctx.mem.r_block(buf_ptr, size * number)
-        fh.write(data)
+        data = ctx.machine.get_mem_io().read_block(buf_ptr, size * number)
+        with self.host_io:
+            fh.fwrite(data)
         got = len(data) // size
-        log_dos.info(
-            "FWrite(%s, %06x, %d, %d) -> %d" % (fh, buf_ptr, size, number, got)
-        )
+        log_dos.info("FWrite(%s, %06x, %d, %d) -> %d", fh, buf_ptr, size, number, got)
         return got
 
     def FRead(self, ctx):
@@ -639,17 +703,15 @@ class DosLibrary(LibImpl):
         buf_ptr = ctx.cpu.r_reg(REG_D2)
         size = ctx.cpu.r_reg(REG_D3)
         number = ctx.cpu.r_reg(REG_D4)
-        # Again, this is actually buffered I/O and I should really
-        # go through all the buffer logic. However, for the time
-        # being, keep it unbuffered.
-        fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
-        data = fh.read(size * number)
-        if data == -1:
+        fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
+        mem_io = ctx.machine.get_mem_io()
+        with self.host_io:
+            num = mem_io.read_into(buf_ptr, size * number, fh.freadinto, fh.fread)
+        if num == -1:
             got = 0  # simple error handling
         else:
-            got = len(data) // size
-            ctx.mem.w_block(buf_ptr, data)
-        log_dos.info("FRead(%s, %06x, %d, %d) -> %d" % (fh, buf_ptr, size, number, got))
+            got = num // size
+        log_dos.info("FRead(%s, %06x, %d, %d) -> %d", fh, buf_ptr, size, number, got)
         return got
 
     def Seek(self, ctx):
@@ -674,11 +736,10 @@ class DosLibrary(LibImpl):
         else:
             raise UnsupportedFeatureError("Seek: mode=%d" % mode)
 
-        old_pos = fh.tell()
-        new_pos = fh.seek(pos, whence)
-        log_dos.info(
-            "Seek(%s, %06x, %s) -> old_pos=%06x" % (fh, pos, mode_str, old_pos)
-        )
+        with self.host_io:
+            old_pos = fh.tell()
+            new_pos = fh.seek(pos, whence)
+        log_dos.info("Seek(%s, %06x, %s) -> old_pos=%06x", fh, pos, mode_str, old_pos)
         if new_pos == -1:
             self.setioerr(ctx, ERROR_SEEK_ERROR)
         else:
@@ -690,17 +751,17 @@ class DosLibrary(LibImpl):
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
         ch = fh.getc()
         if ch == -1:
-            log_dos.info("FGetC(%s) -> EOF (%d)" % (fh, ch))
+            log_dos.info("FGetC(%s) -> EOF (%d)", fh, ch)
         else:
-            log_dos.info("FGetC(%s) -> '%c' (%d)" % (fh, ch, ch))
+            log_dos.info("FGetC(%s) -> '%c' (%d)", fh, ch, ch)
         return ch
 
     def FPutC(self, ctx):
         fh_b_addr = ctx.cpu.r_reg(REG_D1)
         val = ctx.cpu.r_reg(REG_D2)
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
-        log_dos.info("FPutC(%s, '%c' (%d))" % (fh, val, val))
-        fh.write(bytes((val,)))
+        log_dos.info("FPutC(%s, '%c' (%d))", fh, val, val)
+        fh.fwrite(bytes((val,)))
         return val
 
     def FPuts(self, ctx):
@@ -709,8 +770,8 @@ class DosLibrary(LibImpl):
         str_dat = ctx.mem.r_cbytes(str_ptr)
         # write to stdout
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
-        ok = fh.write(str_dat)
-        log_dos.info("FPuts(%s,'%s')" % (fh, str_dat))
+        ok = fh.fwrite(str_dat)
+        log_dos.info("FPuts(%s,'%s')", fh, str_dat)
         return 0  # ok
 
     def UnGetC(self, ctx):
@@ -718,7 +779,7 @@ class DosLibrary(LibImpl):
         val = ctx.cpu.r_reg(REG_D2)
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
         ch = fh.ungetc(val)
-        log_dos.info("UnGetC(%s, %d) -> ch=%d (%d)" % (fh, val, ch, ch))
+        log_dos.info("UnGetC(%s, %d) -> ch=%d (%d)", fh, val, ch, ch)
         return ch
 
     # ----- StdOut -----
@@ -728,30 +789,46 @@ class DosLibrary(LibImpl):
         str_dat = ctx.mem.r_cbytes(str_ptr)
         # write to stdout
         fh = ctx.process.get_output()
-        ok = fh.write(str_dat)
+        ok = fh.fwrite(str_dat)
         log_dos.info("PutStr: '%s'", str_dat)
         return 0  # ok
 
     def Flush(self, ctx):
         fh_b_addr = ctx.cpu.r_reg(REG_D1)
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
-        fh.flush()
+        with self.host_io:
+            fh.flush()
         return -1
 
+    def SetVBuf(self, ctx):
+        fh_b_addr = ctx.cpu.r_reg(REG_D1)
+        buf_type = ctx.cpu.r_reg(REG_D3)
+        size = ctx.cpu.r_reg(REG_D4)
+        if size >= 0x80000000:
+            size = 0
+        # the buffer is kept on the host side. a given buffer is ignored
+        fh = self.file_mgr.get_by_b_addr(fh_b_addr)
+        ok = fh.setvbuf(buf_type, size)
+        log_dos.info("SetVBuf(%s, type=%d, size=%d) -> %s", fh, buf_type, size, ok)
+        if not ok:
+            self.setioerr(ctx, ERROR_BAD_NUMBER)
+            return ERROR_BAD_NUMBER
+        return 0
+
     def VPrintf(self, ctx):
         format_ptr = ctx.cpu.r_reg(REG_D1)
         argv_ptr = ctx.cpu.r_reg(REG_D2)
         fmt = ctx.mem.r_cstr(format_ptr)
         # write on output
         fh = ctx.process.get_output()
-        log_dos.info("VPrintf: format='%s' argv=%06x" % (fmt, argv_ptr))
+        log_dos.info("VPrintf: format='%s' argv=%06x", fmt, argv_ptr)
         # now decode printf
         ps = Printf.printf_parse_string(fmt)
         Printf.printf_read_data(ps, ctx.mem, argv_ptr)
         log_dos.debug("VPrintf: parsed format: %s", ps)
         result = Printf.printf_generate_output(ps)
         # write result
-        fh.write(result.encode("latin-1"))
+        fh.fwrite(result.encode("latin-1"))
         return len(result)
 
     def VFPrintf(self, ctx):
@@ -761,14 +838,14 @@ class DosLibrary(LibImpl):
         argv_ptr = ctx.cpu.r_reg(REG_D3)
         fmt = ctx.mem.r_cstr(format_ptr)
         # write on output
-        log_dos.info("VFPrintf: format='%s' argv=%06x" % (fmt, argv_ptr))
+        log_dos.info("VFPrintf: format='%s' argv=%06x", fmt, argv_ptr)
         # now decode printf
         ps = Printf.printf_parse_string(fmt)
         Printf.printf_read_data(ps, ctx.mem, argv_ptr)
         log_dos.debug("VFPrintf: parsed format: %s", ps)
         result = Printf.printf_generate_output(ps)
         # write result
-        fh.write(result.encode("latin-1"))
+        fh.fwrite(result.encode("latin-1"))
         return len(result)
 
     def WriteChars(self, ctx):
@@ -776,7 +853,7 @@ class DosLibrary(LibImpl):
         buf_addr = ctx.cpu.r_reg(REG_D1)
         siz = ctx.cpu.r_reg(REG_D2)
         buf = ctx.mem.r_cbytes(buf_addr)[:siz]
-        fh.write(buf)
+        fh.fwrite(buf)
         return len(buf)
 
     def VFWritef(self, ctx):
@@ -785,7 +862,7 @@ class DosLibrary(LibImpl):
         fmt_ptr = ctx.cpu.r_reg(REG_D2)
         args_ptr = ctx.cpu.r_reg(REG_D3)
         fmt = ctx.mem.r_cstr(fmt_ptr)
-        log_dos.info("VFWritef: fh=%s format='%s' args_ptr=%06x" % (fh, fmt, args_ptr))
+        log_dos.info("VFWritef: fh=%s format='%s' args_ptr=%06x", fh, fmt, args_ptr)
         out = ""
         pos = 0
         state = ""
@@ -840,7 +917,7 @@ class DosLibrary(LibImpl):
                 else:
                     out = out + ch
         data = out.encode("latin-1")
-        fh.write(data)
+        fh.fwrite(data)
         return len(data)
 
     # ----- Stdin --------
@@ -860,7 +937,7 @@ class DosLibrary(LibImpl):
         line = fh.gets(buflen)
         # Bummer! FIXME: There is currently no way this can communicate an I/O error
         self.setioerr(ctx, 0)
-        log_dos.info("FGetS(%s,%d) -> '%s'" % (fh, buflen, line))
+        log_dos.info("FGetS(%s,%d) -> '%s'", fh, buflen, line)
         ctx.mem.w_cstr(bufaddr, line)
         if line == "":
             return 0
@@ -871,8 +948,10 @@ class DosLibrary(LibImpl):
     def DeleteFile(self, ctx):
         name_ptr = ctx.cpu.r_reg(REG_D1)
         name = ctx.mem.r_cstr(name_ptr)
-        self.setioerr(ctx, self.file_mgr.delete(self.get_current_dir(ctx), name))
-        log_dos.info("DeleteFile: '%s': err=%s" % (name, self.io_err))
+        with self.host_io:
+            err = self.file_mgr.delete(self.get_current_dir(ctx), name)
+        self.setioerr(ctx, err)
+        log_dos.info("DeleteFile: '%s': err=%s", name, self.io_err)
         if self.io_err == NO_ERROR:
             return self.DOSTRUE
         else:
@@ -884,8 +963,10 @@ class DosLibrary(LibImpl):
         new_name_ptr = ctx.cpu.r_reg(REG_D2)
         new_name = ctx.mem.r_cstr(new_name_ptr)
         lock = self.get_current_dir(ctx)
-        self.setioerr(ctx, self.file_mgr.rename(lock, old_name, new_name))
-        log_dos.info("Rename: '%s' -> '%s': err=%s" % (old_name, new_name, self.io_err))
+        with self.host_io:
+            err = self.file_mgr.rename(lock, old_name, new_name)
+        self.setioerr(ctx, err)
+        log_dos.info("Rename: '%s' -> '%s': err=%s", old_name, new_name, self.io_err)
         if self.io_err == NO_ERROR:
             return self.DOSTRUE
         else:
@@ -896,7 +977,9 @@ class DosLibrary(LibImpl):
         name = ctx.mem.r_cstr(name_ptr)
         mask = ctx.cpu.r_reg(REG_D2)
         lock = self.get_current_dir(ctx)
-        self.setioerr(ctx, self.file_mgr.set_protection(lock, name, mask))
+        with self.host_io:
+            err = self.file_mgr.set_protection(lock, name, mask)
+        self.setioerr(ctx, err)
         log_dos.info("SetProtection: '%s' mask=%04x: err=%s", name, mask, self.io_err)
         if self.io_err == NO_ERROR:
             return self.DOSTRUE
@@ -905,12 +988,12 @@ class DosLibrary(LibImpl):
 
     def IsInteractive(self, ctx):
         fh_b_addr = ctx.cpu.r_reg(REG_D1)
-        log_dos.info("IsInteractive: @%06x" % fh_b_addr)
+        log_dos.info("IsInteractive: @%06x", fh_b_addr)
         if fh_b_addr == 0:
             return self.DOSFALSE
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
         res = fh.is_interactive()
-        log_dos.info("IsInteractive(%s): %s" % (fh, res))
+        log_dos.info("IsInteractive(%s): %s", fh, res)
         if res:
             return self.DOSTRUE
         else:
@@ -919,10 +1002,10 @@ class DosLibrary(LibImpl):
     def IsFileSystem(self, ctx):
         name_ptr = ctx.cpu.r_reg(REG_D1)
         name = ctx.mem.r_cstr(name_ptr)
-        log_dos.info("IsFileSystem('%s'):" % name)
+        log_dos.info("IsFileSystem('%s'):", name)
         lock = self.get_current_dir(ctx)
         res = self.file_mgr.is_file_system(lock, name)
-        log_dos.info("IsFileSystem('%s'): %s" % (name, res))
+        log_dos.info("IsFileSystem('%s'): %s", name, res)
         if res:
             return self.DOSTRUE
         else:
@@ -942,12 +1025,16 @@ class DosLibrary(LibImpl):
         else:
             raise UnsupportedFeatureError("Lock: mode=%x" % mode)
 
-        lock = self.lock_mgr.create_lock(
-            self.get_current_dir(ctx), name, lock_exclusive
-        )
+        with self.host_io:
+            lock = self.lock_mgr.create_lock(
+                self.get_current_dir(ctx), name, lock_exclusive
+            )
         log_dos.info(
-            "Lock: (%s) '%s' exc=%s -> %s"
-            % (self.get_current_dir(ctx), name, lock_exclusive, lock)
+            "Lock: (%s) '%s' exc=%s -> %s",
+            self.get_current_dir(ctx),
+            name,
+            lock_exclusive,
+            lock,
         )
         if lock == None:
             self.setioerr(ctx, ERROR_OBJECT_NOT_FOUND)
@@ -961,7 +1048,7 @@ class DosLibrary(LibImpl):
             log_dos.info("UnLock: NULL")
         else:
             lock = self.lock_mgr.get_by_b_addr(lock_b_addr)
-            log_dos.info("UnLock: %s" % (lock))
+            log_dos.info("UnLock: %s", lock)
             self.lock_mgr.release_lock(lock)
 
     def DupLock(self, ctx):
@@ -988,11 +1075,13 @@ class DosLibrary(LibImpl):
         fib_ptr = ctx.cpu.r_reg(REG_D2)
 
         lock = self.lock_mgr.get_by_b_addr(lock_b_addr)
-        fib = AccessStruct(ctx.mem, FileInfoBlockStruct, struct_addr=fib_ptr)
-        err = lock.examine_lock(fib)
-        name_addr = fib.s_get_addr("fib_FileName")
-        name = ctx.mem.r_cstr(name_addr)
-        log_dos.info("Examine: %s fib=%06x(%s) -> %s" % (lock, fib_ptr, name, err))
+        fib_codec = StructCodec.for_struct(FileInfoBlockStruct)
+        fib = fib_codec.read(ctx.mem, fib_ptr)
+        with self.host_io:
+            err = lock.examine_lock(fib)
+        fib_codec.write(ctx.mem, fib_ptr, fib)
+        name = fib.fib_FileName.split(b"\0", 1)[0].decode("latin-1")
+        log_dos.info("Examine: %s fib=%06x(%s) -> %s", lock, fib_ptr, name, err)
         self.setioerr(ctx, err)
         if err == NO_ERROR:
             return self.DOSTRUE
@@ -1004,23 +1093,31 @@ class DosLibrary(LibImpl):
         fib_ptr = ctx.cpu.r_reg(REG_D2)
 
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
-        lock = self.lock_mgr.create_lock(self.get_current_dir(ctx), fh.ami_path, False)
+        with self.host_io:
+            lock = self.lock_mgr.create_lock(
+                self.get_current_dir(ctx), fh.ami_path, False
+            )
         log_dos.info(
-            "Lock: (%s) '%s' exc=%s -> %s"
-            % (self.get_current_dir(ctx), fh.ami_path, False, lock)
+            "Lock: (%s) '%s' exc=%s -> %s",
+            self.get_current_dir(ctx),
+            fh.ami_path,
+            False,
+            lock,
         )
         if lock == None:
             self.setioerr(ctx, ERROR_OBJECT_NOT_FOUND)
             return self.DOSFALSE
 
-        fib = AccessStruct(ctx.mem, FileInfoBlockStruct, struct_addr=fib_ptr)
-        err = lock.examine_lock(fib)
-        name_addr = fib.s_get_addr("fib_FileName")
-        name = ctx.mem.r_cstr(name_addr)
-        log_dos.info("ExamineFH: %s fib=%06x(%s) -> %s" % (fh, fib_ptr, name, err))
+        fib_codec = StructCodec.for_struct(FileInfoBlockStruct)
+        fib = fib_codec.read(ctx.mem, fib_ptr)
+        with self.host_io:
+            err = lock.examine_lock(fib)
+        fib_codec.write(ctx.mem, fib_ptr, fib)
+        name = fib.fib_FileName.split(b"\0", 1)[0].decode("latin-1")
+        log_dos.info("ExamineFH: %s fib=%06x(%s) -> %s", fh, fib_ptr, name, err)
         self.setioerr(ctx, err)
 
-        log_dos.info("UnLock: %s" % (lock))
+        log_dos.info("UnLock: %s", lock)
         self.lock_mgr.release_lock(lock)
         if err == NO_ERROR:
             return self.DOSTRUE
@@ -1043,21 +1140,23 @@ class DosLibrary(LibImpl):
             info.w_s("id_DiskType", 0x444F5303)  # international FFS
             info.w_s("id_VolumeNode", vol)
             info.w_s("id_InUse", 0)
-            log_dos.info("Info: %s info=%06x -> true" % (lock, info_ptr))
+            log_dos.info("Info: %s info=%06x -> true", lock, info_ptr)
             return self.DOSTRUE
         else:
-            log_dos.info("Info: %s info=%06x -> false" % (lock, info_ptr))
+            log_dos.info("Info: %s info=%06x -> false", lock, info_ptr)
             return self.DOSFALSE
 
     def ExNext(self, ctx):
         lock_b_addr = ctx.cpu.r_reg(REG_D1)
         fib_ptr = ctx.cpu.r_reg(REG_D2)
         lock = self.lock_mgr.get_by_b_addr(lock_b_addr)
-        fib = AccessStruct(ctx.mem, FileInfoBlockStruct, struct_addr=fib_ptr)
-        err = lock.examine_next(fib)
-        name_addr = fib.s_get_addr("fib_FileName")
-        name = ctx.mem.r_cstr(name_addr)
-        log_dos.info("ExNext: %s fib=%06x (%s) -> %s" % (lock, fib_ptr, name, err))
+        fib_codec = StructCodec.for_struct(FileInfoBlockStruct)
+        fib = fib_codec.read(ctx.mem, fib_ptr)
+        with self.host_io:
+            err = lock.examine_next(fib)
+        fib_codec.write(ctx.mem, fib_ptr, fib)
+        name = fib.fib_FileName.split(b"\0", 1)[0].decode("latin-1")
+        log_dos.info("ExNext: %s fib=%06x (%s) -> %s", lock, fib_ptr, name, err)
         self.setioerr(ctx, err)
         if err == NO_ERROR:
             self.setioerr(ctx, 0)
@@ -1066,11 +1165,86 @@ class DosLibrary(LibImpl):
             self.setioerr(ctx, err)
             return self.DOSFALSE
 
+    def ExAll(self, ctx):
+        lock_b_addr = ctx.cpu.r_reg(REG_D1)
+        buf_ptr = ctx.cpu.r_reg(REG_D2)
+        buf_size = ctx.cpu.r_reg(REG_D3)
+        data_type = ctx.cpu.r_reg(REG_D4)
+        eac_ptr = ctx.cpu.r_reg(REG_D5)
+        lock = self.lock_mgr.get_by_b_addr(lock_b_addr)
+        eac = AccessStruct(ctx.mem, ExAllControlStruct, struct_addr=eac_ptr)
+        last_key = eac.r_s("eac_LastKey")
+        match = self._get_exall_match(ctx, eac, data_type)
+        # the code of a match hook still counts as CPU time
+        with self.host_io:
+            err, num, last_key = lock.examine_all(
+                ctx.mem, buf_ptr, buf_size, data_type, last_key, match
+            )
+        eac.w_s("eac_Entries", num)
+        eac.w_s("eac_LastKey", last_key)
+        log_dos.info(
+            "ExAll: %s buf=%06x size=%d type=%d eac=%06x -> entries=%d %s",
+            lock,
+            buf_ptr,
+            buf_size,
+            data_type,
+            eac_ptr,
+            num,
+            dos_error_strings.get(err, err),
+        )
+        if err == NO_ERROR:
+            self.setioerr(ctx, 0)
+            return self.DOSTRUE
+        else:
+            self.setioerr(ctx, err)
+            return self.DOSFALSE
+
+    def _get_exall_match(self, ctx, eac, data_type):
+        """return match function for the pattern and hook of an ExAllControl"""
+        pattern = None
+        pat_ptr = eac.r_s("eac_MatchString")
+        if pat_ptr != 0:
+            pattern = Pattern(None, ctx.mem.r_cstr(pat_ptr), True, True)
+        hook_ptr = eac.r_s("eac_MatchFunc")
+        if pattern is None and hook_ptr == 0:
+            return None
+
+        def match(name, ed_addr):
+            if pattern and not pattern_match(pattern, name):
+                return False
+            if hook_ptr:
+                return self._call_exall_hook(ctx, hook_ptr, ed_addr, data_type)
+            return True
+
+        return match
+
+    def _call_exall_hook(self, ctx, hook_ptr, ed_addr, data_type):
+        # hook gets the ExAllData in a1 and a pointer to the data type in a2
+        entry = ctx.mem.r32(hook_ptr + HookStruct.sdef.h_Entry.offset)
+        type_mem = ctx.alloc.alloc_memory(4, "ExAllType")
+        ctx.mem.w32(type_mem.addr, data_type)
+        set_regs = {REG_A0: hook_ptr, REG_A1: ed_addr, REG_A2: type_mem.addr}
+        rs = ctx.machine.run(
+            entry, set_regs=set_regs, get_regs=[REG_D0], name="ExAllMatch"
+        )
+        ctx.alloc.free_memory(type_mem)
+        return rs.regs[REG_D0] != 0
+
+    def ExAllEnd(self, ctx):
+        lock_b_addr = ctx.cpu.r_reg(REG_D1)
+        eac_ptr = ctx.cpu.r_reg(REG_D5)
+        lock = self.lock_mgr.get_by_b_addr(lock_b_addr)
+        lock.examine_all_end()
+        if eac_ptr != 0:
+            eac = AccessStruct(ctx.mem, ExAllControlStruct, struct_addr=eac_ptr)
+            eac.w_s("eac_LastKey", 0)
+        log_dos.info("ExAllEnd: %s eac=%06x", lock, eac_ptr)
+
     def ParentDir(self, ctx):
         lock_b_addr = ctx.cpu.r_reg(REG_D1)
         lock = self.lock_mgr.get_by_b_addr(lock_b_addr)
         parent_lock = self.lock_mgr.create_parent_lock(lock)
-        log_dos.info("ParentDir: %s -> %s" % (lock, parent_lock))
+        log_dos.info("ParentDir: %s -> %s", lock, parent_lock)
         if parent_lock != None:
             return parent_lock.b_addr
         else:
@@ -1080,7 +1254,7 @@ class DosLibrary(LibImpl):
         lock_b_addr = ctx.cpu.r_reg(REG_D1)
         old_lock = self.get_current_dir(ctx)
         new_lock = self.lock_mgr.get_by_b_addr(lock_b_addr)
-        log_dos.info("CurrentDir(b@%x): %s -> %s" % (lock_b_addr, old_lock, new_lock))
+        log_dos.info("CurrentDir(b@%x): %s -> %s", lock_b_addr, old_lock, new_lock)
         if new_lock == None:
             ctx.process.set_current_dir(0)
         else:
@@ -1112,13 +1286,15 @@ class DosLibrary(LibImpl):
         name_ptr = ctx.cpu.r_reg(REG_D1)
         name = ctx.mem.r_cstr(name_ptr)
         lock = self.get_current_dir(ctx)
-        err = self.file_mgr.create_dir(lock, name)
+        with self.host_io:
+            err = self.file_mgr.create_dir(lock, name)
         if err != NO_ERROR:
             self.setioerr(ctx, err)
             return 0
         else:
-            lock = self.lock_mgr.create_lock(lock, name, True)
-            log_dos.info("CreateDir: '%s' -> %s" % (name, lock))
+            with self.host_io:
+                lock = self.lock_mgr.create_lock(lock, name, True)
+            log_dos.info("CreateDir: '%s' -> %s", name, lock)
         if lock == None:
             self.setioerr(ctx, ERROR_OBJECT_NOT_FOUND)
             return 0
@@ -1135,7 +1311,7 @@ class DosLibrary(LibImpl):
         #
         # First filter out "real" devices.
         if uname.startswith("NIL:") or uname == "*" or uname.startswith("CONSOLE:"):
-            log_dos.info("GetDeviceProc: %s -> None" % name)
+            log_dos.info("GetDeviceProc: %s -> None", name)
             vol_lock = 0
         else:
             # Otherwise, create a lock for the path
@@ -1186,14 +1362,18 @@ class DosLibrary(LibImpl):
             ctx.path_mgr, self.lock_mgr, self.get_current_dir(ctx), pat, anchor
         )
         log_dos.info(
-            "MatchFirst: pat='%s' anchor=%06x strlen=%d flags=%02x-> ok=%s"
-            % (pat, anchor_ptr, mfn.str_len, mfn.flags, mfn.ok)
+            "MatchFirst: pat='%s' anchor=%06x strlen=%d flags=%02x-> ok=%s",
+            pat,
+            anchor_ptr,
+            mfn.str_len,
+            mfn.flags,
+            mfn.ok,
         )
         if not mfn.ok:
             self.matches[anchor_ptr] = mfn
             self.setioerr(ctx, ERROR_BAD_TEMPLATE)
             return self.io_err
-        log_dos.debug("MatchFirst: %s" % mfn.matcher)
+        log_dos.debug("MatchFirst: %s", mfn.matcher)
 
         # try first match
         err = mfn.first(ctx)
@@ -1219,7 +1399,7 @@ class DosLibrary(LibImpl):
 
     def MatchNext(self, ctx):
         anchor_ptr = ctx.cpu.r_reg(REG_D1)
-        log_dos.info("MatchNext: anchor=%06x" % (anchor_ptr))
+        log_dos.info("MatchNext: anchor=%06x", anchor_ptr)
         # retrieve match
         if anchor_ptr not in self.matches:
             raise VamosInternalError(
@@ -1245,7 +1425,7 @@ class DosLibrary(LibImpl):
 
     def MatchEnd(self, ctx):
         anchor_ptr = ctx.cpu.r_reg(REG_D1)
-        log_dos.info("MatchEnd: anchor=%06x " % (anchor_ptr))
+        log_dos.info("MatchEnd: anchor=%06x ", anchor_ptr)
         # retrieve match
         if anchor_ptr not in self.matches:
             raise VamosInternalError("MatchEnd: No matcher found for %06x" % anchor_ptr)
@@ -1319,7 +1499,7 @@ class DosLibrary(LibImpl):
         template = ctx.mem.r_cstr(template_ptr)
         keyword = ctx.mem.r_cstr(keyword_ptr)
         # parse template
-        tal = TemplateArgList.parse_string(template)
+        tal = template_parse(template)
         if tal is None:
             # template parse error
             log_dos.warning("FindArgs: invalid template=%s", template)
@@ -1348,7 +1528,7 @@ class DosLibrary(LibImpl):
             array_ptr,
             rdargs_ptr,
         )
-        tal = TemplateArgList.parse_string(template)
+        tal = template_parse(template)
         log_dos.info("ReadArgs: tal=%s", tal)
         if tal is None:
             log_dos.warning("ReadArgs: bad template '%s'", template)
@@ -1457,7 +1637,7 @@ class DosLibrary(LibImpl):
 
     def FreeArgs(self, ctx):
         rdargs_ptr = ctx.cpu.r_reg(REG_D1)
-        log_dos.info("FreeArgs: %06x" % rdargs_ptr)
+        log_dos.info("FreeArgs: %06x", rdargs_ptr)
         # find rdargs
         if rdargs_ptr not in self.rdargs:
             raise VamosInternalError("Can't find RDArgs: %06x" % rdargs_ptr)
@@ -1476,8 +1656,10 @@ class DosLibrary(LibImpl):
         maxchars = ctx.cpu.r_reg(REG_D2)
         csrc_ptr = ctx.cpu.r_reg(REG_D3)
         log_dos.info(
-            "ReadItem: buff_ptr=%06x maxchars=%d csource_ptr=%06x"
-            % (buff_ptr, maxchars, csrc_ptr)
+            "ReadItem: buff_ptr=%06x maxchars=%d csource_ptr=%06x",
+            buff_ptr,
+            maxchars,
+            csrc_ptr,
         )
         if csrc_ptr:
             csrc = CSource()
@@ -1499,7 +1681,7 @@ class DosLibrary(LibImpl):
         # get item
         parser = ItemParser(csrc)
         res, data = parser.read_item(maxchars)
-        log_dos.info("ReadItem: res=%d data=%s" % (res, data))
+        log_dos.info("ReadItem: res=%d data=%s", res, data)
         # Write back the updated csource ptr if we have one
         if csrc_ptr:
             csrc.update_s(ctx.alloc, csrc_ptr)
@@ -1620,14 +1802,21 @@ class DosLibrary(LibImpl):
         name_ptr = ctx.cpu.r_reg(REG_D1)
         name = ctx.mem.r_cstr(name_ptr)
         lock = self.get_current_dir(ctx)
-        sys_path = self.path_mgr.ami_to_sys_path(lock, name, searchMulti=True)
-        if sys_path and os.path.exists(sys_path):
-            b_addr = ctx.seg_loader.load_sys_seglist(sys_path)
-            log_dos.info("LoadSeg: '%s' -> %06x" % (name, b_addr))
-            self.seg_lists[b_addr] = name
+        with self.host_io:
+            sys_path = self.path_mgr.ami_to_sys_path(lock, name, searchMulti=True)
+            if sys_path and self.path_mgr.get_backend(sys_path).exists(sys_path):
+                b_addr = ctx.seg_loader.load_sys_seglist(sys_path)
+            else:
+                b_addr = None
+        if b_addr is not None:
+            log_dos.info("LoadSeg: '%s' -> %06x", name, b_addr)
+            if b_addr in self.seg_lists:
+                self.seg_list_users[b_addr] = self.seg_list_users.get(b_addr, 1) + 1
+            else:
+                self.seg_lists[b_addr] = name
             return b_addr
         else:
-            log_dos.warning("LoadSeg: '%s' -> not found!" % (name))
+            log_dos.warning("LoadSeg: '%s' -> not found!", name)
             return 0
 
     def UnLoadSeg(self, ctx):
@@ -1638,9 +1827,13 @@ class DosLibrary(LibImpl):
                     "Trying to unload unknown LoadSeg seg_list: b_addr=%06x" % b_addr
                 )
             else:
-                del self.seg_lists[b_addr]
+                users = self.seg_list_users.pop(b_addr, 1) - 1
+                if users > 1:
+                    self.seg_list_users[b_addr] = users
+                elif users == 0:
+                    del self.seg_lists[b_addr]
                 ctx.seg_loader.unload_seglist(b_addr)
-                log_dos.info("UnLoadSeg: %06x" % b_addr)
+                log_dos.info("UnLoadSeg: %06x", b_addr)
         else:
             log_dos.info("UnLoadSeg:  NULL")
 
@@ -1651,8 +1844,11 @@ class DosLibrary(LibImpl):
         stack_ptr = ctx.cpu.r_reg(REG_A2)
         # FIXME: For now, just fail
         log_dos.warning(
-            "InternalLoadSeg: fh=%06x table=%06x funcptr=%06x stack_ptr=%06x -> not implemented!"
-            % (fh_baddr, table_ptr, func_ptr, stack_ptr)
+            "InternalLoadSeg: fh=%06x table=%06x funcptr=%06x stack_ptr=%06x -> not implemented!",
+            fh_baddr,
+            table_ptr,
+            func_ptr,
+            stack_ptr,
         )
         self.setioerr(ctx, ERROR_OBJECT_WRONG_TYPE)
         return 0
@@ -1674,8 +1870,11 @@ class DosLibrary(LibImpl):
         input_fh = ctx.process.get_input()
         input_fh.setbuf(cmdline)
         log_dos.info(
-            "RunCommand: seglist=%06x(%s) stack=%d args=%s"
-            % (b_addr, name, stack, cmdline)
+            "RunCommand: seglist=%06x(%s) stack=%d args=%s",
+            b_addr,
+            name,
+            stack,
+            cmdline,
         )
         # round up the stack
         stack = (stack + 3) & -4
@@ -1843,7 +2042,7 @@ class DosLibrary(LibImpl):
         clip_addr = self.Cli(ctx)
         clip = AccessStruct(ctx.mem, CLIStruct, struct_addr=clip_addr)
         pkt = ctx.cpu.r_reg(REG_A0)
-        log_dos.info("CliInitRun (0x%06x)" % pkt)
+        log_dos.info("CliInitRun (0x%06x)", pkt)
         # This would typically initialize the CLI for running a command
         # from the packet. Anyhow, this is already done, so do nothing here
         return 0x80000004  # valid, and a System() call.
@@ -1869,12 +2068,12 @@ class DosLibrary(LibImpl):
         lockbaddr = ctx.cpu.r_reg(REG_D2)
         name = ctx.mem.r_cstr(name_ptr)
         if lockbaddr == 0:
-            log_dos.info("AssignLock (%s -> null)" % name)
+            log_dos.info("AssignLock (%s -> null)", name)
             self.dos_list.remove_assign(name)
             return -1
         else:
             lock = self.lock_mgr.get_by_b_addr(lockbaddr)
-            log_dos.info("AssignLock (%s -> %s)" % (name, lock))
+            log_dos.info("AssignLock (%s -> %s)", name, lock)
             if self.dos_list.create_assign(name, lock) != None:
                 return -1
             return 0
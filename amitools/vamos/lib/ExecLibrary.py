@@ -32,6 +32,9 @@ class ExecLibrary(LibImpl):
         self.alloc = ctx.alloc
         self._pools = {}
         self._poolid = 0x1000
+        # stack of the current task
+        self.stk_lower = None
+        self.stk_upper = None
         self.exec_lib = ExecLibraryType(ctx.mem, base_addr)
         # init lib list
         self.exec_lib.lib_list.new_list(NodeType.NT_LIBRARY)
@@ -56,6 +59,22 @@ class ExecLibrary(LibImpl):
         self.stk_lower = process.get_stack().get_lower()
         self.stk_upper = process.get_stack().get_upper()
 
+    def get_state(self):
+        return (
+            self.stk_lower,
+            self.stk_upper,
+            dict(self._pools),
+            self._poolid,
+            self.port_mgr.get_state(),
+            self.semaphore_mgr.get_state(),
+        )
+
+    def set_state(self, state):
+        self.stk_lower, self.stk_upper, pools, self._poolid, ports, sems = state
+        self._pools = dict(pools)
+        self.port_mgr.set_state(ports)
+        self.semaphore_mgr.set_state(sems)
+
     # helper
 
     def get_callee_pc(self, ctx):
@@ -81,11 +100,11 @@ class ExecLibrary(LibImpl):
         task_ptr = ctx.cpu.r_reg(REG_A1)
         if task_ptr == 0:
             addr = self.exec_lib.this_task.aptr
-            log_exec.info("FindTask: me=%06x" % addr)
+            log_exec.info("FindTask: me=%06x", addr)
             return addr
         else:
             task_name = ctx.mem.r_cstr(task_ptr)
-            log_exec.info("Find Task: %s" % task_name)
+            log_exec.info("Find Task: %s", task_name)
             raise UnsupportedFeatureError("FindTask: other task!")
 
     def SetSignal(self, ctx):
@@ -93,8 +112,10 @@ class ExecLibrary(LibImpl):
         signal_mask = ctx.cpu.r_reg(REG_D1)
         old_signals = 0
         log_exec.info(
-            "SetSignals: new_signals=%08x signal_mask=%08x old_signals=%08x"
-            % (new_signals, signal_mask, old_signals)
+            "SetSignals: new_signals=%08x signal_mask=%08x old_signals=%08x",
+            new_signals,
+            signal_mask,
+            old_signals,
         )
         return old_signals
 
@@ -119,8 +140,13 @@ class ExecLibrary(LibImpl):
         # we report the old stack befor callee
         old_pointer += 4
         log_exec.info(
-            "StackSwap: old(lower=%06x,upper=%06x,ptr=%06x) new(lower=%06x,upper=%06x,ptr=%06x)"
-            % (old_lower, old_upper, old_pointer, new_lower, new_upper, new_pointer)
+            "StackSwap: old(lower=%06x,upper=%06x,ptr=%06x) new(lower=%06x,upper=%06x,ptr=%06x)",
+            old_lower,
+            old_upper,
+            old_pointer,
+            new_lower,
+            new_upper,
+            new_pointer,
         )
         stsw.w_s("stk_Lower", old_lower)
         stsw.w_s("stk_Upper", old_upper)
@@ -260,7 +286,7 @@ class ExecLibrary(LibImpl):
             log_exec.info("TaggedOpenLibrary: %d('%s') -> %06x", tag, name, addr)
             return addr
         else:
-            log_exec.warning("TaggedOpenLibrary: %d invalid tag -> NULL" % tag)
+            log_exec.warning("TaggedOpenLibrary: %d invalid tag -> NULL", tag)
             return 0
 
     def OldOpenLibrary(self, ctx):
@@ -285,7 +311,7 @@ class ExecLibrary(LibImpl):
     def FindResident(self, ctx):
         name_ptr = ctx.cpu.r_reg(REG_A1)
         name = ctx.mem.r_cstr(name_ptr)
-        log_exec.info("FindResident: '%s'" % (name))
+        log_exec.info("FindResident: '%s'", name)
         return 0
 
     def CreatePool(self, ctx):
@@ -298,7 +324,7 @@ class ExecLibrary(LibImpl):
         thresh = ctx.cpu.r_reg(REG_D2)
         pool = Pool(self.mem, self.alloc, flags, size, thresh, poolid)
         self._pools[poolid] = pool
-        log_exec.info("CreatePool: pool 0x%x" % poolid)
+        log_exec.info("CreatePool: pool 0x%x", poolid)
         return poolid
 
     def AllocPooled(self, ctx):
@@ -310,8 +336,7 @@ class ExecLibrary(LibImpl):
             pool = self._pools[poolid]
             mem = pool.AllocPooled(ctx.label_mgr, name, size)
             log_exec.info(
-                "AllocPooled: from pool 0x%x size %d -> 0x%06x"
-                % (poolid, size, mem.addr)
+                "AllocPooled: from pool 0x%x size %d -> 0x%06x", poolid, size, mem.addr
             )
             return mem.addr
         else:
@@ -327,7 +352,7 @@ class ExecLibrary(LibImpl):
             pool = self._pools[poolid]
             pool.FreePooled(mem_ptr, size)
             log_exec.info(
-                "FreePooled: to pool 0x%x mem 0x%06x size %d" % (poolid, mem_ptr, size)
+                "FreePooled: to pool 0x%x mem 0x%06x size %d", poolid, mem_ptr, size
             )
         else:
             raise VamosInternalError(
@@ -341,7 +366,7 @@ class ExecLibrary(LibImpl):
             pool = self._pools[poolid]
             del self._pools[poolid]
             pool.__del__()
-            log_exec.info("DeletePooled: pool 0x%x" % poolid)
+            log_exec.info("DeletePooled: pool 0x%x", poolid)
         else:
             raise VamosInternalError(
                 "DeletePooled: invalid memory pool: ptr=%06x" % poolid
@@ -356,7 +381,7 @@ class ExecLibrary(LibImpl):
         pc = self.get_callee_pc(ctx)
         name = "AllocMem(%06x)" % pc
         mb = self.alloc.alloc_memory(size, label=name)
-        log_exec.info("AllocMem: %s -> 0x%06x %d bytes" % (mb, mb.addr, size))
+        log_exec.info("AllocMem: %s -> 0x%06x %d bytes", mb, mb.addr, size)
         return mb.addr
 
     def FreeMem(self, ctx):
@@ -367,7 +392,7 @@ class ExecLibrary(LibImpl):
             return
         mb = self.alloc.get_memory(addr)
         if mb != None:
-            log_exec.info("FreeMem: 0x%06x %d bytes -> %s" % (addr, size, mb))
+            log_exec.info("FreeMem: 0x%06x %d bytes -> %s", addr, size, mb)
             self.alloc.free_memory(mb)
         else:
             raise VamosInternalError(
@@ -389,7 +414,7 @@ class ExecLibrary(LibImpl):
             return
         mb = self.alloc.get_memory(addr)
         if mb != None:
-            log_exec.info("FreeVec: %s" % mb)
+            log_exec.info("FreeVec: %s", mb)
             self.alloc.free_memory(mb)
         else:
             raise VamosInternalError(
@@ -412,7 +437,7 @@ class ExecLibrary(LibImpl):
     def PutMsg(self, ctx):
         port_addr = ctx.cpu.r_reg(REG_A0)
         msg_addr = ctx.cpu.r_reg(REG_A1)
-        log_exec.info("PutMsg: port=%06x msg=%06x" % (port_addr, msg_addr))
+        log_exec.info("PutMsg: port=%06x msg=%06x", port_addr, msg_addr)
         has_port = self.port_mgr.has_port(port_addr)
         if not has_port:
             raise VamosInternalError(
@@ -422,7 +447,7 @@ class ExecLibrary(LibImpl):
 
     def GetMsg(self, ctx):
         port_addr = ctx.cpu.r_reg(REG_A0)
-        log_exec.info("GetMsg: port=%06x" % (port_addr))
+        log_exec.info("GetMsg: port=%06x", port_addr)
         has_port = self.port_mgr.has_port(port_addr)
         if not has_port:
             raise VamosInternalError(
@@ -430,7 +455,7 @@ class ExecLibrary(LibImpl):
             )
         msg_addr = self.port_mgr.get_msg(port_addr)
         if msg_addr != None:
-            log_exec.info("GetMsg: got message %06x" % (msg_addr))
+            log_exec.info("GetMsg: got message %06x", msg_addr)
             return msg_addr
         else:
             log_exec.info("GetMsg: no message available!")
@@ -438,12 +463,12 @@ class ExecLibrary(LibImpl):
 
     def CreateMsgPort(self, ctx):
         port = self.port_mgr.create_port("exec_port", None)
-        log_exec.info("CreateMsgPort: -> port=%06x" % (port))
+        log_exec.info("CreateMsgPort: -> port=%06x", port)
         return port
 
     def DeleteMsgPort(self, ctx):
         port = ctx.cpu.r_reg(REG_A0)
-        log_exec.info("DeleteMsgPort(%06x)" % port)
+        log_exec.info("DeleteMsgPort(%06x)", port)
         self.port_mgr.free_port(port)
         return 0
 
@@ -455,8 +480,12 @@ class ExecLibrary(LibImpl):
         name = "CreateIORequest(%06x)" % pc
         mb = self.alloc.alloc_memory(size, label=name)
         log_exec.info(
-            "CreateIORequest: (%s,%s,%s) -> 0x%06x %d bytes"
-            % (mb, port, size, mb.addr, size)
+            "CreateIORequest: (%s,%s,%s) -> 0x%06x %d bytes",
+            mb,
+            port,
+            size,
+            mb.addr,
+            size,
         )
         return mb.addr
 
@@ -464,7 +493,7 @@ class ExecLibrary(LibImpl):
         req = ctx.cpu.r_reg(REG_A0)
         mb = self.alloc.get_memory(req)
         if mb != None:
-            log_exec.info("DeleteIOREquest: 0x%06x -> %s" % (req, mb))
+            log_exec.info("DeleteIOREquest: 0x%06x -> %s", req, mb)
             self.alloc.free_memory(mb)
         else:
             raise VamosInternalError(
@@ -503,7 +532,7 @@ class ExecLibrary(LibImpl):
 
     def WaitPort(self, ctx):
         port_addr = ctx.cpu.r_reg(REG_A0)
-        log_exec.info("WaitPort: port=%06x" % (port_addr))
+        log_exec.info("WaitPort: port=%06x", port_addr)
         has_port = self.port_mgr.has_port(port_addr)
         if not has_port:
             raise VamosInternalError(
@@ -515,13 +544,13 @@ class ExecLibrary(LibImpl):
                 "WaitPort on empty message queue called: Port (%06x)" % port_addr
             )
         msg_addr = self.port_mgr.get_msg(port_addr)
-        log_exec.info("WaitPort: got message %06x" % (msg_addr))
+        log_exec.info("WaitPort: got message %06x", msg_addr)
         return msg_addr
 
     def AddTail(self, ctx):
         list_addr = ctx.cpu.r_reg(REG_A0)
         node_addr = ctx.cpu.r_reg(REG_A1)
-        log_exec.info("AddTail(%06x, %06x)" % (list_addr, node_addr))
+        log_exec.info("AddTail(%06x, %06x)", list_addr, node_addr)
         l = AccessStruct(ctx.mem, ListStruct, list_addr)
         n = AccessStruct(ctx.mem, NodeStruct, node_addr)
         n.w_s("ln_Succ", l.s_get_addr("lh_Tail"))
@@ -533,7 +562,7 @@ class ExecLibrary(LibImpl):
     def AddHead(self, ctx):
         list_addr = ctx.cpu.r_reg(REG_A0)
         node_addr = ctx.cpu.r_reg(REG_A1)
-        log_exec.info("AddHead(%06x, %06x)" % (list_addr, node_addr))
+        log_exec.info("AddHead(%06x, %06x)", list_addr, node_addr)
         l = AccessStruct(ctx.mem, ListStruct, list_addr)
         n = AccessStruct(ctx.mem, NodeStruct, node_addr)
         n.w_s("ln_Pred", l.s_get_addr("lh_Head"))
@@ -547,9 +576,7 @@ class ExecLibrary(LibImpl):
         n = AccessStruct(ctx.mem, NodeStruct, node_addr)
         succ = n.r_s("ln_Succ")
         pred = n.r_s("ln_Pred")
-        log_exec.info(
-            "Remove(%06x): ln_Pred=%06x ln_Succ=%06x" % (node_addr, pred, succ)
-        )
+        log_exec.info("Remove(%06x): ln_Pred=%06x ln_Succ=%06x", node_addr, pred, succ)
         AccessStruct(ctx.mem, NodeStruct, pred).w_s("ln_Succ", succ)
         AccessStruct(ctx.mem, NodeStruct, succ).w_s("ln_Pred", pred)
         return node_addr
@@ -562,11 +589,11 @@ class ExecLibrary(LibImpl):
         succ = n.r_s("ln_Succ")
         pred = n.r_s("ln_Pred")
         if succ == 0:
-            log_exec.info("RemHead(%06x): null" % list_addr)
+            log_exec.info("RemHead(%06x): null", list_addr)
             return 0
         AccessStruct(ctx.mem, NodeStruct, pred).w_s("ln_Succ", succ)
         AccessStruct(ctx.mem, NodeStruct, succ).w_s("ln_Pred", pred)
-        log_exec.info("RemHead(%06x): %06x" % (list_addr, node_addr))
+        log_exec.info("RemHead(%06x): %06x", list_addr, node_addr)
         return node_addr
 
     def RemTail(self, ctx):
@@ -577,11 +604,11 @@ class ExecLibrary(LibImpl):
         succ = n.r_s("ln_Succ")
         pred = n.r_s("ln_Pred")
         if pred == 0:
-            log_exec.info("RemTail(%06x): null" % list_addr)
+            log_exec.info("RemTail(%06x): null", list_addr)
             return 0
         AccessStruct(ctx.mem, NodeStruct, pred).w_s("ln_Succ", succ)
         AccessStruct(ctx.mem, NodeStruct, succ).w_s("ln_Pred", pred)
-        log_exec.info("RemTail(%06x): %06x" % (list_addr, node_addr))
+        log_exec.info("RemTail(%06x): %06x", list_addr, node_addr)
         return node_addr
 
     def FindName(self, ctx):
@@ -600,9 +627,7 @@ class ExecLibrary(LibImpl):
         source = ctx.cpu.r_reg(REG_A0)
         dest = ctx.cpu.r_reg(REG_A1)
         length = ctx.cpu.r_reg(REG_D0)
-        log_exec.info(
-            "CopyMem: source=%06x dest=%06x len=%06x" % (source, dest, length)
-        )
+        log_exec.info("CopyMem: source=%06x dest=%06x len=%06x", source, dest, length)
         ctx.mem.copy_block(source, dest, length)
 
     def CopyMemQuick(self, ctx):
@@ -610,14 +635,14 @@ class ExecLibrary(LibImpl):
         dest = ctx.cpu.r_reg(REG_A1)
         length = ctx.cpu.r_reg(REG_D0)
         log_exec.info(
-            "CopyMemQuick: source=%06x dest=%06x len=%06x" % (source, dest, length)
+            "CopyMemQuick: source=%06x dest=%06x len=%06x", source, dest, length
         )
         ctx.mem.copy_block(source, dest, length)
 
     def TypeOfMem(self, ctx):
         addr = ctx.cpu.r_reg(REG_A1)
         log_exec.info(
-            "TypeOfMem: source=%06x -> %s" % (addr, self.alloc.is_valid_address(addr))
+            "TypeOfMem: source=%06x -> %s", addr, self.alloc.is_valid_address(addr)
         )
         if self.alloc.is_valid_address(addr):
             return 1  # MEMF_PUBLIC
@@ -635,8 +660,11 @@ class ExecLibrary(LibImpl):
             ctx, fmtString, dataStream, putProc, putData
         )
         log_exec.info(
-            "RawDoFmt: fmtString=%s -> %s (known=%s, dataStream=%06x)"
-            % (fmt, resultstr, known, dataStream)
+            "RawDoFmt: fmtString=%s -> %s (known=%s, dataStream=%06x)",
+            fmt,
+            resultstr,
+            known,
+            dataStream,
         )
         return dataStream
 
@@ -645,7 +673,7 @@ class ExecLibrary(LibImpl):
     def InitSemaphore(self, ctx):
         addr = ctx.cpu.r_reg(REG_A0)
         self.semaphore_mgr.InitSemaphore(addr)
-        log_exec.info("InitSemaphore(%06x)" % addr)
+        log_exec.info("InitSemaphore(%06x)", addr)
 
     def AddSemaphore(self, ctx):
         addr = ctx.cpu.r_reg(REG_A1)
@@ -653,18 +681,18 @@ class ExecLibrary(LibImpl):
         name_ptr = sstruct.r_s("ss_Link.ln_Name")
         name = ctx.mem.r_cstr(name_ptr)
         self.semaphore_mgr.AddSemaphore(addr, name)
-        log_exec.info("AddSemaphore(%06x,%s)" % (addr, name))
+        log_exec.info("AddSemaphore(%06x,%s)", addr, name)
 
     def RemSemaphore(self, ctx):
         addr = ctx.cpu.r_reg(REG_A1)
         self.semaphore_mgr.RemSemaphore(addr)
-        log_exec.info("RemSemaphore(%06x)" % addr)
+        log_exec.info("RemSemaphore(%06x)", addr)
 
     def FindSemaphore(self, ctx):
         name_ptr = ctx.cpu.r_reg(REG_A1)
         name = ctx.mem.r_cstr(name_ptr)
         semaphore = self.semaphore_mgr.FindSemaphore(name)
-        log_exec.info("FindSemaphore(%s) -> %s" % (name, semaphore))
+        log_exec.info("FindSemaphore(%s) -> %s", name, semaphore)
         if semaphore != None:
             return semaphore.addr
         else:
@@ -673,30 +701,30 @@ class ExecLibrary(LibImpl):
     def ObtainSemaphore(self, ctx):
         addr = ctx.cpu.r_reg(REG_A0)
         # nop for now
-        log_exec.info("ObtainSemaphore(%06x) ignored" % addr)
+        log_exec.info("ObtainSemaphore(%06x) ignored", addr)
 
     def ObtainSemaphoreShared(self, ctx):
         addr = ctx.cpu.r_reg(REG_A0)
         # nop for now
-        log_exec.info("ObtainSemaphoreShared(%06x) ignored" % addr)
+        log_exec.info("ObtainSemaphoreShared(%06x) ignored", addr)
 
     def AttemptSemaphore(self, ctx):
         addr = ctx.cpu.r_reg(REG_A0)
         # nop for now
-        log_exec.info("AttemptSemaphore(%06x) ignored" % addr)
+        log_exec.info("AttemptSemaphore(%06x) ignored", addr)
         return 1
 
     def ReleaseSemaphore(self, ctx):
         addr = ctx.cpu.r_reg(REG_A0)
         # nop for now
-        log_exec.info("ReleaseSemaphore(%06x) ignored" % addr)
+        log_exec.info("ReleaseSemaphore(%06x) ignored", addr)
 
     # ----- Resources -----
 
     def OpenResource(self, ctx):
         name_ptr = ctx.cpu.r_reg(REG_A1)
         name = ctx.mem.r_cstr(name_ptr)
-        log_exec.info("OpenResource(%s) ignored" % name)
+        log_exec.info("OpenResource(%s) ignored", name)
         return 0
 
     # ----- Allocate/Deallocate -----
@@ -705,7 +733,7 @@ class ExecLibrary(LibImpl):
         mh_addr = ctx.cpu.r_reg(REG_A0)
         num_bytes = ctx.cpu.r_reg(REG_D0)
         blk_addr = Alloc.allocate(ctx, mh_addr, num_bytes)
-        log_exec.info("Allocate(%06x, %06x) -> %06x" % (mh_addr, num_bytes, blk_addr))
+        log_exec.info("Allocate(%06x, %06x) -> %06x", mh_addr, num_bytes, blk_addr)
         return blk_addr
 
     def Deallocate(self, ctx):
@@ -713,4 +741,4 @@ class ExecLibrary(LibImpl):
         blk_addr = ctx.cpu.r_reg(REG_A1)
         num_bytes = ctx.cpu.r_reg(REG_D0)
         Alloc.deallocate(ctx, mh_addr, blk_addr, num_bytes)
-        log_exec.info("Deallocate(%06x, %06x, %06x)" % (mh_addr, blk_addr, num_bytes))
+        log_exec.info("Deallocate(%06x, %06x, %06x)", mh_addr, blk_addr, num_bytes)
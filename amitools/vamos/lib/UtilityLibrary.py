@@ -14,8 +14,11 @@ class UtilityLibrary(LibImpl):
         quot = dividend // divisor
         rem = dividend % divisor
         log_utility.info(
-            "UDivMod32(dividend=%u, divisor=%u) => (quotient=%u, remainder=%u)"
-            % (dividend, divisor, quot, rem)
+            "UDivMod32(dividend=%u, divisor=%u) => (quotient=%u, remainder=%u)",
+            dividend,
+            divisor,
+            quot,
+            rem,
         )
         return [quot, rem]
 
@@ -36,8 +39,11 @@ class UtilityLibrary(LibImpl):
         if rem < 0:
             rem = rem + 0x100000000
         log_utility.info(
-            "SDivMod32(dividend=%u, divisor=%u) => (quotient=%u, remainder=%u)"
-            % (dividend, divisor, quot, rem)
+            "SDivMod32(dividend=%u, divisor=%u) => (quotient=%u, remainder=%u)",
+            dividend,
+            divisor,
+            quot,
+            rem,
         )
         return [quot, rem]
 
@@ -66,7 +72,7 @@ class UtilityLibrary(LibImpl):
         str1 = ctx.mem.r_cstr(str1_addr)
         str2 = ctx.mem.r_cstr(str2_addr)
         log_utility.info(
-            'Stricmp(%08x="%s",%08x="%s")' % (str1_addr, str1, str2_addr, str2)
+            'Stricmp(%08x="%s",%08x="%s")', str1_addr, str1, str2_addr, str2
         )
         if str1.lower() < str2.lower():
             return -1
@@ -82,7 +88,7 @@ class UtilityLibrary(LibImpl):
         str1 = ctx.mem.r_cstr(str1_addr)[:length]
         str2 = ctx.mem.r_cstr(str2_addr)[:length]
         log_utility.info(
-            'Strnicmp(%08x="%s",%08x="%s")' % (str1_addr, str1, str2_addr, str2)
+            'Strnicmp(%08x="%s",%08x="%s")', str1_addr, str1, str2_addr, str2
         )
         if str1.lower() < str2.lower():
             return -1
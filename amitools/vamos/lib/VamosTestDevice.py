@@ -16,6 +16,12 @@ class VamosTestDevice(LibImpl):
     def close_lib(self, ctx, open_cnt):
         self.cnt = open_cnt
 
+    def get_state(self):
+        return self.cnt
+
+    def set_state(self, cnt):
+        self.cnt = cnt
+
     def get_version(self):
         return 23
 
@@ -20,6 +20,12 @@ class VamosTestLibrary(LibImpl):
     def close_lib(self, ctx, open_cnt):
         self.cnt = open_cnt
 
+    def get_state(self):
+        return self.cnt
+
+    def set_state(self, cnt):
+        self.cnt = cnt
+
     def get_version(self):
         return 23
 
@@ -42,11 +48,11 @@ class VamosTestLibrary(LibImpl):
         print("VamosTest: PrintString('%s')" % txt.str)
         return 0
 
-    def Add(self, ctx, a, b):
+    def Add(self, ctx, a, b) -> int:
         """define input values directly as function arguments"""
         return a + b
 
-    def Swap(self, ctx, a, b):
+    def Swap(self, ctx, a, b) -> tuple:
         """define input values directly as function arguments"""
         return b, a
 
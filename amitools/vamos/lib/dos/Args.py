@@ -1,7 +1,10 @@
 import types
+from amitools.util import LRUCache
 from .Error import *
 from .Item import ItemParser
 
+_template_cache = LRUCache(128)
+
 
 class TemplateArg:
     """a parsed description of a template argument"""
@@ -115,6 +118,23 @@ class TemplateArgList:
         return tal
 
 
+def template_parse(template):
+    """return the TemplateArgList of a template string or None if invalid
+
+    the parsed templates are cached. do not modify the result.
+    """
+    tal = _template_cache.get(template, False)
+    if tal is False:
+        tal = TemplateArgList.parse_string(template)
+        _template_cache.put(template, tal)
+    return tal
+
+
+def template_cache_stats():
+    """return hits and misses of the template cache"""
+    return _template_cache.get_stats()
+
+
 class ParseResultList:
     """the class holds the parsing results. each template arg gets assigned
     a single item (or not)"""
@@ -0,0 +1,83 @@
+import os
+
+
+class ConsoleSink:
+    """coalesce the output of all console file handles into few host writes
+
+    The sink is used as the file object of the console handles. Data is
+    collected until max_size bytes or max_lines newlines are buffered or an
+    explicit flush() happens. By default a terminal is flushed after each
+    line and a pipe or file only if the buffer is full.
+
+    flush() is also used as a log filter so that log messages on stderr
+    never overtake console output.
+    """
+
+    def __init__(self, obj, max_size=4096, max_lines=None):
+        self.obj = obj
+        self.max_size = max_size
+        if max_lines is None:
+            max_lines = 1 if self._is_tty() else 0
+        self.max_lines = max_lines
+        self.buf = bytearray()
+        self.lines = 0
+        self.num_flushes = 0
+
+    def _is_tty(self):
+        try:
+            return os.isatty(self.obj.fileno())
+        except (OSError, ValueError, AttributeError):
+            return False
+
+    def write(self, data):
+        buf = self.buf
+        old_len = len(buf)
+        buf += data
+        if len(buf) >= self.max_size:
+            self.flush()
+        elif self.max_lines:
+            # data may be a memoryview that has no count()
+            num = buf.count(b"\n", old_len)
+            if num:
+                self.lines += num
+                if self.lines >= self.max_lines:
+                    self.flush()
+        return len(data)
+
+    def flush(self):
+        buf = self.buf
+        if buf:
+            self.buf = bytearray()
+            self.lines = 0
+            self.num_flushes += 1
+            self.obj.write(buf)
+        self.obj.flush()
+
+    def filter(self, record):
+        """log filter: write pending output before a log record"""
+        if self.buf:
+            try:
+                self.flush()
+            except OSError:
+                pass
+        return True
+
+    # --- the rest is passed on to the host file ---
+
+    def read(self, size=-1):
+        return self.obj.read(size)
+
+    def read1(self, size=-1):
+        return self.obj.read1(size)
+
+    def readinto(self, buf):
+        return self.obj.readinto(buf)
+
+    def tell(self):
+        return self.obj.tell()
+
+    def seek(self, pos, whence=0):
+        return self.obj.seek(pos, whence)
+
+    def fileno(self):
+        return self.obj.fileno()
@@ -22,3 +22,9 @@ class DosLibCtx(LibCtx):
 
     def set_process(self, process):
         self.process = process
+
+    def get_state(self):
+        return self.process
+
+    def set_state(self, process):
+        self.process = process
@@ -203,6 +203,28 @@ class DosList:
                             entry.access.w_s("dol_List", assign_entry.addr)
                         assign_last = assign_entry.access
 
+    def get_state(self):
+        """return the entries and their links for set_state()"""
+        entries = [
+            (e, e.next, list(e.locks), list(e.alist), list(e.assigns))
+            for e in self.entries
+        ]
+        return (entries, self.first_entry)
+
+    def set_state(self, state):
+        entries, self.first_entry = state
+        self.entries = []
+        self.entries_by_b_addr = {}
+        self.entries_by_name = {}
+        for entry, next_entry, locks, alist, assigns in entries:
+            entry.next = next_entry
+            entry.locks = list(locks)
+            entry.alist = list(alist)
+            entry.assigns = list(assigns)
+            self.entries.append(entry)
+            self.entries_by_b_addr[entry.baddr] = entry
+            self.entries_by_name[entry.name.lower()] = entry
+
     def get_entry_by_b_addr(self, baddr):
         if baddr not in self.entries_by_b_addr:
             return None
@@ -1,13 +1,36 @@
 import os
 import sys
+import contextlib
 from amitools.vamos.libstructs import FileHandleStruct
 
+# buffer modes of SetVBuf()
+BUF_LINE = 0
+BUF_FULL = 1
+BUF_NONE = 2
+
+DEFAULT_BUF_SIZE = 4096
+
 
 class FileHandle:
-    """represent an AmigaOS file handle (FH) in vamos"""
+    """represent an AmigaOS file handle (FH) in vamos
+
+    The buffered DOS calls (FGetC, FGets, FRead, FPutC, FWrite, ...) use a
+    read-ahead and a write-behind buffer in the handle. read() and write()
+    are unbuffered, like Read() and Write(), but take care of the buffered
+    data. Auto flush handles are unbuffered by default.
+    """
 
     def __init__(
-        self, obj, ami_path, sys_path, need_close=True, is_nil=False, auto_flush=False
+        self,
+        obj,
+        ami_path,
+        sys_path,
+        need_close=True,
+        is_nil=False,
+        auto_flush=False,
+        buf_mode=None,
+        buf_size=DEFAULT_BUF_SIZE,
+        before_read=None,
     ):
         self.obj = obj
         self.name = os.path.basename(sys_path)
@@ -17,9 +40,25 @@ class FileHandle:
         self.need_close = need_close
         self.auto_flush = auto_flush
         # buffering
+        if buf_mode is None:
+            buf_mode = BUF_NONE if auto_flush else BUF_FULL
+        self.buf_mode = buf_mode
+        self.buf_size = buf_size
+        # read ahead data and position in it
+        self.rbuf = b""
+        self.rpos = 0
+        # write behind data
+        self.wbuf = bytearray()
+        # pushed back or injected chars read before the buffer
         self.unch = bytearray()
         self.ch = -1
         self.is_nil = is_nil
+        # only read what is available, e.g. on a console
+        self._read_some = getattr(obj, "read1", obj.read)
+        # called before reading from the host
+        self.before_read = before_read
+        # context of all host reads and writes, e.g. to time them
+        self.host_io = contextlib.nullcontext()
 
     def __str__(self):
         return "[FH:'%s'(ami='%s',sys='%s',nc=%s)@%06x=B@%06x]" % (
@@ -32,6 +71,7 @@ class FileHandle:
         )
 
     def close(self):
+        self._flush_write()
         if self.need_close:
             self.obj.close()
 
@@ -51,64 +91,210 @@ class FileHandle:
     def free_fh(self, alloc):
         alloc.free_struct(self.mem)
 
+    def get_state(self):
+        """return the buffers for set_state(). the host file is not included"""
+        return (
+            self.buf_mode,
+            self.buf_size,
+            self.rbuf,
+            self.rpos,
+            bytes(self.wbuf),
+            bytes(self.unch),
+            self.ch,
+        )
+
+    def set_state(self, state):
+        self.buf_mode, self.buf_size, self.rbuf, self.rpos, wbuf, unch, self.ch = state
+        self.wbuf = bytearray(wbuf)
+        self.unch = bytearray(unch)
+
     # --- file ops ---
 
     def write(self, data):
-        assert isinstance(data, (bytes, bytearray))
+        """unbuffered write"""
+        assert isinstance(data, (bytes, bytearray, memoryview))
+        self._drop_read()
+        if self._flush_write() < 0:
+            return -1
         try:
-            self.obj.write(data)
-            if self.auto_flush:
-                self.obj.flush()
+            with self.host_io:
+                self.obj.write(data)
+                if self.auto_flush:
+                    self.obj.flush()
             return len(data)
         except IOError:
             return -1
 
-    def read(self, len):
+    def read(self, size):
+        """unbuffered read. returns read ahead data first"""
+        if self._flush_write() < 0:
+            return -1
         try:
-            d = self.obj.read(len)
-            return d
+            data = self._take_read(size)
+            if data:
+                rest = size - len(data)
+                if rest > 0:
+                    data += self._read_host(rest)
+                return bytes(data)
+            return self._read_host(size)
         except IOError:
             return -1
 
+    def readinto(self, buf):
+        """unbuffered read into a writable buffer. returns read ahead data first"""
+        if self._flush_write() < 0:
+            return -1
+        view = memoryview(buf)
+        try:
+            size = len(view)
+            data = self._take_read(size)
+            pos = len(data)
+            if pos:
+                view[:pos] = data
+                if pos == size:
+                    return pos
+            return pos + self._readinto_host(view[pos:])
+        except IOError:
+            return -1
+
+    def fwrite(self, data):
+        """buffered write"""
+        if self.buf_mode == BUF_NONE:
+            return self.write(data)
+        self._drop_read()
+        if len(data) >= self.buf_size and self.buf_mode == BUF_FULL:
+            # large writes bypass the buffer
+            if self._flush_write() < 0:
+                return -1
+            try:
+                with self.host_io:
+                    self.obj.write(data)
+                return len(data)
+            except IOError:
+                return -1
+        wbuf = self.wbuf
+        wbuf += data
+        if len(wbuf) >= self.buf_size or (self.buf_mode == BUF_LINE and b"\n" in data):
+            if self._flush_write() < 0:
+                return -1
+        return len(data)
+
+    def fread(self, size):
+        """buffered read"""
+        res = bytearray()
+        while self.unch and size > 0:
+            res.append(self.unch.pop(0))
+            size -= 1
+        if self.buf_mode == BUF_NONE:
+            data = self.read(size)
+            if data == -1:
+                return -1
+            res += data
+            return bytes(res)
+        try:
+            while size > 0:
+                data = self._take_read(size)
+                if data:
+                    res += data
+                    size -= len(data)
+                elif size >= self.buf_size:
+                    # large reads bypass the buffer
+                    if self._flush_write() < 0:
+                        return -1
+                    data = self._read_host(size)
+                    if not data:
+                        break
+                    res += data
+                    size -= len(data)
+                elif not self._fill():
+                    break
+        except IOError:
+            return -1
+        return bytes(res)
+
+    def freadinto(self, buf):
+        """buffered read into a writable buffer"""
+        view = memoryview(buf)
+        size = len(view)
+        pos = 0
+        while self.unch and pos < size:
+            view[pos] = self.unch.pop(0)
+            pos += 1
+        if self.buf_mode == BUF_NONE:
+            got = self.readinto(view[pos:])
+            if got == -1:
+                return -1
+            return pos + got
+        try:
+            while pos < size:
+                data = self._take_read(size - pos)
+                if data:
+                    end = pos + len(data)
+                    view[pos:end] = data
+                    pos = end
+                elif size - pos >= self.buf_size:
+                    # large reads bypass the buffer
+                    if self._flush_write() < 0:
+                        return -1
+                    got = self._readinto_host(view[pos:])
+                    if not got:
+                        break
+                    pos += got
+                elif not self._fill():
+                    break
+        except IOError:
+            return -1
+        return pos
+
     def getc(self):
         if len(self.unch) > 0:
             self.ch = self.unch[0]
             del self.unch[0]
         else:
-            if self.is_nil:
-                return -1
-            try:
-                d = self.obj.read(1)
-                if d == b"":
+            pos = self.rpos
+            if pos >= len(self.rbuf):
+                try:
+                    if not self._fill():
+                        return -1
+                except IOError:
                     return -1
-                self.ch = d[0]
-            except IOError:
-                return -1
+                pos = 0
+            self.ch = self.rbuf[pos]
+            self.rpos = pos + 1
         return self.ch
 
-    def gets(self, len):
+    def gets(self, size):
         res = bytearray()
-        ch = -1
-        # print "fgets from %s" % self
-        while len > 0:
-            len -= 1
+        # pushed back chars first
+        while self.unch and size > 0:
             ch = self.getc()
-            if ch < 0:
-                return res.decode("latin-1")
             res.append(ch)
+            size -= 1
             if ch == 10:
                 return res.decode("latin-1")
-        # apparently, python-I/O does not keep the unread
-        # part of a line in a buffer, so we have to (bummer!)
-        # Do that now so that the next read gets the rest
-        # of the line.
-        remains = bytearray()
-        while ch != 10:
-            ch = self.getc()
-            if ch == -1:
-                break
-            remains.append(ch)
-        self.unch = remains + self.unch
+        # then search lines in the read buffer
+        try:
+            while size > 0:
+                rbuf = self.rbuf
+                pos = self.rpos
+                if pos >= len(rbuf):
+                    if not self._fill():
+                        break
+                    rbuf = self.rbuf
+                    pos = 0
+                end = min(len(rbuf), pos + size)
+                nl = rbuf.find(b"\n", pos, end)
+                if nl >= 0:
+                    end = nl + 1
+                res += rbuf[pos:end]
+                size -= end - pos
+                self.rpos = end
+                if nl >= 0:
+                    break
+        except IOError:
+            pass
+        if res:
+            self.ch = res[-1]
         return res.decode("latin-1")
 
     def ungetc(self, var):
@@ -118,7 +304,12 @@ class FileHandle:
             var = self.ch
             self.ch = -1
         if var >= 0:
-            self.unch.insert(0, var)
+            pos = self.rpos
+            # step back in read buffer if possible
+            if not self.unch and pos > 0 and self.rbuf[pos - 1] == var:
+                self.rpos = pos - 1
+            else:
+                self.unch.insert(0, var)
         return var
 
     def ungets(self, s):
@@ -134,20 +325,120 @@ class FileHandle:
     def getbuf(self):
         return self.unch
 
+    def setvbuf(self, mode, size=0):
+        """set buffer mode and size (if > 0). return False on invalid mode"""
+        if mode not in (BUF_LINE, BUF_FULL, BUF_NONE):
+            return False
+        self._flush_write()
+        self.buf_mode = mode
+        if size > 0:
+            self.buf_size = size
+        return True
+
     def tell(self):
-        return self.obj.tell()
+        self._flush_write()
+        return self.obj.tell() - (len(self.rbuf) - self.rpos)
 
     def seek(self, pos, whence):
         try:
+            if self._flush_write() < 0:
+                return -1
+            if whence == 1:
+                pos -= len(self.rbuf) - self.rpos
             self.obj.seek(pos, whence)
         except IOError:
             return -1
+        # buffered data is void now
+        self.rbuf = b""
+        self.rpos = 0
+        self.unch = bytearray()
 
     def flush(self):
-        self.obj.flush()
+        self._flush_write()
+        self._drop_read()
+        with self.host_io:
+            self.obj.flush()
+
+    def _fill(self):
+        """read ahead into the buffer. return False on EOF"""
+        if self.wbuf:
+            self._flush_write()
+        if self.is_nil:
+            return False
+        if self.buf_mode == BUF_NONE:
+            size = 1
+        else:
+            size = self.buf_size
+        with self.host_io:
+            if self.before_read:
+                self.before_read()
+            data = self._read_some(size)
+        self.rbuf = data
+        self.rpos = 0
+        return len(data) > 0
+
+    def _read_host(self, size):
+        with self.host_io:
+            if self.before_read:
+                self.before_read()
+            return self.obj.read(size)
+
+    def _readinto_host(self, view):
+        with self.host_io:
+            if self.before_read:
+                self.before_read()
+            readinto = getattr(self.obj, "readinto", None)
+            if readinto is None:
+                data = self.obj.read(len(view))
+                got = len(data)
+                view[:got] = data
+                return got
+            got = readinto(view)
+        # non-blocking streams return None if no data is available
+        return got or 0
+
+    def _take_read(self, size):
+        """return up to size bytes of the read ahead data"""
+        rbuf = self.rbuf
+        pos = self.rpos
+        if pos >= len(rbuf):
+            return b""
+        end = min(len(rbuf), pos + size)
+        self.rpos = end
+        return rbuf[pos:end]
+
+    def _drop_read(self):
+        """return the file position to the read position"""
+        left = len(self.rbuf) - self.rpos
+        if left > 0:
+            try:
+                self.obj.seek(-left, 1)
+            except (IOError, ValueError):
+                # keep data of unseekable streams
+                return
+        self.rbuf = b""
+        self.rpos = 0
+
+    def _flush_write(self):
+        wbuf = self.wbuf
+        if not wbuf:
+            return 0
+        self.wbuf = bytearray()
+        try:
+            with self.host_io:
+                self.obj.write(wbuf)
+                if self.auto_flush:
+                    self.obj.flush()
+            return 0
+        except IOError:
+            return -1
 
     def is_interactive(self):
-        fd = self.obj.fileno()
+        # files in memory have no fd
+        try:
+            fd = self.obj.fileno()
+        except (OSError, ValueError):
+            return False
         if hasattr(os, "ttyname"):
             try:
                 os.ttyname(fd)
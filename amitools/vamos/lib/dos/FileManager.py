@@ -4,14 +4,16 @@ import os
 import logging
 import errno
 import stat
+import contextlib
 
-from amitools.vamos.log import log_file
+from amitools.vamos.log import log_file, loggers
 from amitools.vamos.error import UnsupportedFeatureError
-from amitools.vamos.astructs import AccessStruct
+from amitools.vamos.astructs import AccessStruct, StructCodec
 from amitools.vamos.libstructs import MessageStruct, DosPacketStruct
 from .Error import *
 from .DosProtection import DosProtection
-from .FileHandle import FileHandle
+from .FileHandle import FileHandle, BUF_NONE
+from .ConsoleSink import ConsoleSink
 
 
 class FileManager:
@@ -22,6 +24,10 @@ class FileManager:
         self.mem = mem
 
         self.files_by_b_addr = {}
+        # number of files opened by the program
+        self.num_opened = 0
+        # context of the host I/O of all files
+        self.host_io = contextlib.nullcontext()
 
         # get current umask
         self.umask = os.umask(0)
@@ -30,12 +36,17 @@ class FileManager:
         # setup ports
         # currently we use a single fake port for all devices
         self.fs_handler_port = port_mgr.create_port("FakeFSPort", self.fs_put_msg)
-        log_file.info("dos fs handler port: %06x" % self.fs_handler_port)
+        log_file.info("dos fs handler port: %06x", self.fs_handler_port)
         # create console handler
         self.console_handler_port = port_mgr.create_port(
             "ConsolePort", self.console_put_msg
         )
-        log_file.info("dos console port: %06x" % self.console_handler_port)
+        log_file.info("dos console port: %06x", self.console_handler_port)
+
+        # coalesce console output
+        self.console = ConsoleSink(sys.stdout.buffer)
+        for l in loggers:
+            l.addFilter(self.console)
 
         # setup std input/output
         self.std_input = self._create_stdin_fh()
@@ -44,34 +55,64 @@ class FileManager:
         self._register_file(self.std_output)
 
     def finish(self):
+        # write buffered data of files that were not closed
+        for fh in self.files_by_b_addr.values():
+            try:
+                fh.flush()
+            except (IOError, ValueError) as e:
+                log_file.warning("can't flush %s: %s", fh, e)
         self._unregister_file(self.std_input)
         self._unregister_file(self.std_output)
+        for l in loggers:
+            l.removeFilter(self.console)
         # free ports
         self.port_mgr.free_port(self.fs_handler_port)
         self.port_mgr.free_port(self.console_handler_port)
 
     def _create_stdin_fh(self):
-        return FileHandle(sys.stdin.buffer, "<STDIN>", "/dev/stdin", need_close=False)
+        # show pending output before waiting for input
+        return FileHandle(
+            sys.stdin.buffer,
+            "<STDIN>",
+            "/dev/stdin",
+            need_close=False,
+            before_read=self.console.flush,
+        )
 
     def _create_stdout_fh(self):
+        # the console sink does the buffering
         return FileHandle(
-            sys.stdout.buffer,
+            self.console,
             "<STDOUT>",
             "/dev/stdout",
             need_close=False,
-            auto_flush=True,
+            buf_mode=BUF_NONE,
         )
 
+    def flush_console(self):
+        """write pending console output, e.g. at the end of a process"""
+        try:
+            self.console.flush()
+        except IOError as e:
+            log_file.warning("can't write console output: %s", e)
+
     def get_fs_handler_port(self):
         return self.fs_handler_port
 
     def get_console_handler_port(self):
         return self.console_handler_port
 
+    def set_io_timer(self, host_io):
+        """time the host reads and writes of all file handles"""
+        self.host_io = host_io
+        for fh in self.files_by_b_addr.values():
+            fh.host_io = host_io
+
     def _register_file(self, fh):
+        fh.host_io = self.host_io
         baddr = fh.alloc_fh(self.alloc, self.fs_handler_port)
         self.files_by_b_addr[baddr] = fh
-        log_file.info("registered: %s" % fh)
+        log_file.info("registered: %s", fh)
 
     def _unregister_file(self, fh):
         if fh.b_addr in self.files_by_b_addr:
@@ -81,9 +122,34 @@ class FileManager:
         else:
             raise ValueError("Invalid File to unregister: %s" % fh)
         del self.files_by_b_addr[fh.b_addr]
-        log_file.info("unregistered: %s" % fh)
+        log_file.info("unregistered: %s", fh)
         fh.free_fh(self.alloc)
 
+    def get_state(self):
+        """return the open files for set_state()"""
+        return (
+            dict(self.files_by_b_addr),
+            self.std_input.get_state(),
+            self.std_output.get_state(),
+        )
+
+    def set_state(self, state):
+        """close the files opened since get_state() and restore the rest"""
+        files, input_state, output_state = state
+        for b_addr, fh in self.files_by_b_addr.items():
+            if files.get(b_addr) is not fh:
+                log_file.info("close on restore: %s", fh)
+                try:
+                    fh.close()
+                except (IOError, ValueError) as e:
+                    log_file.warning("can't close %s: %s", fh, e)
+        self.files_by_b_addr = dict(files)
+        self.std_input.set_state(input_state)
+        self.std_output.set_state(output_state)
+
+    def get_num_opened(self):
+        return self.num_opened
+
     def get_input(self):
         return self.std_input
 
@@ -111,15 +177,16 @@ class FileManager:
                     lock, ami_path, searchMulti=True
                 )
                 if sys_path == None:
-                    log_file.info("file not found: '%s' -> '%s'" % (ami_path, sys_path))
+                    log_file.info("file not found: '%s' -> '%s'", ami_path, sys_path)
                     return None
 
                 # make some checks on existing file
-                if os.path.exists(sys_path):
+                backend = self.path_mgr.get_backend(sys_path)
+                if backend.exists(sys_path):
                     # if not writeable -> no append mode
                     if f_mode == "rwb+":
                         f_mode = "rb+"
-                    if not os.access(sys_path, os.W_OK):
+                    if not backend.access(sys_path, os.W_OK):
                         if f_mode[-1] == "+":
                             f_mode = f_mode[:-1]
                 else:
@@ -128,18 +195,21 @@ class FileManager:
                         f_mode = "wb+"
 
                 log_file.debug(
-                    "opening file: '%s' -> '%s' f_mode=%s"
-                    % (ami_path, sys_path, f_mode)
+                    "opening file: '%s' -> '%s' f_mode=%s", ami_path, sys_path, f_mode
                 )
-                fobj = open(sys_path, f_mode)
+                fobj = backend.open(sys_path, f_mode)
                 fh = FileHandle(fobj, ami_path, sys_path)
 
             self._register_file(fh)
+            self.num_opened += 1
             return fh
         except IOError as e:
             log_file.info(
-                "error opening: '%s' -> '%s' f_mode=%s -> %s"
-                % (ami_path, sys_path, f_mode, e)
+                "error opening: '%s' -> '%s' f_mode=%s -> %s",
+                ami_path,
+                sys_path,
+                f_mode,
+                e,
             )
             return None
 
@@ -167,38 +237,53 @@ class FileManager:
 
     def delete(self, lock, ami_path):
         sys_path = self.path_mgr.ami_to_sys_path(lock, ami_path)
-        if sys_path == None or not os.path.exists(sys_path):
-            log_file.info("file to delete not found: '%s'" % (ami_path))
+        if sys_path == None:
+            log_file.info("file to delete not found: '%s'", ami_path)
+            return ERROR_OBJECT_NOT_FOUND
+        backend = self.path_mgr.get_backend(sys_path)
+        if not backend.exists(sys_path):
+            log_file.info("file to delete not found: '%s'", ami_path)
             return ERROR_OBJECT_NOT_FOUND
         try:
-            if os.path.isdir(sys_path):
-                os.rmdir(sys_path)
+            if backend.isdir(sys_path):
+                backend.rmdir(sys_path)
             else:
-                os.remove(sys_path)
+                backend.remove(sys_path)
             return 0
         except OSError as e:
             if e.errno == errno.ENOTEMPTY:  # Directory not empty
-                log_file.info("can't delete directory: '%s' -> not empty!" % (ami_path))
+                log_file.info("can't delete directory: '%s' -> not empty!", ami_path)
                 return ERROR_DIRECTORY_NOT_EMPTY
             else:
-                log_file.info("can't delete file: '%s' -> %s" % (ami_path, e))
+                log_file.info("can't delete file: '%s' -> %s", ami_path, e)
                 return ERROR_OBJECT_IN_USE
 
     def rename(self, lock, old_ami_path, new_ami_path):
         old_sys_path = self.path_mgr.ami_to_sys_path(lock, old_ami_path)
         new_sys_path = self.path_mgr.ami_to_sys_path(lock, new_ami_path)
-        if old_sys_path == None or not os.path.exists(old_sys_path):
-            log_file.info("old file to rename not found: '%s'" % old_ami_path)
+        if old_sys_path == None:
+            log_file.info("old file to rename not found: '%s'", old_ami_path)
+            return ERROR_OBJECT_NOT_FOUND
+        backend = self.path_mgr.get_backend(old_sys_path)
+        if not backend.exists(old_sys_path):
+            log_file.info("old file to rename not found: '%s'", old_ami_path)
             return ERROR_OBJECT_NOT_FOUND
         if new_sys_path == None:
-            log_file.info("new file to rename not found: '%s'" % new_ami_path)
+            log_file.info("new file to rename not found: '%s'", new_ami_path)
             return ERROR_OBJECT_NOT_FOUND
+        if self.path_mgr.get_backend(new_sys_path) is not backend:
+            log_file.info(
+                "can't rename file: '%s','%s' -> across devices",
+                old_ami_path,
+                new_ami_path,
+            )
+            return ERROR_RENAME_ACROSS_DEVICES
         try:
-            os.rename(old_sys_path, new_sys_path)
+            backend.rename(old_sys_path, new_sys_path)
             return 0
         except OSError as e:
             log_file.info(
-                "can't rename file: '%s','%s' -> %s" % (old_ami_path, new_ami_path, e)
+                "can't rename file: '%s','%s' -> %s", old_ami_path, new_ami_path, e
             )
             return ERROR_OBJECT_IN_USE
 
@@ -214,7 +299,11 @@ class FileManager:
 
     def set_protection(self, lock, ami_path, mask):
         sys_path = self.path_mgr.ami_to_sys_path(lock, ami_path)
-        if sys_path == None or not os.path.exists(sys_path):
+        if sys_path == None:
+            log_file.info("file to set proteciton not found: '%s'", ami_path)
+            return ERROR_OBJECT_NOT_FOUND
+        backend = self.path_mgr.get_backend(sys_path)
+        if not backend.exists(sys_path):
             log_file.info("file to set proteciton not found: '%s'", ami_path)
             return ERROR_OBJECT_NOT_FOUND
         prot = DosProtection(mask)
@@ -235,7 +324,7 @@ class FileManager:
             self.umask,
         )
         try:
-            os.chmod(sys_path, posix_mask)
+            backend.chmod(sys_path, posix_mask)
             return NO_ERROR
         except OSError:
             return ERROR_OBJECT_WRONG_TYPE
@@ -243,7 +332,7 @@ class FileManager:
     def create_dir(self, lock, ami_path):
         sys_path = self.path_mgr.ami_to_sys_path(lock, ami_path)
         try:
-            os.mkdir(sys_path)
+            self.path_mgr.get_backend(sys_path).mkdir(sys_path)
             return NO_ERROR
         except OSError:
             return ERROR_OBJECT_EXISTS
@@ -255,9 +344,10 @@ class FileManager:
     def fs_put_msg(self, port_mgr, msg_addr):
         msg = AccessStruct(self.mem, MessageStruct, struct_addr=msg_addr)
         dos_pkt_addr = msg.r_s("mn_Node.ln_Name")
-        dos_pkt = AccessStruct(self.mem, DosPacketStruct, struct_addr=dos_pkt_addr)
-        reply_port_addr = dos_pkt.r_s("dp_Port")
-        pkt_type = dos_pkt.r_s("dp_Type")
+        pkt_codec = StructCodec.for_struct(DosPacketStruct)
+        dos_pkt = pkt_codec.read(self.mem, dos_pkt_addr)
+        reply_port_addr = dos_pkt.dp_Port
+        pkt_type = dos_pkt.dp_Type
         log_file.info(
             "FS DosPacket: msg=%06x -> pkt=%06x: reply_port=%06x type=%06x",
             msg_addr,
@@ -267,9 +357,9 @@ class FileManager:
         )
         # handle packet
         if pkt_type == ord("R"):  # read
-            fh_b_addr = dos_pkt.r_s("dp_Arg1")
-            buf_ptr = dos_pkt.r_s("dp_Arg2")
-            size = dos_pkt.r_s("dp_Arg3")
+            fh_b_addr = dos_pkt.dp_Arg1
+            buf_ptr = dos_pkt.dp_Arg2
+            size = dos_pkt.dp_Arg3
             # get fh and read
             fh = self.get_by_b_addr(fh_b_addr)
             data = fh.read(size)
@@ -283,11 +373,11 @@ class FileManager:
                 got,
                 fh,
             )
-            dos_pkt.w_s("dp_Res1", got)
+            dos_pkt.dp_Res1 = got
         elif pkt_type == ord("W"):  # write
-            fh_b_addr = dos_pkt.r_s("dp_Arg1")
-            buf_ptr = dos_pkt.r_s("dp_Arg2")
-            size = dos_pkt.r_s("dp_Arg3")
+            fh_b_addr = dos_pkt.dp_Arg1
+            buf_ptr = dos_pkt.dp_Arg2
+            size = dos_pkt.dp_Arg3
             fh = self.get_by_b_addr(fh_b_addr)
             data = self.mem.r_block(buf_ptr, size)
             fh.write(data)
@@ -300,9 +390,10 @@ class FileManager:
                 put,
                 fh,
             )
-            dos_pkt.w_s("dp_Res1", put)
+            dos_pkt.dp_Res1 = put
         else:
             raise UnsupportedFeatureError("Unsupported DosPacket: type=%d" % pkt_type)
+        pkt_codec.write(self.mem, dos_pkt_addr, dos_pkt)
         # do reply
         if not port_mgr.has_port(reply_port_addr):
             port_mgr.register_port(reply_port_addr)
@@ -312,9 +403,10 @@ class FileManager:
     def console_put_msg(self, port_mgr, msg_addr):
         msg = AccessStruct(self.mem, MessageStruct, struct_addr=msg_addr)
         dos_pkt_addr = msg.r_s("mn_Node.ln_Name")
-        dos_pkt = AccessStruct(self.mem, DosPacketStruct, struct_addr=dos_pkt_addr)
-        reply_port_addr = dos_pkt.r_s("dp_Port")
-        pkt_type = dos_pkt.r_s("dp_Type")
+        pkt_codec = StructCodec.for_struct(DosPacketStruct)
+        dos_pkt = pkt_codec.read(self.mem, dos_pkt_addr)
+        reply_port_addr = dos_pkt.dp_Port
+        pkt_type = dos_pkt.dp_Type
         log_file.info(
             "Console DosPacket: msg=%06x -> pkt=%06x: reply_port=%06x type=%06x",
             msg_addr,
@@ -323,7 +415,8 @@ class FileManager:
             pkt_type,
         )
         # fake result
-        dos_pkt.w_s("dp_Res1", 0)
+        dos_pkt.dp_Res1 = 0
+        pkt_codec.write(self.mem, dos_pkt_addr, dos_pkt)
         # do reply
         if not port_mgr.has_port(reply_port_addr):
             port_mgr.register_port(reply_port_addr)
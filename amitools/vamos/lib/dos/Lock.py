@@ -1,29 +1,53 @@
-import os
 import stat
+import struct
 import uuid
 
 from amitools.vamos.log import log_lock
 
-from amitools.vamos.astructs import AccessStruct
-from amitools.vamos.libstructs import FileLockStruct, DateStampStruct
+from amitools.vamos.libstructs import FileLockStruct, ExAllDataStruct
+from amitools.vamos.path import HostBackend
 from .DosProtection import DosProtection
 from .AmiTime import *
 from .Error import *
 
+# ExAll() data types
+ED_NAME = 1
+ED_TYPE = 2
+ED_SIZE = 3
+ED_PROTECTION = 4
+ED_DATE = 5
+ED_COMMENT = 6
+ED_OWNER = 7
+
+# size of an ExAllData entry holding the fields up to a data type
+ed_sizes = {
+    ED_NAME: ExAllDataStruct.sdef.ed_Type.offset,
+    ED_TYPE: ExAllDataStruct.sdef.ed_Size.offset,
+    ED_SIZE: ExAllDataStruct.sdef.ed_Prot.offset,
+    ED_PROTECTION: ExAllDataStruct.sdef.ed_Days.offset,
+    ED_DATE: ExAllDataStruct.sdef.ed_Comment.offset,
+    ED_COMMENT: ExAllDataStruct.sdef.ed_OwnerUID.offset,
+    ED_OWNER: ExAllDataStruct.get_size(),
+}
+
 
 class Lock:
     """represent an AmigaOS Lock in vamos"""
 
-    def __init__(self, name, ami_path, sys_path, exclusive=False):
+    def __init__(self, name, ami_path, sys_path, exclusive=False, backend=None):
+        if backend is None:
+            backend = HostBackend()
         self.ami_path = ami_path
         self.sys_path = sys_path
         self.name = name
         self.exclusive = exclusive
+        self.backend = backend
         self.mem = None
         self.b_addr = 0
         self.vol_addr = 0
         self.key = 0
         self.dirent = None
+        self.exall_entries = None
 
     def __repr__(self):
         addr = 0
@@ -54,102 +78,198 @@ class Lock:
 
     # --- lock ops ---
 
-    def _examine_file(self, fib_mem, name, sys_path, key):
-        # name
-        name_addr = fib_mem.s_get_addr("fib_FileName")
-        # clear 32 name bytes
-        mem = fib_mem.mem
-        mem.clear_block(name_addr, 32, 0)
-        mem.w_cstr(name_addr, name)
+    def _examine_file(self, fib, name, sys_path, key, entry=None):
+        # fib is a FileInfoBlock record of the StructCodec
+        # name (keep terminating zero)
+        fib.fib_FileName = name.encode("latin-1")[:107]
         # comment
-        comment_addr = fib_mem.s_get_addr("fib_Comment")
-        mem.w_cstr(comment_addr, "")
+        fib.fib_Comment = b""
         # create the "inode" information
-        fib_mem.w_s("fib_DiskKey", key)
+        fib.fib_DiskKey = key
         log_lock.debug("examine key: %08x", key)
-        # type
-        if os.path.isdir(sys_path):
-            dirEntryType = 2
-        else:
-            dirEntryType = -3
-        fib_mem.w_s("fib_DirEntryType", dirEntryType)
-        fib_mem.w_s("fib_EntryType", dirEntryType)
-        # protection
-        prot = DosProtection(0)
+        # query all infos with a single stat (cached in the dir entry)
         try:
-            os_stat = os.stat(sys_path)
-            mode = os_stat.st_mode
-            if mode & stat.S_IXUSR == 0:
-                prot.clr(DosProtection.FIBF_EXECUTE)
-            if mode & stat.S_IRUSR == 0:
-                prot.clr(DosProtection.FIBF_READ)
-            if mode & stat.S_IWUSR == 0:
-                prot.clr(DosProtection.FIBF_WRITE)
-            log_lock.debug("examine lock: '%s' mode=%03o: prot=%s", name, mode, prot)
+            if entry:
+                os_stat = entry.stat()
+            else:
+                os_stat = self.backend.stat(sys_path)
         except OSError:
+            fib.fib_DirEntryType = -3
+            fib.fib_EntryType = -3
             return ERROR_OBJECT_IN_USE
-        fib_mem.w_s("fib_Protection", prot.mask)
+        dirEntryType, size, prot, at = self._get_stat_info(os_stat)
+        fib.fib_DirEntryType = dirEntryType
+        fib.fib_EntryType = dirEntryType
+        log_lock.debug(
+            "examine lock: '%s' mode=%03o: prot=%s", name, os_stat.st_mode, prot
+        )
+        fib.fib_Protection = prot.mask
         # size
-        if os.path.isfile(sys_path):
-            size = os.path.getsize(sys_path)
-            # limit to 32bit
-            if size > 0xFFFFFFFF:
-                size = 0xFFFFFFFF
-            fib_mem.w_s("fib_Size", size)
+        if size is not None:
+            fib.fib_Size = size
             blocks = (size + 511) // 512
-            fib_mem.w_s("fib_NumBlocks", blocks)
+            fib.fib_NumBlocks = blocks
             log_lock.debug(
                 "examine lock: '%s' size=%d, blocks=%d", sys_path, size, blocks
             )
         else:
-            fib_mem.w_s("fib_NumBlocks", 1)
+            fib.fib_NumBlocks = 1
             log_lock.debug("examine lock: '%s' no file", sys_path)
         # date (use mtime here)
-        date_addr = fib_mem.s_get_addr("fib_Date")
-        date = AccessStruct(fib_mem.mem, DateStampStruct, date_addr)
-        t = os.path.getmtime(sys_path)
-        at = sys_to_ami_time(t)
-        date.w_s("ds_Days", at.tday)
-        date.w_s("ds_Minute", at.tmin)
-        date.w_s("ds_Tick", at.tick)
+        date = fib.fib_Date
+        date.ds_Days = at.tday
+        date.ds_Minute = at.tmin
+        date.ds_Tick = at.tick
         # fill in UID/GID
-        fib_mem.w_s("fib_OwnerUID", 0)
-        fib_mem.w_s("fib_OwnerGID", 0)
+        fib.fib_OwnerUID = 0
+        fib.fib_OwnerGID = 0
         return NO_ERROR
 
-    def examine_lock(self, fib_mem):
-        return self._examine_file(fib_mem, self.name, self.sys_path, self.key)
+    def _get_stat_info(self, os_stat):
+        """return entry type, size (None if no file), protection and date"""
+        mode = os_stat.st_mode
+        # type
+        if stat.S_ISDIR(mode):
+            dirEntryType = 2
+        else:
+            dirEntryType = -3
+        # protection
+        prot = DosProtection(0)
+        if mode & stat.S_IXUSR == 0:
+            prot.clr(DosProtection.FIBF_EXECUTE)
+        if mode & stat.S_IRUSR == 0:
+            prot.clr(DosProtection.FIBF_READ)
+        if mode & stat.S_IWUSR == 0:
+            prot.clr(DosProtection.FIBF_WRITE)
+        # size limited to 32bit
+        if stat.S_ISREG(mode):
+            size = min(os_stat.st_size, 0xFFFFFFFF)
+        else:
+            size = None
+        at = sys_to_ami_time(os_stat.st_mtime)
+        return dirEntryType, size, prot, at
+
+    def _scan_dir(self):
+        """return the os.scandir() entries of the locked dir"""
+        try:
+            return self.backend.scandir(self.sys_path)
+        except OSError:
+            return []
+
+    def examine_lock(self, fib):
+        """fill the FileInfoBlock record fib with infos on the locked object"""
+        return self._examine_file(fib, self.name, self.sys_path, self.key)
 
-    def examine_next(self, fib_mem):
+    def examine_next(self, fib):
+        """fill the FileInfoBlock record fib with the next dir entry"""
         # start scan
         if self.dirent is None:
             # scan real dir
-            if os.path.isdir(self.sys_path):
-                self.dirent = os.listdir(self.sys_path)
-            else:
-                self.dirent = []
+            self.dirent = self._scan_dir()
             # assume that key stored in given FIB is my own one
             # (otherwise no Examine() on my lock was done before..., aka broken code!)
-            self._check_disk_key(fib_mem)
+            self._check_disk_key(fib)
             index = 0
         else:
-            index = fib_mem.r_s("fib_DiskKey")
+            index = fib.fib_DiskKey
 
         if index < len(self.dirent):
             entry = self.dirent[index]
-            e_path = os.path.join(self.sys_path, entry)
-            return self._examine_file(fib_mem, entry, e_path, index + 1)
+            return self._examine_file(fib, entry.name, entry.path, index + 1, entry)
         else:
             self.dirent = None
             return ERROR_NO_MORE_ENTRIES
 
-    def _check_disk_key(self, fib_mem):
+    def examine_all(self, mem, buf_addr, buf_size, data_type, last_key, match=None):
+        """fill a buffer with linked ExAllData entries of the locked dir
+
+        last_key is the eac_LastKey of the ExAllControl. match(name, ed_addr)
+        is called with each entry written to the buffer and may reject it.
+
+        return error, number of entries and new last_key. The error is
+        NO_ERROR if more entries are pending and ERROR_NO_MORE_ENTRIES if
+        the scan is done.
+        """
+        ed_size = ed_sizes.get(data_type)
+        if ed_size is None:
+            return ERROR_BAD_NUMBER, 0, last_key
+        if self.exall_entries is None or last_key == 0:
+            self.exall_entries = self._scan_dir()
+            last_key = 0
+        entries = self.exall_entries
+        num_entries = len(entries)
+        index = last_key
+        buf_end = buf_addr + buf_size
+        pos = buf_addr
+        last_addr = 0
+        num = 0
+        while index < num_entries:
+            entry = entries[index]
+            try:
+                os_stat = entry.stat()
+            except OSError:
+                index += 1
+                continue
+            name = entry.name.encode("latin-1", "replace")
+            # name and comment are stored after the entry
+            str_addr = pos + ed_size
+            end = str_addr + len(name) + 1
+            if data_type >= ED_COMMENT:
+                end += 1
+            end = (end + 3) & ~3
+            if end > buf_end:
+                break
+            index += 1
+            self._write_exall_data(
+                mem, pos, ed_size, data_type, os_stat, name, str_addr
+            )
+            if match and not match(entry.name, pos):
+                continue
+            if last_addr:
+                mem.w32(last_addr, pos)
+            last_addr = pos
+            pos = end
+            num += 1
+        if index >= num_entries:
+            self.exall_entries = None
+            return ERROR_NO_MORE_ENTRIES, num, index
+        # not even a single entry fits
+        if num == 0:
+            return ERROR_BUFFER_OVERFLOW, 0, index
+        return NO_ERROR, num, index
+
+    def examine_all_end(self):
+        """abort an ExAll() scan"""
+        self.exall_entries = None
+
+    def _write_exall_data(self, mem, addr, ed_size, data_type, os_stat, name, str_addr):
+        mem.w32(addr, 0)
+        mem.w32(addr + 4, str_addr)
+        mem.w_block(str_addr, name + b"\0")
+        if data_type < ED_TYPE:
+            return
+        dirEntryType, size, prot, at = self._get_stat_info(os_stat)
+        # type, size, prot, days, mins, ticks
+        data = [dirEntryType & 0xFFFFFFFF, size or 0, prot.mask]
+        data += [at.tday, at.tmin, at.tick]
+        if data_type >= ED_COMMENT:
+            # empty comment
+            comment_addr = str_addr + len(name) + 1
+            mem.w8(comment_addr, 0)
+            data.append(comment_addr)
+        if data_type >= ED_OWNER:
+            # UID and GID
+            data.append(0)
+        num = (ed_size - 8) // 4
+        mem.w_block(addr + 8, struct.pack(">%dI" % num, *data[:num]))
+
+    def _check_disk_key(self, fib):
         # make sure its a dir entry
-        dirEntryType = fib_mem.r_s("fib_DirEntryType")
+        dirEntryType = fib.fib_DirEntryType
         if dirEntryType != 2:
             log_lock.warning("fib type is not dir on first ExNext()!")
         # make sure fib_key is mine
-        fib_key = fib_mem.r_s("fib_DiskKey")
+        fib_key = fib.fib_DiskKey
         if fib_key != self.key:
             log_lock.warning(
                 "first ExNext() does not start at Examine()d lock!"
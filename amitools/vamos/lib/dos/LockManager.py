@@ -1,4 +1,3 @@
-import os.path
 import logging
 
 from amitools.util import SlotArray
@@ -88,11 +87,11 @@ class LockManager:
         # register lock in key (with baddr allocated above)
         lock_key.add_lock(lock)
 
-        log_lock.info("registered: %s" % lock)
+        log_lock.info("registered: %s", lock)
         return lock
 
     def _unregister_lock(self, lock):
-        log_lock.info("unregistered: %s" % lock)
+        log_lock.info("unregistered: %s", lock)
         # fetch key and lock_key
         slot_id = lock.key
         lock_key = self.keys[slot_id]
@@ -120,7 +119,8 @@ class LockManager:
         if sys_path is None:
             log_lock.info("lock '%s' invalid: no sys path found: '%s'", name, ami_path)
             return None
-        exists = os.path.exists(sys_path)
+        backend = self.path_mgr.get_backend(sys_path)
+        exists = backend.exists(sys_path)
         if not exists:
             log_lock.info(
                 "lock '%s' invalid: sys path does not exist: '%s' -> '%s'",
@@ -129,7 +129,7 @@ class LockManager:
                 sys_path,
             )
             return None
-        lock = Lock(name, ami_path, sys_path, exclusive)
+        lock = Lock(name, ami_path, sys_path, exclusive, backend)
         return self._register_lock(lock)
 
     def dup_lock(self, lock):
@@ -166,6 +166,30 @@ class LockManager:
         if lock and lock.b_addr != 0:
             self._unregister_lock(lock)
 
+    def get_state(self):
+        """return the lock keys and their locks for set_state()"""
+        slots = self.keys.get_state()
+        lock_keys = []
+        for val in slots[0]:
+            if isinstance(val, LockKey):
+                locks = [
+                    (lock, lock.dirent, lock.exall_entries)
+                    for lock in val.locks_by_baddr.values()
+                ]
+                lock_keys.append((val, locks))
+        return (slots, dict(self.sys_path_to_key_map), lock_keys)
+
+    def set_state(self, state):
+        slots, key_map, lock_keys = state
+        self.keys.set_state(slots)
+        self.sys_path_to_key_map = dict(key_map)
+        for lock_key, locks in lock_keys:
+            lock_key.locks_by_baddr = {}
+            for lock, dirent, exall_entries in locks:
+                lock.dirent = dirent
+                lock.exall_entries = exall_entries
+                lock_key.add_lock(lock)
+
     def volume_name_of_lock(self, lock):
         if lock is None:
             return "SYS:"
@@ -1,4 +1,4 @@
-from amitools.vamos.astructs import AccessStruct
+from amitools.vamos.astructs import AccessStruct, StructCodec
 from amitools.vamos.libstructs import (
     AnchorPathStruct,
     AChainStruct,
@@ -68,8 +68,10 @@ class MatchFirstNext:
         if lock == None:
             return ERROR_OBJECT_NOT_FOUND
         fib_ptr = self.anchor.s_get_addr("ap_Info")
-        fib = AccessStruct(ctx.mem, FileInfoBlockStruct, struct_addr=fib_ptr)
+        fib_codec = StructCodec.for_struct(FileInfoBlockStruct)
+        fib = fib_codec.read(ctx.mem, fib_ptr)
         io_err = lock.examine_lock(fib)
+        fib_codec.write(ctx.mem, fib_ptr, fib)
         self.lock_mgr.release_lock(lock)
         # store path name of first name at end of structure
         if self.str_len > 0:
@@ -1,3 +1,6 @@
+import re
+from amitools.util import LRUCache
+
 # pattern match constants
 P_ANY = 0x80
 P_SINGLE = 0x81
@@ -27,6 +30,10 @@ p_txt = {
     P_STOP: "P_STOP",
 }
 
+# parsed patterns and compiled matchers
+_parse_cache = LRUCache(256)
+_matcher_cache = LRUCache(256)
+
 
 class Pattern:
     def __init__(self, src_str, pat_str, ignore_case, has_wildcard):
@@ -34,6 +41,8 @@ class Pattern:
         self.pat_str = pat_str
         self.ignore_case = ignore_case
         self.has_wildcard = has_wildcard
+        # compiled matcher function
+        self.matcher = None
 
     def __str__(self):
         return "[src='%s'->pat='%s',ignore_case=%s,has_wildcard=%s]" % (
@@ -56,7 +65,19 @@ def _pop_non_or(blocks, dst):
 
 
 def pattern_parse(src_str, ignore_case=True, star_is_wild=False):
-    """tokenize pattern. return tokenized pattern or None if an error occurred"""
+    """tokenize pattern. return tokenized pattern or None if an error occurred
+
+    the patterns are cached. do not modify the result.
+    """
+    key = (src_str, ignore_case, star_is_wild)
+    pattern = _parse_cache.get(key, False)
+    if pattern is False:
+        pattern = _pattern_parse(src_str, ignore_case, star_is_wild)
+        _parse_cache.put(key, pattern)
+    return pattern
+
+
+def _pattern_parse(src_str, ignore_case, star_is_wild):
     dst = ""
     n_src = len(src_str)
 
@@ -336,8 +357,8 @@ def _scan_or_block(pat, pat_pos, str_pos, markers):
         pat_pos += 1
 
 
-def pattern_match(pattern, in_str, debug=False):
-    """match pattern pat against str and return True/False"""
+def pattern_interpret(pattern, in_str, debug=False):
+    """match pattern pat against str with the interpreter and return True/False"""
     if pattern.ignore_case:
         tr = lambda x: x.lower()
     else:
@@ -591,3 +612,122 @@ if __name__ == "__main__":
                 for a in sys.argv[2:]:
                     match = pattern_match(pat, a, debug=True)
                     print("'%s' -> %s" % (a, match))
+
+
+# ----- pattern compiler -----
+
+
+def _class_regex(body, negate):
+    """convert the body of a [...] class into a regex class"""
+    ranges = []
+    n = len(body)
+    pos = 0
+    while pos < n:
+        begin = end = ord(body[pos])
+        pos += 1
+        if pos < n and body[pos] == "-":
+            pos += 1
+            if pos < n:
+                # the end char is also tried as next class char
+                end = ord(body[pos])
+            else:
+                # '-]' -> match until 255
+                end = 255
+        if begin <= end:
+            ranges.append("\\U%08x-\\U%08x" % (begin, end))
+    if not ranges:
+        # empty class matches nothing, negated one any char
+        return "." if negate else "(?!)"
+    return "[%s%s]" % ("^" if negate else "", "".join(ranges))
+
+
+def _pattern_regex(pat):
+    """convert a tokenized pattern without NOT blocks to a regex string"""
+    res = []
+    n = len(pat)
+    pos = 0
+    while pos < n:
+        ch = pat[pos]
+        cmd = ord(ch)
+        if cmd == P_ANY:
+            res.append(".*")
+        elif cmd == P_SINGLE:
+            res.append(".")
+        elif cmd in (P_ORSTART, P_REPBEG):
+            res.append("(?:")
+        elif cmd == P_ORNEXT:
+            res.append("|")
+        elif cmd == P_OREND:
+            res.append(")")
+        elif cmd == P_REPEND:
+            res.append(")*")
+        elif cmd in (P_CLASS, P_NOTCLASS):
+            end = pat.index(chr(P_CLASS), pos + 1)
+            res.append(_class_regex(pat[pos + 1 : end], cmd == P_NOTCLASS))
+            pos = end
+        elif cmd in (P_NOT, P_NOTEND, P_STOP):
+            return None
+        else:
+            res.append(re.escape(ch))
+        pos += 1
+    return "".join(res)
+
+
+def _pattern_compile(pat_str, ignore_case):
+    # a NOT block around the whole pattern negates the match
+    negate = False
+    if (
+        len(pat_str) > 1
+        and ord(pat_str[0]) == P_NOT
+        and ord(pat_str[-1]) == P_NOTEND
+        and _seek_end(pat_str, 1, P_NOT, P_NOTEND) == len(pat_str) - 1
+    ):
+        negate = True
+        pat_str = pat_str[1:-1]
+    regex = _pattern_regex(pat_str)
+    if regex is not None:
+        try:
+            fullmatch = re.compile(regex, re.DOTALL).fullmatch
+        except re.error:
+            fullmatch = None
+        if fullmatch:
+            if negate:
+                if ignore_case:
+                    return lambda s: fullmatch(s.lower()) is None
+                return lambda s: fullmatch(s) is None
+            if ignore_case:
+                return lambda s: fullmatch(s.lower()) is not None
+            return lambda s: fullmatch(s) is not None
+    # interpret other patterns
+    if negate:
+        pat_str = chr(P_NOT) + pat_str + chr(P_NOTEND)
+    pattern = Pattern(None, pat_str, ignore_case, True)
+    return lambda s: pattern_interpret(pattern, s)
+
+
+def pattern_compile(pattern):
+    """return a matcher function for the pattern that returns True/False
+
+    the matchers are cached by tokenized pattern and case flag.
+    """
+    matcher = pattern.matcher
+    if matcher is None:
+        key = (pattern.pat_str, pattern.ignore_case)
+        matcher = _matcher_cache.get(key)
+        if matcher is None:
+            matcher = _pattern_compile(pattern.pat_str, pattern.ignore_case)
+            _matcher_cache.put(key, matcher)
+        pattern.matcher = matcher
+    return matcher
+
+
+def pattern_match(pattern, in_str, debug=False):
+    """match pattern pat against str and return True/False"""
+    if debug:
+        return pattern_interpret(pattern, in_str, debug)
+    return pattern_compile(pattern)(in_str)
+
+
+def pattern_cache_stats():
+    """return hits and misses of the pattern caches"""
+    return {"parse": _parse_cache.get_stats(), "match": _matcher_cache.get_stats()}
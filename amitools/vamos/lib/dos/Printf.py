@@ -1,6 +1,7 @@
 """Handle printf like Functions including VPrintf and RawDoFmt"""
 
 import re
+from amitools.util import LRUCache
 from amitools.util.Math import *
 
 
@@ -16,6 +17,21 @@ class printf_element:
         self.width_limit = width_limit
         self.length = length
         self.data = None
+        self.sys_fmt = None
+
+    def clone(self):
+        """return a copy without data"""
+        e = printf_element(
+            self.txt,
+            self.begin,
+            self.end,
+            self.etype,
+            self.flags,
+            self.width_limit,
+            self.length,
+        )
+        e.sys_fmt = self.sys_fmt
+        return e
 
     def __str__(self):
         sf = self.gen_sys_printf_format()
@@ -54,7 +70,10 @@ class printf_element:
         return "".join(result)
 
     def gen_value(self):
-        fmt = self.gen_sys_printf_format()
+        fmt = self.sys_fmt
+        if fmt is None:
+            fmt = self.gen_sys_printf_format()
+            self.sys_fmt = fmt
         val = self.data
 
         # handle negative values in '%d'
@@ -85,8 +104,30 @@ class printf_state:
 
 printf_re_format = r"%([-]?)([0-9]*\.?[0-9]*)?([l])?([bduxsc%])"
 
+_format_cache = LRUCache(128)
+
 
 def printf_parse_string(string):
+    """parse a format string and return a new printf_state
+
+    the parsed elements are cached by format string.
+    """
+    proto = _format_cache.get(string)
+    if proto is None:
+        proto = _printf_parse_string(string)
+        for e in proto.elements:
+            e.sys_fmt = e.gen_sys_printf_format()
+        _format_cache.put(string, proto)
+    elements = [e.clone() for e in proto.elements]
+    return printf_state(elements, list(proto.fragments))
+
+
+def printf_cache_stats():
+    """return hits and misses of the format cache"""
+    return _format_cache.get_stats()
+
+
+def _printf_parse_string(string):
     # groups in pattern:
     # 1 flags (opt)
     # 2 width_limit (opt)
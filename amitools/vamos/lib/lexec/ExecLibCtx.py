@@ -18,3 +18,9 @@ class ExecLibCtx(LibCtx):
 
     def set_process(self, process):
         self.process = process
+
+    def get_state(self):
+        return self.process
+
+    def set_state(self, process):
+        self.process = process
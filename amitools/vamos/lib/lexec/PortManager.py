@@ -1,4 +1,5 @@
-from amitools.vamos.libstructs import MsgPortStruct
+from amitools.vamos.astructs import StructCodec
+from amitools.vamos.libstructs import MsgPortStruct, NodeType
 from amitools.vamos.error import *
 
 
@@ -49,9 +50,22 @@ class PortManager:
         mem = self.alloc.alloc_struct(MsgPortStruct, label=name)
         port = Port(name, self, mem=mem, handler=py_msg_handler)
         addr = mem.addr
+        self._init_port(addr)
         self.ports[addr] = port
         return addr
 
+    def _init_port(self, addr):
+        # setup node type and empty message list with a single write
+        codec = StructCodec.for_struct(MsgPortStruct)
+        port = codec.new_value()
+        port.mp_Node.ln_Type = NodeType.NT_MSGPORT
+        msg_list = port.mp_MsgList
+        list_addr = addr + MsgPortStruct.sdef.mp_MsgList.offset
+        msg_list.lh_Head = list_addr + 4
+        msg_list.lh_TailPred = list_addr
+        msg_list.lh_Type = NodeType.NT_MESSAGE
+        codec.write(self.alloc.mem, addr, port)
+
     def free_port(self, addr):
         if addr in self.ports:
             port = self.ports[addr]
@@ -63,6 +77,24 @@ class PortManager:
         else:
             raise VamosInternalError("Invalid Port free mem: %06x" % addr)
 
+    def get_state(self):
+        """return the ports and their queued messages for set_state()"""
+        state = []
+        for port in self.ports.values():
+            queue = port.queue
+            if queue is not None:
+                queue = list(queue)
+            state.append((port, queue))
+        return state
+
+    def set_state(self, state):
+        self.ports = {}
+        for port, queue in state:
+            if queue is not None:
+                queue = list(queue)
+            port.queue = queue
+            self.ports[port.addr] = port
+
     def register_port(self, addr):
         name = "IntPort@%06x" % addr
         port = Port(name, self, addr=addr)
@@ -57,6 +57,19 @@ class SemaphoreManager:
         else:
             return self.semaphores[addr]
 
+    def get_state(self):
+        """return the semaphores and their names for set_state()"""
+        sems = [(sem, sem.name) for sem in self.semaphores.values()]
+        return (sems, dict(self.semaphores_by_name))
+
+    def set_state(self, state):
+        sems, by_name = state
+        self.semaphores = {}
+        for sem, name in sems:
+            sem.name = name
+            self.semaphores[sem.addr] = sem
+        self.semaphores_by_name = dict(by_name)
+
     def unregister_semaphore(self, addr):
         if addr in self.semaphores:
             semaphore = self.semaphores[addr]
@@ -2,6 +2,7 @@ from .impl import LibImpl, LibImplScanner, LibImplScan, LibImplFunc, LibImplFunc
 from .registry import LibRegistry
 from .ctx import LibCtx
 from .stub import LibStub, LibStubGen
+from .stubcode import LibStubCodeGen
 from .proxy import LibProxy, LibProxyGen
 from .profile import LibFuncProfileData, LibProfileData, LibProfiler
 from .jumptab import LibJumpTable, NoJumpTableEntryError
@@ -3,6 +3,7 @@ from amitools.vamos.libtypes import Library
 from amitools.fd import read_lib_fd, generate_fd
 from .vlib import VLib
 from .stub import LibStubGen
+from .stubcode import LibStubCodeGen
 from .patch import LibPatcherMultiTrap
 from .impl import LibImplScanner
 
@@ -10,6 +11,11 @@ from .impl import LibImplScanner
 class LibCreator(object):
     """create a vamos internal libs"""
 
+    stub_gen_types = {
+        LibStubGen.name: LibStubGen,
+        LibStubCodeGen.name: LibStubCodeGen,
+    }
+
     def __init__(
         self,
         alloc,
@@ -18,13 +24,18 @@ class LibCreator(object):
         log_missing=None,
         log_valid=None,
         lib_profiler=None,
+        metrics=None,
     ):
         self.alloc = alloc
         self.traps = traps
         # options
         self.fd_dir = fd_dir
         self.profiler = lib_profiler
+        self.metrics = metrics
+        self.log_missing = log_missing
+        self.log_valid = log_valid
         self.stub_gen = LibStubGen(log_missing=log_missing, log_valid=log_valid)
+        self.stub_gens = {self.stub_gen.name: self.stub_gen}
 
     def _create_library(self, info, is_dev, fd):
         if is_dev:
@@ -58,6 +69,21 @@ class LibCreator(object):
     def get_profiler(self):
         return self.profiler
 
+    def _get_stub_gen(self, lib_cfg):
+        if lib_cfg is None:
+            return self.stub_gen
+        name = lib_cfg.stub_gen
+        stub_gen = self.stub_gens.get(name)
+        if stub_gen is None:
+            stub_gen_cls = self.stub_gen_types.get(name)
+            if stub_gen_cls is None:
+                raise ValueError("create_lib: invalid stub generator: %s" % name)
+            stub_gen = stub_gen_cls(
+                log_missing=self.log_missing, log_valid=self.log_valid
+            )
+            self.stub_gens[name] = stub_gen
+        return stub_gen
+
     def create_lib(self, info, ctx, impl=None, lib_cfg=None, check=False):
         name = info.get_name()
         if name.endswith(".device"):
@@ -89,11 +115,12 @@ class LibCreator(object):
         else:
             profile = None
         # create stub
+        stub_gen = self._get_stub_gen(lib_cfg)
         if scan is None:
-            stub = self.stub_gen.gen_fake_stub(name, fd, ctx, profile)
+            stub = stub_gen.gen_fake_stub(name, fd, ctx, profile)
             struct = LibraryStruct
         else:
-            stub = self.stub_gen.gen_stub(scan, ctx, profile)
+            stub = stub_gen.gen_stub(scan, ctx, profile)
             struct = impl.get_struct_def()
         # adjust info pos/neg size
         if info.pos_size == 0:
@@ -104,7 +131,7 @@ class LibCreator(object):
         library = self._create_library(info, is_dev, fd)
         addr = library.get_addr()
         # patcher
-        patcher = LibPatcherMultiTrap(self.alloc, self.traps, stub)
+        patcher = LibPatcherMultiTrap(self.alloc, self.traps, stub, self.metrics)
         patcher.patch_jump_table(addr)
         # fix lib sum
         library.update_sum()
@@ -27,6 +27,20 @@ class LibImpl(object):
     def close_lib(self, ctx, open_cnt):
         pass
 
+    def get_state(self):
+        """return the state of the lib for set_state(), e.g. for a snapshot.
+
+        libs that keep state in attributes have to overwrite both calls.
+        """
+        if vars(self):
+            raise VamosInternalError(
+                "lib impl %s has no state hooks" % type(self).__name__
+            )
+        return None
+
+    def set_state(self, state):
+        pass
+
 
 LibImplFunc = collections.namedtuple(
     "LibImplFunc",
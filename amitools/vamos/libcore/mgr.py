@@ -47,6 +47,7 @@ class VLibManager(object):
             log_missing=log_missing,
             log_valid=log_valid,
             lib_profiler=self.lib_profiler,
+            metrics=self.machine.get_metrics(),
         )
 
     def set_ctx_extra_attr(self, key, val):
@@ -57,6 +58,16 @@ class VLibManager(object):
         for key, val in self.ctx_extra_attr.items():
             setattr(ctx, key, val)
 
+    def get_state(self):
+        """return the maps of the vlibs and contexts for set_state()"""
+        return (dict(self.addr_vlib), dict(self.name_vlib), dict(self.ctx_map))
+
+    def set_state(self, state):
+        addr_vlib, name_vlib, ctx_map = state
+        self.addr_vlib = dict(addr_vlib)
+        self.name_vlib = dict(name_vlib)
+        self.ctx_map = dict(ctx_map)
+
     def add_impl_cls(self, name, impl_cls):
         self.lib_reg.add_lib_impl(name, impl_cls)
 
@@ -64,7 +75,7 @@ class VLibManager(object):
         self.ctx_map[name] = ctx
         self._add_ctx_extra_attr(ctx)
 
-    def bootstrap_exec(self, exec_info=None, version=0, revision=0):
+    def bootstrap_exec(self, exec_info=None, version=0, revision=0, lib_cfg=None):
         """setup exec library"""
         if exec_info is None:
             date = datetime.date(day=7, month=7, year=2007)
@@ -72,7 +83,7 @@ class VLibManager(object):
         # make sure its an exec info
         assert exec_info.get_name() == "exec.library"
         # create vlib
-        vlib = self._create_vlib(exec_info, False)
+        vlib = self._create_vlib(exec_info, False, lib_cfg)
         assert vlib
         assert vlib.impl
         # setup exec_lib
@@ -4,10 +4,11 @@ from .jumptab import LibJumpTable
 class LibPatcherMultiTrap(object):
     """patch in a stub by adding traps for each call"""
 
-    def __init__(self, alloc, traps, stub):
+    def __init__(self, alloc, traps, stub, metrics=None):
         self.alloc = alloc
         self.traps = traps
         self.stub = stub
+        self.metrics = metrics
         self.tids = []
         self.mem_obj = None
         self.trap_base = None
@@ -32,7 +33,11 @@ class LibPatcherMultiTrap(object):
         addr = self.mem_obj.addr
         self.trap_base = addr
         mem = self.alloc.mem
+        metrics = self.metrics
         for func in func_table:
+            # count and time the calls in the run metrics
+            if metrics:
+                func = metrics.wrap_trap(self.stub.name, func)
             # setup new patch
             tid = self.traps.setup(func, auto_rts=True)
             if tid < 0:
@@ -46,11 +51,15 @@ class LibPatcherMultiTrap(object):
             # next slot
             addr += 2
 
-    def cleanup(self):
-        """remove traps"""
+    def free_traps(self):
+        """only release the traps but keep the trap block"""
         for tid in self.tids:
             self.traps.free(tid)
         self.tids = []
+
+    def cleanup(self):
+        """remove traps"""
+        self.free_traps()
         # free trap block
         self.alloc.free_memory(self.mem_obj)
         self.mem_obj = None
@@ -60,6 +60,8 @@ class LibStubGen(object):
     """the lib stub generator scans a lib impl and creates stubs for all
     methods found there"""
 
+    name = "closure"
+
     def __init__(self, log_missing=None, log_valid=None, ignore_invalid=True):
         self.log_missing = log_missing
         self.log_valid = log_valid
@@ -256,7 +258,7 @@ class LibStubGen(object):
                 this._gen_arg_dump(func_args, ctx),
                 callee_pc,
             )
-            log.info("{ CALL: %s" % call_info)
+            log.info("{ CALL: %s", call_info)
             res = base_func(this, *args, **kwargs)
             if res is not None:
                 if type(res) in (list, tuple):
@@ -265,7 +267,7 @@ class LibStubGen(object):
                     res_str = "d0=%08x" % int(res)
             else:
                 res_str = "n/a"
-            log.info("} CALL: -> %s" % res_str)
+            log.info("} CALL: -> %s", res_str)
 
         return log_func
 
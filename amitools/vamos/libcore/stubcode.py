@@ -0,0 +1,109 @@
+import time
+
+from amitools.vamos.machine.regs import REG_D0, REG_D1
+from .stub import LibStubGen
+
+
+class LibStubCodeGen(LibStubGen):
+    """a stub generator that creates specialised Python source code for each
+    valid function of a library and compiles it once at library setup.
+
+    In contrast to the closure based LibStubGen the register reads of all
+    arguments are unrolled, the handling of the return value is chosen by
+    the return annotation of the impl method (if any) and profiling is
+    inlined into the generated function.
+
+    Logging and missing functions are handled by the base class.
+    """
+
+    name = "code"
+
+    def __init__(self, log_missing=None, log_valid=None, ignore_invalid=True):
+        super().__init__(log_missing, log_valid, ignore_invalid)
+        # store generated sources by func name for inspection
+        self.sources = {}
+
+    def get_source(self, name):
+        return self.sources.get(name)
+
+    def _wrap_func(self, stub, impl_func, ctx, profile):
+        fd_func = impl_func.fd_func
+        log = self.log_valid
+        if log:
+            # logging wraps the base function, so keep profiling outside
+            func = self._gen_code_func(impl_func, ctx, None)
+            func = self._gen_log_func(stub, fd_func, func, ctx, log)
+            if profile:
+                func = self._gen_profile_func(fd_func, profile, func)
+            return func
+        else:
+            return self._gen_code_func(impl_func, ctx, profile)
+
+    def _gen_code_func(self, impl_func, ctx, profile):
+        """generate and compile the stub function for an impl func"""
+        glob = {"ctx": ctx, "method": impl_func.method}
+        lines = ["def stub_func(this, *args, **kwargs):"]
+        body = []
+        # profiling
+        if profile:
+            index = impl_func.fd_func.get_index()
+            glob["prof"] = profile.get_func_by_index(index)
+            glob["perf_counter"] = time.perf_counter
+            body.append("start = perf_counter()")
+        body.append("cpu = ctx.cpu")
+        # unroll register reads of extra args
+        call_args = ["ctx"]
+        extra_args = impl_func.extra_args
+        if extra_args:
+            for num, arg in enumerate(extra_args):
+                var = "arg%d" % num
+                if arg.type is int:
+                    body.append("%s = cpu.r_reg(%d)" % (var, arg.reg))
+                else:
+                    # bind to type
+                    type_var = "arg_type%d" % num
+                    glob[type_var] = arg.type
+                    body.append(
+                        "%s = %s(cpu=cpu, reg=%d, mem=ctx.mem)"
+                        % (var, type_var, arg.reg)
+                    )
+                call_args.append(var)
+        body.append("res = method(%s)" % ", ".join(call_args))
+        # return value handling
+        body += self._gen_return_code(impl_func.method)
+        if profile:
+            # like the profile wrapper of LibStubGen: no return value
+            body.append("prof.count(perf_counter() - start)")
+        else:
+            body.append("return res")
+        lines += ["    " + line for line in body]
+        source = "\n".join(lines) + "\n"
+        self.sources[impl_func.name] = source
+        # compile and extract function
+        file_name = "<stub:%s>" % impl_func.name
+        code = compile(source, file_name, "exec")
+        exec(code, glob)
+        return glob["stub_func"]
+
+    def _gen_return_code(self, method):
+        d0 = "cpu.w_reg(%d, res & 0xFFFFFFFF)" % REG_D0
+        d0_tuple = "cpu.w_reg(%d, res[0] & 0xFFFFFFFF)" % REG_D0
+        d1_tuple = "cpu.w_reg(%d, res[1] & 0xFFFFFFFF)" % REG_D1
+        anno = getattr(method, "__annotations__", {})
+        if "return" in anno:
+            ret_type = anno["return"]
+            if ret_type is None:
+                return []
+            elif ret_type is int:
+                return ["if res is not None:", "    " + d0]
+            elif ret_type in (tuple, list):
+                return ["if res is not None:", "    " + d0_tuple, "    " + d1_tuple]
+        # unknown at generation time: decide on each call
+        return [
+            "if res is not None:",
+            "    if type(res) in (list, tuple):",
+            "        " + d0_tuple,
+            "        " + d1_tuple,
+            "    else:",
+            "        " + d0,
+        ]
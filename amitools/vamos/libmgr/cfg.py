@@ -9,6 +9,9 @@ class LibCfg(object):
     EXPUNGE_MODE_NO_MEM = "no_mem"
     EXPUNGE_MODE_SHUTDOWN = "shutdown"
 
+    STUB_GEN_CLOSURE = "closure"
+    STUB_GEN_CODE = "code"
+
     valid_create_modes = (
         CREATE_MODE_OFF,
         CREATE_MODE_AUTO,
@@ -23,23 +26,35 @@ class LibCfg(object):
         EXPUNGE_MODE_SHUTDOWN,
     )
 
+    valid_stub_gens = (STUB_GEN_CLOSURE, STUB_GEN_CODE)
+
     def __init__(
-        self, create_mode=None, force_version=None, expunge_mode=None, num_fake_funcs=0
+        self,
+        create_mode=None,
+        force_version=None,
+        expunge_mode=None,
+        num_fake_funcs=0,
+        stub_gen=None,
     ):
         # set defaults
         if create_mode is None:
             create_mode = self.CREATE_MODE_AUTO
         if expunge_mode is None:
             expunge_mode = self.EXPUNGE_MODE_LAST_CLOSE
+        if stub_gen is None:
+            stub_gen = self.STUB_GEN_CLOSURE
         if create_mode not in self.valid_create_modes:
             raise ValueError("invalid create_mode: " + create_mode)
         if expunge_mode not in self.valid_expunge_modes:
             raise ValueError("invalid expunge mode: " + expunge_mode)
+        if stub_gen not in self.valid_stub_gens:
+            raise ValueError("invalid stub gen: " + stub_gen)
         # store values
         self.create_mode = create_mode
         self.force_version = force_version
         self.expunge_mode = expunge_mode
         self.num_fake_funcs = num_fake_funcs
+        self.stub_gen = stub_gen
 
     @classmethod
     def from_dict(cls, cfg):
@@ -47,7 +62,8 @@ class LibCfg(object):
         force_version = cfg.version
         expunge_mode = cfg.expunge
         num_fake_funcs = cfg.num_fake_funcs
-        return cls(create_mode, force_version, expunge_mode, num_fake_funcs)
+        stub_gen = cfg.stub
+        return cls(create_mode, force_version, expunge_mode, num_fake_funcs, stub_gen)
 
     def get_create_mode(self):
         return self.create_mode
@@ -61,12 +77,16 @@ class LibCfg(object):
     def get_num_fake_funcs(self):
         return self.num_fake_funcs
 
+    def get_stub_gen(self):
+        return self.stub_gen
+
     def __eq__(self, other):
         return (
             self.create_mode == other.create_mode
             and self.force_version == other.force_version
             and self.expunge_mode == other.expunge_mode
             and self.num_fake_funcs == other.num_fake_funcs
+            and self.stub_gen == other.stub_gen
         )
 
     def __ne__(self, other):
@@ -75,17 +95,19 @@ class LibCfg(object):
             or self.force_version != other.force_version
             or self.expunge_mode != other.expunge_mode
             or self.num_fake_funcs != other.num_fake_funcs
+            or self.stub_gen != other.stub_gen
         )
 
     def __repr__(self):
         return (
             "LibCfg(create_mode=%s,"
-            " force_version=%s, expunge_mode=%s, num_fake_funcs=%d)"
+            " force_version=%s, expunge_mode=%s, num_fake_funcs=%d, stub_gen=%s)"
             % (
                 self.create_mode,
                 self.force_version,
                 self.expunge_mode,
                 self.num_fake_funcs,
+                self.stub_gen,
             )
         )
 
@@ -20,6 +20,20 @@ class LibManager(object):
         self.vlib_mgr.set_ctx_extra_attr("proxies", self.proxy_mgr)
         cfg.dump(log_libmgr.info)
 
+    def get_state(self):
+        """return the state of vamos and native libs for set_state()"""
+        return (
+            self.vlib_mgr.get_state(),
+            self.alib_mgr.get_state(),
+            self.proxy_mgr.get_state(),
+        )
+
+    def set_state(self, state):
+        vlib_state, alib_state, proxy_state = state
+        self.vlib_mgr.set_state(vlib_state)
+        self.alib_mgr.set_state(alib_state)
+        self.proxy_mgr.set_state(proxy_state)
+
     def get_lib_proxy_mgr(self):
         """access the library proxy manager"""
         return self.proxy_mgr
@@ -52,7 +66,7 @@ class LibManager(object):
         if force_version is not None:
             version = force_version
             log_libmgr.info("exec: force version: %s", version)
-        return self.vlib_mgr.bootstrap_exec(exec_info, version)
+        return self.vlib_mgr.bootstrap_exec(exec_info, version, lib_cfg=lib_cfg)
 
     def shutdown(self, run_sp=None):
         """cleanup libs
@@ -12,6 +12,16 @@ class LibProxyManager:
         self.exec_lib_proxy = None
         self.dos_lib_proxy = None
 
+    def get_state(self):
+        """return the convenience proxies for set_state()
+
+        the proxy cache only holds generated classes and is kept.
+        """
+        return (self.exec_lib_proxy, self.dos_lib_proxy)
+
+    def set_state(self, state):
+        self.exec_lib_proxy, self.dos_lib_proxy = state
+
     def get_exec_lib_proxy(self):
         # auto open exec
         exec = self.exec_lib_proxy
@@ -3,13 +3,22 @@ from amitools.vamos.lib.dos.DosLibCtx import DosLibCtx
 from amitools.vamos.lib.LibList import vamos_libs
 from amitools.vamos.loader import SegmentLoader
 from amitools.vamos.log import log_libmgr
+from amitools.vamos.error import VamosInternalError
 from .cfg import LibMgrCfg
 from .mgr import LibManager
+from .snapshot import LibMgrSnapshot
 
 
 class SetupLibManager(object):
     def __init__(
-        self, machine, mem_map, scheduler, path_mgr, lib_cfg=None, main_profiler=None
+        self,
+        machine,
+        mem_map,
+        scheduler,
+        path_mgr,
+        lib_cfg=None,
+        main_profiler=None,
+        loader_cfg=None,
     ):
         self.machine = machine
         self.mem_map = mem_map
@@ -18,6 +27,7 @@ class SetupLibManager(object):
         self.alloc = mem_map.get_alloc()
         self.lib_mgr_cfg = lib_cfg
         self.main_profiler = main_profiler
+        self.loader_cfg = loader_cfg
         # state
         self.seg_loader = None
         self.exec_ctx = None
@@ -36,6 +46,7 @@ class SetupLibManager(object):
             self.lib_mgr_cfg = LibMgrCfg()
         # create segment loader
         self.seg_loader = SegmentLoader(self.alloc, self.path_mgr)
+        self.seg_loader.parse_config(self.loader_cfg)
         # setup contexts
         odg_base = self.mem_map.get_old_dos_guard_base()
         # create lib mgr
@@ -74,6 +85,40 @@ class SetupLibManager(object):
         sp = self.machine.get_ram_begin() - 4
         self.lib_mgr.shutdown(run_sp=sp)
 
+    def snapshot(self):
+        """capture the state of the lib manager and its libs.
+
+        Call this after open_base_libs() and before running any code.
+        Machine and memory map are not included and need their own
+        snapshot.
+        """
+        snap = LibMgrSnapshot(self)
+        log_libmgr.info(
+            "snapshot: %d vlibs, %d objects",
+            len(snap.vlibs),
+            snap.objs.get_num_objects(),
+        )
+        return snap
+
+    def restore(self, snapshot):
+        """restore the lib manager state of a snapshot
+
+        vamos libs created after the snapshot are dropped and their traps
+        are released. Their memory is reclaimed by restoring the memory map.
+        """
+        vlib_mgr = self.lib_mgr.vlib_mgr
+        old_vlibs = set(map(id, snapshot.vlibs))
+        for vlib in snapshot.vlibs:
+            if vlib.get_patcher() is None:
+                raise VamosInternalError(
+                    "restore: lib '%s' was freed after snapshot" % vlib.get_name()
+                )
+        for vlib in vlib_mgr.addr_vlib.values():
+            if id(vlib) not in old_vlibs:
+                log_libmgr.info("restore: drop lib '%s'", vlib.get_name())
+                vlib.get_patcher().free_traps()
+        snapshot.objs.restore()
+
     def open_base_libs(self):
         log_libmgr.info("opening base libs...")
         # first bootstrap exec
@@ -0,0 +1,48 @@
+from amitools.vamos.error import VamosInternalError
+
+
+class ObjectSnapshot(object):
+    """capture the state of a list of objects with state hooks.
+
+    Each object has to provide get_state() and set_state(). The state is
+    taken once and restore() hands it back to the objects in place, so the
+    identity of these objects (e.g. bound in traps) stays valid.
+    """
+
+    def __init__(self, objs):
+        self.states = []
+        for obj in objs:
+            get_state = getattr(obj, "get_state", None)
+            if get_state is None or not hasattr(obj, "set_state"):
+                raise VamosInternalError(
+                    "snapshot: %s has no state hooks" % type(obj).__name__
+                )
+            self.states.append((obj, get_state()))
+
+    def get_num_objects(self):
+        return len(self.states)
+
+    def restore(self):
+        for obj, state in self.states:
+            obj.set_state(state)
+
+
+class LibMgrSnapshot(object):
+    """the state of the library manager and all its vamos libs"""
+
+    def __init__(self, setup_lib_mgr):
+        lib_mgr = setup_lib_mgr.lib_mgr
+        self.vlibs = list(lib_mgr.vlib_mgr.addr_vlib.values())
+        objs = [
+            lib_mgr,
+            setup_lib_mgr.seg_loader,
+            setup_lib_mgr.scheduler,
+            setup_lib_mgr.exec_ctx,
+            setup_lib_mgr.dos_ctx,
+        ]
+        for vlib in self.vlibs:
+            impl = vlib.get_impl()
+            # fake libs have no impl
+            if impl is not None:
+                objs.append(impl)
+        self.objs = ObjectSnapshot(objs)
@@ -3,9 +3,15 @@ class InitStruct(object):
         self.mem = mem
 
     def init_struct(self, init_table_ptr, memory_ptr, size):
-        """Exec's InitStruct() call"""
+        """Exec's InitStruct() call
+
+        The struct is assembled in a local buffer and written back with a
+        single block transfer.
+        """
         if size > 0:
-            self.mem.clear_block(memory_ptr, size, 0)
+            buf = bytearray(size)
+        else:
+            buf = bytearray()
         # eval codes
         ptr = init_table_ptr
         mem = memory_ptr
@@ -36,49 +42,44 @@ class InitStruct(object):
             # apply offset
             if typ == 2 or typ == 3:
                 mem = memory_ptr + offset
-            rng = range(cnt + 1)
+            # element width: LONG, WORD, BYTE
+            if siz == 0:
+                width = 4
+            elif siz == 1:
+                width = 2
+            else:
+                width = 1
+            num = cnt + 1
             # op: repeat cnt+1 times
             if typ == 1:
-                if siz == 0:  # LONG
-                    val = self.mem.r32(ptr)
-                    ptr += 4
-                    for i in rng:
-                        self.mem.w32(mem, val)
-                        mem += 4
-                elif siz == 1:  # WORD
-                    val = self.mem.r16(ptr)
-                    ptr += 2
-                    for i in rng:
-                        self.mem.w16(mem, val)
-                        mem += 2
-                else:  # BYTE
-                    val = self.mem.r8(ptr)
-                    ptr += 1
-                    for i in rng:
-                        self.mem.w8(mem, val)
-                        mem += 1
+                data = self.mem.r_block(ptr, width) * num
+                ptr += width
             # op: copy cnt+1 elements
             else:
-                if siz == 0:  # LONG
-                    for i in rng:
-                        val = self.mem.r32(ptr)
-                        self.mem.w32(mem, val)
-                        ptr += 4
-                        mem += 4
-                elif siz == 1:  # WORD
-                    for i in rng:
-                        val = self.mem.r16(ptr)
-                        self.mem.w16(mem, val)
-                        ptr += 2
-                        mem += 2
-                else:
-                    for i in rng:
-                        val = self.mem.r8(ptr)
-                        self.mem.w8(mem, val)
-                        ptr += 1
-                        mem += 1
+                data = self.mem.r_block(ptr, width * num)
+                ptr += width * num
+            self._put(buf, memory_ptr, mem, data)
+            mem += len(data)
             # align next cmd to word
             ptr = (ptr + 1) & ~1
+        if size > 0:
+            self.mem.w_block(memory_ptr, bytes(buf))
+
+    def _put(self, buf, base, addr, data):
+        # place data in buffer and write parts outside of it directly
+        num = len(buf)
+        off = addr - base
+        end = off + len(data)
+        if off >= num or end <= 0:
+            self.mem.w_block(addr, data)
+            return
+        lo = max(off, 0)
+        hi = min(end, num)
+        buf[lo:hi] = data[lo - off : hi - off]
+        if lo > off:
+            self.mem.w_block(addr, data[: lo - off])
+        if hi < end:
+            self.mem.w_block(base + hi, data[hi - off :])
 
 
 class InitStructBuilder(object):
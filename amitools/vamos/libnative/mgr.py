@@ -70,6 +70,16 @@ class ALibManager(object):
         # state
         self.lib_infos = []
 
+    def get_state(self):
+        """return the lib infos and their base addrs for set_state()"""
+        return [(info, dict(info.base_addrs)) for info in self.lib_infos]
+
+    def set_state(self, state):
+        self.lib_infos = []
+        for info, base_addrs in state:
+            info.base_addrs = dict(base_addrs)
+            self.lib_infos.append(info)
+
     def is_base_addr(self, addr):
         """check if a given addr is the lib base of a native lib
         return info if found or None
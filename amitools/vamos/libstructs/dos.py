@@ -290,6 +290,33 @@ class AnchorPathStruct(AmigaStruct):
     ]
 
 
+@AmigaStructDef
+class ExAllDataStruct(AmigaStruct):
+    _format = [
+        (APTR_SELF, "ed_Next"),
+        (APTR(UBYTE), "ed_Name"),
+        (LONG, "ed_Type"),
+        (ULONG, "ed_Size"),
+        (ULONG, "ed_Prot"),
+        (ULONG, "ed_Days"),
+        (ULONG, "ed_Mins"),
+        (ULONG, "ed_Ticks"),
+        (APTR(UBYTE), "ed_Comment"),
+        (UWORD, "ed_OwnerUID"),
+        (UWORD, "ed_OwnerGID"),
+    ]
+
+
+@AmigaStructDef
+class ExAllControlStruct(AmigaStruct):
+    _format = [
+        (ULONG, "eac_Entries"),
+        (ULONG, "eac_LastKey"),
+        (APTR(UBYTE), "eac_MatchString"),
+        (APTR_VOID, "eac_MatchFunc"),
+    ]
+
+
 @AmigaStructDef
 class DevProcStruct(AmigaStruct):
     _format = [
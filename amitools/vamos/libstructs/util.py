@@ -3,7 +3,9 @@ from amitools.vamos.astructs import (
     AmigaStruct,
     UWORD,
     ULONG,
+    APTR_VOID,
 )
+from .exec_ import MinNodeStruct
 
 
 # TagItem
@@ -24,3 +26,14 @@ class ClockDataStruct(AmigaStruct):
         (UWORD, "year"),
         (UWORD, "wday"),
     ]
+
+
+# Hook
+@AmigaStructDef
+class HookStruct(AmigaStruct):
+    _format = [
+        (MinNodeStruct, "h_MinNode"),
+        (APTR_VOID, "h_Entry"),
+        (APTR_VOID, "h_SubEntry"),
+        (APTR_VOID, "h_Data"),
+    ]
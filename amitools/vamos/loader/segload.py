@@ -1,8 +1,14 @@
 import os.path
+import struct
+import time
 
+from amitools.util import LRUCache
 from amitools.binfmt.BinFmt import BinFmt
+from amitools.binfmt.BinImageCache import BinImageCache
 from amitools.binfmt.Relocate import Relocate
+from amitools.binfmt.BinImage import BIN_IMAGE_RELOC_PC32
 from amitools.vamos.log import log_segload
+from amitools.vamos.path import HostBackend, MEM_PREFIX
 from .seglist import SegList
 
 
@@ -12,30 +18,182 @@ class SegLoadInfo(object):
         self.bin_img = bin_img
         self.sys_file = sys_file
         self.ami_file = ami_file
+        # (path, size, mtime) of the loaded file
+        self.file_key = None
+        # number of loads of a resident seglist
+        self.users = 1
+        self.resident = False
 
     def __str__(self):
-        return "[SegLoad:%s,sys=%s,ami=%s]" % (
+        return "[SegLoad:%s,sys=%s,ami=%s,users=%d,resident=%s]" % (
             self.seglist,
             self.sys_file,
             self.ami_file,
+            self.users,
+            self.resident,
         )
 
 
+class SegImage(object):
+    """a binary image relocated once and kept to quickly create more seglists
+
+    The relocated data of the segments is stored for the addresses of the
+    first load. If the next seglist gets the same addresses the data is only
+    copied. Otherwise the relocations are adjusted by the address deltas.
+    """
+
+    def __init__(self, bin_img, sizes, addrs, datas):
+        self.bin_img = bin_img
+        self.sizes = sizes
+        self.addrs = addrs
+        self.datas = [bytes(d) for d in datas]
+        self.relocs = self._get_relocs(bin_img)
+
+    def _get_relocs(self, bin_img):
+        """return (offset, to_id, is_pc_rel) for all relocations per segment"""
+        result = []
+        for segment in bin_img.get_segments():
+            relocs = []
+            for to_seg in segment.get_reloc_to_segs():
+                to_id = to_seg.id
+                for r in segment.get_reloc(to_seg).get_relocs():
+                    is_pc_rel = r.get_type() == BIN_IMAGE_RELOC_PC32
+                    relocs.append((r.get_offset(), to_id, is_pc_rel))
+            result.append(relocs)
+        return result
+
+    def relocate(self, addrs):
+        """return the segment datas relocated to the given addresses"""
+        if addrs == self.addrs:
+            return self.datas
+        deltas = [new - old for new, old in zip(addrs, self.addrs)]
+        unpack_from = struct.unpack_from
+        pack_into = struct.pack_into
+        result = []
+        for my_id, data in enumerate(self.datas):
+            data = bytearray(data)
+            my_delta = deltas[my_id]
+            for offset, to_id, is_pc_rel in self.relocs[my_id]:
+                delta = deltas[to_id]
+                if is_pc_rel:
+                    delta -= my_delta
+                if delta:
+                    val = unpack_from(">I", data, offset)[0]
+                    pack_into(">I", data, offset, (val + delta) & 0xFFFFFFFF)
+            result.append(data)
+        return result
+
+
 class SegmentLoader(object):
-    def __init__(self, alloc, path_mgr=None):
+    """load binaries into seglists
+
+    The relocated images of recently loaded files are cached by host path,
+    size and mtime. Loading the same binary again skips parsing and
+    relocating the file.
+
+    Pure commands can be made resident by name: their seglist is loaded
+    once and then shared by all users like with the AmigaDOS Resident
+    command.
+    """
+
+    # do not cache files changed in the last seconds
+    racy_delta = 2.0
+
+    def __init__(self, alloc, path_mgr=None, image_cache_size=16, resident=None):
         self.alloc = alloc
         self.path_mgr = path_mgr
         self.mem = alloc.get_mem()
         self.binfmt = BinFmt()
+        self.host_backend = HostBackend()
         # map seglist baddr to bin_img
         self.infos = {}
+        self.image_cache = None
+        self.set_image_cache_size(image_cache_size)
+        # lower case names of resident commands
+        self.resident_names = set()
+        if resident:
+            for name in resident:
+                self.add_resident_name(name)
+        # map sys path to info of resident seglist
+        self.residents = {}
+
+    def get_state(self):
+        """return the loaded seglists for set_state()
+
+        the image caches are kept as they only depend on the files.
+        """
+        infos = {}
+        for baddr, info in self.infos.items():
+            infos[baddr] = (info, info.users, info.resident)
+        return (infos, dict(self.residents))
+
+    def set_state(self, state):
+        infos, residents = state
+        self.infos = {}
+        for baddr, (info, users, resident) in infos.items():
+            info.users = users
+            info.resident = resident
+            self.infos[baddr] = info
+        self.residents = dict(residents)
+
+    def parse_config(self, cfg):
+        if not cfg:
+            return True
+        self.set_image_cache_size(cfg.image_cache)
+        if cfg.disk_cache:
+            self.set_disk_cache(cfg.disk_cache, cfg.disk_cache_size * 1024)
+        if cfg.resident:
+            for name in cfg.resident:
+                self.add_resident_name(name)
+        return True
+
+    def set_image_cache_size(self, size):
+        if size > 0:
+            self.image_cache = LRUCache(size)
+        else:
+            self.image_cache = None
+
+    def set_disk_cache(self, cache_dir, max_size=0):
+        """store parsed binaries in a cache dir. max_size 0 is no limit"""
+        cache_dir = os.path.expanduser(cache_dir)
+        if max_size <= 0:
+            max_size = None
+        log_segload.info("disk cache: dir=%s max_size=%s", cache_dir, max_size)
+        self.binfmt = BinFmt(BinImageCache(cache_dir, max_size))
+
+    def get_disk_cache_stats(self):
+        cache = self.binfmt.image_cache
+        if cache is not None:
+            return cache.get_stats()
+
+    def add_resident_name(self, name):
+        """a command with the given base name is pure and kept resident"""
+        self.resident_names.add(name.lower())
+
+    def get_image_cache_stats(self):
+        if self.image_cache is not None:
+            return self.image_cache.get_stats()
+
+    def _get_backend(self, sys_path):
+        # files of memory volumes are only known to the path manager
+        if self.path_mgr and sys_path.startswith(MEM_PREFIX):
+            return self.path_mgr.get_backend(sys_path)
+        return self.host_backend
 
     def load_sys_seglist(self, sys_bin_file):
         """load seglist, register it, and return seglist baddr or 0"""
+        info = self._get_resident(sys_bin_file)
+        if info:
+            info.users += 1
+            log_segload.info("resident sys seglist: %s", info)
+            return info.seglist.get_baddr()
         info = self.int_load_sys_seglist(sys_bin_file)
         if info:
             baddr = info.seglist.get_baddr()
             self.infos[baddr] = info
+            if info.file_key and self._is_resident_name(sys_bin_file):
+                info.resident = True
+                self.residents[sys_bin_file] = info
             log_segload.info("loaded sys seglist: %s", info)
             return baddr
         else:
@@ -61,6 +219,10 @@ class SegmentLoader(object):
             log_segload.error("unknown seglist at @%06x", seglist_baddr)
             return False
         info = self.infos[seglist_baddr]
+        info.users -= 1
+        if info.users > 0 or info.resident:
+            log_segload.info("keep seglist: %s", info)
+            return True
         log_segload.info("unload seglist: %s", info)
         del self.infos[seglist_baddr]
         info.seglist.free()
@@ -86,12 +248,55 @@ class SegmentLoader(object):
     def shutdown(self):
         """check orphan seglists on shutdown and return number of orphans"""
         log_segload.info("shutdown")
+        num_orphans = 0
         for baddr in self.infos:
             info = self.infos[baddr]
-            log_segload.warning("orphaned seglist: %s", info)
+            if info.resident and info.users == 0:
+                log_segload.info("free resident seglist: %s", info)
+            else:
+                log_segload.warning("orphaned seglist: %s", info)
+                num_orphans += 1
             # try to free list
             info.seglist.free()
-        return len(self.infos)
+        self.infos = {}
+        self.residents = {}
+        if self.image_cache is not None:
+            self.image_cache.clear()
+        return num_orphans
+
+    def _is_resident_name(self, sys_bin_file):
+        if not self.resident_names:
+            return False
+        return os.path.basename(sys_bin_file).lower() in self.resident_names
+
+    def _get_resident(self, sys_bin_file):
+        """return info of valid resident seglist of a file or None"""
+        info = self.residents.get(sys_bin_file)
+        if info is None:
+            return None
+        backend = self._get_backend(sys_bin_file)
+        if self._get_file_key(backend, sys_bin_file) == info.file_key:
+            return info
+        # file was changed: drop the resident seglist
+        log_segload.info("drop resident seglist: %s", info)
+        del self.residents[sys_bin_file]
+        info.resident = False
+        if info.users == 0:
+            del self.infos[info.seglist.get_baddr()]
+            info.seglist.free()
+        return None
+
+    def _get_file_key(self, backend, sys_bin_file):
+        """return key of an unchanged file or None if key is not reliable"""
+        try:
+            st = backend.stat(sys_bin_file)
+        except OSError:
+            return None
+        mtime = st.st_mtime
+        # a file changed just now could be changed again with the same mtime
+        if time.time() - mtime <= self.racy_delta:
+            return None
+        return (sys_bin_file, st.st_size, mtime)
 
     def int_load_ami_seglist(self, ami_bin_file, lock=None):
         """load seglist given by ami binary path and return SegLoadInfo"""
@@ -109,21 +314,36 @@ class SegmentLoader(object):
         base_name = os.path.basename(sys_bin_file)
 
         # does file exist?
-        if not os.path.isfile(sys_bin_file):
+        backend = self._get_backend(sys_bin_file)
+        if not backend.isfile(sys_bin_file):
             log_segload.debug("no file: %s", sys_bin_file)
             return None
 
-        # try to load bin image in supported format (e.g. HUNK or ELF)
-        bin_img = self.binfmt.load_image(sys_bin_file)
-        if bin_img is None:
-            log_segload.debug("load_image failed: %s", sys_bin_file)
-            return None
+        # already loaded before?
+        image = None
+        file_key = None
+        if self.image_cache is not None or self._is_resident_name(sys_bin_file):
+            file_key = self._get_file_key(backend, sys_bin_file)
+        if file_key and self.image_cache is not None:
+            image = self.image_cache.get(file_key)
+
+        if image is not None:
+            bin_img = image.bin_img
+            sizes = image.sizes
+        else:
+            # try to load bin image in supported format (e.g. HUNK or ELF)
+            with backend.open(sys_bin_file, "rb") as fobj:
+                bin_img = self.binfmt.load_image_fobj(fobj)
+            if bin_img is None:
+                log_segload.debug("load_image failed: %s", sys_bin_file)
+                return None
 
-        # create relocator
-        relocator = Relocate(bin_img)
+            # create relocator
+            relocator = Relocate(bin_img)
+
+            # get info about segments to allocate
+            sizes = relocator.get_sizes()
 
-        # get info about segments to allocate
-        sizes = relocator.get_sizes()
         names = bin_img.get_segment_names()
         bin_img_segs = bin_img.get_segments()
 
@@ -143,11 +363,19 @@ class SegmentLoader(object):
         addrs = seg_list.get_all_addrs()
 
         # relocate to addresses and return data
-        datas = relocator.relocate(addrs)
+        if image is not None:
+            datas = image.relocate(addrs)
+        else:
+            datas = relocator.relocate(addrs)
+            if file_key and self.image_cache is not None:
+                image = SegImage(bin_img, sizes, addrs, datas)
+                self.image_cache.put(file_key, image)
 
         # write contents to allocated memory
         for i in range(len(sizes)):
             # write data to segments
             self.mem.w_block(addrs[i], datas[i])
 
-        return SegLoadInfo(seg_list, bin_img, sys_bin_file)
+        info = SegLoadInfo(seg_list, bin_img, sys_bin_file)
+        info.file_key = file_key
+        return info
@@ -2,36 +2,90 @@ import logging
 import logging.config
 from .cfgcore import log_cfg
 
+# --- log channels ---
+
+# the log functions of a channel and their level
+_log_funcs = (
+    ("debug", logging.DEBUG),
+    ("info", logging.INFO),
+    ("warning", logging.WARNING),
+    ("warn", logging.WARNING),
+    ("error", logging.ERROR),
+    ("exception", logging.ERROR),
+    ("critical", logging.CRITICAL),
+    ("fatal", logging.CRITICAL),
+)
+
+
+def _log_off(*args, **kwargs):
+    pass
+
+
+class LogChannel(logging.Logger):
+    """a logger that binds the log functions below its level to a no-op.
+
+    The level is resolved once when it is set and not on every call.
+    A disabled call then only costs an empty function call if the message
+    arguments are passed lazily, e.g. log_dos.info("Read(%s)", fh) and
+    not log_dos.info("Read(%s)" % fh).
+
+    Without an own level (NOTSET) all functions stay active.
+    """
+
+    def setLevel(self, level):
+        logging.Logger.setLevel(self, level)
+        self._bind()
+
+    def _bind(self):
+        level = self.level
+        funcs = self.__dict__
+        for name, func_level in _log_funcs:
+            if level != logging.NOTSET and func_level < level:
+                funcs[name] = _log_off
+            else:
+                funcs.pop(name, None)
+
+
+def _get_channel(name):
+    manager = logging.Logger.manager
+    old_cls = manager.loggerClass
+    manager.setLoggerClass(LogChannel)
+    try:
+        return logging.getLogger(name)
+    finally:
+        manager.loggerClass = old_cls
+
+
 # --- vamos loggers ---
 
-log_main = logging.getLogger("main")
+log_main = _get_channel("main")
 
-log_mem = logging.getLogger("mem")
-log_mem_map = logging.getLogger("mem_map")
-log_mem_alloc = logging.getLogger("mem_alloc")
-log_mem_int = logging.getLogger("mem_int")
-log_instr = logging.getLogger("instr")
-log_machine = logging.getLogger("machine")
+log_mem = _get_channel("mem")
+log_mem_map = _get_channel("mem_map")
+log_mem_alloc = _get_channel("mem_alloc")
+log_mem_int = _get_channel("mem_int")
+log_instr = _get_channel("instr")
+log_machine = _get_channel("machine")
 
-log_lib = logging.getLogger("lib")
-log_libmgr = logging.getLogger("libmgr")
-log_segload = logging.getLogger("segload")
+log_lib = _get_channel("lib")
+log_libmgr = _get_channel("libmgr")
+log_segload = _get_channel("segload")
 
-log_path = logging.getLogger("path")
-log_file = logging.getLogger("file")
-log_lock = logging.getLogger("lock")
-log_doslist = logging.getLogger("doslist")
+log_path = _get_channel("path")
+log_file = _get_channel("file")
+log_lock = _get_channel("lock")
+log_doslist = _get_channel("doslist")
 
-log_dos = logging.getLogger("dos")
-log_exec = logging.getLogger("exec")
-log_utility = logging.getLogger("utility")
-log_math = logging.getLogger("math")
+log_dos = _get_channel("dos")
+log_exec = _get_channel("exec")
+log_utility = _get_channel("utility")
+log_math = _get_channel("math")
 
-log_proc = logging.getLogger("proc")
-log_prof = logging.getLogger("prof")
+log_proc = _get_channel("proc")
+log_prof = _get_channel("prof")
 
-log_tp = logging.getLogger("tp")
-log_hw = logging.getLogger("hw")
+log_tp = _get_channel("tp")
+log_hw = _get_channel("hw")
 
 loggers = [
     log_main,
@@ -143,6 +197,13 @@ def log_setup(cfg):
         return True
 
 
+def log_reset():
+    """remove the handlers added by log_setup()"""
+    for l in loggers:
+        for h in list(l.handlers):
+            l.removeHandler(h)
+
+
 def log_shutdown():
     logging.shutdown()
 
@@ -2,6 +2,7 @@ from .regs import *
 from .cpustate import CPUState
 from .mockcpu import MockCPU
 from .mockmem import MockMemory
+from .memio import MemoryIO
 from .mocktraps import MockTraps
 from .mockmachine import MockMachine
 from .machine import Machine
@@ -9,3 +10,5 @@ from .opcodes import *
 from .hwaccess import HWAccess, HWAccessError
 from .memmap import MemoryMap
 from .disasm import DisAsm
+from .watch import MemWatch, MemWatchList
+from .metrics import RunMetrics
@@ -12,6 +12,9 @@ from .regs import *
 from .opcodes import *
 from .error import ErrorReporter
 from .cpustate import CPUState
+from .memio import MemoryIO
+from .watch import MemWatchList
+from .metrics import RunMetrics, CAT_CPU
 from amitools.vamos.error import *
 from amitools.vamos.log import log_machine
 from amitools.vamos.label import LabelManager
@@ -47,6 +50,14 @@ class RunState(object):
         )
 
 
+class MachineSnapshot(object):
+    """the RAM contents and CPU context of a machine"""
+
+    def __init__(self, ram, cpu_ctx):
+        self.ram = ram
+        self.cpu_ctx = cpu_ctx
+
+
 class Machine(object):
     """the main interface to the m68k emulation including CPU, memory,
     and traps. The machine does only a minimal setup of RAM and the CPU.
@@ -86,6 +97,8 @@ class Machine(object):
     scratch_begin = 0x600
     quick_trap_begin = 0x500
     quick_trap_num = 128
+    # upper bound for the execution slices of adaptive runs
+    max_slice_cycles = 1 << 18
 
     def __init__(
         self,
@@ -96,6 +109,8 @@ class Machine(object):
         cycles_per_run=1000,
         max_cycles=0,
         cpu_name=None,
+        adaptive_slices=False,
+        metrics=False,
     ):
         if cpu_name is None:
             cpu_name = machine68k.cpu_type_to_str(cpu_type)
@@ -105,6 +120,7 @@ class Machine(object):
         self.machine = machine68k.Machine(cpu_type, ram_size_kib)
         self.cpu = self.machine.cpu
         self.mem = self.machine.mem
+        self.mem_io = MemoryIO(self.mem)
         self.traps = self.machine.traps
         # internal state
         if use_labels:
@@ -117,9 +133,15 @@ class Machine(object):
         self.error_reporter = ErrorReporter(self)
         self.run_states = []
         self.instr_hook = None
+        self.sampler = None
+        self.sample_cycles = 0
         self.cycles_per_run = cycles_per_run
         self.max_cycles = max_cycles
+        self.adaptive_slices = adaptive_slices
         self.bail_out = False
+        self.cpu_mem_trace_hook = None
+        self.mem_watches = MemWatchList()
+        self.metrics = RunMetrics(enabled=metrics, count_traps=adaptive_slices)
         # call init
         self._setup_handler()
         self._setup_quick_traps()
@@ -135,6 +157,7 @@ class Machine(object):
         self.traps.cleanup()
         self.cpu = None
         self.mem = None
+        self.mem_io = None
         self.traps = None
 
     @classmethod
@@ -151,14 +174,18 @@ class Machine(object):
         ram_size = machine_cfg.ram_size
         cycles_per_run = machine_cfg.cycles_per_run
         max_cycles = machine_cfg.max_cycles
+        adaptive_slices = machine_cfg.get("adaptive_slices", False)
+        metrics = bool(machine_cfg.get("metrics"))
         log_machine.info(
-            "cpu=%s(%d), ram_size=%d, labels=%s, " "cycles_per_run=%d, max_cycles=%d",
+            "cpu=%s(%d), ram_size=%d, labels=%s, "
+            "cycles_per_run=%d, max_cycles=%d, adaptive_slices=%s",
             cpu_name,
             cpu_type,
             ram_size,
             use_labels,
             cycles_per_run,
             max_cycles,
+            adaptive_slices,
         )
         return cls(
             cpu_type,
@@ -168,6 +195,8 @@ class Machine(object):
             cycles_per_run=cycles_per_run,
             max_cycles=max_cycles,
             cpu_name=cpu_name,
+            adaptive_slices=adaptive_slices,
+            metrics=metrics,
         )
 
     @classmethod
@@ -258,6 +287,40 @@ class Machine(object):
         self.traps.free(tid)
         m.w16(addr, 0)
 
+    def snapshot(self):
+        """capture RAM and CPU context of the idle machine"""
+        if self.run_states:
+            raise VamosInternalError("snapshot: machine is running!")
+        ram = bytes(self.mem.r_block(0, self.ram_total))
+        # the full context also keeps the internal state of the CPU core,
+        # e.g. the cycles of a pending reset eaten by the first run
+        cpu_ctx = self.cpu.get_cpu_context()
+        return MachineSnapshot(ram, cpu_ctx)
+
+    def restore(self, snapshot):
+        """restore RAM and CPU context of a snapshot
+
+        Quick traps set up after the snapshot are freed.
+        """
+        if self.run_states:
+            raise VamosInternalError("restore: machine is running!")
+        m = self.mem
+        ram = snapshot.ram
+        addr = self.quick_trap_begin
+        for i in range(self.quick_trap_num):
+            cur = m.r16(addr)
+            old = ram[addr] << 8 | ram[addr + 1]
+            if cur != old:
+                if old != 0:
+                    raise VamosInternalError(
+                        "restore: quick trap @%06x was freed after snapshot" % addr
+                    )
+                self.traps.free(cur & 0xFFF)
+            addr += 2
+        m.w_block(0, ram)
+        self.cpu.set_cpu_context(snapshot.cpu_ctx)
+        self.bail_out = False
+
     def get_cpu(self):
         return self.cpu
 
@@ -270,12 +333,19 @@ class Machine(object):
     def get_mem(self):
         return self.mem
 
+    def get_mem_io(self):
+        """return MemoryIO for block transfers to and from RAM"""
+        return self.mem_io
+
     def get_traps(self):
         return self.traps
 
     def get_label_mgr(self):
         return self.label_mgr
 
+    def get_metrics(self):
+        return self.metrics
+
     def get_scratch_top(self):
         return self.ram_begin - 4
 
@@ -311,10 +381,24 @@ class Machine(object):
     def set_mem(self, mem):
         """replace the memory instance with a wrapped one, e.g. for tracing"""
         self.mem = mem
+        self.mem_io = MemoryIO(mem)
 
     def set_cycles_per_run(self, num):
         self.cycles_per_run = num
 
+    def set_adaptive_slices(self, on):
+        """grow the execution slices of a run while no traps are called"""
+        self.adaptive_slices = on
+        self.metrics.count_traps = on
+
+    def set_sampler(self, func, cycles=0):
+        """call func(pc) between execution slices of a run (or None).
+
+        while sampling the slices are enlarged to about the given cycles.
+        """
+        self.sampler = func
+        self.sample_cycles = cycles
+
     def set_instr_hook(self, func):
         self.cpu.set_instr_hook_callback(func)
 
@@ -344,8 +428,38 @@ class Machine(object):
         self.set_instr_hook(None)
 
     def set_cpu_mem_trace_hook(self, func):
-        self.mem.set_trace_mode(1)
-        self.mem.set_trace_func(func)
+        """trace all CPU memory accesses with func(mode, width, addr, value)"""
+        self.cpu_mem_trace_hook = func
+        self._update_mem_trace()
+
+    def add_mem_watch(self, watch):
+        """only report the CPU memory accesses hitting the MemWatch"""
+        self.mem_watches.add(watch)
+        self._update_mem_trace()
+
+    def remove_mem_watch(self, watch):
+        self.mem_watches.remove(watch)
+        self._update_mem_trace()
+
+    def _update_mem_trace(self):
+        func = self.cpu_mem_trace_hook
+        if len(self.mem_watches) > 0:
+            if func is None:
+                func = self.mem_watches.trace
+            else:
+                hook = func
+                watch = self.mem_watches.trace
+
+                def func(mode, width, addr, value=0):
+                    watch(mode, width, addr, value)
+                    return hook(mode, width, addr, value)
+
+        if func is None:
+            self.mem.set_trace_mode(0)
+            self.mem.set_trace_func(None)
+        else:
+            self.mem.set_trace_mode(1)
+            self.mem.set_trace_func(func)
 
     def get_cur_run_state(self):
         assert len(self.run_states) > 0
@@ -495,18 +609,53 @@ class Machine(object):
 
         # main execution loop of run
         total_cycles = 0
+        num_slices = 0
+        slice_cycles = cycles_per_run
+        sampler = self.sampler
+        if sampler:
+            # sample between slices of about sample_cycles
+            slice_cycles *= max(1, self.sample_cycles // cycles_per_run)
+        metrics = self.metrics
+        metrics.add_run(nesting)
+        slice_sizes = metrics.slice_sizes
+        # adaptive: double the slice after a slice without traps and
+        # halve it again if traps were called. samples need fixed slices
+        adaptive = self.adaptive_slices and not sampler
+        max_slice = max(self.max_slice_cycles, cycles_per_run)
+        num_traps = metrics.num_traps
+        metrics.enter(CAT_CPU)
         start_time = time.perf_counter()
         try:
             while not run_state.done:
+                cycles = slice_cycles
+                # do not overshoot max_cycles with large slices
+                if adaptive and max_cycles > 0:
+                    cycles = min(cycles, max_cycles - total_cycles)
                 log_machine.debug("+ cpu.execute")
-                total_cycles += cpu.execute(cycles_per_run)
+                total_cycles += cpu.execute(cycles)
                 log_machine.debug("- cpu.execute")
+                num_slices += 1
+                if adaptive:
+                    slice_sizes[cycles] = slice_sizes.get(cycles, 0) + 1
+                # statistical profiling: sample pc of interrupted code
+                if sampler and not run_state.done:
+                    sampler(cpu.r_pc())
                 # end after enough cycles
                 if max_cycles > 0 and total_cycles >= max_cycles:
                     break
+                if adaptive:
+                    if metrics.num_traps == num_traps:
+                        if slice_cycles < max_slice:
+                            slice_cycles = min(slice_cycles * 2, max_slice)
+                    else:
+                        num_traps = metrics.num_traps
+                        slice_cycles = max(slice_cycles // 2, cycles_per_run)
         except Exception as e:
             self.error_reporter.report_error(e)
         end_time = time.perf_counter()
+        metrics.leave()
+        metrics.cycles += total_cycles
+        metrics.slices += num_slices
 
         # retrieve regs
         if get_regs:
@@ -0,0 +1,71 @@
+class MemoryIO(object):
+    """transfer blocks between host buffers and the machine RAM
+
+    If the memory offers its RAM as a host buffer (get_ram_view()) then
+    blocks are accessed through memoryviews without copies, e.g. a host file
+    can readinto() the RAM directly. Otherwise the block functions of the
+    memory are used.
+
+    All accesses are checked against the RAM size.
+    """
+
+    def __init__(self, mem):
+        self.mem = mem
+        self.ram_size = mem.get_ram_size_bytes()
+        get_ram_view = getattr(mem, "get_ram_view", None)
+        if get_ram_view:
+            self.ram_view = get_ram_view()
+        else:
+            self.ram_view = None
+
+    def has_view(self):
+        return self.ram_view is not None
+
+    def check_range(self, addr, size):
+        if addr < 0 or size < 0 or addr + size > self.ram_size:
+            raise ValueError(
+                "invalid RAM block: addr=%06x size=%06x ram=%06x"
+                % (addr, size, self.ram_size)
+            )
+
+    def get_view(self, addr, size):
+        """return a writable memoryview of a RAM block or None if not possible"""
+        if self.ram_view is None:
+            return None
+        self.check_range(addr, size)
+        return self.ram_view[addr : addr + size]
+
+    def read_block(self, addr, size):
+        """return the data of a RAM block. it may be a view on the RAM"""
+        if self.ram_view is None:
+            return self.mem.r_block(addr, size)
+        self.check_range(addr, size)
+        return self.ram_view[addr : addr + size]
+
+    def write_block(self, addr, data):
+        """write a bytes-like object to RAM"""
+        if self.ram_view is None:
+            if type(data) is memoryview:
+                data = data.tobytes()
+            self.mem.w_block(addr, data)
+        else:
+            size = len(data)
+            self.check_range(addr, size)
+            self.ram_view[addr : addr + size] = data
+
+    def read_into(self, addr, size, readinto, read):
+        """fill a RAM block from a host source
+
+        readinto(buf) fills a buffer and returns the number of bytes,
+        read(size) returns the data. Both may return -1 on error.
+        Return the number of bytes transferred or -1.
+        """
+        view = self.get_view(addr, size)
+        if view is not None:
+            return readinto(view)
+        data = read(size)
+        if data == -1:
+            return -1
+        if data:
+            self.mem.w_block(addr, data)
+        return len(data)
@@ -5,6 +5,14 @@ from amitools.vamos.label import LabelRange
 from amitools.vamos.mem import MemoryAlloc
 
 
+class MemoryMapSnapshot(object):
+    """the allocator and label state of a memory map"""
+
+    def __init__(self, alloc_state, label_state):
+        self.alloc_state = alloc_state
+        self.label_state = label_state
+
+
 class MemoryMap(object):
     def __init__(self, machine):
         self.machine = machine
@@ -40,7 +48,7 @@ class MemoryMap(object):
             self.setup_old_dos_guard()
         if not self.validate():
             return False
-        self.setup_ram_allocator()
+        self.setup_ram_allocator(cfg.mem_alloc)
         return True
 
     def validate(self):
@@ -73,12 +81,32 @@ class MemoryMap(object):
             self.label_mgr.add_label(label)
             log_mem_map.info(label)
 
-    def setup_ram_allocator(self):
+    def setup_ram_allocator(self, free_list=None):
         mem = self.machine.get_mem()
         mem_begin = 0x1000
         mem_size = self.ram_total - mem_begin
-        log_mem_map.info("setup ram allocator: @%06x +%06x", mem_begin, mem_size)
-        self.alloc = MemoryAlloc(mem, mem_begin, mem_size, self.label_mgr)
+        log_mem_map.info(
+            "setup ram allocator: @%06x +%06x free_list=%s",
+            mem_begin,
+            mem_size,
+            free_list,
+        )
+        self.alloc = MemoryAlloc(mem, mem_begin, mem_size, self.label_mgr, free_list)
+
+    def snapshot(self):
+        """capture allocator and label state"""
+        alloc_state = self.alloc.get_state()
+        if self.label_mgr:
+            label_state = self.label_mgr.get_state()
+        else:
+            label_state = None
+        return MemoryMapSnapshot(alloc_state, label_state)
+
+    def restore(self, snapshot):
+        """restore allocator and label state of a snapshot"""
+        self.alloc.set_state(snapshot.alloc_state)
+        if self.label_mgr:
+            self.label_mgr.set_state(snapshot.label_state)
 
     def get_old_dos_guard_base(self):
         return self.dos_guard_base
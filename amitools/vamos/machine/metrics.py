@@ -0,0 +1,159 @@
+import json
+import time
+import contextlib
+
+# time categories. traps are charged to the name of their lib
+CAT_CPU = "cpu"
+CAT_IO = "io"
+CAT_OTHER = "other"
+
+
+class MetricsTimer(object):
+    """charge the time of a with block to a category"""
+
+    def __init__(self, metrics, cat):
+        self.metrics = metrics
+        self.cat = cat
+
+    def __enter__(self):
+        self.metrics.enter(self.cat)
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.metrics.leave()
+
+
+class RunMetrics(object):
+    """split the wall time of a session into m68k execution, trap handling
+    per lib and host I/O and count the runs, traps and other events.
+
+    The time is always charged to the current category. enter() and leave()
+    switch it like a stack, so the m68k code of a nested run inside a trap
+    is charged to the CPU and not to the lib of the trap.
+    Counters of other components are added as functions and read on demand.
+
+    Traps and host I/O are only timed if enabled. Otherwise wrap_trap()
+    keeps the trap as is or only counts the calls if count_traps is set,
+    e.g. for adaptive slices.
+    """
+
+    def __init__(self, enabled=True, count_traps=False):
+        self.enabled = enabled
+        self.count_traps = count_traps
+        self.start_time = time.perf_counter()
+        self.last_time = self.start_time
+        self.cur = CAT_OTHER
+        self.stack = []
+        # category -> seconds
+        self.times = {}
+        # lib name -> number of trap calls
+        self.lib_calls = {}
+        # name -> get count function
+        self.counters = {}
+        if enabled:
+            self.io_timer = MetricsTimer(self, CAT_IO)
+        else:
+            self.io_timer = contextlib.nullcontext()
+        # run stats
+        self.runs = 0
+        self.max_nesting = 0
+        self.cycles = 0
+        self.num_traps = 0
+        self.slices = 0
+        # cycles of adaptive execution slice -> number of slices
+        self.slice_sizes = {}
+
+    def enter(self, cat):
+        now = time.perf_counter()
+        cur = self.cur
+        times = self.times
+        times[cur] = times.get(cur, 0.0) + now - self.last_time
+        self.last_time = now
+        self.stack.append(cur)
+        self.cur = cat
+
+    def leave(self):
+        now = time.perf_counter()
+        cur = self.cur
+        times = self.times
+        times[cur] = times.get(cur, 0.0) + now - self.last_time
+        self.last_time = now
+        self.cur = self.stack.pop()
+
+    def get_io_timer(self):
+        """return a timer for host I/O used in a with block"""
+        return self.io_timer
+
+    def add_counter(self, name, get_count):
+        self.counters[name] = get_count
+
+    def add_run(self, nesting):
+        self.runs += 1
+        if nesting > self.max_nesting:
+            self.max_nesting = nesting
+
+    def wrap_trap(self, lib_name, func):
+        """return a trap function that counts and times the calls of func"""
+        metrics = self
+        if not self.enabled:
+            if not self.count_traps:
+                return func
+
+            def count_func(*args):
+                metrics.num_traps += 1
+                return func(*args)
+
+            return count_func
+        lib_calls = self.lib_calls
+        lib_calls.setdefault(lib_name, 0)
+        enter = self.enter
+        leave = self.leave
+
+        def trap_func(*args):
+            lib_calls[lib_name] += 1
+            metrics.num_traps += 1
+            enter(lib_name)
+            try:
+                return func(*args)
+            finally:
+                leave()
+
+        return trap_func
+
+    def get_data(self):
+        """return the metrics as a dict"""
+        # charge the current category up to now
+        now = time.perf_counter()
+        times = dict(self.times)
+        times[self.cur] = times.get(self.cur, 0.0) + now - self.last_time
+        libs = {}
+        for name, lib_time in times.items():
+            if name not in (CAT_CPU, CAT_IO, CAT_OTHER):
+                libs[name] = {"calls": self.lib_calls.get(name, 0), "time": lib_time}
+        for name, calls in self.lib_calls.items():
+            if calls and name not in libs:
+                libs[name] = {"calls": calls, "time": 0.0}
+        counts = {
+            "runs": self.runs,
+            "max_nesting": self.max_nesting,
+            "cycles": self.cycles,
+            "traps": self.num_traps,
+            "slices": self.slices,
+        }
+        for name, get_count in self.counters.items():
+            counts[name] = get_count()
+        return {
+            "wall_time": now - self.start_time,
+            "time": {
+                "cpu": times.get(CAT_CPU, 0.0),
+                "traps": sum(lib["time"] for lib in libs.values()),
+                "io": times.get(CAT_IO, 0.0),
+                "other": times.get(CAT_OTHER, 0.0),
+            },
+            "libs": libs,
+            "counts": counts,
+            "slices": {str(k): v for k, v in sorted(self.slice_sizes.items())},
+        }
+
+    def save_json_file(self, path):
+        with open(path, "w") as fh:
+            json.dump(self.get_data(), fh, indent=2, sort_keys=True)
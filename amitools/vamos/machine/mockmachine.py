@@ -1,6 +1,8 @@
 from .mockcpu import MockCPU
 from .mockmem import MockMemory
 from .mocktraps import MockTraps
+from .memio import MemoryIO
+from .metrics import RunMetrics
 from amitools.vamos.label import LabelManager
 
 
@@ -8,29 +10,52 @@ class MockMachine(object):
     def __init__(self, size_kib=16, fill=0, use_labels=True):
         self.cpu = MockCPU()
         self.mem = MockMemory(size_kib, fill)
+        self.mem_io = MemoryIO(self.mem)
         self.traps = MockTraps()
         if use_labels:
             self.label_mgr = LabelManager()
         else:
             self.label_mgr = None
+        self.sampler = None
+        self.mem_watches = []
+        self.metrics = RunMetrics()
 
     def get_cpu(self):
         return self.cpu
 
+    def get_cpu_name(self):
+        return "68000"
+
     def get_mem(self):
         return self.mem
 
+    def get_mem_io(self):
+        return self.mem_io
+
     def get_traps(self):
         return self.traps
 
     def get_label_mgr(self):
         return self.label_mgr
 
+    def get_metrics(self):
+        return self.metrics
+
+    def set_sampler(self, func, cycles=0):
+        self.sampler = func
+
     def get_ram_begin(self):
         return 0x800
 
     def set_cpu_mem_trace_hook(self, func):
         pass
 
+    def add_mem_watch(self, watch):
+        self.mem_watches.append(watch)
+
+    def remove_mem_watch(self, watch):
+        self.mem_watches.remove(watch)
+
     def set_mem(self, mem):
         self.mem = mem
+        self.mem_io = MemoryIO(mem)
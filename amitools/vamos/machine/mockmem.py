@@ -18,6 +18,10 @@ class MockMemory(object):
     def get_ram_size_bytes(self):
         return self.size_bytes
 
+    def get_ram_view(self):
+        """return a memoryview of the whole RAM"""
+        return memoryview(self.data)
+
     def reserve_special_range(self, num_pages=1):
         raise NotImplementedError()
 
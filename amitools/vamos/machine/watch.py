@@ -0,0 +1,77 @@
+class MemWatch(object):
+    """a watched address range of CPU memory accesses
+
+    func(mode, width, addr, value) is called for each access that touches
+    the range with a mode ('R', 'W') in modes and a width (0=byte, 1=word,
+    2=long) in widths.
+    """
+
+    def __init__(self, addr, size, func, modes="RW", widths=(0, 1, 2)):
+        self.addr = addr
+        self.size = size
+        self.end = addr + size
+        self.func = func
+        self.modes = modes
+        self.widths = widths
+
+    def __str__(self):
+        return "[MemWatch:@%06x +%06x %s %s]" % (
+            self.addr,
+            self.size,
+            self.modes,
+            ",".join(str(1 << w) for w in self.widths),
+        )
+
+    def matches(self, mode, width, addr):
+        return (
+            addr < self.end
+            and addr + (1 << width) > self.addr
+            and mode in self.modes
+            and width in self.widths
+        )
+
+
+class MemWatchList(object):
+    """filter the CPU memory trace by the watched ranges
+
+    The pages touched by the watches are kept in a set, so most accesses
+    are rejected with a single lookup before any watch is checked.
+    The trace function is rebuilt on each change to keep the lookups local.
+    """
+
+    page_shift = 12
+
+    def __init__(self):
+        self.watches = []
+        self.trace = self._build_trace()
+
+    def __len__(self):
+        return len(self.watches)
+
+    def add(self, watch):
+        self.watches.append(watch)
+        self.trace = self._build_trace()
+
+    def remove(self, watch):
+        self.watches.remove(watch)
+        self.trace = self._build_trace()
+
+    def _build_trace(self):
+        """return the trace function for the CPU memory"""
+        shift = self.page_shift
+        pages = set()
+        for w in self.watches:
+            # a long access may start up to 3 bytes before the range
+            first = max(w.addr - 3, 0) >> shift
+            last = (w.end - 1) >> shift
+            pages.update(range(first, last + 1))
+        watches = tuple(self.watches)
+
+        def trace(mode, width, addr, value=0):
+            if addr >> shift in pages:
+                for w in watches:
+                    if w.matches(mode, width, addr):
+                        w.func(mode, width, addr, value)
+            return 0
+
+        return trace
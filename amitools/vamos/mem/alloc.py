@@ -2,6 +2,7 @@ from amitools.vamos.error import *
 from amitools.vamos.log import log_mem_alloc
 from amitools.vamos.label import LabelRange, LabelStruct, LabelLib
 from amitools.vamos.astructs import AccessStruct
+from .freelist import MemoryChunk, FirstFitFreeList, create_free_list
 
 
 class Memory:
@@ -18,29 +19,13 @@ class Memory:
             return "[@%06x +%06x %06x]" % (self.addr, self.size, self.addr + self.size)
 
 
-class MemoryChunk:
-    def __init__(self, addr, size):
-        self.addr = addr
-        self.size = size
-        self.next = None
-        self.prev = None
-
-    def __str__(self):
-        end = self.addr + self.size
-        return "[@%06x +%06x %06x]" % (self.addr, self.size, end)
-
-    def does_fit(self, size):
-        """check if new size would fit into chunk
-        return < 0 if it does not fit, 0 for exact fit, > 0 n wasted bytes
-        """
-        return self.size - size
-
-
 class MemoryAlloc:
-    def __init__(self, mem, addr=0, size=0, label_mgr=None):
+    def __init__(self, mem, addr=0, size=0, label_mgr=None, free_list=None):
         """mem is a interface.
         setup allocator starting at addr with size bytes.
         if label_mgr is set then labels are created for allocations.
+        free_list selects the free chunk manager by name (see freelist.py).
+        default is 'first_fit'.
         """
         # if no size is specified then take mem total
         if size == 0:
@@ -60,23 +45,48 @@ class MemoryAlloc:
 
         self.addrs = {}
         self.mem_objs = {}
+        self.num_allocs = 0
 
         # init free list
         self.free_bytes = size
-        self.free_first = MemoryChunk(addr, self.free_bytes)
-        self.free_entries = 1
+        if free_list is None:
+            free_list = FirstFitFreeList.name
+        self.free_list = create_free_list(free_list, addr, size)
+        if self.free_list is None:
+            raise VamosInternalError("Invalid free list type: %s" % free_list)
 
     @classmethod
-    def for_machine(cls, machine):
+    def for_machine(cls, machine, free_list=None):
         return cls(
             machine.get_mem(),
             addr=machine.get_ram_begin(),
             label_mgr=machine.get_label_mgr(),
+            free_list=free_list,
         )
 
     def get_mem(self):
         return self.mem
 
+    def get_state(self):
+        """return a copy of the allocation state for set_state()"""
+        return (
+            self.free_bytes,
+            dict(self.addrs),
+            dict(self.mem_objs),
+            self.free_list.get_chunks(),
+        )
+
+    def set_state(self, state):
+        """restore an allocation state returned by get_state()
+
+        note: labels of the allocations are not touched here.
+        """
+        free_bytes, addrs, mem_objs, chunks = state
+        self.free_bytes = free_bytes
+        self.addrs = dict(addrs)
+        self.mem_objs = dict(mem_objs)
+        self.free_list.set_chunks(chunks)
+
     def get_addr(self):
         return self.addr
 
@@ -86,99 +96,24 @@ class MemoryAlloc:
     def get_label_mgr(self):
         return self.label_mgr
 
+    def get_free_list(self):
+        return self.free_list
+
     def get_free_bytes(self):
         return self.free_bytes
 
+    def get_num_allocs(self):
+        """return the number of allocations done so far"""
+        return self.num_allocs
+
     def is_all_free(self):
         return self.size == self.free_bytes
 
-    def _find_best_chunk(self, size):
-        """find best chunk that could take the given alloc
-        return: index of chunk in free list or -1 if none found + bytes left in chunk
-        """
-        chunk = self.free_first
-        while chunk != None:
-            left = chunk.does_fit(size)
-            # exact match
-            if left == 0:
-                return (chunk, 0)
-            # potential candidate: has some bytes left
-            elif left > 0:
-                # Don't make such a hassle. Return the first one that fits.
-                # This function takes too much time.
-                return (chunk, left)
-            chunk = chunk.next
-        # nothing found?
-        return (None, -1)
-
-    def _remove_chunk(self, chunk):
-        next = chunk.next
-        prev = chunk.prev
-        if chunk == self.free_first:
-            self.free_first = next
-        if next != None:
-            next.prev = prev
-        if prev != None:
-            prev.next = next
-        self.free_entries -= 1
-
-    def _replace_chunk(self, old_chunk, new_chunk):
-        next = old_chunk.next
-        prev = old_chunk.prev
-        if old_chunk == self.free_first:
-            self.free_first = new_chunk
-        if next != None:
-            next.prev = new_chunk
-        if prev != None:
-            prev.next = new_chunk
-        new_chunk.next = next
-        new_chunk.prev = prev
-
-    def _insert_chunk(self, chunk):
-        cur = self.free_first
-        last = None
-        addr = chunk.addr
-        while cur != None:
-            # fits right before
-            if addr < cur.addr:
-                break
-            last = cur
-            cur = cur.next
-        # inster after last but before cur
-        if last == None:
-            self.free_first = chunk
-        else:
-            last.next = chunk
-            chunk.prev = last
-        if cur != None:
-            chunk.next = cur
-            cur.prev = chunk
-        self.free_entries += 1
-
-    def _merge_chunk(self, a, b):
-        # can we merge?
-        if a.addr + a.size == b.addr:
-            chunk = MemoryChunk(a.addr, a.size + b.size)
-            prev = a.prev
-            if prev != None:
-                prev.next = chunk
-                chunk.prev = prev
-            next = b.next
-            if next != None:
-                next.prev = chunk
-                chunk.next = next
-            if self.free_first == a:
-                self.free_first = chunk
-            self.free_entries -= 1
-            return chunk
-        else:
-            return None
-
     def _stat_info(self):
         num_allocs = len(self.addrs)
         return "(free %06x #%d) (allocs #%d)" % (
             self.free_bytes,
-            self.free_entries,
+            self.free_list.get_num_chunks(),
             num_allocs,
         )
 
@@ -186,26 +121,19 @@ class MemoryAlloc:
         """allocate memory and return addr or 0 if no more memory"""
         # align size to 4 bytes
         size = (size + 3) & ~3
-        # find best free chunk
-        chunk, left = self._find_best_chunk(size)
+        # take a free chunk
+        addr = self.free_list.alloc(size)
         # out of memory?
-        if chunk == None:
+        if addr is None:
             if except_on_fail:
                 self.dump_orphans()
-                log_mem_alloc.error("[alloc: NO MEMORY for %06x bytes]" % size)
+                log_mem_alloc.error("[alloc: NO MEMORY for %06x bytes]", size)
                 raise VamosInternalError("[alloc: NO MEMORY for %06x bytes]" % size)
             return 0
-        # remove chunk from free list
-        # is something left?
-        addr = chunk.addr
-        if left == 0:
-            self._remove_chunk(chunk)
-        else:
-            left_chunk = MemoryChunk(addr + size, left)
-            self._replace_chunk(chunk, left_chunk)
         # add to valid allocs map
         self.addrs[addr] = size
         self.free_bytes -= size
+        self.num_allocs += 1
         # erase memory
         self.mem.clear_block(addr, size, 0)
         log_mem_alloc.info(
@@ -231,26 +159,8 @@ class MemoryAlloc:
         assert size == real_size
         # remove from valid allocs
         del self.addrs[addr]
-        # create a new free chunk
-        chunk = MemoryChunk(addr, real_size)
-        self._insert_chunk(chunk)
-
-        # try to merge with prev/next
-        prev = chunk.prev
-        if prev != None:
-            new_chunk = self._merge_chunk(prev, chunk)
-            if new_chunk != None:
-                log_mem_alloc.debug(
-                    "merged: %s + this=%s -> %s", prev, chunk, new_chunk
-                )
-                chunk = new_chunk
-        next = chunk.next
-        if next != None:
-            new_chunk = self._merge_chunk(chunk, next)
-            if new_chunk != None:
-                log_mem_alloc.debug(
-                    "merged: this=%s + %s -> %s", chunk, next, new_chunk
-                )
+        # return chunk to free list and merge with neighbors
+        self.free_list.free(addr, real_size)
 
         # correct free bytes
         self.free_bytes += size
@@ -270,37 +180,26 @@ class MemoryAlloc:
             return None
 
     def dump_mem_state(self):
-        chunk = self.free_first
         num = 0
-        while chunk != None:
-            log_mem_alloc.debug("dump #%02d: %s" % (num, chunk))
+        for addr, size in self.free_list.get_chunks():
+            log_mem_alloc.debug("dump #%02d: %s", num, MemoryChunk(addr, size))
             num += 1
-            chunk = chunk.next
 
     def _dump_orphan(self, addr, size):
-        log_mem_alloc.warning("orphan: [@%06x +%06x %06x]" % (addr, size, addr + size))
+        log_mem_alloc.warning("orphan: [@%06x +%06x %06x]", addr, size, addr + size)
         if self.label_mgr:
             labels = self.label_mgr.get_intersecting_labels(addr, size)
             for l in labels:
                 log_mem_alloc.warning("-> %s", l)
 
     def dump_orphans(self):
-        last = self.free_first
-        # orphan at begin?
-        if last.addr != self.addr:
-            addr = self.addr
-            size = last.addr - addr
-            self._dump_orphan(addr, size)
         # walk along free list
-        cur = last.next
-        while cur != None:
-            addr = last.addr + last.size
-            size = cur.addr - addr
-            self._dump_orphan(addr, size)
-            last = cur
-            cur = cur.next
+        addr = self.addr
+        for chunk_addr, chunk_size in self.free_list.get_chunks():
+            if chunk_addr != addr:
+                self._dump_orphan(addr, chunk_addr - addr)
+            addr = chunk_addr + chunk_size
         # orphan at end?
-        addr = last.addr + last.size
         end = self.addr + self.size
         if addr != end:
             self._dump_orphan(addr, end - addr)
@@ -452,17 +351,9 @@ class MemoryAlloc:
 
     def available(self):
         free = 0
-        chunk = self.free_first
-        while chunk != None:
-            free += chunk.size
-            chunk = chunk.next
+        for addr, size in self.free_list.get_chunks():
+            free += size
         return free
 
     def largest_chunk(self):
-        largest = 0
-        chunk = self.free_first
-        while chunk != None:
-            if chunk.size > largest:
-                largest = chunk.size
-            chunk = chunk.next
-        return largest
+        return self.free_list.get_largest_chunk()
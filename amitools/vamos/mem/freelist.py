@@ -0,0 +1,318 @@
+from bisect import bisect_left, insort
+
+
+class MemoryChunk:
+    def __init__(self, addr, size):
+        self.addr = addr
+        self.size = size
+        self.next = None
+        self.prev = None
+
+    def __str__(self):
+        end = self.addr + self.size
+        return "[@%06x +%06x %06x]" % (self.addr, self.size, end)
+
+    def does_fit(self, size):
+        """check if new size would fit into chunk
+        return < 0 if it does not fit, 0 for exact fit, > 0 n wasted bytes
+        """
+        return self.size - size
+
+
+class FirstFitFreeList:
+    """manage free memory chunks in an address sorted linked list.
+
+    allocation takes the first chunk that fits.
+    """
+
+    name = "first_fit"
+
+    def __init__(self, addr, size):
+        self.free_first = MemoryChunk(addr, size)
+        self.free_entries = 1
+
+    def get_num_chunks(self):
+        return self.free_entries
+
+    def get_chunks(self):
+        """return address sorted list of free (addr, size) chunks"""
+        result = []
+        chunk = self.free_first
+        while chunk != None:
+            result.append((chunk.addr, chunk.size))
+            chunk = chunk.next
+        return result
+
+    def set_chunks(self, chunks):
+        """replace all free chunks with the given address sorted chunks"""
+        self.free_first = None
+        self.free_entries = 0
+        last = None
+        for addr, size in chunks:
+            chunk = MemoryChunk(addr, size)
+            if last is None:
+                self.free_first = chunk
+            else:
+                last.next = chunk
+                chunk.prev = last
+            last = chunk
+            self.free_entries += 1
+
+    def get_largest_chunk(self):
+        largest = 0
+        chunk = self.free_first
+        while chunk != None:
+            if chunk.size > largest:
+                largest = chunk.size
+            chunk = chunk.next
+        return largest
+
+    def alloc(self, size):
+        """take size bytes from the free chunks and return addr or None"""
+        # find best free chunk
+        chunk, left = self._find_best_chunk(size)
+        # out of memory?
+        if chunk == None:
+            return None
+        # remove chunk from free list
+        # is something left?
+        addr = chunk.addr
+        if left == 0:
+            self._remove_chunk(chunk)
+        else:
+            left_chunk = MemoryChunk(addr + size, left)
+            self._replace_chunk(chunk, left_chunk)
+        return addr
+
+    def free(self, addr, size):
+        """return a chunk and merge it with its neighbors"""
+        # create a new free chunk
+        chunk = MemoryChunk(addr, size)
+        self._insert_chunk(chunk)
+
+        # try to merge with prev/next
+        prev = chunk.prev
+        if prev != None:
+            new_chunk = self._merge_chunk(prev, chunk)
+            if new_chunk != None:
+                chunk = new_chunk
+        next = chunk.next
+        if next != None:
+            self._merge_chunk(chunk, next)
+
+    def _find_best_chunk(self, size):
+        """find best chunk that could take the given alloc
+        return: index of chunk in free list or -1 if none found + bytes left in chunk
+        """
+        chunk = self.free_first
+        while chunk != None:
+            left = chunk.does_fit(size)
+            # exact match
+            if left == 0:
+                return (chunk, 0)
+            # potential candidate: has some bytes left
+            elif left > 0:
+                # Don't make such a hassle. Return the first one that fits.
+                # This function takes too much time.
+                return (chunk, left)
+            chunk = chunk.next
+        # nothing found?
+        return (None, -1)
+
+    def _remove_chunk(self, chunk):
+        next = chunk.next
+        prev = chunk.prev
+        if chunk == self.free_first:
+            self.free_first = next
+        if next != None:
+            next.prev = prev
+        if prev != None:
+            prev.next = next
+        self.free_entries -= 1
+
+    def _replace_chunk(self, old_chunk, new_chunk):
+        next = old_chunk.next
+        prev = old_chunk.prev
+        if old_chunk == self.free_first:
+            self.free_first = new_chunk
+        if next != None:
+            next.prev = new_chunk
+        if prev != None:
+            prev.next = new_chunk
+        new_chunk.next = next
+        new_chunk.prev = prev
+
+    def _insert_chunk(self, chunk):
+        cur = self.free_first
+        last = None
+        addr = chunk.addr
+        while cur != None:
+            # fits right before
+            if addr < cur.addr:
+                break
+            last = cur
+            cur = cur.next
+        # inster after last but before cur
+        if last == None:
+            self.free_first = chunk
+        else:
+            last.next = chunk
+            chunk.prev = last
+        if cur != None:
+            chunk.next = cur
+            cur.prev = chunk
+        self.free_entries += 1
+
+    def _merge_chunk(self, a, b):
+        # can we merge?
+        if a.addr + a.size == b.addr:
+            chunk = MemoryChunk(a.addr, a.size + b.size)
+            prev = a.prev
+            if prev != None:
+                prev.next = chunk
+                chunk.prev = prev
+            next = b.next
+            if next != None:
+                next.prev = chunk
+                chunk.next = next
+            if self.free_first == a:
+                self.free_first = chunk
+            self.free_entries -= 1
+            return chunk
+        else:
+            return None
+
+
+class BestFitFreeList:
+    """manage free memory chunks in size segregated bins.
+
+    Small chunks are kept in exact size bins (in steps of 4 bytes) and a bit
+    mask of non-empty bins finds the smallest fitting bin without a scan.
+    Larger chunks are kept in a list sorted by size and address.
+
+    Coalescing uses boundary maps from chunk begin to size and from chunk end
+    to begin, so neighbors of a freed chunk are found without any search.
+    """
+
+    name = "best_fit"
+    small_limit = 4096
+
+    def __init__(self, addr, size):
+        # begin -> size and end -> begin of all free chunks
+        self.by_begin = {}
+        self.by_end = {}
+        # small chunks: bin per size/4 with set of addrs
+        self.bins = [None] * (self.small_limit >> 2)
+        self.bin_mask = 0
+        # large chunks: sorted keys of size << 32 | addr
+        self.large_keys = []
+        if size > 0:
+            self._add_chunk(addr, size)
+
+    def get_num_chunks(self):
+        return len(self.by_begin)
+
+    def get_chunks(self):
+        """return address sorted list of free (addr, size) chunks"""
+        return sorted(self.by_begin.items())
+
+    def set_chunks(self, chunks):
+        """replace all free chunks with the given address sorted chunks"""
+        self.by_begin = {}
+        self.by_end = {}
+        self.bins = [None] * (self.small_limit >> 2)
+        self.bin_mask = 0
+        self.large_keys = []
+        for addr, size in chunks:
+            self._add_chunk(addr, size)
+
+    def get_largest_chunk(self):
+        if self.large_keys:
+            return self.large_keys[-1] >> 32
+        mask = self.bin_mask
+        if mask:
+            idx = mask.bit_length() - 1
+            return max(self.by_begin[addr] for addr in self.bins[idx])
+        return 0
+
+    def alloc(self, size):
+        """take size bytes from the free chunks and return addr or None"""
+        addr = None
+        if size < self.small_limit:
+            idx = size >> 2
+            # any chunk of size idx*4 ... fits as size is aligned
+            mask = self.bin_mask >> idx
+            if mask:
+                idx += (mask & -mask).bit_length() - 1
+                addr = next(iter(self.bins[idx]))
+        if addr is None:
+            keys = self.large_keys
+            pos = bisect_left(keys, size << 32)
+            if pos == len(keys):
+                return None
+            addr = keys[pos] & 0xFFFFFFFF
+        chunk_size = self.by_begin[addr]
+        self._remove_chunk(addr, chunk_size)
+        if chunk_size > size:
+            self._add_chunk(addr + size, chunk_size - size)
+        return addr
+
+    def free(self, addr, size):
+        """return a chunk and merge it with its neighbors"""
+        # merge with prev chunk ending here
+        prev_addr = self.by_end.get(addr)
+        if prev_addr is not None:
+            prev_size = self.by_begin[prev_addr]
+            self._remove_chunk(prev_addr, prev_size)
+            addr = prev_addr
+            size += prev_size
+        # merge with next chunk starting at our end
+        end = addr + size
+        next_size = self.by_begin.get(end)
+        if next_size is not None:
+            self._remove_chunk(end, next_size)
+            size += next_size
+        if size > 0:
+            self._add_chunk(addr, size)
+
+    def _add_chunk(self, addr, size):
+        self.by_begin[addr] = size
+        self.by_end[addr + size] = addr
+        if size < self.small_limit:
+            idx = size >> 2
+            bin = self.bins[idx]
+            if bin is None:
+                bin = set()
+                self.bins[idx] = bin
+            bin.add(addr)
+            self.bin_mask |= 1 << idx
+        else:
+            insort(self.large_keys, size << 32 | addr)
+
+    def _remove_chunk(self, addr, size):
+        del self.by_begin[addr]
+        del self.by_end[addr + size]
+        if size < self.small_limit:
+            idx = size >> 2
+            bin = self.bins[idx]
+            bin.discard(addr)
+            if not bin:
+                self.bin_mask &= ~(1 << idx)
+        else:
+            keys = self.large_keys
+            pos = bisect_left(keys, size << 32 | addr)
+            del keys[pos]
+
+
+free_list_types = {
+    FirstFitFreeList.name: FirstFitFreeList,
+    BestFitFreeList.name: BestFitFreeList,
+}
+
+
+def create_free_list(name, addr, size):
+    """create a free list by name. return None if name is unknown"""
+    free_list_type = free_list_types.get(name)
+    if free_list_type is None:
+        return None
+    return free_list_type(addr, size)
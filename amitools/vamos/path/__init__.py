@@ -1,7 +1,16 @@
 from .assign import AssignManager
 from .mgr import PathManager, SysPathError
 from .spec import Spec
-from .volume import VolumeManager, Volume, resolve_sys_path
+from .volume import (
+    VolumeManager,
+    Volume,
+    VolumeBackend,
+    HostBackend,
+    MEM_PREFIX,
+    resolve_sys_path,
+)
+from .memfs import MemBackend
+from .dircache import DirCache
 from .amipath import AmiPath, AmiPathError
 from .lazypath import LazyPath, LazyPathList
 from .env import AmiPathEnv
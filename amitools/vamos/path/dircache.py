@@ -0,0 +1,78 @@
+import os
+import stat
+import time
+
+
+class DirCache(object):
+    """cache the lower case names of host directories
+
+    A listing is keyed by the host path of the directory and maps the lower
+    case names to the real names. An entry is valid as long as the mtime of
+    the directory is unchanged. A listing taken shortly after a change of the
+    directory is not kept, as further changes in the same time stamp tick
+    would be missed.
+
+    Changes done by vamos itself are reported with invalidate().
+    """
+
+    # ignore listings of directories changed in the last seconds
+    racy_delta = 2.0
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_names(self, path):
+        """return lower case name map of a directory or None if no dir"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISDIR(st.st_mode):
+            return None
+        mtime = st.st_mtime_ns
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        try:
+            files = os.listdir(path)
+        except OSError:
+            return None
+        names = {}
+        for name in files:
+            names.setdefault(name.lower(), name)
+        # only keep listing if the dir was not changed just now
+        if time.time() - mtime / 1e9 > self.racy_delta:
+            if len(self.entries) >= self.max_entries:
+                self.entries.clear()
+            self.entries[path] = (mtime, names)
+        elif entry is not None:
+            del self.entries[path]
+        return names
+
+    def find_name(self, path, name):
+        """return the real name of a name in a directory or None"""
+        names = self.get_names(path)
+        if names is None:
+            return None
+        return names.get(name.lower())
+
+    def invalidate(self, sys_path):
+        """a host path was created, removed or renamed"""
+        sys_path = sys_path.rstrip(os.sep)
+        self.entries.pop(sys_path, None)
+        self.entries.pop(os.path.dirname(sys_path), None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+        }
@@ -0,0 +1,395 @@
+import io
+import os
+import stat
+import time
+import errno
+
+from amitools.vamos.log import log_path
+from .volume import VolumeBackend
+
+
+class MemNode(object):
+    """a file or dir in the memory file system"""
+
+    def __init__(self, name, is_dir, mode):
+        self.name = name
+        self.is_dir = is_dir
+        self.mode = mode
+        self.mtime = time.time()
+        if is_dir:
+            # lower case name -> node
+            self.entries = {}
+            # lower case name -> name
+            self.names = {}
+            self.data = None
+        else:
+            self.entries = None
+            self.names = None
+            self.data = bytearray()
+
+    def get_stat(self):
+        if self.is_dir:
+            mode = stat.S_IFDIR | self.mode
+            size = 0
+        else:
+            mode = stat.S_IFREG | self.mode
+            size = len(self.data)
+        t = self.mtime
+        return os.stat_result((mode, id(self), 0, 1, 0, 0, size, t, t, t))
+
+
+class MemDirEntry(object):
+    """the os.DirEntry of a memory file system"""
+
+    def __init__(self, node, path):
+        self.node = node
+        self.name = node.name
+        self.path = path
+
+    def is_dir(self):
+        return self.node.is_dir
+
+    def is_file(self):
+        return not self.node.is_dir
+
+    def stat(self):
+        return self.node.get_stat()
+
+
+class MemFile(io.RawIOBase):
+    """a file object that works directly on the data of a file node"""
+
+    def __init__(self, fs, node, readable, writable, append=False):
+        io.RawIOBase.__init__(self)
+        self.fs = fs
+        self.node = node
+        self._readable = readable
+        self._writable = writable
+        self.pos = len(node.data) if append else 0
+
+    def _check_closed(self):
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+
+    def readable(self):
+        return self._readable
+
+    def writable(self):
+        return self._writable
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        self._check_closed()
+        if not self._readable:
+            raise io.UnsupportedOperation("not readable")
+        data = self.node.data
+        pos = self.pos
+        end = min(pos + len(b), len(data))
+        if end <= pos:
+            return 0
+        n = end - pos
+        # copy without an intermediate bytes object
+        with memoryview(data) as view:
+            b[:n] = view[pos:end]
+        self.pos = end
+        return n
+
+    def read(self, size=-1):
+        self._check_closed()
+        if not self._readable:
+            raise io.UnsupportedOperation("not readable")
+        data = self.node.data
+        pos = self.pos
+        if size is None or size < 0:
+            end = len(data)
+        else:
+            end = min(pos + size, len(data))
+        if end <= pos:
+            return b""
+        self.pos = end
+        return bytes(data[pos:end])
+
+    read1 = read
+
+    def readall(self):
+        return self.read()
+
+    def write(self, b):
+        self._check_closed()
+        if not self._writable:
+            raise io.UnsupportedOperation("not writable")
+        node = self.node
+        data = node.data
+        n = len(b)
+        end = self.pos + n
+        grow = end - len(data)
+        if grow > 0:
+            self.fs._alloc(grow)
+            # fill gap after a seek beyond the end
+            gap = self.pos - len(data)
+            if gap > 0:
+                data.extend(bytes(gap))
+        data[self.pos : end] = b
+        self.pos = end
+        node.mtime = time.time()
+        return n
+
+    def seek(self, pos, whence=0):
+        self._check_closed()
+        if whence == 1:
+            pos += self.pos
+        elif whence == 2:
+            pos += len(self.node.data)
+        if pos < 0:
+            raise OSError(errno.EINVAL, "negative seek position")
+        self.pos = pos
+        return pos
+
+    def tell(self):
+        self._check_closed()
+        return self.pos
+
+    def truncate(self, size=None):
+        self._check_closed()
+        if not self._writable:
+            raise io.UnsupportedOperation("not writable")
+        if size is None:
+            size = self.pos
+        data = self.node.data
+        delta = size - len(data)
+        if delta > 0:
+            self.fs._alloc(delta)
+            data.extend(bytes(delta))
+        else:
+            self.fs._free(-delta)
+            del data[size:]
+        self.node.mtime = time.time()
+        return size
+
+
+class MemBackend(VolumeBackend):
+    """a volume backend keeping all files in memory
+
+    The sys paths of the volume are virtual: 'mem:<volume>/dir/file'.
+    Names are looked up case insensitive like in AmigaDOS.
+
+    max_size limits the bytes stored in all files. The contents can be
+    written to a host directory on shutdown (dump_path).
+    """
+
+    def __init__(self, root_path, max_size=None, dump_path=None):
+        self.root_path = root_path
+        self.max_size = max_size
+        self.dump_path = dump_path
+        self.root = None
+        self.used = 0
+        self.umask = os.umask(0)
+        os.umask(self.umask)
+
+    def setup(self):
+        self.root = MemNode(self.root_path, True, 0o777 & ~self.umask)
+        self.used = 0
+        return True
+
+    def shutdown(self):
+        if self.dump_path and self.root:
+            self.dump(self.dump_path)
+        self.root = None
+        self.used = 0
+
+    def get_used_size(self):
+        return self.used
+
+    def dump(self, path):
+        """write the contents to a host directory"""
+        log_path.info("mem volume: dumping '%s' to '%s'", self.root_path, path)
+        try:
+            self._dump_dir(self.root, path)
+        except OSError as e:
+            log_path.error("mem volume: error dumping to '%s': %s", path, e)
+
+    def _dump_dir(self, node, path):
+        os.makedirs(path, exist_ok=True)
+        for sub in node.entries.values():
+            sub_path = os.path.join(path, sub.name)
+            if sub.is_dir:
+                self._dump_dir(sub, sub_path)
+            else:
+                with open(sub_path, "wb") as fh:
+                    fh.write(sub.data)
+                os.chmod(sub_path, sub.mode)
+            os.utime(sub_path, (sub.mtime, sub.mtime))
+
+    # ----- internal -----
+
+    def _alloc(self, size):
+        if self.max_size is not None and self.used + size > self.max_size:
+            raise OSError(errno.ENOSPC, "mem volume full", self.root_path)
+        self.used += size
+
+    def _free(self, size):
+        self.used -= size
+
+    def _split(self, path):
+        """return the name components of a path in the volume or None"""
+        root = self.root_path
+        if path == root:
+            return []
+        if not path.startswith(root + "/"):
+            return None
+        return [x for x in path[len(root) + 1 :].split("/") if x]
+
+    def _find(self, path):
+        names = self._split(path)
+        if names is None or self.root is None:
+            return None
+        node = self.root
+        for name in names:
+            if not node.is_dir:
+                return None
+            node = node.entries.get(name.lower())
+            if node is None:
+                return None
+        return node
+
+    def _get(self, path):
+        node = self._find(path)
+        if node is None:
+            raise FileNotFoundError(errno.ENOENT, "no such file", path)
+        return node
+
+    def _get_parent(self, path):
+        """return parent node and name of a path"""
+        names = self._split(path)
+        if not names:
+            raise PermissionError(errno.EACCES, "invalid path", path)
+        parent = self._get(self.root_path + "/" + "/".join(names[:-1]))
+        if not parent.is_dir:
+            raise NotADirectoryError(errno.ENOTDIR, "not a dir", path)
+        return parent, names[-1]
+
+    def _add(self, parent, node):
+        lo_name = node.name.lower()
+        parent.entries[lo_name] = node
+        parent.names[lo_name] = node.name
+        parent.mtime = time.time()
+
+    def _remove(self, parent, node):
+        lo_name = node.name.lower()
+        del parent.entries[lo_name]
+        del parent.names[lo_name]
+        parent.mtime = time.time()
+
+    # ----- backend API -----
+
+    def get_names(self, path):
+        node = self._find(path)
+        if node is None or not node.is_dir:
+            return None
+        return node.names
+
+    def exists(self, path):
+        return self._find(path) is not None
+
+    def isdir(self, path):
+        node = self._find(path)
+        return node is not None and node.is_dir
+
+    def isfile(self, path):
+        node = self._find(path)
+        return node is not None and not node.is_dir
+
+    def access(self, path, mode):
+        node = self._find(path)
+        if node is None:
+            return False
+        if mode & os.R_OK and not node.mode & stat.S_IRUSR:
+            return False
+        if mode & os.W_OK and not node.mode & stat.S_IWUSR:
+            return False
+        if mode & os.X_OK and not node.mode & stat.S_IXUSR:
+            return False
+        return True
+
+    def stat(self, path):
+        return self._get(path).get_stat()
+
+    def scandir(self, path):
+        node = self._get(path)
+        if not node.is_dir:
+            raise NotADirectoryError(errno.ENOTDIR, "not a dir", path)
+        return [MemDirEntry(n, path + "/" + n.name) for n in node.entries.values()]
+
+    def listdir(self, path):
+        return [e.name for e in self.scandir(path)]
+
+    def open(self, path, mode):
+        readable = "r" in mode or "+" in mode
+        writable = "w" in mode or "a" in mode or "+" in mode
+        node = self._find(path)
+        if node is None:
+            if mode[0] == "r":
+                raise FileNotFoundError(errno.ENOENT, "no such file", path)
+            parent, name = self._get_parent(path)
+            node = MemNode(name, False, 0o666 & ~self.umask)
+            self._add(parent, node)
+        elif node.is_dir:
+            raise IsADirectoryError(errno.EISDIR, "is a dir", path)
+        elif writable and not node.mode & stat.S_IWUSR:
+            raise PermissionError(errno.EACCES, "write protected", path)
+        elif mode[0] == "w":
+            self._free(len(node.data))
+            node.data = bytearray()
+            node.mtime = time.time()
+        return MemFile(self, node, readable, writable, mode[0] == "a")
+
+    def remove(self, path):
+        parent, name = self._get_parent(path)
+        node = self._get(path)
+        if node.is_dir:
+            raise IsADirectoryError(errno.EISDIR, "is a dir", path)
+        self._remove(parent, node)
+        self._free(len(node.data))
+
+    def rmdir(self, path):
+        parent, name = self._get_parent(path)
+        node = self._get(path)
+        if not node.is_dir:
+            raise NotADirectoryError(errno.ENOTDIR, "not a dir", path)
+        if node.entries:
+            raise OSError(errno.ENOTEMPTY, "dir not empty", path)
+        self._remove(parent, node)
+
+    def mkdir(self, path):
+        if self._find(path) is not None:
+            raise FileExistsError(errno.EEXIST, "exists", path)
+        parent, name = self._get_parent(path)
+        self._add(parent, MemNode(name, True, 0o777 & ~self.umask))
+
+    def rename(self, old_path, new_path):
+        old_parent, old_name = self._get_parent(old_path)
+        node = self._get(old_path)
+        new_parent, new_name = self._get_parent(new_path)
+        # do not move a dir into itself
+        old_names = [x.lower() for x in self._split(old_path)]
+        new_names = [x.lower() for x in self._split(new_path)]
+        num = len(old_names)
+        if len(new_names) > num and new_names[:num] == old_names:
+            raise OSError(errno.EINVAL, "can't move dir into itself", new_path)
+        other = new_parent.entries.get(new_name.lower())
+        if other is not None and other is not node:
+            if other.is_dir:
+                raise IsADirectoryError(errno.EISDIR, "is a dir", new_path)
+            self._remove(new_parent, other)
+            self._free(len(other.data))
+        self._remove(old_parent, node)
+        node.name = new_name
+        self._add(new_parent, node)
+
+    def chmod(self, path, mode):
+        self._get(path).mode = mode & 0o777
+
+    def utime(self, path, times):
+        self._get(path).mtime = times[1]
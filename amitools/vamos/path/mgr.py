@@ -510,6 +510,14 @@ class PathManager:
         res = self.vol_mgr.ami_to_sys_path(str(ami_path))
         return res
 
+    def invalidate_sys_path(self, sys_path):
+        """a host path was created, removed or renamed by vamos"""
+        self.vol_mgr.invalidate_sys_path(sys_path)
+
+    def get_backend(self, sys_path):
+        """return the volume backend that accesses a sys path"""
+        return self.vol_mgr.get_backend(sys_path)
+
     def from_sys_path(self, sys_path, strict=False):
         """Convert sys path to AmiPath
 
@@ -4,6 +4,7 @@ import shutil
 from amitools.vamos.log import log_path
 import logging
 from .spec import Spec
+from .dircache import DirCache
 
 
 def resolve_sys_path(sys_path):
@@ -19,14 +20,166 @@ def resolve_sys_path(sys_path):
     return abs_path
 
 
+# prefix of the sys paths of volumes in memory
+MEM_PREFIX = "mem:"
+
+
+class VolumeBackend(object):
+    """access the objects of a volume by their sys path.
+
+    FileManager, LockManager and Lock never touch the host file system
+    directly but ask the volume manager for the backend of a sys path.
+    The calls mirror the os functions and raise OSError on failure.
+    """
+
+    def setup(self):
+        return True
+
+    def shutdown(self):
+        pass
+
+    def get_names(self, path):
+        """return lower case to real name map of a dir or None if no dir"""
+        raise NotImplementedError()
+
+    def exists(self, path):
+        raise NotImplementedError()
+
+    def isdir(self, path):
+        raise NotImplementedError()
+
+    def isfile(self, path):
+        raise NotImplementedError()
+
+    def access(self, path, mode):
+        raise NotImplementedError()
+
+    def stat(self, path):
+        raise NotImplementedError()
+
+    def scandir(self, path):
+        """return a list of os.DirEntry like objects"""
+        raise NotImplementedError()
+
+    def listdir(self, path):
+        raise NotImplementedError()
+
+    def open(self, path, mode):
+        """return a binary file object"""
+        raise NotImplementedError()
+
+    def remove(self, path):
+        raise NotImplementedError()
+
+    def rmdir(self, path):
+        raise NotImplementedError()
+
+    def mkdir(self, path):
+        raise NotImplementedError()
+
+    def makedirs(self, path):
+        if self.isdir(path):
+            return
+        parent = os.path.dirname(path)
+        if parent != path and not self.exists(parent):
+            self.makedirs(parent)
+        self.mkdir(path)
+
+    def rename(self, old_path, new_path):
+        raise NotImplementedError()
+
+    def chmod(self, path, mode):
+        raise NotImplementedError()
+
+    def utime(self, path, times):
+        raise NotImplementedError()
+
+
+class HostBackend(VolumeBackend):
+    """the volume is a directory of the host file system"""
+
+    def __init__(self, dir_cache=None):
+        self.dir_cache = dir_cache
+
+    def _invalidate(self, path):
+        if self.dir_cache:
+            self.dir_cache.invalidate(path)
+
+    def get_names(self, path):
+        if self.dir_cache:
+            return self.dir_cache.get_names(path)
+        try:
+            return {name.lower(): name for name in os.listdir(path)}
+        except OSError:
+            return None
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def isdir(self, path):
+        return os.path.isdir(path)
+
+    def isfile(self, path):
+        return os.path.isfile(path)
+
+    def access(self, path, mode):
+        return os.access(path, mode)
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def scandir(self, path):
+        with os.scandir(path) as it:
+            return list(it)
+
+    def listdir(self, path):
+        return os.listdir(path)
+
+    def open(self, path, mode):
+        fobj = open(path, mode)
+        if mode[0] in "wa":
+            self._invalidate(path)
+        return fobj
+
+    def remove(self, path):
+        os.remove(path)
+        self._invalidate(path)
+
+    def rmdir(self, path):
+        os.rmdir(path)
+        self._invalidate(path)
+
+    def mkdir(self, path):
+        os.mkdir(path)
+        self._invalidate(path)
+
+    def makedirs(self, path):
+        os.makedirs(path, exist_ok=True)
+        self._invalidate(path)
+
+    def rename(self, old_path, new_path):
+        os.rename(old_path, new_path)
+        self._invalidate(old_path)
+        self._invalidate(new_path)
+
+    def chmod(self, path, mode):
+        os.chmod(path, mode)
+
+    def utime(self, path, times):
+        os.utime(path, times)
+
+
 class Volume(object):
-    def __init__(self, name, path, cfg=None):
+    def __init__(self, name, path, cfg=None, backend=None):
         if cfg is None:
             cfg = {}
+        if backend is None:
+            backend = HostBackend()
         self.name = name
         self.path = path
         self.lo_name = name.lower()
         self.cfg = cfg
+        self.backend = backend
         self.is_setup = False
 
     def __str__(self):
@@ -54,10 +207,20 @@ class Volume(object):
         """return volume configuration"""
         return self.cfg
 
+    def get_backend(self):
+        """return the backend that accesses the files of the volume"""
+        return self.backend
+
+    def is_mem(self):
+        return "mem" in self.cfg
+
     def setup(self):
         path = self.path
+        # in memory?
+        if self.is_mem():
+            return self.backend.setup()
         # temp dir?
-        if "temp" in self.cfg:
+        elif "temp" in self.cfg:
             if not self._create_temp(path):
                 return False
         # does path exist?
@@ -71,7 +234,9 @@ class Volume(object):
         return True
 
     def shutdown(self):
-        if "temp" in self.cfg:
+        if self.is_mem():
+            self.backend.shutdown()
+        elif "temp" in self.cfg:
             self._delete_temp(self.path)
 
     def _create_temp(self, path):
@@ -108,7 +273,7 @@ class Volume(object):
         if type(rel_path) in (list, tuple):
             rel_path = os.path.join(*rel_path)
         dir_path = os.path.join(self.path, rel_path)
-        if os.path.isdir(dir_path):
+        if self.backend.isdir(dir_path):
             log_path.debug(
                 "rel sys path in volume already exists '%s' + %s -> %s",
                 self.name,
@@ -123,7 +288,7 @@ class Volume(object):
                 rel_path,
                 dir_path,
             )
-            os.makedirs(dir_path)
+            self.backend.makedirs(dir_path)
             return dir_path
         except OSError as e:
             log_path.error(
@@ -141,6 +306,8 @@ class VolumeManager(object):
         self.is_setup = False
         self.vols_by_name = {}
         self.vols_base_dir = vols_base_dir
+        self.dir_cache = DirCache()
+        self.host_backend = HostBackend(self.dir_cache)
 
     def get_num_volumes(self):
         return len(self.volumes)
@@ -175,6 +342,14 @@ class VolumeManager(object):
         return True
 
     def shutdown(self):
+        stats = self.dir_cache.get_stats()
+        log_path.info(
+            "dir cache: hits=%d, misses=%d, entries=%d",
+            stats["hits"],
+            stats["misses"],
+            stats["entries"],
+        )
+        self.dir_cache.clear()
         # shutdown all volumes
         log_path.debug("shutting down volumes")
         for volume in self.volumes:
@@ -240,6 +415,11 @@ class VolumeManager(object):
         src_list = spec.get_src_list()
         cfg = spec.get_cfg()
         n = len(src_list)
+        if "mem" in cfg:
+            if n > 0:
+                log_path.error("memory volume has no source path!")
+                return None
+            return self._create_mem_volume(name, cfg)
         if n == 0:
             # local path
             path = self._get_local_vol_path(name)
@@ -254,7 +434,32 @@ class VolumeManager(object):
             return None
         log_path.debug("name='%s', path='%s'", name, path)
         # create volume
-        return Volume(name, path, cfg)
+        return Volume(name, path, cfg, self.host_backend)
+
+    def _create_mem_volume(self, name, cfg):
+        # avoid circular import
+        from .memfs import MemBackend
+
+        path = MEM_PREFIX + name
+        max_size = cfg.get("size")
+        if max_size is not None:
+            try:
+                max_size = int(max_size) * 1024
+            except ValueError:
+                log_path.error("invalid size of memory volume: %s", max_size)
+                return None
+        dump_path = cfg.get("dump")
+        if dump_path:
+            dump_path = resolve_sys_path(dump_path)
+        log_path.debug(
+            "name='%s', mem path='%s', max_size=%s, dump='%s'",
+            name,
+            path,
+            max_size,
+            dump_path,
+        )
+        backend = MemBackend(path, max_size, dump_path)
+        return Volume(name, path, cfg, backend)
 
     def _get_local_vol_path(self, name):
         base_dir = self._setup_base_dir()
@@ -302,6 +507,15 @@ class VolumeManager(object):
     def get_all_names(self):
         return [x.get_name() for x in self.volumes]
 
+    def get_backend(self, sys_path):
+        """return the backend that handles the given sys path"""
+        if sys_path.startswith(MEM_PREFIX):
+            name = sys_path[len(MEM_PREFIX) :].split("/", 1)[0]
+            volume = self.vols_by_name.get(name.lower())
+            if volume and volume.is_mem():
+                return volume.backend
+        return self.host_backend
+
     def sys_to_ami_path(self, sys_path):
         """try to map an absolute system path back to an amiga path
 
@@ -309,7 +523,7 @@ class VolumeManager(object):
 
         return ami_path or None if sys_path can't be mapped
         """
-        if not os.path.isabs(sys_path):
+        if not os.path.isabs(sys_path) and not sys_path.startswith(MEM_PREFIX):
             sys_path = resolve_sys_path(sys_path)
             log_path.debug("vol: sys_to_ami_path: resolved rel path: %s", sys_path)
         res_len = None
@@ -381,7 +595,9 @@ class VolumeManager(object):
 
             # follow ami path along in sys world
             dirs = remainder.split("/")
-            sys_path = self._follow_path_no_case(vol_sys_path, dirs, fast)
+            sys_path = self._follow_path_no_case(
+                volume.backend, vol_sys_path, dirs, fast
+            )
             log_path.info(
                 "vol: ami_to_sys_path: ami='%s' -> sys='%s'", ami_path, sys_path
             )
@@ -392,30 +608,33 @@ class VolumeManager(object):
             )
             return None
 
-    def _follow_path_no_case(self, base, dirs, fast):
-        # base is the name (no more dirs)
-        if len(dirs) == 0:
-            return base
-        # make sure base is a dir
-        if not os.path.isdir(base):
-            # assume remainder is new
-            return os.path.join(base, os.path.join(*dirs))
-        # dir component to search
-        d = dirs[0]
-        # check for direct match first
-        if fast:
-            dp = os.path.join(base, d)
-            if os.path.exists(dp):
-                return self._follow_path_no_case(dp, dirs[1:], fast)
-        # read dir and check for no case variant
-        dlow = d.lower()
-        files = os.listdir(base)
-        dl = len(d)
-        for f in files:
-            if len(f) == dl:
-                flow = f.lower()
-                if flow == dlow:
-                    res = os.path.join(base, f)
-                    return self._follow_path_no_case(res, dirs[1:], fast)
-        # can't find it -> we assume rest of path is new
-        return os.path.join(base, os.path.join(*dirs))
+    def get_dir_cache(self):
+        return self.dir_cache
+
+    def invalidate_sys_path(self, sys_path):
+        """tell the dir cache that a host path was created, removed or renamed"""
+        self.dir_cache.invalidate(sys_path)
+
+    def _follow_path_no_case(self, backend, base, dirs, fast):
+        num = len(dirs)
+        for i in range(num):
+            # make sure base is a dir
+            names = backend.get_names(base)
+            if names is None:
+                # assume remainder is new
+                return os.path.join(base, *dirs[i:])
+            # dir component to search
+            d = dirs[i]
+            # check for direct match first
+            if fast:
+                dp = os.path.join(base, d)
+                if backend.exists(dp):
+                    base = dp
+                    continue
+            # check for no case variant
+            name = names.get(d.lower())
+            if name is None:
+                # can't find it -> we assume rest of path is new
+                return os.path.join(base, *dirs[i:])
+            base = os.path.join(base, name)
+        return base
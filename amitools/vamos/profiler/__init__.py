@@ -1,3 +1,5 @@
 from .main import MainProfiler
 from .profiler import Profiler
 from .data import ProfDataFile
+from .sampler import PCSampleProfiler
+from .caches import CacheProfiler
@@ -0,0 +1,84 @@
+from amitools.vamos.log import log_prof
+from .profiler import Profiler
+
+
+class CacheProfiler(Profiler):
+    """report the hits and misses of the parse caches used by the libs.
+
+    Each cache is added with a name and a function returning its stats
+    dict with 'hits' and 'misses'. Only the lookups done while profiling
+    are counted.
+    """
+
+    name = "caches"
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        # name -> get_stats function
+        self.caches = {}
+        # name -> stats at setup
+        self.base = {}
+        # name -> {hits, misses}
+        self.stats = {}
+
+    def get_name(self):
+        return self.name
+
+    def add_cache(self, name, get_stats):
+        self.caches[name] = get_stats
+
+    def parse_config(self, cfg):
+        if not cfg:
+            return True
+        self.enabled = cfg.enabled
+        return True
+
+    def set_data(self, data_dict):
+        for name, stats in data_dict.items():
+            self._add(name, stats["hits"], stats["misses"])
+        return True
+
+    def get_data(self):
+        return self.stats
+
+    def setup(self):
+        if not self.enabled:
+            return
+        self.base = {name: func() for name, func in self.caches.items()}
+        log_prof.debug("caches: enabled. caches=%s", ",".join(self.caches))
+
+    def shutdown(self):
+        if not self.enabled:
+            return
+        for name, func in self.caches.items():
+            stats = func()
+            base = self.base.get(name)
+            hits = stats["hits"] - base["hits"]
+            misses = stats["misses"] - base["misses"]
+            if hits or misses:
+                self._add(name, hits, misses)
+        self.base = {}
+
+    def get_stats(self, name):
+        return self.stats.get(name)
+
+    def dump(self, write):
+        if not self.stats:
+            write("no cache lookups")
+            return
+        for name in sorted(self.stats):
+            stats = self.stats[name]
+            hits = stats["hits"]
+            total = hits + stats["misses"]
+            write(
+                "%-16s  hits=%8d  misses=%8d  %6.2f%%"
+                % (name, hits, stats["misses"], hits * 100.0 / total)
+            )
+
+    def _add(self, name, hits, misses):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = {"hits": 0, "misses": 0}
+            self.stats[name] = stats
+        stats["hits"] += hits
+        stats["misses"] += misses
@@ -0,0 +1,166 @@
+from bisect import bisect_right
+from amitools.vamos.log import log_prof
+from amitools.vamos.label import LabelSegment
+from .profiler import Profiler
+
+
+class PCSampleProfiler(Profiler):
+    """statistical profiler sampling the CPU PC after each execution slice.
+
+    The machine calls sample() with the PC between the cpu.execute() slices
+    of a run about every interval cycles. The raw PCs are only
+    counted here. They are resolved to segments and symbols before the labels
+    of the code go away (e.g. in UnLoadSeg) and when profiling ends.
+
+    The result is a flat profile per function (segment and nearest symbol)
+    and the sum of these samples by segment or label. Only the PC is sampled
+    and no stack is walked, so samples are never charged to callers.
+    """
+
+    name = "samples"
+
+    def __init__(self, machine=None, enabled=False, interval=10000, top=20):
+        self.machine = machine
+        self.enabled = enabled
+        self.interval = interval
+        self.top = top
+        # raw pc -> count of samples not yet resolved
+        self.pcs = {}
+        self.funcs = {}
+        self.segments = {}
+        self.num_samples = 0
+        self.label_mgr = None
+        self.sym_tabs = {}
+
+    def get_name(self):
+        return self.name
+
+    def parse_config(self, cfg):
+        if not cfg:
+            return True
+        self.enabled = cfg.enabled
+        self.interval = cfg.interval
+        self.top = cfg.top
+        return True
+
+    def set_data(self, data_dict):
+        self.num_samples += data_dict.num_samples
+        self._merge(self.funcs, data_dict.funcs)
+        self._merge(self.segments, data_dict.segments)
+        return True
+
+    def get_data(self):
+        self.resolve()
+        if self.num_samples == 0:
+            return {}
+        return {
+            "num_samples": self.num_samples,
+            "funcs": self.funcs,
+            "segments": self.segments,
+        }
+
+    def setup(self):
+        if not self.enabled or not self.machine:
+            return
+        self.label_mgr = self.machine.get_label_mgr()
+        if self.label_mgr:
+            self.label_mgr.add_remove_hook(self.resolve)
+        else:
+            log_prof.warning("samples: labels disabled. can't resolve PCs!")
+        self.machine.set_sampler(self.sample, self.interval)
+        log_prof.debug("samples: enabled. interval=%d, top=%d", self.interval, self.top)
+
+    def shutdown(self):
+        if not self.enabled or not self.machine:
+            return
+        self.machine.set_sampler(None)
+        self.resolve()
+        if self.label_mgr:
+            self.label_mgr.remove_remove_hook(self.resolve)
+            self.label_mgr = None
+        self.sym_tabs = {}
+
+    def sample(self, pc):
+        pcs = self.pcs
+        pcs[pc] = pcs.get(pc, 0) + 1
+
+    def resolve(self):
+        """resolve the pending raw PCs with the current labels"""
+        pcs = self.pcs
+        if not pcs:
+            return
+        self.pcs = {}
+        funcs = self.funcs
+        segments = self.segments
+        for pc, num in pcs.items():
+            seg_name, func_name = self._resolve_pc(pc)
+            funcs[func_name] = funcs.get(func_name, 0) + num
+            segments[seg_name] = segments.get(seg_name, 0) + num
+            self.num_samples += num
+
+    def get_num_samples(self):
+        return self.num_samples
+
+    def get_funcs(self):
+        """return (name, count) of flat profile sorted by count"""
+        return self._sorted(self.funcs)
+
+    def get_segments(self):
+        """return (name, count) of samples by segment sorted by count"""
+        return self._sorted(self.segments)
+
+    def dump(self, write):
+        self.resolve()
+        total = self.num_samples
+        write("%d samples" % total)
+        if total == 0:
+            return
+        for title, entries in (
+            ("flat", self.get_funcs()),
+            ("by segment", self.get_segments()),
+        ):
+            write("%s:" % title)
+            for name, num in entries[: self.top]:
+                write("%8d  %6.2f%%  %s" % (num, num * 100.0 / total, name))
+
+    def _resolve_pc(self, pc):
+        label = None
+        if self.label_mgr:
+            label = self.label_mgr.get_label(pc)
+        if label is None:
+            return "??", "?? @%06x" % pc
+        seg_name = label.name
+        if isinstance(label, LabelSegment):
+            # code of segment starts after size and next ptr
+            sym = self._find_symbol(label.segment, pc - label.addr - 8)
+            if sym:
+                return seg_name, "%s:%s" % (seg_name, sym)
+        return seg_name, seg_name
+
+    def _find_symbol(self, segment, offset):
+        """find nearest symbol at or before offset in segment"""
+        tab = self.sym_tabs.get(segment)
+        if tab is None:
+            syms = []
+            symtab = segment.get_symtab()
+            if symtab:
+                syms = sorted(
+                    (s.get_offset(), s.get_name()) for s in symtab.get_symbols()
+                )
+            tab = ([s[0] for s in syms], [s[1] for s in syms])
+            self.sym_tabs[segment] = tab
+        offsets, names = tab
+        idx = bisect_right(offsets, offset) - 1
+        if idx < 0:
+            return None
+        name = names[idx]
+        if type(name) is bytes:
+            name = name.decode("latin-1")
+        return name
+
+    def _merge(self, dst, src):
+        for name in src:
+            dst[name] = dst.get(name, 0) + src[name]
+
+    def _sorted(self, counts):
+        return sorted(counts.items(), key=lambda x: (-x[1], x[0]))
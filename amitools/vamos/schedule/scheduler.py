@@ -10,6 +10,15 @@ class Scheduler(object):
         self.cb = None
         self.main_task = None
         self.fail_task = None
+        self.last_task = None
+
+    def get_state(self):
+        """return the tasks for set_state()"""
+        return (list(self.tasks), self.main_task, self.fail_task, self.last_task)
+
+    def set_state(self, state):
+        tasks, self.main_task, self.fail_task, self.last_task = state
+        self.tasks = list(tasks)
 
     def get_machine(self):
         return self.machine
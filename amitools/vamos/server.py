@@ -0,0 +1,221 @@
+import os
+import sys
+import signal
+import socket
+
+from .cfg import VamosMainParser
+from .log import log_main, log_setup, log_reset, log_help
+from .session import VamosSession
+from .main import RET_CODE_CONFIG_ERROR
+from .path import Spec, resolve_sys_path
+from .client import get_socket_path, recv_request, send_reply, REPLY_REJECTED
+
+
+def _get_host_paths(path_cfg):
+    """return the host paths of the volumes and assigns in a path config.
+
+    Relative paths, ~ and environment variables are resolved in the current
+    dir and environment like at the setup of the paths.
+    """
+    paths = []
+    base_dir = path_cfg.path.vols_base_dir
+    if base_dir:
+        paths.append(resolve_sys_path(base_dir))
+    for spec in path_cfg.volumes or []:
+        try:
+            spec = Spec.parse(spec)
+        except ValueError:
+            paths.append(spec)
+            continue
+        for src in spec.get_src_list():
+            paths.append(resolve_sys_path(src))
+        dump_path = spec.get_cfg().get("dump")
+        if dump_path:
+            paths.append(resolve_sys_path(dump_path))
+    for spec in path_cfg.assigns or []:
+        try:
+            spec = Spec.parse(spec)
+        except ValueError:
+            paths.append(spec)
+            continue
+        # escaped sys paths
+        for src in spec.get_src_list():
+            if src.startswith("::"):
+                paths.append(resolve_sys_path(src[2:]))
+    return paths
+
+
+class VamosServer(object):
+    """a fork server for vamos commands.
+
+    The server owns a session with the machine, paths and base libs already
+    set up. For each request on the Unix socket a child is forked that runs
+    the command in its copy-on-write copy of the session.
+
+    A request must use the same session config (paths, libs, machine,
+    trace and profile options) as the server. The host paths of volumes and
+    assigns must also resolve to the same paths in the dir and environment
+    of the client. Otherwise it is rejected and the client runs vamos
+    directly. Log and process options can be set per request.
+    """
+
+    def __init__(self, session, get_cfg_files=None, socket_path=None):
+        self.session = session
+        self.get_cfg_files = get_cfg_files
+        self.socket_path = get_socket_path(socket_path)
+        self.sock = None
+        self.children = set()
+        # paths resolved in the dir and environment of the server
+        self.host_paths = _get_host_paths(session.mp.get_path_dict())
+
+    def get_socket_path(self):
+        return self.socket_path
+
+    def open(self):
+        sock_dir = os.path.dirname(self.socket_path)
+        if not os.path.isdir(sock_dir):
+            os.makedirs(sock_dir)
+        # remove stale socket
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.socket_path)
+        self.sock.listen(16)
+        log_main.info("server: listening on '%s'", self.socket_path)
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+            os.unlink(self.socket_path)
+        # wait for running commands
+        for pid in self.children:
+            os.waitpid(pid, 0)
+        self.children = set()
+        log_main.info("server: closed")
+
+    def serve(self, max_requests=None):
+        """handle requests until interrupted or max_requests are done"""
+        num = 0
+        while max_requests is None or num < max_requests:
+            conn, _ = self.sock.accept()
+            self._reap_children()
+            pid = os.fork()
+            if pid == 0:
+                self._child(conn)
+            conn.close()
+            self.children.add(pid)
+            num += 1
+
+    def _reap_children(self):
+        for pid in list(self.children):
+            res, _ = os.waitpid(pid, os.WNOHANG)
+            if res == pid:
+                self.children.remove(pid)
+
+    def _child(self, conn):
+        """run a request in the forked child. never returns"""
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        self.sock.close()
+        exit_code = RET_CODE_CONFIG_ERROR
+        try:
+            args, cwd, env, fds = recv_request(conn)
+            # take over stdio of client
+            for std_fd, fd in enumerate(fds):
+                os.dup2(fd, std_fd)
+                os.close(fd)
+            sys.stdin = open(0, "r", closefd=False)
+            sys.stdout = open(1, "w", closefd=False)
+            sys.stderr = open(2, "w", closefd=False)
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(env)
+            exit_code = self._run(args)
+        except Exception as e:
+            log_main.exception("server: request failed: %s", e)
+            exit_code = 1
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            send_reply(conn, exit_code)
+        finally:
+            os._exit(0 if exit_code == 0 else 1)
+
+    def _run(self, args):
+        # parse config of request like a regular vamos run
+        cfg_files = self.get_cfg_files() if self.get_cfg_files else None
+        mp = VamosMainParser()
+        if not mp.parse(cfg_files, args):
+            return RET_CODE_CONFIG_ERROR
+        log_reset()
+        if not log_setup(mp.get_log_dict().logging):
+            log_help()
+            return RET_CODE_CONFIG_ERROR
+        if mp.get_session_dicts() != self.session.mp.get_session_dicts():
+            log_main.info("server: config differs. rejecting request")
+            return REPLY_REJECTED
+        if _get_host_paths(mp.get_path_dict()) != self.host_paths:
+            log_main.info("server: host paths differ. rejecting request")
+            return REPLY_REJECTED
+        # cwd of client
+        session = self.session
+        session.path_mgr.get_default_env().resolve(force=True)
+        exit_code = session.run(mp.get_proc_dict().process)
+        if exit_code is None:
+            return RET_CODE_CONFIG_ERROR
+        # the paths are shared with the server and are not shut down here
+        session.close_libs()
+        return exit_code
+
+
+def _on_term(signum, frame):
+    raise KeyboardInterrupt()
+
+
+def server_main(
+    get_cfg_files=None, args=None, cfg_dict=None, socket_path=None, max_requests=None
+):
+    """vamos server entry point.
+
+    setup a vamos session without a process and serve requests of
+    vamos clients on a Unix socket until terminated.
+
+    get_cfg_files(opt): function returning the config files to read
+    args(opt): vamos options without binary
+    """
+    # --- parse config ---
+    cfg_files = get_cfg_files() if get_cfg_files else None
+    mp = VamosMainParser(proc=False)
+    if not mp.parse(cfg_files, args, cfg_dict):
+        return RET_CODE_CONFIG_ERROR
+
+    # --- init logging ---
+    log_cfg = mp.get_log_dict().logging
+    if not log_setup(log_cfg):
+        log_help()
+        return RET_CODE_CONFIG_ERROR
+
+    session = VamosSession(mp)
+    try:
+        if not session.setup():
+            return RET_CODE_CONFIG_ERROR
+
+        server = VamosServer(session, get_cfg_files, socket_path)
+        old_term = signal.signal(signal.SIGTERM, _on_term)
+        server.open()
+        try:
+            server.serve(max_requests)
+        except KeyboardInterrupt:
+            log_main.info("server: interrupted")
+        finally:
+            server.close()
+            signal.signal(signal.SIGTERM, old_term)
+
+        session.close_libs()
+
+    finally:
+        session.close_paths()
+
+    session.cleanup()
+    return 0
@@ -0,0 +1,198 @@
+from .machine import Machine, MemoryMap
+from .machine.regs import REG_D0
+from .log import log_main
+from .path import VamosPathManager
+from .trace import TraceManager
+from .libmgr import SetupLibManager
+from .schedule import Scheduler
+from .profiler import MainProfiler, PCSampleProfiler, CacheProfiler
+from .lib.dos.Process import Process
+from .lib.dos.Args import template_cache_stats
+from .lib.dos.Printf import printf_cache_stats
+from .lib.dos.PatternMatch import pattern_cache_stats
+
+
+class VamosSession(object):
+    """a vamos session holds the machine, memory map, paths and base libs.
+
+    setup() creates all parts from the parsed config of a VamosMainParser
+    and opens the base libs. Then run() executes a main process. Finally
+    close the libs, the paths and clean up the machine.
+    """
+
+    def __init__(self, mp):
+        self.mp = mp
+        self.main_profiler = None
+        self.cache_profiler = None
+        self.machine_cfg = None
+        self.machine = None
+        self.mem_map = None
+        self.trace_mgr = None
+        self.metrics_file = None
+        self.path_mgr = None
+        self.scheduler = None
+        self.slm = None
+        # result of last run
+        self.ok = False
+        self.run_state = None
+
+    def _create_cache_profiler(self):
+        prof = CacheProfiler()
+        prof.add_cache("args_template", template_cache_stats)
+        prof.add_cache("printf_format", printf_cache_stats)
+        prof.add_cache("pattern_parse", lambda: pattern_cache_stats()["parse"])
+        prof.add_cache("pattern_match", lambda: pattern_cache_stats()["match"])
+        return prof
+
+    def setup(self):
+        """setup the session and return True if all went well"""
+        mp = self.mp
+
+        # setup main profiler
+        self.main_profiler = MainProfiler()
+        prof_cfg = mp.get_profile_dict().profile
+        self.main_profiler.parse_config(prof_cfg)
+
+        # setup machine
+        self.machine_cfg = mp.get_machine_dict().machine
+        use_labels = mp.get_trace_dict().trace.labels
+        self.machine = Machine.from_cfg(self.machine_cfg, use_labels)
+        if not self.machine:
+            return False
+        self.metrics_file = self.machine_cfg.get("metrics")
+        self.main_profiler.add_profiler(PCSampleProfiler(self.machine))
+        self.cache_profiler = self._create_cache_profiler()
+        self.main_profiler.add_profiler(self.cache_profiler)
+
+        # setup memory map
+        mem_map_cfg = mp.get_machine_dict().memmap
+        self.mem_map = MemoryMap(self.machine)
+        if not self.mem_map.parse_config(mem_map_cfg):
+            log_main.error("memory map setup failed!")
+            return False
+        metrics = self.machine.get_metrics()
+        metrics.add_counter("allocs", self.mem_map.get_alloc().get_num_allocs)
+
+        # setup trace manager
+        trace_mgr_cfg = mp.get_trace_dict().trace
+        self.trace_mgr = TraceManager(self.machine)
+        if not self.trace_mgr.parse_config(trace_mgr_cfg):
+            log_main.error("tracing setup failed!")
+            return False
+
+        # setup path manager
+        self.path_mgr = VamosPathManager()
+        if not self.path_mgr.parse_config(mp.get_path_dict()):
+            log_main.error("path config failed!")
+            return False
+        if not self.path_mgr.setup():
+            log_main.error("path setup failed!")
+            return False
+
+        # setup scheduler
+        self.scheduler = Scheduler(self.machine)
+
+        # setup lib mgr
+        lib_cfg = mp.get_libs_dict()
+        self.slm = SetupLibManager(
+            self.machine,
+            self.mem_map,
+            self.scheduler,
+            self.path_mgr,
+            main_profiler=self.main_profiler,
+            loader_cfg=mp.get_loader_dict().loader,
+        )
+        if not self.slm.parse_config(lib_cfg):
+            log_main.error("lib manager setup failed!")
+            return False
+        self.slm.setup()
+        seg_loader = self.slm.seg_loader
+        if seg_loader.image_cache is not None:
+            self.cache_profiler.add_cache(
+                "loader_image", seg_loader.get_image_cache_stats
+            )
+        if seg_loader.binfmt.image_cache is not None:
+            self.cache_profiler.add_cache(
+                "loader_disk", seg_loader.get_disk_cache_stats
+            )
+
+        # setup profiler
+        self.main_profiler.setup()
+
+        # open base libs
+        self.slm.open_base_libs()
+        return True
+
+    def run(self, proc_cfg):
+        """run the main process and return its exit code.
+
+        return None if the process could not be created.
+        """
+        main_proc = Process.create_main_proc(proc_cfg, self.path_mgr, self.slm.dos_ctx)
+        if not main_proc:
+            log_main.error("main proc setup failed!")
+            return None
+
+        # main loop
+        task = main_proc.get_task()
+        self.scheduler.add_task(task)
+        self.scheduler.schedule()
+        main_proc.ctx.dos_lib.file_mgr.flush_console()
+
+        # check proc result
+        self.ok = False
+        run_state = task.get_run_state()
+        self.run_state = run_state
+        if run_state.done:
+            if run_state.error:
+                log_main.error("vamos failed!")
+                exit_code = 1
+            else:
+                self.ok = True
+                # return code is limited to 0-255
+                exit_code = run_state.regs[REG_D0] & 0xFF
+                log_main.info("done. exit code=%d", exit_code)
+                log_main.info("total cycles: %d", run_state.cycles)
+        else:
+            log_main.info(
+                "vamos was stopped after %d cycles. ignoring result",
+                self.machine_cfg.max_cycles,
+            )
+            exit_code = 0
+
+        # shutdown main proc
+        if self.ok:
+            main_proc.free()
+        return exit_code
+
+    def close_libs(self):
+        """shutdown libs and profiler"""
+        self.slm.close_base_libs()
+        self.main_profiler.shutdown()
+        self.slm.cleanup()
+
+    def close_paths(self):
+        """shutdown path manager to release external resources"""
+        if self.path_mgr:
+            self.path_mgr.shutdown()
+
+    def close_trace(self):
+        """write the binary trace file. also done if the run failed"""
+        if self.trace_mgr:
+            self.trace_mgr.shutdown()
+
+    def close_metrics(self):
+        """write the run metrics file. also done if the run failed"""
+        if self.metrics_file:
+            metrics = self.machine.get_metrics()
+            try:
+                metrics.save_json_file(self.metrics_file)
+            except OSError as e:
+                log_main.error("can't write metrics '%s': %s", self.metrics_file, e)
+            self.metrics_file = None
+
+    def cleanup(self):
+        """cleanup memory map and machine"""
+        if self.ok:
+            self.mem_map.cleanup()
+        self.machine.cleanup()
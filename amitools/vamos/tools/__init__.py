@@ -3,3 +3,5 @@ from .tool import Tool
 from .path import PathTool
 from .type import TypeTool
 from .libprof import LibProfilerTool
+from .batch import BatchTool
+from .trace import TraceTool
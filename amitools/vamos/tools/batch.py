@@ -0,0 +1,79 @@
+import sys
+import json
+import shlex
+import argparse
+
+from .tool import Tool
+from amitools.vamos.batch import run_batch
+
+
+class BatchTool(Tool):
+    def __init__(self, cfg_files=None):
+        Tool.__init__(self, "batch", "run many Amiga commands in parallel")
+        self.cfg_files = cfg_files
+
+    def add_args(self, arg_parser):
+        arg_parser.add_argument(
+            "cmd_file", help="file with one command line per line or '-' for stdin"
+        )
+        arg_parser.add_argument(
+            "-j",
+            "--jobs",
+            dest="batch_jobs",
+            type=int,
+            default=None,
+            help="number of worker processes (default: number of CPUs)",
+        )
+        arg_parser.add_argument(
+            "-o",
+            "--json",
+            dest="batch_json",
+            default=None,
+            help="write the results to a json file",
+        )
+        arg_parser.add_argument(
+            "vamos_args",
+            nargs=argparse.REMAINDER,
+            help="vamos options used for all commands",
+        )
+
+    def run(self, args):
+        jobs = self._read_jobs(args.cmd_file)
+        if jobs is None:
+            return 1
+        results = run_batch(
+            jobs, self.cfg_files, args.vamos_args, num_workers=args.batch_jobs
+        )
+        # report in order
+        failed = 0
+        for num, res in enumerate(results):
+            sys.stdout.write(res.stdout.decode("latin-1"))
+            sys.stderr.write(res.stderr.decode("latin-1"))
+            if res.exit_code != 0:
+                failed += 1
+                print(
+                    "job #%d failed: %s -> exit code %d"
+                    % (num, " ".join(res.args), res.exit_code),
+                    file=sys.stderr,
+                )
+        if args.batch_json:
+            with open(args.batch_json, "w") as fh:
+                json.dump([res.to_dict() for res in results], fh, indent=2)
+        return 1 if failed else 0
+
+    def _read_jobs(self, cmd_file):
+        try:
+            if cmd_file == "-":
+                lines = sys.stdin.readlines()
+            else:
+                with open(cmd_file) as fh:
+                    lines = fh.readlines()
+        except IOError as e:
+            print("can't read commands: %s" % e, file=sys.stderr)
+            return None
+        jobs = []
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                jobs.append(shlex.split(line))
+        return jobs
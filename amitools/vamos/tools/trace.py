@@ -0,0 +1,55 @@
+from .tool import Tool
+from amitools.vamos.trace.ring import TraceReader
+from amitools.vamos.trace.decode import TraceDecoder
+
+
+class TraceTool(Tool):
+    def __init__(self):
+        Tool.__init__(self, "trace", "decode binary trace files")
+
+    def add_args(self, arg_parser):
+        sub = arg_parser.add_subparsers(dest="trace_cmd")
+        # info
+        parser = sub.add_parser("info", help="show infos of a trace file")
+        parser.add_argument("input", help="trace file")
+        # dump
+        parser = sub.add_parser("dump", help="decode the events of a trace file")
+        parser.add_argument("input", help="trace file")
+        parser.add_argument(
+            "-n", "--last", type=int, default=None, help="only show the last N events"
+        )
+        parser.add_argument(
+            "--no-labels",
+            action="store_true",
+            default=False,
+            help="do not resolve labels",
+        )
+
+    def run(self, args):
+        reader = TraceReader(args.input)
+        error = reader.read()
+        if error:
+            print("trace: %s" % error)
+            return 1
+        cmd = args.trace_cmd
+        if cmd == "info":
+            return self._do_info(reader)
+        elif cmd == "dump":
+            return self._do_dump(reader, args)
+        else:
+            return 1
+
+    def _do_info(self, reader):
+        print("cpu:      %s" % reader.cpu_name)
+        print("size:     %d events" % reader.num_records)
+        print("recorded: %d events" % reader.get_num_records())
+        print("wrapped:  %s" % (reader.laps > 0))
+        print("closed:   %s" % reader.closed)
+        print("labels:   %d" % len(reader.labels))
+        return 0
+
+    def _do_dump(self, reader, args):
+        decoder = TraceDecoder(reader, not args.no_labels)
+        for chn, line in decoder.decode(args.last):
+            print("%8s:  %s" % (chn, line))
+        return 0
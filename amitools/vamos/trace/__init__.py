@@ -1,2 +1,4 @@
 from .mem import TraceMemory
 from .mgr import TraceManager
+from .ring import TraceRing, TraceReader
+from .decode import TraceDecoder
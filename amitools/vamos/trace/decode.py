@@ -0,0 +1,205 @@
+from bisect import bisect_right
+
+from amitools.vamos import libstructs
+from amitools.vamos.label import LabelLib, LabelSegment, LabelStruct
+from amitools.vamos.machine import DisAsm
+from .ring import (
+    KIND_INSTR,
+    KIND_REGS,
+    KIND_MEM,
+    KIND_INT_MEM,
+    KIND_INT_BLOCK,
+)
+
+
+def encode_label(label):
+    """convert a label into a dict that is stored in the trace file"""
+    entry = {"name": label.name, "addr": label.addr, "size": label.size}
+    if isinstance(label, LabelSegment):
+        syms = []
+        symtab = label.segment.get_symtab()
+        if symtab:
+            for s in symtab.get_symbols():
+                name = s.get_name()
+                if type(name) is bytes:
+                    name = name.decode("latin-1")
+                syms.append((s.get_offset(), name))
+        entry["symbols"] = syms
+    elif isinstance(label, LabelStruct):
+        entry["struct"] = label.struct.sdef.get_type_name()
+        entry["struct_addr"] = label.struct_begin
+        entry["struct_size"] = label.struct_size
+        if isinstance(label, LabelLib):
+            entry["base"] = label.base_addr
+            funcs = []
+            if label.fd is not None:
+                for f in label.fd.get_funcs():
+                    funcs.append((f.get_bias(), f.get_name(), f.get_str()))
+            entry["funcs"] = funcs
+    return entry
+
+
+class TraceLabel:
+    def __init__(self, entry):
+        self.name = entry["name"]
+        self.addr = entry["addr"]
+        self.end = self.addr + entry["size"]
+        # offset in segment -> symbol name
+        self.symbols = None
+        if "symbols" in entry:
+            self.symbols = {}
+            for offset, name in reversed(entry["symbols"]):
+                self.symbols[offset] = name
+        self.struct = None
+        type_name = entry.get("struct")
+        if type_name:
+            self.struct = getattr(libstructs, type_name + "Struct", None)
+            self.struct_addr = entry["struct_addr"]
+            self.struct_size = entry["struct_size"]
+        self.base = entry.get("base")
+        self.funcs = {}
+        for bias, name, txt in entry.get("funcs", ()):
+            self.funcs[bias] = (name, txt)
+
+
+class TraceLabels:
+    """find the labels stored in a trace file by address"""
+
+    def __init__(self, entries):
+        labels = [TraceLabel(e) for e in entries]
+        labels.sort(key=lambda x: x.addr)
+        self.labels = labels
+        self.addrs = [l.addr for l in labels]
+
+    def get_label(self, addr):
+        """return the innermost label covering addr or None"""
+        idx = bisect_right(self.addrs, addr) - 1
+        while idx >= 0:
+            label = self.labels[idx]
+            if addr < label.end:
+                return label
+            idx -= 1
+        return None
+
+
+class TraceDecoder:
+    """turn the records of a TraceReader into trace lines like the log"""
+
+    trace_val_str = ("%02x      ", "%04x    ", "%08x")
+
+    def __init__(self, reader, use_labels=True):
+        self.reader = reader
+        self.disasm = DisAsm.create(reader.cpu_name)
+        if use_labels and reader.labels:
+            self.labels = TraceLabels(reader.labels)
+        else:
+            self.labels = None
+
+    def decode(self, last=None):
+        """yield (channel, line) for the records"""
+        for rec in self.reader.get_records(last):
+            kind = rec[0]
+            if kind == KIND_INSTR:
+                yield from self._decode_instr(rec[1], rec[2])
+            elif kind == KIND_REGS:
+                for line in self._decode_regs(rec[1]):
+                    yield "instr", line
+            elif kind == KIND_MEM:
+                yield "mem", self._decode_mem(*rec[1:])
+            elif kind == KIND_INT_MEM:
+                yield "mem_int", self._decode_mem(*rec[1:])
+            elif kind == KIND_INT_BLOCK:
+                yield "mem_int", self._decode_block(*rec[1:])
+
+    def _decode_instr(self, pc, code):
+        num, txt = self.disasm.disassemble_raw(pc, code)
+        if num == 0:
+            # code was not readable or is truncated
+            txt = "??"
+        label, sym, addon = self._get_code_info(pc)
+        if sym is not None:
+            yield "instr", "%s%s:" % (" " * 40, sym)
+        yield "instr", "%-40s  %06x    %-20s  %s" % (label, pc, txt, addon)
+
+    def _decode_regs(self, regs):
+        pc, sr = regs[0], regs[1]
+        flags = "".join(c if sr & (1 << i) else "-" for i, c in enumerate("CVZNX"))
+        yield "PC=%08x  SR=%s" % (pc, flags)
+        yield "  ".join("D%d=%08x" % (i, v) for i, v in enumerate(regs[2:10]))
+        yield "  ".join("A%d=%08x" % (i, v) for i, v in enumerate(regs[10:18]))
+
+    def _decode_mem(self, mode, width, addr, value):
+        val = self.trace_val_str[width] % value
+        info, text, addon = self._get_mem_info(addr)
+        return "%s(%d): %06x: %s  %6s  [%s] %s" % (
+            mode,
+            2**width,
+            addr,
+            val,
+            text,
+            info,
+            addon,
+        )
+
+    def _decode_block(self, mode, addr, size):
+        info, _, _ = self._get_mem_info(addr)
+        return "%s(B): %06x: +%06x   %6s  [%s] %s" % (mode, addr, size, "", info, "")
+
+    def _get_code_info(self, pc):
+        if not self.labels:
+            return "N/A", None, ""
+        label = self.labels.get_label(pc)
+        if label is None:
+            return "N/A", None, ""
+        rel_addr = pc - label.addr
+        sym = None
+        addon = ""
+        if label.symbols is not None:
+            # real start of code in segment
+            rel_addr -= 8
+            sym = label.symbols.get(rel_addr)
+        mem = "@%06x +%06x %s" % (label.addr, rel_addr, label.name)
+        if label.base is not None and pc < label.base:
+            delta = label.base - pc
+            mem += "(-%d)" % delta
+            func = label.funcs.get(delta)
+            if func:
+                addon = "; " + func[0]
+        return mem, sym, addon
+
+    def _get_mem_info(self, addr):
+        if not self.labels:
+            return "??", "", ""
+        label = self.labels.get_label(addr)
+        if label is None:
+            return "??", "", ""
+        info = "@%06x +%06x %s" % (label.addr, addr - label.addr, label.name)
+        text, addon = "", ""
+        if label.base is not None and addr < label.base:
+            delta = label.base - addr
+            slot = delta // 6
+            rel = delta % 6
+            if rel == 0:
+                addon = "-%d  [%d]" % (delta, slot)
+            else:
+                addon = "-%d  [%d]+%d" % (delta, slot, rel)
+            func = label.funcs.get(delta)
+            if func:
+                addon += "  " + func[1]
+            text = "JUMP"
+        elif label.struct is not None:
+            offset = addr - label.struct_addr
+            if 0 <= offset < label.struct_size:
+                sdef = label.struct.sdef
+                field_defs, delta = sdef.find_sub_field_defs_by_offset(offset)
+                name = ".".join(x.name for x in field_defs)
+                type_sig = field_defs[-1].type.get_signature()
+                addon = "%s+%d = %s(%s)+%d" % (
+                    sdef.get_type_name(),
+                    offset,
+                    name,
+                    type_sig,
+                    delta,
+                )
+                text = "Struct"
+        return info, text, addon
@@ -1,9 +1,11 @@
 import logging
-from amitools.vamos.log import log_mem, log_mem_int, log_instr
+from amitools.vamos.log import log_mem, log_mem_int, log_instr, log_main
 from amitools.vamos.label import LabelStruct, LabelLib, LabelSegment
-from amitools.vamos.machine import CPUState, DisAsm
+from amitools.vamos.machine import CPUState, DisAsm, MemWatch
 from amitools.vamos.machine.regs import *
 from .mem import TraceMemory
+from .ring import TraceRing, KIND_MEM, KIND_INT_MEM, KIND_INT_BLOCK, CODE_SIZE
+from .decode import encode_label
 
 
 class TraceManager(object):
@@ -16,19 +18,54 @@ class TraceManager(object):
         self.disasm = DisAsm(machine)
         # state
         self.mem_tracer = None
+        # binary trace
+        self.ring = None
+        self.ring_labels = None
 
     def parse_config(self, cfg):
         if not cfg:
             return True
+        if cfg.get("file"):
+            if not self.setup_ring(cfg.file, cfg.size, cfg.mmap):
+                return False
         if cfg.vamos_ram:
             self.setup_vamos_ram_trace()
         if cfg.memory:
             self.setup_cpu_mem_trace()
+        for spec in cfg.get("watch") or ():
+            watch = self.parse_watch(spec)
+            if watch is None:
+                log_main.error("trace: invalid memory watch: '%s'", spec)
+                return False
+            self.add_mem_watch(*watch)
         if cfg.instr:
             with_regs = cfg.reg_dump
             self.setup_cpu_instr_trace(with_regs)
         return True
 
+    def setup_ring(self, path, num_records, use_mmap=False):
+        """record the traces in a binary ring buffer file instead of the log"""
+        ring = TraceRing(path, num_records, use_mmap, self.machine.get_cpu_name())
+        if not ring.open():
+            return False
+        self.ring = ring
+        # keep the labels of code that is unloaded while tracing
+        self.ring_labels = {}
+        if self.label_mgr:
+            self.label_mgr.add_remove_hook(self._save_labels)
+        return True
+
+    def shutdown(self):
+        """write the binary trace file"""
+        if not self.ring:
+            return
+        if self.label_mgr:
+            self.label_mgr.remove_remove_hook(self._save_labels)
+            self._save_labels()
+        self.ring.close(list(self.ring_labels.values()))
+        self.ring = None
+        self.ring_labels = None
+
     def setup_vamos_ram_trace(self):
         mem = self.machine.get_mem()
         self.mem_tracer = TraceMemory(mem, self)
@@ -38,11 +75,72 @@ class TraceManager(object):
         self.machine.set_mem(self.mem_tracer)
 
     def setup_cpu_mem_trace(self):
+        if self.ring:
+            self.machine.set_cpu_mem_trace_hook(self.ring_cpu_mem)
+            return
         self.machine.set_cpu_mem_trace_hook(self.trace_cpu_mem)
         if not log_mem.isEnabledFor(logging.INFO):
             log_mem.setLevel(logging.INFO)
 
+    def add_mem_watch(self, addr, size, modes="RW", widths=(0, 1, 2)):
+        """trace only the CPU accesses hitting the given memory range"""
+        if self.ring:
+            func = self.ring_cpu_mem
+        else:
+            func = self.trace_cpu_mem
+            if not log_mem.isEnabledFor(logging.INFO):
+                log_mem.setLevel(logging.INFO)
+        watch = MemWatch(addr, size, func, modes, widths)
+        self.machine.add_mem_watch(watch)
+        return watch
+
+    def remove_mem_watch(self, watch):
+        self.machine.remove_mem_watch(watch)
+
+    @staticmethod
+    def parse_watch(spec):
+        """parse 'addr[+size][/flags]' into (addr, size, modes, widths) or None
+
+        flags are 'r' and 'w' for the access modes and '1', '2', '4' for
+        the access widths in bytes. missing flags select all of a kind.
+        """
+        pos = spec.find("/")
+        if pos == -1:
+            flags = ""
+        else:
+            flags = spec[pos + 1 :].lower()
+            spec = spec[:pos]
+        pos = spec.find("+")
+        try:
+            if pos == -1:
+                addr = int(spec, 0)
+                size = 1
+            else:
+                addr = int(spec[:pos], 0)
+                size = int(spec[pos + 1 :], 0)
+        except ValueError:
+            return None
+        if addr < 0 or size <= 0:
+            return None
+        modes = ""
+        widths = []
+        for c in flags:
+            if c in "rw":
+                modes += c.upper()
+            elif c in "124":
+                widths.append("124".index(c))
+            else:
+                return None
+        if not modes:
+            modes = "RW"
+        if not widths:
+            widths = [0, 1, 2]
+        return addr, size, modes, tuple(widths)
+
     def setup_cpu_instr_trace(self, with_regs):
+        if self.ring:
+            self._setup_ring_instr_trace(with_regs)
+            return
         if not log_instr.isEnabledFor(logging.INFO):
             log_instr.setLevel(logging.INFO)
         cpu = self.cpu
@@ -68,16 +166,61 @@ class TraceManager(object):
 
         self.machine.set_instr_hook(instr_hook)
 
+    def _setup_ring_instr_trace(self, with_regs):
+        cpu = self.cpu
+        ring = self.ring
+        # the machine mem might be replaced by the (traced) vamos RAM
+        mem = self.machine.get_mem()
+        if self.mem_tracer:
+            mem = self.mem_tracer.mem
+        ram_end = mem.get_ram_size_bytes()
+
+        def read_code(pc):
+            if pc + CODE_SIZE <= ram_end:
+                return mem.r_block(pc, CODE_SIZE)
+            elif pc < ram_end:
+                return mem.r_block(pc, ram_end - pc)
+            else:
+                return b""
+
+        if with_regs:
+
+            def instr_hook():
+                pc = cpu.r_pc()
+                regs = [pc, cpu.r_sr()]
+                for i in range(16):
+                    regs.append(cpu.r_reg(i))
+                ring.add_regs(regs)
+                ring.add_instr(pc, read_code(pc))
+
+        else:
+
+            def instr_hook():
+                pc = cpu.r_pc()
+                ring.add_instr(pc, read_code(pc))
+
+        self.machine.set_instr_hook(instr_hook)
+
     # trace callback from CPU core
     def trace_cpu_mem(self, mode, width, addr, value=0):
         self._trace_mem(log_mem, mode, width, addr, value)
         return 0
 
+    def ring_cpu_mem(self, mode, width, addr, value=0):
+        self.ring.add_mem(KIND_MEM, mode, width, addr, value)
+        return 0
+
     def trace_int_mem(self, mode, width, addr, value=0, text="", addon=""):
+        if self.ring:
+            self.ring.add_mem(KIND_INT_MEM, mode, width, addr, value)
+            return
         self._trace_mem(log_mem_int, mode, width, addr, value, text, addon)
 
     def trace_int_block(self, mode, addr, size, text="", addon=""):
         addr = int(addr)
+        if self.ring:
+            self.ring.add_mem(KIND_INT_BLOCK, mode, 0, addr, size)
+            return
         info, label = self._get_mem_info(addr)
         log_mem_int.info(
             "%s(B): %06x: +%06x   %6s  [%s] %s", mode, addr, size, text, info, addon
@@ -90,10 +233,17 @@ class TraceManager(object):
             log_instr.info("%s%s:", " " * 40, sym)
         if src is not None:
             log_instr.info("%s%s", " " * 50, src)
-        log_instr.info("%-40s  %06x    %-20s  %s" % (label, pc, txt, addon))
+        log_instr.info("%-40s  %06x    %-20s  %s", label, pc, txt, addon)
 
     # ----- internal -----
 
+    def _save_labels(self):
+        labels = self.ring_labels
+        for label in self.label_mgr.get_all_labels():
+            key = (label.name, label.addr, label.size)
+            if key not in labels:
+                labels[key] = encode_label(label)
+
     def _get_disasm_info(self, addr):
         if not self.label_mgr:
             return "N/A", None, None, ""
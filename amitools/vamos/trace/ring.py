@@ -0,0 +1,304 @@
+import json
+import mmap
+import struct
+
+from amitools.vamos.log import log_main
+
+# file layout: header, ring of fixed size records, labels (json)
+TRACE_MAGIC = b"VTRC"
+TRACE_VERSION = 1
+HEADER_SIZE = 64
+RECORD_SIZE = 16
+
+# header: magic, version, record size, num records, pos, laps, flags, cpu name
+_header = struct.Struct("<4sHHIIQI16s")
+FLAG_CLOSED = 1
+
+# record kinds. bit 7 holds the parity of the ring lap
+KIND_NONE = 0
+KIND_INSTR = 1
+KIND_REGS = 2
+KIND_MEM = 3
+KIND_INT_MEM = 4
+KIND_INT_BLOCK = 5
+KIND_MASK = 0x7F
+LAP_BIT = 0x80
+
+# instr: kind, code size, code, pc
+_instr = struct.Struct("<BB10sI")
+CODE_SIZE = 10
+# regs: kind, index of first reg, 3 regs
+_regs = struct.Struct("<BBxxIII")
+# regs are PC, SR, D0-D7, A0-A7 in 6 records
+NUM_REGS = 18
+# mem: kind, mode, width, addr, value
+# int block: kind, mode, 0, addr, size
+_mem = struct.Struct("<BBBxII4x")
+
+
+class TraceRing:
+    """record trace events as fixed size binary records in a ring buffer.
+
+    Only the raw values are stored. Disassembly and labels are resolved
+    offline with 'vamostool trace'. If the ring is full then the oldest
+    records are overwritten, i.e. the last num_records events are kept.
+
+    The ring lives in memory and is written to the file on close() or with
+    use_mmap it is a mmap of the file itself. Then the events also survive
+    a crash of vamos. Each record carries the parity of the lap it was
+    written in, so the reader finds the end of the ring even if close()
+    was never called.
+    """
+
+    def __init__(self, path, num_records, use_mmap=False, cpu_name="68000"):
+        self.path = path
+        self.num_records = num_records
+        self.use_mmap = use_mmap
+        self.cpu_name = cpu_name
+        self.buf = None
+        self.fobj = None
+        self.start = HEADER_SIZE
+        self.end = HEADER_SIZE + num_records * RECORD_SIZE
+        self.pos = self.start
+        self.laps = 0
+        self.lap_bit = 0
+
+    def open(self):
+        if self.num_records <= 0:
+            log_main.error("trace: invalid ring size: %d", self.num_records)
+            return False
+        if not self.use_mmap:
+            self.buf = bytearray(self.end)
+            return True
+        try:
+            self.fobj = open(self.path, "w+b")
+            self.fobj.truncate(self.end)
+            self.buf = mmap.mmap(self.fobj.fileno(), self.end)
+        except OSError as e:
+            log_main.error("trace: can't create '%s': %s", self.path, e)
+            if self.fobj:
+                self.fobj.close()
+                self.fobj = None
+            return False
+        self._write_header(0)
+        return True
+
+    def close(self, labels=None):
+        """write the ring and the labels to the file"""
+        if self.buf is None:
+            return True
+        self._write_header(FLAG_CLOSED)
+        ok = True
+        try:
+            if self.use_mmap:
+                self.buf.close()
+                fobj = self.fobj
+                fobj.seek(self.end)
+            else:
+                fobj = open(self.path, "wb")
+                fobj.write(self.buf)
+            if labels:
+                fobj.write(json.dumps(labels).encode("utf-8"))
+            fobj.close()
+        except OSError as e:
+            log_main.error("trace: can't write '%s': %s", self.path, e)
+            ok = False
+        self.buf = None
+        self.fobj = None
+        return ok
+
+    def get_num_events(self):
+        """return the number of records written so far"""
+        return self.laps * self.num_records + (self.pos - self.start) // RECORD_SIZE
+
+    def add_instr(self, pc, code):
+        pos = self.pos
+        _instr.pack_into(self.buf, pos, self.lap_bit | KIND_INSTR, len(code), code, pc)
+        pos += RECORD_SIZE
+        if pos == self.end:
+            self._wrap()
+        else:
+            self.pos = pos
+
+    def add_regs(self, regs):
+        for i in range(0, NUM_REGS, 3):
+            pos = self.pos
+            _regs.pack_into(
+                self.buf,
+                pos,
+                self.lap_bit | KIND_REGS,
+                i,
+                regs[i],
+                regs[i + 1],
+                regs[i + 2],
+            )
+            pos += RECORD_SIZE
+            if pos == self.end:
+                self._wrap()
+            else:
+                self.pos = pos
+
+    def add_mem(self, kind, mode, width, addr, value):
+        pos = self.pos
+        _mem.pack_into(
+            self.buf,
+            pos,
+            self.lap_bit | kind,
+            ord(mode),
+            width,
+            addr,
+            value & 0xFFFFFFFF,
+        )
+        pos += RECORD_SIZE
+        if pos == self.end:
+            self._wrap()
+        else:
+            self.pos = pos
+
+    def _wrap(self):
+        self.pos = self.start
+        self.laps += 1
+        self.lap_bit ^= LAP_BIT
+        if self.use_mmap:
+            self._write_header(0)
+
+    def _write_header(self, flags):
+        _header.pack_into(
+            self.buf,
+            0,
+            TRACE_MAGIC,
+            TRACE_VERSION,
+            RECORD_SIZE,
+            self.num_records,
+            (self.pos - self.start) // RECORD_SIZE,
+            self.laps,
+            flags,
+            self.cpu_name.encode("ascii"),
+        )
+
+
+class TraceReader:
+    """read a trace file written by a TraceRing"""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self.num_records = 0
+        self.pos = 0
+        self.laps = 0
+        self.closed = False
+        self.cpu_name = None
+        self.labels = []
+
+    def read(self):
+        """read the file and return an error message or None"""
+        try:
+            with open(self.path, "rb") as fh:
+                data = fh.read()
+        except OSError as e:
+            return "can't read '%s': %s" % (self.path, e)
+        if len(data) < HEADER_SIZE:
+            return "no trace file"
+        (
+            magic,
+            version,
+            record_size,
+            num_records,
+            pos,
+            laps,
+            flags,
+            cpu_name,
+        ) = _header.unpack_from(data)
+        if magic != TRACE_MAGIC:
+            return "no trace file"
+        if version != TRACE_VERSION or record_size != RECORD_SIZE:
+            return "unsupported trace version: %d" % version
+        end = HEADER_SIZE + num_records * RECORD_SIZE
+        if len(data) < end:
+            return "truncated trace file"
+        if len(data) > end:
+            try:
+                self.labels = json.loads(data[end:].decode("utf-8"))
+            except ValueError:
+                return "invalid labels in trace file"
+        self.data = data
+        self.num_records = num_records
+        self.cpu_name = cpu_name.rstrip(b"\0").decode("ascii")
+        self.closed = bool(flags & FLAG_CLOSED)
+        if self.closed:
+            self.pos = pos
+            self.laps = laps
+        else:
+            self.pos, self.laps = self._find_end()
+        return None
+
+    def get_num_records(self):
+        """return number of valid records in the ring"""
+        if self.laps > 0:
+            return self.num_records
+        return self.pos
+
+    def _kind(self, idx):
+        return self.data[HEADER_SIZE + idx * RECORD_SIZE]
+
+    def _find_end(self):
+        # the records of the current lap differ in parity from the ones
+        # of the last lap
+        num = self.num_records
+        first = self._kind(0)
+        if first == KIND_NONE:
+            return 0, 0
+        lap_bit = first & LAP_BIT
+        for idx in range(1, num):
+            kind = self._kind(idx)
+            if kind == KIND_NONE:
+                return idx, 0
+            if kind & LAP_BIT != lap_bit:
+                return idx, 1
+        return 0, 1
+
+    def get_records(self, last=None):
+        """yield the decoded records from the oldest to the newest
+
+        instr: (KIND_INSTR, pc, code)
+        regs: (KIND_REGS, [pc, sr, d0-d7, a0-a7])
+        mem, int mem: (kind, mode, width, addr, value)
+        int block: (KIND_INT_BLOCK, mode, addr, size)
+        """
+        num = self.get_num_records()
+        if last is not None and last < num:
+            skip = num - last
+            num = last
+        else:
+            skip = 0
+        if self.laps > 0:
+            first = (self.pos + skip) % self.num_records
+        else:
+            first = skip
+        data = self.data
+        regs = None
+        for i in range(num):
+            idx = (first + i) % self.num_records
+            off = HEADER_SIZE + idx * RECORD_SIZE
+            kind = data[off] & KIND_MASK
+            if kind == KIND_INSTR:
+                _, size, code, pc = _instr.unpack_from(data, off)
+                yield (KIND_INSTR, pc, code[:size])
+            elif kind == KIND_REGS:
+                _, reg, r0, r1, r2 = _regs.unpack_from(data, off)
+                if reg == 0:
+                    regs = []
+                elif regs is None or len(regs) != reg:
+                    # incomplete at the start of the ring
+                    regs = None
+                    continue
+                regs += (r0, r1, r2)
+                if len(regs) == NUM_REGS:
+                    yield (KIND_REGS, regs)
+                    regs = None
+            elif kind in (KIND_MEM, KIND_INT_MEM):
+                _, mode, width, addr, value = _mem.unpack_from(data, off)
+                yield (kind, chr(mode), width, addr, value)
+            elif kind == KIND_INT_BLOCK:
+                _, mode, _, addr, size = _mem.unpack_from(data, off)
+                yield (kind, chr(mode), addr, size)
@@ -0,0 +1,52 @@
+from amitools.vamos.machine import MockMemory
+from amitools.vamos.astructs import AccessStruct
+from amitools.vamos.libstructs import ProcessStruct
+
+
+def astructs_access_create_benchmark(benchmark):
+    mem = MockMemory(size_kib=4)
+
+    def create():
+        return AccessStruct(mem, ProcessStruct, 0x100)
+
+    benchmark(create)
+
+
+def astructs_access_r_s_benchmark(benchmark):
+    mem = MockMemory(size_kib=4)
+    access = AccessStruct(mem, ProcessStruct, 0x100)
+
+    def read():
+        access.r_s("pr_Task.tc_SPLower")
+
+    benchmark(read)
+
+
+def astructs_access_w_s_benchmark(benchmark):
+    mem = MockMemory(size_kib=4)
+    access = AccessStruct(mem, ProcessStruct, 0x100)
+
+    def write():
+        access.w_s("pr_Task.tc_SPLower", 0x1000)
+
+    benchmark(write)
+
+
+def astructs_access_w_s_bptr_benchmark(benchmark):
+    mem = MockMemory(size_kib=4)
+    access = AccessStruct(mem, ProcessStruct, 0x100)
+
+    def write():
+        access.w_s("pr_CurrentDir", 0x1000)
+
+    benchmark(write)
+
+
+def astructs_access_s_get_addr_benchmark(benchmark):
+    mem = MockMemory(size_kib=4)
+    access = AccessStruct(mem, ProcessStruct, 0x100)
+
+    def get_addr():
+        access.s_get_addr("pr_MsgPort.mp_MsgList")
+
+    benchmark(get_addr)
@@ -0,0 +1,51 @@
+import pytest
+
+from amitools.vamos.machine import MockMemory
+from amitools.vamos.libstructs import (
+    ProcessStruct,
+    ExecLibraryStruct,
+    FileInfoBlockStruct,
+    MsgPortStruct,
+)
+
+structs = pytest.mark.parametrize(
+    "struct",
+    [ProcessStruct, ExecLibraryStruct, FileInfoBlockStruct, MsgPortStruct],
+    ids=lambda s: s.sdef.get_type_name(),
+)
+
+
+@structs
+def astructs_astruct_create_benchmark(benchmark, struct):
+    mem = MockMemory(size_kib=4)
+
+    def create():
+        return struct(mem, 0x100)
+
+    benchmark(create)
+
+
+@structs
+def astructs_astruct_create_two_fields_benchmark(benchmark, struct):
+    mem = MockMemory(size_kib=4)
+    field_defs = struct.sdef.get_field_defs()
+    first = field_defs[0].name
+    last = field_defs[-1].name
+
+    def create():
+        s = struct(mem, 0x100)
+        s.get(first)
+        s.get(last)
+
+    benchmark(create)
+
+
+@structs
+def astructs_astruct_create_all_fields_benchmark(benchmark, struct):
+    mem = MockMemory(size_kib=4)
+
+    def create():
+        s = struct(mem, 0x100)
+        s.sfields.get_fields()
+
+    benchmark(create)
@@ -0,0 +1,50 @@
+from amitools.vamos.machine import MockMemory
+from amitools.vamos.astructs import AccessStruct, StructCodec
+from amitools.vamos.libstructs import FileInfoBlockStruct
+
+fib_fields = (
+    "fib_DiskKey",
+    "fib_DirEntryType",
+    "fib_EntryType",
+    "fib_Protection",
+    "fib_Size",
+    "fib_NumBlocks",
+    "fib_Date.ds_Days",
+    "fib_Date.ds_Minute",
+    "fib_Date.ds_Tick",
+    "fib_OwnerUID",
+    "fib_OwnerGID",
+)
+
+
+def astructs_codec_fib_access_benchmark(benchmark):
+    mem = MockMemory(size_kib=4)
+
+    def fill():
+        fib = AccessStruct(mem, FileInfoBlockStruct, 0x100)
+        for name in fib_fields:
+            fib.w_s(name, 1)
+
+    benchmark(fill)
+
+
+def astructs_codec_fib_codec_benchmark(benchmark):
+    mem = MockMemory(size_kib=4)
+    codec = StructCodec.for_struct(FileInfoBlockStruct)
+
+    def fill():
+        fib = codec.read(mem, 0x100)
+        fib.fib_DiskKey = 1
+        fib.fib_DirEntryType = 1
+        fib.fib_EntryType = 1
+        fib.fib_Protection = 1
+        fib.fib_Size = 1
+        fib.fib_NumBlocks = 1
+        fib.fib_Date.ds_Days = 1
+        fib.fib_Date.ds_Minute = 1
+        fib.fib_Date.ds_Tick = 1
+        fib.fib_OwnerUID = 1
+        fib.fib_OwnerGID = 1
+        codec.write(mem, 0x100, fib)
+
+    benchmark(fill)
@@ -0,0 +1,16 @@
+from amitools.binfmt.BinFmt import BinFmt
+from amitools.binfmt.BinImageCache import BinImageCache
+
+# a larger binary with symbols and debug infos
+bin_file = "bin/math_double_trans_gcc_dbg"
+
+
+def binfmt_load_benchmark(benchmark):
+    bin_fmt = BinFmt()
+    benchmark(bin_fmt.load_image, bin_file)
+
+
+def binfmt_load_cached_benchmark(benchmark, tmpdir):
+    bin_fmt = BinFmt(BinImageCache(str(tmpdir)))
+    bin_fmt.load_image(bin_file)
+    benchmark(bin_fmt.load_image, bin_file)
@@ -0,0 +1,96 @@
+from amitools.vamos.lib.dos.FileHandle import FileHandle
+from amitools.vamos.machine import MockMemory, MemoryIO
+
+NUM_LINES = 2000
+LINE = b"\tmove.l\td0,(a0)+\t; copy a long word\n"
+# large block read by a copy tool
+BLOCK_SIZE = 256 * 1024
+
+
+def open_fh(tmpdir):
+    path = str(tmpdir.join("source.asm"))
+    with open(path, "wb") as f:
+        f.write(LINE * NUM_LINES)
+    return FileHandle(open(path, "rb+"), "ram:source.asm", path)
+
+
+def dos_filehandle_gets_benchmark(benchmark, tmpdir):
+    fh = open_fh(tmpdir)
+
+    def read_lines():
+        fh.seek(0, 0)
+        num = 0
+        while fh.gets(256):
+            num += 1
+        return num
+
+    assert benchmark(read_lines) == NUM_LINES
+    fh.close()
+
+
+def dos_filehandle_getc_benchmark(benchmark, tmpdir):
+    fh = open_fh(tmpdir)
+
+    def read_chars():
+        fh.seek(0, 0)
+        num = 0
+        while fh.getc() >= 0:
+            num += 1
+        return num
+
+    assert benchmark(read_chars) == NUM_LINES * len(LINE)
+    fh.close()
+
+
+def dos_filehandle_fputc_benchmark(benchmark, tmpdir):
+    path = str(tmpdir.join("out.txt"))
+    fh = FileHandle(open(path, "wb"), "ram:out.txt", path)
+
+    def write_chars():
+        fh.seek(0, 0)
+        for ch in LINE * 100:
+            fh.fwrite(bytes((ch,)))
+
+    benchmark(write_chars)
+    fh.close()
+
+
+def read_blocks(fh, read_block, size=BLOCK_SIZE):
+    fh.seek(0, 0)
+    total = 0
+    while True:
+        got = read_block(0x1000, size)
+        if got <= 0:
+            return total
+        total += got
+
+
+def open_big_fh(tmpdir):
+    path = str(tmpdir.join("big.bin"))
+    with open(path, "wb") as f:
+        f.write(LINE * NUM_LINES * 16)
+    return FileHandle(open(path, "rb"), "ram:big.bin", path)
+
+
+def dos_filehandle_read_copy_benchmark(benchmark, tmpdir):
+    fh = open_big_fh(tmpdir)
+    mem = MockMemory(size_kib=512)
+
+    def read_block(addr, size):
+        data = fh.read(size)
+        mem.w_block(addr, data)
+        return len(data)
+
+    assert benchmark(read_blocks, fh, read_block) == NUM_LINES * len(LINE) * 16
+    fh.close()
+
+
+def dos_filehandle_read_into_benchmark(benchmark, tmpdir):
+    fh = open_big_fh(tmpdir)
+    mem_io = MemoryIO(MockMemory(size_kib=512))
+
+    def read_block(addr, size):
+        return mem_io.read_into(addr, size, fh.readinto, fh.read)
+
+    assert benchmark(read_blocks, fh, read_block) == NUM_LINES * len(LINE) * 16
+    fh.close()
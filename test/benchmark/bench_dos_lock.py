@@ -0,0 +1,44 @@
+from amitools.vamos.machine import MockMemory
+from amitools.vamos.astructs import StructCodec
+from amitools.vamos.libstructs import FileInfoBlockStruct
+from amitools.vamos.lib.dos.Lock import Lock, ED_DATE
+from amitools.vamos.lib.dos.Error import NO_ERROR, ERROR_NO_MORE_ENTRIES
+
+
+def setup_lock(tmpdir):
+    for i in range(200):
+        tmpdir.join("file%d.o" % i).write("")
+    return Lock("tmp", "tmp:", str(tmpdir))
+
+
+def dos_lock_examine_next_benchmark(benchmark, tmpdir):
+    lock = setup_lock(tmpdir)
+    mem = MockMemory()
+    codec = StructCodec.for_struct(FileInfoBlockStruct)
+
+    def scan():
+        fib = codec.read(mem, 0)
+        lock.examine_lock(fib)
+        codec.write(mem, 0, fib)
+        while True:
+            fib = codec.read(mem, 0)
+            err = lock.examine_next(fib)
+            codec.write(mem, 0, fib)
+            if err != NO_ERROR:
+                break
+
+    benchmark(scan)
+
+
+def dos_lock_examine_all_benchmark(benchmark, tmpdir):
+    lock = setup_lock(tmpdir)
+    mem = MockMemory()
+
+    def scan():
+        key = 0
+        while True:
+            err, num, key = lock.examine_all(mem, 0x1000, 4096, ED_DATE, key)
+            if err == ERROR_NO_MORE_ENTRIES:
+                break
+
+    benchmark(scan)
@@ -0,0 +1,31 @@
+from amitools.vamos.lib.dos.PatternMatch import (
+    pattern_parse,
+    pattern_match,
+    pattern_interpret,
+)
+
+names = []
+for i in range(50):
+    for ext in ("c", "h", "o", "info"):
+        names.append("module_%03d.%s" % (i, ext))
+patterns = [
+    pattern_parse(p) for p in ("#?.(c|h|o)", "[a-m]#?", "~(#?.o)", "mod#?_0?5.c")
+]
+
+
+def scan(func):
+    n = 0
+    for pat in patterns:
+        for name in names:
+            if func(pat, name):
+                n += 1
+    return n
+
+
+def dos_pattern_interpret_benchmark(benchmark):
+    benchmark(scan, pattern_interpret)
+
+
+def dos_pattern_compiled_benchmark(benchmark):
+    assert scan(pattern_match) == scan(pattern_interpret)
+    benchmark(scan, pattern_match)
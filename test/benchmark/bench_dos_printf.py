@@ -0,0 +1,51 @@
+from amitools.vamos.machine import MockMemory
+from amitools.vamos.lib.dos.Printf import (
+    printf_parse_string,
+    printf_read_data,
+    printf_generate_output,
+    _printf_parse_string,
+)
+from amitools.vamos.lib.dos.Args import TemplateArgList, template_parse
+
+fmt = "%-20s %8ld bytes %4ld blocks %s\n"
+template = "FROM/M,TO/A,ALL/S,QUIET/S,BUF=BUFFER/K/N,CLONE/S,DATES/S,NOPRO/S"
+
+
+def setup_mem():
+    mem = MockMemory()
+    mem.w32(0x100, 0x200)
+    mem.w32(0x104, 1234)
+    mem.w32(0x108, 3)
+    mem.w32(0x10C, 0x210)
+    mem.w_cstr(0x200, "foo.c")
+    mem.w_cstr(0x210, "----rwed")
+    return mem
+
+
+def do_printf(parse, mem):
+    # like a tool listing a directory
+    for i in range(100):
+        ps = parse(fmt)
+        printf_read_data(ps, mem, 0x100)
+        printf_generate_output(ps)
+
+
+def dos_printf_parse_benchmark(benchmark):
+    benchmark(do_printf, _printf_parse_string, setup_mem())
+
+
+def dos_printf_cached_benchmark(benchmark):
+    benchmark(do_printf, printf_parse_string, setup_mem())
+
+
+def do_template(parse):
+    for i in range(100):
+        parse(template)
+
+
+def dos_args_template_parse_benchmark(benchmark):
+    benchmark(do_template, TemplateArgList.parse_string)
+
+
+def dos_args_template_cached_benchmark(benchmark):
+    benchmark(do_template, template_parse)
@@ -0,0 +1,38 @@
+import pytest
+
+from amitools.vamos.label import LabelManager, LabelRange
+
+
+def _create_mgr(num):
+    mgr = LabelManager()
+    for i in range(num):
+        mgr.add_label(LabelRange("label%d" % i, i * 0x100, 0x80))
+    return mgr
+
+
+@pytest.mark.parametrize("num", [100, 1000, 10000, 100000])
+def label_mgr_get_label_benchmark(benchmark, num):
+    mgr = _create_mgr(num)
+    addr = (num // 2) * 0x100 + 0x40
+    label = benchmark(mgr.get_label, addr)
+    assert label.addr == (num // 2) * 0x100
+
+
+@pytest.mark.parametrize("num", [100, 1000, 10000, 100000])
+def label_mgr_get_label_miss_benchmark(benchmark, num):
+    mgr = _create_mgr(num)
+    addr = (num // 2) * 0x100 + 0xC0
+    label = benchmark(mgr.get_label, addr)
+    assert label is None
+
+
+@pytest.mark.parametrize("num", [100, 1000, 10000, 100000])
+def label_mgr_add_remove_benchmark(benchmark, num):
+    mgr = _create_mgr(num)
+    label = LabelRange("extra", (num // 2) * 0x100 + 0x80, 0x40)
+
+    def add_remove():
+        mgr.add_label(label)
+        mgr.remove_label(label)
+
+    benchmark(add_remove)
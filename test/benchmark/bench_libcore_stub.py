@@ -1,7 +1,7 @@
 import logging
 import pytest
 
-from amitools.vamos.libcore import LibStubGen, LibCtx, LibImplScanner
+from amitools.vamos.libcore import LibStubGen, LibStubCodeGen, LibCtx, LibImplScanner
 from amitools.vamos.lib.VamosTestLibrary import VamosTestLibrary
 from amitools.vamos.machine import MockMachine
 from amitools.vamos.libcore import LibProfileData
@@ -13,7 +13,12 @@ def _create_ctx():
     return LibCtx(machine)
 
 
-def _create_stub(do_profile=False, do_log=False):
+stub_gens = pytest.mark.parametrize(
+    "gen_cls", [LibStubGen, LibStubCodeGen], ids=lambda c: c.name
+)
+
+
+def _create_stub(gen_cls, do_profile=False, do_log=False):
     name = "vamostest.library"
     impl = VamosTestLibrary()
     fd = read_lib_fd(name)
@@ -31,26 +36,42 @@ def _create_stub(do_profile=False, do_log=False):
         log_missing = None
         log_valid = None
     # create stub
-    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid)
+    gen = gen_cls(log_missing=log_missing, log_valid=log_valid)
     stub = gen.gen_stub(scan, ctx, profile)
     return stub
 
 
-def libcore_stub_base_benchmark(benchmark):
-    stub = _create_stub()
+@stub_gens
+def libcore_stub_base_benchmark(benchmark, gen_cls):
+    stub = _create_stub(gen_cls)
     benchmark(stub.PrintHello)
 
 
-def libcore_stub_profile_benchmark(benchmark):
-    stub = _create_stub(do_profile=True)
+@stub_gens
+def libcore_stub_profile_benchmark(benchmark, gen_cls):
+    stub = _create_stub(gen_cls, do_profile=True)
     benchmark(stub.PrintHello)
 
 
-def libcore_stub_log_benchmark(benchmark):
-    stub = _create_stub(do_log=True)
+@stub_gens
+def libcore_stub_log_benchmark(benchmark, gen_cls):
+    stub = _create_stub(gen_cls, do_log=True)
     benchmark(stub.PrintHello)
 
 
-def libcore_stub_log_profile_benchmark(benchmark):
-    stub = _create_stub(do_profile=True, do_log=True)
+@stub_gens
+def libcore_stub_log_profile_benchmark(benchmark, gen_cls):
+    stub = _create_stub(gen_cls, do_profile=True, do_log=True)
     benchmark(stub.PrintHello)
+
+
+@stub_gens
+def libcore_stub_args_benchmark(benchmark, gen_cls):
+    stub = _create_stub(gen_cls)
+    benchmark(stub.Add)
+
+
+@stub_gens
+def libcore_stub_args_profile_benchmark(benchmark, gen_cls):
+    stub = _create_stub(gen_cls, do_profile=True)
+    benchmark(stub.Add)
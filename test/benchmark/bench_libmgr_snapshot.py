@@ -0,0 +1,44 @@
+from amitools.vamos.libmgr import SetupLibManager
+from amitools.vamos.machine import Machine, MemoryMap
+from amitools.vamos.path import PathManager
+from amitools.vamos.schedule import Scheduler
+
+
+def setup_libs():
+    machine = Machine()
+    mem_map = MemoryMap(machine)
+    mem_map.setup_ram_allocator()
+    scheduler = Scheduler(machine)
+    path_mgr = PathManager()
+    slm = SetupLibManager(machine, mem_map, scheduler, path_mgr)
+    slm.setup()
+    slm.open_base_libs()
+    return machine, mem_map, slm
+
+
+def cleanup_libs(machine, mem_map, slm):
+    slm.close_base_libs()
+    slm.cleanup()
+    machine.cleanup()
+
+
+def libmgr_bootstrap_benchmark(benchmark):
+    def bootstrap():
+        cleanup_libs(*setup_libs())
+
+    benchmark(bootstrap)
+
+
+def libmgr_snapshot_restore_benchmark(benchmark):
+    machine, mem_map, slm = setup_libs()
+    lib_snap = slm.snapshot()
+    map_snap = mem_map.snapshot()
+    machine_snap = machine.snapshot()
+
+    def restore():
+        slm.restore(lib_snap)
+        mem_map.restore(map_snap)
+        machine.restore(machine_snap)
+
+    benchmark(restore)
+    cleanup_libs(machine, mem_map, slm)
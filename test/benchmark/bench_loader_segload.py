@@ -0,0 +1,35 @@
+from amitools.vamos.loader import SegmentLoader
+
+
+def load_unload(loader, lib_file):
+    # like a script running the same command again and again
+    for i in range(10):
+        baddr = loader.load_sys_seglist(lib_file)
+        loader.unload_seglist(baddr)
+
+
+def setup_loader(alloc, **kw_args):
+    loader = SegmentLoader(alloc, **kw_args)
+    loader.racy_delta = -1
+    return loader
+
+
+def loader_segload_nocache_benchmark(benchmark, buildlibnix, mem_alloc):
+    mem, alloc = mem_alloc
+    lib_file = buildlibnix.make_lib("testnix")
+    loader = setup_loader(alloc, image_cache_size=0)
+    benchmark(load_unload, loader, lib_file)
+
+
+def loader_segload_image_cache_benchmark(benchmark, buildlibnix, mem_alloc):
+    mem, alloc = mem_alloc
+    lib_file = buildlibnix.make_lib("testnix")
+    loader = setup_loader(alloc)
+    benchmark(load_unload, loader, lib_file)
+
+
+def loader_segload_resident_benchmark(benchmark, buildlibnix, mem_alloc):
+    mem, alloc = mem_alloc
+    lib_file = buildlibnix.make_lib("testnix")
+    loader = setup_loader(alloc, resident=["testnix.library"])
+    benchmark(load_unload, loader, lib_file)
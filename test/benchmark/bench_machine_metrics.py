@@ -0,0 +1,32 @@
+from amitools.vamos.machine import RunMetrics
+
+
+def trap_func(op, pc):
+    return 0
+
+
+def machine_trap_plain_benchmark(benchmark):
+    benchmark(trap_func, 0xA000, 0x1000)
+
+
+def machine_trap_metrics_benchmark(benchmark):
+    metrics = RunMetrics()
+    func = metrics.wrap_trap("dos.library", trap_func)
+    benchmark(func, 0xA000, 0x1000)
+
+
+def machine_trap_no_metrics_benchmark(benchmark):
+    metrics = RunMetrics(enabled=False, count_traps=True)
+    func = metrics.wrap_trap("dos.library", trap_func)
+    benchmark(func, 0xA000, 0x1000)
+
+
+def machine_io_timer_benchmark(benchmark):
+    metrics = RunMetrics()
+    timer = metrics.get_io_timer()
+
+    def io():
+        with timer:
+            pass
+
+    benchmark(io)
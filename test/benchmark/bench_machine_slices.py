@@ -0,0 +1,21 @@
+from amitools.vamos.machine import Machine
+
+# count to 100000 in a loop without any traps
+LOOP_CODE = bytes.fromhex("7000" "5280" "0c80000186a0" "66f6" "4e75")
+
+
+def run_loop(benchmark, adaptive):
+    machine = Machine()
+    machine.set_adaptive_slices(adaptive)
+    code = machine.get_ram_begin()
+    machine.get_mem().w_block(code, LOOP_CODE)
+    benchmark(machine.run, code, machine.get_scratch_top())
+    machine.cleanup()
+
+
+def machine_slices_fixed_benchmark(benchmark):
+    run_loop(benchmark, False)
+
+
+def machine_slices_adaptive_benchmark(benchmark):
+    run_loop(benchmark, True)
@@ -0,0 +1,55 @@
+import io
+import logging
+
+from amitools.vamos.log import log_mem
+from amitools.vamos.machine import Machine, MemWatch
+from amitools.vamos.trace import TraceManager
+
+# count to 1000 in a loop and store the counter in a variable
+VAR_ADDR = 0x10000
+LOOP_CODE = bytes.fromhex(
+    "7000" "5280" "23c0%08x" "0c80000003e8" "66f0" "4e75" % VAR_ADDR
+)
+
+
+def setup_machine():
+    machine = Machine()
+    code = machine.get_ram_begin()
+    machine.get_mem().w_block(code, LOOP_CODE)
+    return machine, code, machine.get_scratch_top()
+
+
+def run_logged(benchmark, machine, code, stack):
+    handler = logging.StreamHandler(io.StringIO())
+    log_mem.addHandler(handler)
+    benchmark(machine.run, code, stack)
+    log_mem.removeHandler(handler)
+    log_mem.setLevel(logging.NOTSET)
+    machine.cleanup()
+
+
+def machine_no_trace_benchmark(benchmark):
+    machine, code, stack = setup_machine()
+    benchmark(machine.run, code, stack)
+    machine.cleanup()
+
+
+def machine_trace_log_benchmark(benchmark):
+    machine, code, stack = setup_machine()
+    tm = TraceManager(machine)
+    tm.setup_cpu_mem_trace()
+    run_logged(benchmark, machine, code, stack)
+
+
+def machine_watch_log_benchmark(benchmark):
+    machine, code, stack = setup_machine()
+    tm = TraceManager(machine)
+    tm.add_mem_watch(VAR_ADDR, 4, "W")
+    run_logged(benchmark, machine, code, stack)
+
+
+def machine_watch_no_hit_benchmark(benchmark):
+    machine, code, stack = setup_machine()
+    machine.add_mem_watch(MemWatch(0x20000, 4, None, "W"))
+    benchmark(machine.run, code, stack)
+    machine.cleanup()
@@ -0,0 +1,72 @@
+import random
+import pytest
+
+from amitools.vamos.machine import MockMemory
+from amitools.vamos.mem import MemoryAlloc
+
+
+class NoClearMemory(MockMemory):
+    """skip clearing allocated memory to only measure the allocator"""
+
+    def clear_block(self, addr, size, value):
+        pass
+
+
+def _gen_ops(num_ops, seed=42):
+    """generate a compiler like mix of many small and a few large allocs"""
+    rnd = random.Random(seed)
+    ops = []
+    live = []
+    for i in range(num_ops):
+        if live and rnd.random() < 0.45:
+            idx = rnd.randrange(len(live))
+            live[idx], live[-1] = live[-1], live[idx]
+            ops.append((False, live.pop()))
+        else:
+            if rnd.random() < 0.9:
+                size = rnd.randrange(8, 256)
+            else:
+                size = rnd.randrange(1024, 32768)
+            ops.append((True, size))
+            live.append(i)
+    return ops
+
+
+def _run_ops(alloc, ops):
+    addrs = {}
+    sizes = {}
+    for i, (is_alloc, val) in enumerate(ops):
+        if is_alloc:
+            addrs[i] = alloc.alloc_mem(val, except_on_fail=False)
+            sizes[i] = val
+        else:
+            addr = addrs.pop(val)
+            size = sizes.pop(val)
+            if addr:
+                alloc.free_mem(addr, size)
+    return addrs, sizes
+
+
+@pytest.mark.parametrize("num_ops", [1000, 20000])
+@pytest.mark.parametrize("free_list", ["first_fit", "best_fit"])
+def mem_alloc_stress_benchmark(benchmark, free_list, num_ops):
+    ops = _gen_ops(num_ops)
+    mem = NoClearMemory(size_kib=64)
+    state = {}
+
+    def run():
+        alloc = MemoryAlloc(mem, 0x1000, 64 * 1024 * 1024, free_list=free_list)
+        state["alloc"] = alloc
+        state["result"] = _run_ops(alloc, ops)
+
+    benchmark(run)
+    # report fragmentation of the final state
+    alloc = state["alloc"]
+    addrs, sizes = state["result"]
+    assert all(addrs.values())
+    free_list_obj = alloc.get_free_list()
+    chunks = free_list_obj.get_chunks()
+    end = max(addr + size for addr, size in zip(addrs.values(), sizes.values()))
+    benchmark.extra_info["free_chunks"] = free_list_obj.get_num_chunks()
+    benchmark.extra_info["used_span"] = end - alloc.get_addr()
+    benchmark.extra_info["holes_below_top"] = sum(s for a, s in chunks if a < end)
@@ -0,0 +1,33 @@
+from amitools.vamos.path import VolumeManager
+
+
+def setup_volume(tmpdir, spec):
+    v = VolumeManager(str(tmpdir))
+    assert v.setup()
+    assert v.add_volume(spec)
+    return v
+
+
+def write_temp_files(v):
+    # like a compiler writing and reading back its temp files
+    data = b"x" * 4096
+    for i in range(20):
+        sys_path = v.ami_to_sys_path("ram:tmp%d.o" % i)
+        backend = v.get_backend(sys_path)
+        with backend.open(sys_path, "wb") as fh:
+            fh.write(data)
+        with backend.open(sys_path, "rb") as fh:
+            fh.read()
+        backend.remove(sys_path)
+
+
+def path_memfs_host_benchmark(benchmark, tmpdir):
+    v = setup_volume(tmpdir, "ram:" + str(tmpdir.join("ram")) + "?temp")
+    benchmark(write_temp_files, v)
+    v.shutdown()
+
+
+def path_memfs_mem_benchmark(benchmark, tmpdir):
+    v = setup_volume(tmpdir, "ram:?mem")
+    benchmark(write_temp_files, v)
+    v.shutdown()
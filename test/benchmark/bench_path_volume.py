@@ -0,0 +1,26 @@
+import os
+from amitools.vamos.path import VolumeManager
+
+
+def setup_volume(tmpdir):
+    inc = tmpdir.mkdir("include")
+    for name in ("exec", "dos", "intuition", "graphics", "libraries"):
+        d = inc.mkdir(name)
+        for i in range(50):
+            d.join("File%d.h" % i).write("")
+    for path, _, _ in os.walk(str(inc)):
+        os.utime(path, (1000000, 1000000))
+    v = VolumeManager()
+    assert v.add_volume("inc:" + str(inc))
+    return v
+
+
+def path_volume_ami_to_sys_benchmark(benchmark, tmpdir):
+    v = setup_volume(tmpdir)
+    paths = ["inc:DOS/file%d.h" % i for i in range(50)]
+
+    def resolve():
+        for path in paths:
+            v.ami_to_sys_path(path)
+
+    benchmark(resolve)
@@ -0,0 +1,41 @@
+from amitools.vamos.machine import Machine
+from amitools.vamos.label import LabelRange
+from amitools.vamos.profiler import PCSampleProfiler
+
+NUM_CYCLES = 1000000
+# compare with the slice size used while sampling
+CYCLES_PER_RUN = 10000
+
+
+def setup_machine():
+    machine = Machine(cycles_per_run=CYCLES_PER_RUN)
+    mem = machine.get_mem()
+    code = machine.get_ram_begin()
+    # endless loop: addq.l #1,d0; bra.s loop
+    mem.w16(code, 0x5280)
+    mem.w16(code + 2, 0x60FC)
+    machine.get_label_mgr().add_label(LabelRange("loop", code, 4))
+    return machine, code, machine.get_scratch_top()
+
+
+def _run(benchmark, machine, code, stack):
+    def run():
+        machine.run(code, stack, max_cycles=NUM_CYCLES)
+
+    benchmark(run)
+
+
+def profiler_sampler_off_benchmark(benchmark):
+    machine, code, stack = setup_machine()
+    _run(benchmark, machine, code, stack)
+    machine.cleanup()
+
+
+def profiler_sampler_on_benchmark(benchmark):
+    machine, code, stack = setup_machine()
+    prof = PCSampleProfiler(machine, enabled=True, interval=CYCLES_PER_RUN)
+    prof.setup()
+    _run(benchmark, machine, code, stack)
+    prof.shutdown()
+    assert prof.get_segments()[0][0] == "loop"
+    machine.cleanup()
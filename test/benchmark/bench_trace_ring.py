@@ -0,0 +1,38 @@
+import io
+import logging
+
+from amitools.vamos.log import log_instr
+from amitools.vamos.machine import Machine
+from amitools.vamos.trace import TraceManager
+
+# count to 1000 in a loop
+LOOP_CODE = bytes.fromhex("7000" "5280" "0c80000003e8" "66f6" "4e75")
+
+
+def setup_machine():
+    machine = Machine()
+    code = machine.get_ram_begin()
+    machine.get_mem().w_block(code, LOOP_CODE)
+    return machine, code, machine.get_scratch_top()
+
+
+def trace_instr_log_benchmark(benchmark):
+    machine, code, stack = setup_machine()
+    handler = logging.StreamHandler(io.StringIO())
+    log_instr.addHandler(handler)
+    tm = TraceManager(machine)
+    tm.setup_cpu_instr_trace(False)
+    benchmark(machine.run, code, stack)
+    log_instr.removeHandler(handler)
+    log_instr.setLevel(logging.NOTSET)
+    machine.cleanup()
+
+
+def trace_instr_ring_benchmark(benchmark, tmpdir):
+    machine, code, stack = setup_machine()
+    tm = TraceManager(machine)
+    tm.setup_ring(str(tmpdir.join("trace")), 65536)
+    tm.setup_cpu_instr_trace(False)
+    benchmark(machine.run, code, stack)
+    tm.shutdown()
+    machine.cleanup()
@@ -0,0 +1,117 @@
+import io
+import logging
+import pytest
+
+from amitools.vamos.log import log_dos
+from amitools.vamos.libcore import LibCtx
+from amitools.vamos.machine import MockMachine
+from amitools.vamos.machine.regs import REG_D1, REG_D2, REG_D3
+from amitools.vamos.mem import MemoryAlloc
+from amitools.vamos.lib.DosLibrary import DosLibrary
+from amitools.vamos.lib.dos.FileHandle import FileHandle
+import amitools.vamos.lib.DosLibrary as dos_mod
+
+FH_B_ADDR = 0x100
+
+
+class FileMgr:
+    def __init__(self, fh):
+        self.fh = fh
+
+    def get_by_b_addr(self, b_addr, for_writing=None):
+        return self.fh
+
+
+class EagerDosLibrary(DosLibrary):
+    """the traps with the eager log formatting used before"""
+
+    def Read(self, ctx):
+        fh_b_addr = ctx.cpu.r_reg(REG_D1)
+        buf_ptr = ctx.cpu.r_reg(REG_D2)
+        size = ctx.cpu.r_reg(REG_D3)
+        fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
+        data = fh.read(size)
+        ctx.mem.w_block(buf_ptr, data)
+        got = len(data)
+        dos_mod.log_dos.info("Read(%s, %06x, %d) -> %d" % (fh, buf_ptr, size, got))
+        return got
+
+    def Write(self, ctx):
+        fh_b_addr = ctx.cpu.r_reg(REG_D1)
+        buf_ptr = ctx.cpu.r_reg(REG_D2)
+        size = ctx.cpu.r_reg(REG_D3)
+        fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
+        data = ctx.mem.r_block(buf_ptr, size)
+        fh.write(data)
+        got = len(data)
+        dos_mod.log_dos.info("Write(%s, %06x, %d) -> %d" % (fh, buf_ptr, size, got))
+        return size
+
+    def FGetC(self, ctx):
+        fh_b_addr = ctx.cpu.r_reg(REG_D1)
+        fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
+        ch = fh.getc()
+        if ch == -1:
+            dos_mod.log_dos.info("FGetC(%s) -> EOF (%d)" % (fh, ch))
+        else:
+            dos_mod.log_dos.info("FGetC(%s) -> '%c' (%d)" % (fh, ch, ch))
+        return ch
+
+
+# before: eager formatting and a plain logger
+# lazy: lazy arguments and a plain logger
+# channel: lazy arguments and a log channel
+variants = pytest.mark.parametrize("variant", ["before", "lazy", "channel"])
+
+
+@pytest.fixture
+def setup_trap(monkeypatch):
+    def setup(variant, data=b""):
+        if variant == "channel":
+            log = log_dos
+        else:
+            log = logging.Logger("dos")
+        log.setLevel(logging.WARN)
+        monkeypatch.setattr(dos_mod, "log_dos", log)
+        if variant == "before":
+            lib = EagerDosLibrary()
+        else:
+            lib = DosLibrary()
+        machine = MockMachine()
+        ctx = LibCtx(machine)
+        alloc = MemoryAlloc(machine.get_mem(), 0x2000, 0x2000)
+        fh = FileHandle(io.BytesIO(data), "ram:foo", "/tmp/foo")
+        fh.alloc_fh(alloc, 0)
+        lib.file_mgr = FileMgr(fh)
+        cpu = ctx.cpu
+        cpu.w_reg(REG_D1, FH_B_ADDR)
+        cpu.w_reg(REG_D2, 0x1000)
+        cpu.w_reg(REG_D3, 16)
+        return lib, ctx, fh
+
+    yield setup
+    log_dos.setLevel(logging.NOTSET)
+
+
+def run_trap(trap, ctx, fh):
+    for i in range(100):
+        fh.seek(0, 0)
+        trap(ctx)
+
+
+@variants
+def vamos_log_dos_read_benchmark(benchmark, setup_trap, variant):
+    lib, ctx, fh = setup_trap(variant, bytes(64))
+    benchmark(run_trap, lib.Read, ctx, fh)
+
+
+@variants
+def vamos_log_dos_write_benchmark(benchmark, setup_trap, variant):
+    lib, ctx, fh = setup_trap(variant)
+    benchmark(run_trap, lib.Write, ctx, fh)
+
+
+@variants
+def vamos_log_dos_fgetc_benchmark(benchmark, setup_trap, variant):
+    lib, ctx, fh = setup_trap(variant, b"a")
+    benchmark(run_trap, lib.FGetC, ctx, fh)
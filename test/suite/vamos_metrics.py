@@ -0,0 +1,32 @@
+import os
+import json
+import pytest
+
+
+def run_metrics(vamos, tmpdir, prog, *args):
+    metrics_file = str(tmpdir / "metrics.json")
+    rc, stdout, stderr = vamos.run_prog(prog, *args, vargs=["--metrics", metrics_file])
+    assert rc == 0
+    with open(metrics_file) as fh:
+        return json.load(fh)
+
+
+def vamos_metrics_file_test(vamos, tmpdir):
+    test_file = str(tmpdir / "test")
+    data = run_metrics(vamos, tmpdir, "dos_seek", "root:" + test_file[1:])
+    counts = data["counts"]
+    assert counts["runs"] >= 1
+    assert counts["files"] >= 1
+    assert counts["traps"] == sum(lib["calls"] for lib in data["libs"].values())
+    assert data["libs"]["dos.library"]["calls"] > 0
+    assert data["time"]["io"] > 0.0
+
+
+def vamos_metrics_dir_test(vamos, tmpdir):
+    # locks and directory scans are host I/O, too
+    test_dir = tmpdir / "bla"
+    os.mkdir(str(test_dir))
+    os.mkdir(str(test_dir / "bar"))
+    data = run_metrics(vamos, tmpdir, "dos_examine", "root:" + str(test_dir)[1:])
+    assert data["counts"]["files"] == 0
+    assert data["time"]["io"] > 0.0
@@ -1,4 +1,6 @@
 import os
+import json
+from amitools.vamos.trace import TraceRing
 
 
 def run(toolrun, tmpdir, *args):
@@ -43,3 +45,59 @@ def vamostool_type_list_test(toolrun, tmpdir):
     assert status == 0
     assert err == []
     assert "ExecLibrary" in out
+
+
+def vamostool_batch_test(toolrun, tmpdir):
+    cmd_file = tmpdir.join("cmds.txt")
+    cmd_file.write("# hello\nbin/test_hello_sc\n\nbin/test_hello_gcc\n")
+    json_file = tmpdir.join("result.json")
+    status, out, err = run(
+        toolrun,
+        tmpdir,
+        "batch",
+        "-j",
+        "2",
+        "-o",
+        str(json_file),
+        str(cmd_file),
+        "-c",
+        "test.vamosrc",
+        "--vols-base-dir",
+        str(tmpdir),
+    )
+    assert status == 0
+    assert err == []
+    assert out == ["VamosTest: PrintHello()"] * 2
+    result = json.loads(json_file.read())
+    assert [r["args"] for r in result] == [
+        ["bin/test_hello_sc"],
+        ["bin/test_hello_gcc"],
+    ]
+    assert [r["exit_code"] for r in result] == [0, 0]
+
+
+def vamostool_trace_test(toolrun, tmpdir):
+    path = str(tmpdir.join("trace"))
+    ring = TraceRing(path, 4)
+    assert ring.open()
+    for pc in range(0x100, 0x10C, 2):
+        ring.add_instr(pc, b"\x4e\x71")
+    ring.close([{"name": "code", "addr": 0x100, "size": 0x10}])
+    status, out, err = run(toolrun, tmpdir, "trace", "info", path)
+    assert status == 0
+    assert err == []
+    assert out == [
+        "cpu:      68000",
+        "size:     4 events",
+        "recorded: 4 events",
+        "wrapped:  True",
+        "closed:   True",
+        "labels:   1",
+    ]
+    status, out, err = run(toolrun, tmpdir, "trace", "dump", "-n", "2", path)
+    assert status == 0
+    assert err == []
+    assert out == [
+        "   instr:  @000100 +000008 code                      000108    nop                   ",
+        "   instr:  @000100 +00000a code                      00010a    nop                   ",
+    ]
@@ -84,3 +84,31 @@ def mem_access_bptr_test():
     assert a.r_s("bs_TestBptr") == 44
     # check auto converted baddr
     assert mem.r32(0x42) == 11
+
+
+def mem_access_cached_sub_field_test():
+    mem = MockMemory()
+    a = AccessStruct(mem, MyTaskStruct, 0x42)
+    b = AccessStruct(mem, MyTaskStruct, 0x80)
+    a.w_s("tc_Node.ln_Pri", -3)
+    b.w_s("tc_Node.ln_Pri", 5)
+    # accessor is shared by all instances of the struct type
+    assert a._accessors is b._accessors
+    assert "tc_Node.ln_Pri" in a._accessors
+    assert a.r_s("tc_Node.ln_Pri") == -3
+    assert b.r_s("tc_Node.ln_Pri") == 5
+    assert b.s_get_addr("tc_Node.ln_Pri") == 0x80 + 9
+    with pytest.raises(KeyError):
+        a.r_s("tc_Node.ln_Pri.foo")
+
+
+def mem_access_enum_test():
+    from amitools.vamos.libstructs import NodeStruct, NodeType
+
+    mem = MockMemory()
+    a = AccessStruct(mem, NodeStruct, 0x42)
+    a.w_s("ln_Type", NodeType.NT_MSGPORT)
+    assert a.r_s("ln_Type") == NodeType.NT_MSGPORT
+    # enum values are still checked on write
+    with pytest.raises(ValueError):
+        a.w_s("ln_Type", "foo")
@@ -207,6 +207,25 @@ def astructs_astruct_sub_struct_inst_test():
     assert ss.sfields.find_sub_field_by_def(SubStruct.sdef.ss_My2.ms_Pad) == field
 
 
+def astructs_astruct_lazy_fields_test():
+    mem = MockMemory()
+    ss = SubStruct(mem, 0x10)
+    # no field instance was created yet
+    assert ss.sfields._fields == [None] * 4
+    ms2 = ss.ss_My2
+    assert ss.sfields._fields == [None, None, None, ms2]
+    assert ms2.sfields._fields == [None] * 4
+    # alias access creates the same instance
+    pad = ms2.pad
+    assert ms2.ms_Pad is pad
+    assert ms2.sfields._fields == [None, pad, None, None]
+    # get all fields
+    fields = ss.sfields.get_fields()
+    assert len(fields) == 4
+    assert fields[3] is ms2
+    assert None not in ss.sfields._fields
+
+
 def astructs_astruct_baddr_test():
     mem = MockMemory()
     ms = MyStruct(mem, 0x10)
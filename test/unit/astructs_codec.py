@@ -0,0 +1,113 @@
+import pytest
+from amitools.vamos.astructs import (
+    AccessStruct,
+    AmigaStruct,
+    AmigaStructDef,
+    StructCodec,
+    APTR_SELF,
+    ARRAY,
+    BPTR_VOID,
+    UBYTE,
+    BYTE,
+    UWORD,
+    WORD,
+    LONG,
+    CSTR,
+)
+from amitools.vamos.libstructs import FileInfoBlockStruct, MsgPortStruct
+from amitools.vamos.machine import MockMemory
+
+
+@AmigaStructDef
+class CodecSubStruct(AmigaStruct):
+    _format = [
+        (WORD, "cs_Word"),
+        (UWORD, "cs_UWord"),
+    ]
+
+
+@AmigaStructDef
+class CodecStruct(AmigaStruct):
+    _format = [
+        (APTR_SELF, "c_Next"),
+        (BPTR_VOID, "c_BPtr"),
+        (BYTE, "c_Byte"),
+        (UBYTE, "c_UByte"),
+        (LONG, "c_Long"),
+        (CSTR, "c_Name"),
+        (CodecSubStruct, "c_Sub"),
+        (ARRAY(UBYTE, 6), "c_Bytes"),
+        (ARRAY(LONG, 2), "c_Longs"),
+        (ARRAY(CodecSubStruct, 2), "c_Subs"),
+    ]
+
+
+def astructs_codec_size_test():
+    codec = StructCodec.for_struct(CodecStruct)
+    assert codec.get_size() == CodecStruct.get_byte_size()
+    assert StructCodec.for_struct(CodecStruct) is codec
+
+
+def astructs_codec_new_value_test():
+    codec = StructCodec.for_struct(CodecStruct)
+    rec = codec.new_value()
+    assert rec.c_Next == 0
+    assert rec.c_Sub.cs_Word == 0
+    assert rec.c_Bytes == bytes(6)
+    assert rec.c_Longs == [0, 0]
+    assert rec.c_Subs[1].cs_UWord == 0
+    assert codec.pack(rec) == bytes(codec.get_size())
+
+
+def astructs_codec_read_write_test():
+    mem = MockMemory()
+    codec = StructCodec.for_struct(CodecStruct)
+    rec = codec.new_value()
+    rec.c_Next = 0x1234
+    rec.c_BPtr = 0x400
+    rec.c_Byte = -2
+    rec.c_UByte = 0xFE
+    rec.c_Long = -100
+    rec.c_Name = 0x2000
+    rec.c_Sub.cs_Word = -3
+    rec.c_Sub.cs_UWord = 0xFFFD
+    rec.c_Bytes = b"abc"
+    rec.c_Longs = [1, -1]
+    rec.c_Subs[1].cs_Word = 42
+    codec.write(mem, 0x100, rec)
+    # check with access struct
+    access = AccessStruct(mem, CodecStruct, 0x100)
+    assert access.r_s("c_Next") == 0x1234
+    assert access.r_s("c_BPtr") == 0x400
+    assert mem.r32(0x104) == 0x100
+    assert access.r_s("c_Byte") == -2
+    assert access.r_s("c_UByte") == 0xFE
+    assert access.r_s("c_Long") == -100
+    assert access.r_s("c_Sub.cs_Word") == -3
+    assert access.r_s("c_Sub.cs_UWord") == 0xFFFD
+    assert mem.r_cstr(access.s_get_addr("c_Bytes")) == "abc"
+    # read back
+    rec2 = codec.read(mem, 0x100)
+    assert rec2.c_Bytes == b"abc\0\0\0"
+    rec2.c_Bytes = b"abc"
+    assert rec2 == rec
+    assert rec2.c_Subs[1].cs_Word == 42
+
+
+def astructs_codec_libstructs_test():
+    mem = MockMemory()
+    fib_codec = StructCodec.for_struct(FileInfoBlockStruct)
+    fib = fib_codec.read(mem, 0x100)
+    fib.fib_FileName = b"hello"
+    fib.fib_Date.ds_Minute = 23
+    fib_codec.write(mem, 0x100, fib)
+    access = AccessStruct(mem, FileInfoBlockStruct, 0x100)
+    assert mem.r_cstr(access.s_get_addr("fib_FileName")) == "hello"
+    assert access.r_s("fib_Date.ds_Minute") == 23
+    port_codec = StructCodec.for_struct(MsgPortStruct)
+    assert port_codec.get_size() == MsgPortStruct.get_byte_size()
+
+
+def astructs_codec_invalid_test():
+    with pytest.raises(AssertionError):
+        StructCodec.for_struct(UBYTE)
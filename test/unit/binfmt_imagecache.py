@@ -0,0 +1,77 @@
+import os
+from amitools.binfmt.BinFmt import BinFmt
+from amitools.binfmt.BinImageCache import BinImageCache
+from amitools.binfmt.Relocate import Relocate
+
+
+def dump_image(bin_img):
+    result = []
+    for seg in bin_img.get_segments():
+        symtab = seg.get_symtab()
+        if symtab:
+            syms = [(s.get_offset(), s.get_name()) for s in symtab.get_symbols()]
+        else:
+            syms = None
+        debug_line = seg.get_debug_line()
+        if debug_line:
+            lines = [
+                (f.get_src_file(), f.get_dir_name(), e.get_offset(), e.get_src_line())
+                for f in debug_line.get_files()
+                for e in f.get_entries()
+            ]
+        else:
+            lines = None
+        result.append((str(seg), seg.get_data(), syms, lines))
+    return result
+
+
+def check_cache(tmpdir, path):
+    cache = BinImageCache(str(tmpdir))
+    bin_fmt = BinFmt(cache)
+    bin_img = BinFmt().load_image(path)
+    assert bin_fmt.load_image(path)
+    assert cache.get_stats() == {"hits": 0, "misses": 1}
+    cached_img = bin_fmt.load_image(path)
+    assert cache.get_stats() == {"hits": 1, "misses": 1}
+    assert dump_image(cached_img) == dump_image(bin_img)
+    addrs = [0x1000 * (i + 1) for i in range(len(bin_img.get_segments()))]
+    assert Relocate(cached_img).relocate(addrs) == Relocate(bin_img).relocate(addrs)
+
+
+def binfmt_imagecache_hunk_test(tmpdir):
+    check_cache(tmpdir, "bin/test_hello_sc_dbg")
+
+
+def binfmt_imagecache_elf_test(tmpdir):
+    check_cache(tmpdir, "bin/test_hello_agcc")
+
+
+def binfmt_imagecache_broken_test(tmpdir):
+    cache = BinImageCache(str(tmpdir))
+    bin_fmt = BinFmt(cache)
+    path = "bin/test_hello_gcc"
+    bin_fmt.load_image(path)
+    (entry,) = tmpdir.listdir()
+    entry.write(b"BIC1garbage", mode="wb")
+    # a broken entry is replaced
+    assert bin_fmt.load_image(path)
+    assert cache.get_stats() == {"hits": 0, "misses": 2}
+    assert bin_fmt.load_image(path)
+    assert cache.get_stats() == {"hits": 1, "misses": 2}
+
+
+def binfmt_imagecache_evict_test(tmpdir):
+    cache = BinImageCache(str(tmpdir))
+    bin_fmt = BinFmt(cache)
+    bin_fmt.load_image("bin/test_hello_gcc")
+    (entry,) = tmpdir.listdir()
+    # make entry old
+    os.utime(str(entry), (1000, 1000))
+    bin_fmt.load_image("bin/test_hello_sc")
+    assert len(tmpdir.listdir()) == 2
+    # the older entry is dropped first
+    cache.evict(tmpdir.listdir()[0].size() + tmpdir.listdir()[1].size() - 1)
+    assert len(tmpdir.listdir()) == 1
+    assert not entry.exists()
+    cache.clear()
+    assert tmpdir.listdir() == []
@@ -11,12 +11,14 @@ def cfg_libs_dict_test():
                 "version": 42,
                 "expunge": "last_close",
                 "num_fake_funcs": 0,
+                "stub": "closure",
             },
             "test.library": {
                 "mode": "amiga",
                 "version": 0,
                 "expunge": "shutdown",
                 "num_fake_funcs": 0,
+                "stub": "closure",
             },
         },
         "devs": {
@@ -25,12 +27,14 @@ def cfg_libs_dict_test():
                 "version": 0,
                 "expunge": "no_mem",
                 "num_fake_funcs": 0,
+                "stub": "closure",
             },
             "test.device": {
                 "mode": "off",
                 "version": 42,
                 "expunge": "no_mem",
                 "num_fake_funcs": 0,
+                "stub": "closure",
             },
         },
     }
@@ -46,24 +50,28 @@ def cfg_libs_ini_test():
             "version": 42,
             "expunge": "no_mem",
             "num_fake_funcs": 1,
+            "stub": "closure",
         },
         "test.library": {
             "mode": "amiga",
             "version": 0,
             "expunge": "shutdown",
             "num_fake_funcs": 2,
+            "stub": "closure",
         },
         "*.device": {
             "mode": "fake",
             "version": 0,
             "expunge": "last_close",
             "num_fake_funcs": 3,
+            "stub": "closure",
         },
         "test.device": {
             "mode": "off",
             "version": 42,
             "expunge": "shutdown",
             "num_fake_funcs": 4,
+            "stub": "closure",
         },
     }
     lp.parse_config(ini_dict, "ini")
@@ -74,12 +82,14 @@ def cfg_libs_ini_test():
                 "version": 42,
                 "expunge": "no_mem",
                 "num_fake_funcs": 1,
+                "stub": "closure",
             },
             "test.library": {
                 "mode": "amiga",
                 "version": 0,
                 "expunge": "shutdown",
                 "num_fake_funcs": 2,
+                "stub": "closure",
             },
         },
         "devs": {
@@ -88,12 +98,14 @@ def cfg_libs_ini_test():
                 "version": 0,
                 "expunge": "last_close",
                 "num_fake_funcs": 3,
+                "stub": "closure",
             },
             "test.device": {
                 "mode": "off",
                 "version": 42,
                 "expunge": "shutdown",
                 "num_fake_funcs": 4,
+                "stub": "closure",
             },
         },
     }
@@ -108,7 +120,7 @@ def cfg_libs_args_test():
             "-O",
             "*.library=mode:vamos,version:42,expunge:last_close,num_fake_funcs:1",
             "-O",
-            "test.library=mode:amiga",
+            "test.library=mode:amiga,stub:code",
             "-O",
             "*.device=mode:amiga+test.device=mode:fake,version:42,expunge:no_mem",
         ]
@@ -121,12 +133,14 @@ def cfg_libs_args_test():
                 "version": 42,
                 "expunge": "last_close",
                 "num_fake_funcs": 1,
+                "stub": "closure",
             },
             "test.library": {
                 "mode": "amiga",
                 "version": 0,
                 "expunge": "shutdown",
                 "num_fake_funcs": 0,
+                "stub": "code",
             },
         },
         "devs": {
@@ -135,12 +149,14 @@ def cfg_libs_args_test():
                 "version": 0,
                 "expunge": "shutdown",
                 "num_fake_funcs": 0,
+                "stub": "closure",
             },
             "test.device": {
                 "mode": "fake",
                 "version": 42,
                 "expunge": "no_mem",
                 "num_fake_funcs": 0,
+                "stub": "closure",
             },
         },
     }
@@ -0,0 +1,63 @@
+from amitools.vamos.cfg import LoaderParser
+import argparse
+
+
+def cfg_loader_dict_test():
+    lp = LoaderParser()
+    input_dict = {
+        "loader": {
+            "resident": ["c", "cc"],
+            "image_cache": 4,
+            "disk_cache": "~/.cache/vamos",
+            "disk_cache_size": 1024,
+        }
+    }
+    lp.parse_config(input_dict, "dict")
+    assert lp.get_cfg_dict() == input_dict
+
+
+def cfg_loader_ini_test():
+    lp = LoaderParser("vamos")
+    ini_dict = {
+        "vamos": {
+            "resident": "c,cc",
+            "loader_image_cache": 4,
+            "loader_disk_cache": "/tmp/cache",
+        }
+    }
+    lp.parse_config(ini_dict, "ini")
+    assert lp.get_cfg_dict() == {
+        "loader": {
+            "resident": ["c", "cc"],
+            "image_cache": 4,
+            "disk_cache": "/tmp/cache",
+            "disk_cache_size": 65536,
+        }
+    }
+
+
+def cfg_loader_args_test():
+    lp = LoaderParser()
+    ap = argparse.ArgumentParser()
+    lp.setup_args(ap)
+    args = ap.parse_args(
+        [
+            "--resident",
+            "c,cc",
+            "--loader-image-cache",
+            "0",
+            "--loader-disk-cache",
+            "/tmp/cache",
+            "--loader-disk-cache-size",
+            "0",
+        ]
+    )
+    lp.parse_args(args)
+    assert lp.get_cfg_dict() == {
+        "loader": {
+            "resident": ["c", "cc"],
+            "image_cache": 0,
+            "disk_cache": "/tmp/cache",
+            "disk_cache_size": 0,
+        }
+    }
@@ -9,9 +9,15 @@ def cfg_machine_dict_test():
             "cpu": "68020",
             "max_cycles": 23,
             "cycles_per_run": 42,
+            "adaptive_slices": True,
             "ram_size": 512,
+            "metrics": "m.json",
+        },
+        "memmap": {
+            "hw_access": "abort",
+            "old_dos_guard": True,
+            "mem_alloc": "best_fit",
         },
-        "memmap": {"hw_access": "abort", "old_dos_guard": True},
     }
     lp.parse_config(input_dict, "dict")
     assert lp.get_cfg_dict() == input_dict
@@ -24,9 +30,12 @@ def cfg_machine_ini_test():
             "cpu": "68020",
             "max_cycles": 23,
             "cycles_per_run": 42,
+            "adaptive_slices": True,
             "ram_size": 512,
+            "metrics": "m.json",
             "hw_access": "abort",
             "old_dos_guard": True,
+            "mem_alloc": "best_fit",
         }
     }
     lp.parse_config(ini_dict, "ini")
@@ -35,9 +44,15 @@ def cfg_machine_ini_test():
             "cpu": "68020",
             "max_cycles": 23,
             "cycles_per_run": 42,
+            "adaptive_slices": True,
             "ram_size": 512,
+            "metrics": "m.json",
+        },
+        "memmap": {
+            "hw_access": "abort",
+            "old_dos_guard": True,
+            "mem_alloc": "best_fit",
         },
-        "memmap": {"hw_access": "abort", "old_dos_guard": True},
     }
 
 
@@ -53,11 +68,16 @@ def cfg_machine_args_test():
             "23",
             "--cycles-per-block",
             "42",
+            "--adaptive-slices",
             "--old-dos-guard",
+            "--mem-alloc",
+            "best_fit",
             "-m",
             "512",
             "-H",
             "abort",
+            "--metrics",
+            "m.json",
         ]
     )
     lp.parse_args(args)
@@ -66,7 +86,13 @@ def cfg_machine_args_test():
             "cpu": "68020",
             "max_cycles": 23,
             "cycles_per_run": 42,
+            "adaptive_slices": True,
             "ram_size": 512,
+            "metrics": "m.json",
+        },
+        "memmap": {
+            "hw_access": "abort",
+            "old_dos_guard": True,
+            "mem_alloc": "best_fit",
         },
-        "memmap": {"hw_access": "abort", "old_dos_guard": True},
     }
@@ -8,6 +8,8 @@ def cfg_profile_dict_test():
         "profile": {
             "enabled": True,
             "libs": {"names": ["exec.library", "dos.library"], "calls": True},
+            "samples": {"enabled": True, "interval": 1000, "top": 10},
+            "caches": {"enabled": True},
             "output": {"file": "foo/bar", "append": True, "dump": True},
         }
     }
@@ -25,6 +27,12 @@ def cfg_profile_args_test():
             "--profile-libs",
             "exec.library,dos.library",
             "--profile-lib-calls",
+            "--profile-samples",
+            "--profile-samples-interval",
+            "2000",
+            "--profile-samples-top",
+            "5",
+            "--profile-caches",
             "--profile-file",
             "foo/bar",
             "--profile-file-append",
@@ -36,6 +44,8 @@ def cfg_profile_args_test():
         "profile": {
             "enabled": True,
             "libs": {"names": ["exec.library", "dos.library"], "calls": True},
+            "samples": {"enabled": True, "interval": 2000, "top": 5},
+            "caches": {"enabled": True},
             "output": {"file": "foo/bar", "append": True, "dump": True},
         }
     }
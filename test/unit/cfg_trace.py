@@ -11,6 +11,10 @@ def cfg_trace_dict_test():
             "vamos_ram": True,
             "reg_dump": True,
             "labels": True,
+            "file": "trace.bin",
+            "size": 1000,
+            "mmap": True,
+            "watch": ["0x1000+4/w"],
         }
     }
     lp.parse_config(input_dict, "dict")
@@ -26,6 +30,9 @@ def cfg_trace_ini_test():
             "internal_memory_trace": True,
             "reg_dump": True,
             "labels": True,
+            "trace_file": "trace.bin",
+            "trace_size": 1000,
+            "mem_watch": "0x1000+4/w,0x2000",
         }
     }
     lp.parse_config(ini_dict, "ini")
@@ -36,6 +43,10 @@ def cfg_trace_ini_test():
             "vamos_ram": True,
             "reg_dump": True,
             "labels": True,
+            "file": "trace.bin",
+            "size": 1000,
+            "mmap": False,
+            "watch": ["0x1000+4/w", "0x2000"],
         }
     }
 
@@ -44,7 +55,22 @@ def cfg_trace_args_test():
     lp = TraceParser()
     ap = argparse.ArgumentParser()
     lp.setup_args(ap)
-    args = ap.parse_args(["-I", "-t", "-T", "-r", "-B"])
+    args = ap.parse_args(
+        [
+            "-I",
+            "-t",
+            "-T",
+            "-r",
+            "-B",
+            "--trace-file",
+            "t.bin",
+            "--trace-mmap",
+            "--watch",
+            "0x1000+4/w",
+            "--watch",
+            "0x2000",
+        ]
+    )
     lp.parse_args(args)
     assert lp.get_cfg_dict() == {
         "trace": {
@@ -53,5 +79,9 @@ def cfg_trace_args_test():
             "vamos_ram": True,
             "reg_dump": True,
             "labels": True,
+            "file": "t.bin",
+            "size": 1048576,
+            "mmap": True,
+            "watch": ["0x1000+4/w", "0x2000"],
         }
     }
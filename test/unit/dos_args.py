@@ -232,3 +232,11 @@ def parse_args_multi_test():
         "a b c d e",
         ["a", "b", ["c"], "d", "e"],
     )
+
+
+def template_parse_cache_test():
+    tal = template_parse("files/m/a,all/s")
+    assert tal.len() == 2
+    hits = template_cache_stats()["hits"]
+    assert template_parse("files/m/a,all/s") is tal
+    assert template_cache_stats()["hits"] == hits + 1
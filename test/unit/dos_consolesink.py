@@ -0,0 +1,77 @@
+import io
+import logging
+from amitools.vamos.lib.dos.ConsoleSink import ConsoleSink
+from amitools.vamos.lib.dos.FileHandle import FileHandle, BUF_NONE
+
+
+class WriteIO(io.BytesIO):
+    """record each write that reaches the host"""
+
+    def __init__(self):
+        io.BytesIO.__init__(self)
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+        return io.BytesIO.write(self, data)
+
+
+def dos_consolesink_lines_test():
+    obj = WriteIO()
+    sink = ConsoleSink(obj, max_lines=2)
+    for ch in b"hello\nworld\nfoo":
+        sink.write(bytes((ch,)))
+    assert obj.writes == [b"hello\nworld\n"]
+    sink.flush()
+    assert obj.writes == [b"hello\nworld\n", b"foo"]
+    assert sink.num_flushes == 2
+
+
+def dos_consolesink_memoryview_test():
+    obj = WriteIO()
+    sink = ConsoleSink(obj, max_lines=2)
+    data = b"a\nb\nc"
+    assert sink.write(memoryview(data)[:2]) == 2
+    assert obj.writes == []
+    assert sink.write(memoryview(data)[2:]) == 3
+    assert obj.writes == [b"a\nb\nc"]
+
+
+def dos_consolesink_size_test():
+    obj = WriteIO()
+    # not a tty: no line limit
+    sink = ConsoleSink(obj, max_size=8)
+    assert sink.max_lines == 0
+    sink.write(b"a\nb\n")
+    assert obj.writes == []
+    sink.write(b"c\nd\n")
+    assert obj.writes == [b"a\nb\nc\nd\n"]
+
+
+def dos_consolesink_filter_test():
+    obj = WriteIO()
+    sink = ConsoleSink(obj)
+    logger = logging.getLogger("sink_test")
+    logger.addFilter(sink)
+    sink.write(b"out")
+    logger.error("log")
+    assert obj.writes == [b"out"]
+    logger.removeFilter(sink)
+
+
+def dos_consolesink_fh_test():
+    obj = WriteIO()
+    sink = ConsoleSink(obj)
+    out1 = FileHandle(sink, "*", "/dev/stdout", need_close=False, buf_mode=BUF_NONE)
+    out2 = FileHandle(sink, "*", "/dev/stdout", need_close=False, buf_mode=BUF_NONE)
+    inp = FileHandle(io.BytesIO(b"in\n"), "*", "/dev/stdin", before_read=sink.flush)
+    for ch in b"a>":
+        out1.fwrite(bytes((ch,)))
+    out2.fwrite(b"b")
+    assert obj.writes == []
+    # reading input shows the prompt
+    assert inp.gets(10) == "in\n"
+    assert obj.writes == [b"a>b"]
+    out1.fwrite(b"c")
+    out2.flush()
+    assert obj.getvalue() == b"a>bc"
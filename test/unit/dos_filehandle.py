@@ -0,0 +1,223 @@
+import io
+from amitools.vamos.lib.dos.FileHandle import (
+    FileHandle,
+    BUF_LINE,
+    BUF_FULL,
+    BUF_NONE,
+)
+from amitools.vamos.machine import RunMetrics
+
+
+class CountIO(io.BytesIO):
+    """count the writes that reach the host file"""
+
+    def __init__(self, data=b""):
+        io.BytesIO.__init__(self, data)
+        self.num_writes = 0
+
+    def write(self, data):
+        self.num_writes += 1
+        return io.BytesIO.write(self, data)
+
+
+class PipeIO(io.BytesIO):
+    """return short reads like a pipe or console"""
+
+    def __init__(self, data=b"", chunk=7):
+        io.BytesIO.__init__(self, data)
+        self.chunk = chunk
+
+    def read(self, size=-1):
+        return io.BytesIO.read(self, min(size, self.chunk))
+
+    def readinto(self, buf):
+        return io.BytesIO.readinto(self, memoryview(buf)[: self.chunk])
+
+
+def create_fh(data=b"", **kwargs):
+    obj = CountIO(data)
+    return FileHandle(obj, "ram:foo", "/tmp/foo", **kwargs), obj
+
+
+def dos_filehandle_getc_test():
+    fh, obj = create_fh(b"ab", buf_size=16)
+    assert fh.getc() == ord("a")
+    # whole file was read ahead
+    assert obj.tell() == 2
+    assert fh.tell() == 1
+    assert fh.getc() == ord("b")
+    assert fh.getc() == -1
+
+
+def dos_filehandle_ungetc_test():
+    fh, obj = create_fh(b"abc")
+    assert fh.getc() == ord("a")
+    assert fh.ungetc(-1) == ord("a")
+    assert fh.tell() == 0
+    assert fh.getc() == ord("a")
+    # unget other char
+    assert fh.ungetc(ord("x")) == ord("x")
+    assert fh.getc() == ord("x")
+    assert fh.getc() == ord("b")
+    # seek drops ungot chars
+    fh.ungetc(ord("y"))
+    assert fh.seek(0, 0) is None
+    assert fh.getc() == ord("a")
+
+
+def dos_filehandle_gets_test():
+    fh, obj = create_fh(b"hello\nworld\nlast", buf_size=4)
+    assert fh.gets(100) == "hello\n"
+    assert fh.gets(3) == "wor"
+    assert fh.gets(100) == "ld\n"
+    assert fh.tell() == 12
+    assert fh.gets(100) == "last"
+    assert fh.gets(100) == ""
+    # injected line comes first
+    fh.setbuf("cmd\n")
+    assert fh.gets(100) == "cmd\n"
+
+
+def dos_filehandle_fread_test():
+    data = bytes(range(100))
+    fh, obj = create_fh(data, buf_size=16)
+    assert fh.getc() == 0
+    fh.ungetc(ord("x"))
+    assert fh.fread(10) == b"x" + data[1:10]
+    # larger than buffer
+    assert fh.fread(50) == data[10:60]
+    assert fh.tell() == 60
+    assert fh.read(10) == data[60:70]
+    assert fh.fread(100) == data[70:]
+
+
+def dos_filehandle_fwrite_test():
+    fh, obj = create_fh(buf_size=8)
+    assert fh.fwrite(b"abc") == 3
+    assert fh.fwrite(b"def") == 3
+    assert obj.num_writes == 0
+    assert fh.tell() == 6
+    assert obj.getvalue() == b"abcdef"
+    # buffer full
+    assert fh.fwrite(b"0123456789") == 10
+    assert obj.getvalue() == b"abcdef0123456789"
+    # unbuffered write flushes buffer first
+    fh.fwrite(b"x")
+    fh.write(b"y")
+    assert obj.getvalue() == b"abcdef0123456789xy"
+    fh.fwrite(b"z")
+    fh.close()
+    assert obj.closed
+
+
+def dos_filehandle_seek_test():
+    fh, obj = create_fh(b"0123456789")
+    assert fh.getc() == ord("0")
+    assert fh.seek(2, 1) is None
+    assert fh.getc() == ord("3")
+    # write after read goes to read position
+    fh.fwrite(b"ab")
+    fh.seek(-2, 2)
+    assert fh.getc() == ord("8")
+    assert obj.getvalue() == b"0123ab6789"
+    fh.flush()
+    assert obj.tell() == 9
+
+
+def dos_filehandle_setvbuf_test():
+    fh, obj = create_fh()
+    assert fh.buf_mode == BUF_FULL
+    assert not fh.setvbuf(17)
+    # line buffered
+    assert fh.setvbuf(BUF_LINE, 100)
+    assert fh.buf_size == 100
+    fh.fwrite(b"abc")
+    assert obj.num_writes == 0
+    fh.fwrite(b"d\n")
+    assert obj.num_writes == 1
+    # unbuffered
+    assert fh.setvbuf(BUF_NONE)
+    assert fh.buf_size == 100
+    fh.fwrite(b"x")
+    fh.fwrite(b"y")
+    assert obj.num_writes == 3
+    assert obj.getvalue() == b"abcd\nxy"
+
+
+def dos_filehandle_auto_flush_test():
+    fh, obj = create_fh(auto_flush=True)
+    assert fh.buf_mode == BUF_NONE
+    fh.fwrite(b"a")
+    assert obj.getvalue() == b"a"
+
+
+def dos_filehandle_fwrite_large_test():
+    fh, obj = create_fh(buf_size=8)
+    assert fh.fwrite(b"ab") == 2
+    # large write flushes the buffer and bypasses it
+    assert fh.fwrite(memoryview(b"0123456789")) == 10
+    assert obj.num_writes == 2
+    assert obj.getvalue() == b"ab0123456789"
+    assert fh.tell() == 12
+
+
+def dos_filehandle_readinto_test():
+    data = bytes(range(100))
+    fh, obj = create_fh(data, buf_size=16)
+    assert fh.getc() == 0
+    # read ahead data comes first
+    buf = bytearray(20)
+    assert fh.readinto(buf) == 20
+    assert buf == data[1:21]
+    assert fh.tell() == 21
+    buf = bytearray(100)
+    assert fh.readinto(memoryview(buf)[10:]) == 79
+    assert buf[10:89] == data[21:]
+    assert fh.readinto(buf) == 0
+
+
+def dos_filehandle_freadinto_test():
+    data = bytes(range(100))
+    fh, obj = create_fh(data, buf_size=16)
+    assert fh.getc() == 0
+    fh.ungetc(ord("x"))
+    buf = bytearray(10)
+    assert fh.freadinto(buf) == 10
+    assert buf == b"x" + data[1:10]
+    # larger than buffer
+    buf = bytearray(50)
+    assert fh.freadinto(buf) == 50
+    assert buf == data[10:60]
+    assert fh.tell() == 60
+    buf = bytearray(100)
+    assert fh.freadinto(buf) == 40
+    assert buf[:40] == data[60:]
+    # unbuffered
+    fh, obj = create_fh(data, buf_mode=BUF_NONE)
+    buf = bytearray(10)
+    assert fh.freadinto(buf) == 10
+    assert buf == data[:10]
+
+
+def dos_filehandle_fread_short_test():
+    data = bytes(range(100))
+    fh = FileHandle(PipeIO(data), "*", "/dev/stdin", buf_size=16)
+    # large reads are repeated until enough data arrived
+    assert fh.fread(50) == data[:50]
+    buf = bytearray(100)
+    assert fh.freadinto(buf) == 50
+    assert buf[:50] == data[50:]
+    assert fh.fread(10) == b""
+
+
+def dos_filehandle_host_io_test():
+    metrics = RunMetrics()
+    fh, obj = create_fh(b"Hello\nWorld\n")
+    fh.host_io = metrics.get_io_timer()
+    # buffered calls are timed when they fill or flush the buffer
+    assert fh.getc() == ord("H")
+    assert fh.gets(10) == "ello\n"
+    fh.fwrite(b"bla")
+    fh.flush()
+    assert metrics.get_data()["time"]["io"] > 0.0
+    assert metrics.stack == []
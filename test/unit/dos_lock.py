@@ -0,0 +1,105 @@
+import os
+from amitools.vamos.machine import MockMemory
+from amitools.vamos.astructs import StructCodec
+from amitools.vamos.libstructs import FileInfoBlockStruct
+from amitools.vamos.lib.dos.Lock import (
+    Lock,
+    ED_NAME,
+    ED_SIZE,
+    ED_OWNER,
+)
+from amitools.vamos.lib.dos.Error import (
+    NO_ERROR,
+    ERROR_NO_MORE_ENTRIES,
+    ERROR_BUFFER_OVERFLOW,
+    ERROR_BAD_NUMBER,
+)
+
+
+def setup_dir(tmpdir):
+    tmpdir.join("foo").write("hello")
+    tmpdir.join("bar").write("")
+    tmpdir.mkdir("baz")
+    return Lock("tmp", "tmp:", str(tmpdir))
+
+
+def read_entries(mem, addr, num, with_size=False):
+    result = {}
+    for i in range(num):
+        name = mem.r_cstr(mem.r32(addr + 4))
+        if with_size:
+            result[name] = (mem.r32s(addr + 8), mem.r32(addr + 12))
+        else:
+            result[name] = None
+        nxt = mem.r32(addr)
+        if i == num - 1:
+            assert nxt == 0
+        addr = nxt
+    return result
+
+
+def dos_lock_examine_next_test(tmpdir):
+    lock = setup_dir(tmpdir)
+    mem = MockMemory()
+    codec = StructCodec.for_struct(FileInfoBlockStruct)
+    fib = codec.read(mem, 0)
+    assert lock.examine_lock(fib) == NO_ERROR
+    assert fib.fib_DirEntryType == 2
+    names = {}
+    while lock.examine_next(fib) == NO_ERROR:
+        name = fib.fib_FileName.split(b"\0", 1)[0].decode("latin-1")
+        names[name] = (fib.fib_DirEntryType, fib.fib_Size)
+    assert names == {"foo": (-3, 5), "bar": (-3, 0), "baz": (2, names["baz"][1])}
+    assert lock.dirent is None
+
+
+def dos_lock_examine_all_test(tmpdir):
+    lock = setup_dir(tmpdir)
+    mem = MockMemory()
+    err, num, key = lock.examine_all(mem, 0x100, 1024, ED_SIZE, 0)
+    assert err == ERROR_NO_MORE_ENTRIES
+    assert num == 3
+    assert key == 3
+    entries = read_entries(mem, 0x100, num, True)
+    assert entries["foo"] == (-3, 5)
+    assert entries["bar"] == (-3, 0)
+    assert entries["baz"][0] == 2
+    assert lock.exall_entries is None
+
+
+def dos_lock_examine_all_chunks_test(tmpdir):
+    lock = setup_dir(tmpdir)
+    mem = MockMemory()
+    # only a single entry fits
+    names = set()
+    key = 0
+    while True:
+        err, num, key = lock.examine_all(mem, 0x100, 56, ED_OWNER, key)
+        assert num == 1
+        names.update(read_entries(mem, 0x100, num))
+        if err == ERROR_NO_MORE_ENTRIES:
+            break
+        assert err == NO_ERROR
+    assert names == {"foo", "bar", "baz"}
+
+
+def dos_lock_examine_all_match_test(tmpdir):
+    lock = setup_dir(tmpdir)
+    mem = MockMemory()
+    err, num, key = lock.examine_all(
+        mem, 0x100, 1024, ED_NAME, 0, lambda name, addr: name.startswith("ba")
+    )
+    assert err == ERROR_NO_MORE_ENTRIES
+    assert set(read_entries(mem, 0x100, num)) == {"bar", "baz"}
+
+
+def dos_lock_examine_all_error_test(tmpdir):
+    lock = setup_dir(tmpdir)
+    mem = MockMemory()
+    err, num, key = lock.examine_all(mem, 0x100, 1024, 42, 0)
+    assert err == ERROR_BAD_NUMBER
+    err, num, key = lock.examine_all(mem, 0x100, 8, ED_NAME, 0)
+    assert err == ERROR_BUFFER_OVERFLOW
+    assert num == 0
+    lock.examine_all_end()
+    assert lock.exall_entries is None
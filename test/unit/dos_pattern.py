@@ -1,7 +1,11 @@
 from amitools.vamos.lib.dos.PatternMatch import (
+    Pattern,
     pattern_parse,
     pattern_match,
     pattern_dump,
+    pattern_interpret,
+    pattern_compile,
+    pattern_cache_stats,
 )
 
 
@@ -38,3 +42,43 @@ def pattern_not_any_test():
     pat = pattern_parse("~(#?.o)")
     assert pattern_match(pat, "bla")
     assert not pattern_match(pat, "test.o", True)
+
+
+def pattern_compile_test():
+    names = ["", "a", "test.o", "TEST.O", "test.c", "foo.info", "a.b.c", "x-1", "#?"]
+    pats = [
+        "#?",
+        "#?.o",
+        "?.?",
+        "t(est|mp).(c|o)",
+        "#(a.)b",
+        "[a-t]#?",
+        "[~a-f]#?",
+        "x-[0-9]",
+        "~(#?.info)",
+        "~(t#?)",
+        "#?~(.o)",
+        "'#'?",
+        "a%",
+    ]
+    for src in pats:
+        for ignore_case in (True, False):
+            pat = pattern_parse(src, ignore_case)
+            assert pat
+            for name in names:
+                assert pattern_match(pat, name) == pattern_interpret(pat, name)
+
+
+def pattern_cache_test():
+    pat = pattern_parse("#?.cache")
+    # parsed pattern is cached
+    assert pattern_parse("#?.cache") is pat
+    assert pattern_parse("#?.cache", ignore_case=False) is not pat
+    # matchers are shared by patterns with the same tokens
+    matcher = pattern_compile(pat)
+    assert pat.matcher is matcher
+    pat2 = Pattern(None, pat.pat_str, True, True)
+    stats = pattern_cache_stats()["match"]
+    assert pattern_compile(pat2) is matcher
+    assert pattern_cache_stats()["match"]["hits"] == stats["hits"] + 1
+    assert matcher("foo.CACHE")
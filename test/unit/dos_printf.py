@@ -0,0 +1,29 @@
+from amitools.vamos.machine import MockMemory
+from amitools.vamos.lib.dos.Printf import (
+    printf,
+    printf_parse_string,
+    printf_cache_stats,
+)
+
+
+def dos_printf_test():
+    mem = MockMemory()
+    mem.w32(0x100, 42)
+    mem.w16(0x104, 0xFFFF)
+    mem.w32(0x106, 0x200)
+    mem.w_cstr(0x200, "foo")
+    fmt = "a=%ld b=%d s=%-5s!"
+    assert printf(fmt, mem, 0x100) == "a=42 b=-1 s=foo  !"
+    # the cached format gives the same result
+    hits = printf_cache_stats()["hits"]
+    assert printf(fmt, mem, 0x100) == "a=42 b=-1 s=foo  !"
+    assert printf_cache_stats()["hits"] == hits + 1
+
+
+def dos_printf_parse_cache_test():
+    ps1 = printf_parse_string("%s and %s")
+    ps2 = printf_parse_string("%s and %s")
+    # each call gets its own state
+    assert ps1.elements[0] is not ps2.elements[0]
+    assert ps1.fragments is not ps2.fragments
+    assert ps1.fragments == [" and "]
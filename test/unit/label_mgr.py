@@ -0,0 +1,167 @@
+from amitools.vamos.label import LabelManager, LabelRange
+
+
+def label_mgr_add_get_test():
+    mgr = LabelManager()
+    a = LabelRange("a", 0x100, 0x10)
+    b = LabelRange("b", 0x200, 0x20)
+    c = LabelRange("c", 0x110, 0x10)
+    mgr.add_label(a)
+    mgr.add_label(b)
+    mgr.add_label(c)
+    assert mgr.get_num_labels() == 3
+    assert mgr.get_all_labels() == [a, c, b]
+    assert mgr.get_label(0xFF) is None
+    assert mgr.get_label(0x100) is a
+    assert mgr.get_label(0x10F) is a
+    assert mgr.get_label(0x110) is c
+    assert mgr.get_label(0x120) is None
+    assert mgr.get_label(0x21F) is b
+    assert mgr.get_label(0x220) is None
+    assert mgr.get_label_offset(0x204) == (b, 4)
+    assert mgr.get_label_offset(0x300) == (None, 0)
+
+
+def label_mgr_remove_test():
+    mgr = LabelManager()
+    a = LabelRange("a", 0x100, 0x10)
+    b = LabelRange("b", 0x200, 0x20)
+    mgr.add_label(a)
+    mgr.add_label(b)
+    mgr.remove_label(a)
+    assert mgr.get_label(0x100) is None
+    assert mgr.get_label(0x200) is b
+    # removing an unknown label is ignored
+    mgr.remove_label(a)
+    mgr.remove_label(b)
+    assert mgr.get_num_labels() == 0
+    assert mgr.get_label(0x200) is None
+
+
+def label_mgr_nested_test():
+    mgr = LabelManager()
+    outer = LabelRange("outer", 0x100, 0x100)
+    first = LabelRange("first", 0x100, 0x10)
+    inner = LabelRange("inner", 0x140, 0x10)
+    after = LabelRange("after", 0x180, 0x10)
+    mgr.add_label(outer)
+    mgr.add_label(first)
+    mgr.add_label(inner)
+    mgr.add_label(after)
+    # innermost label wins
+    assert mgr.get_label(0x100) is first
+    assert mgr.get_label(0x144) is inner
+    assert mgr.get_label(0x150) is outer
+    assert mgr.get_label(0x1A0) is outer
+    assert mgr.get_label(0x200) is None
+    # removing the outer label keeps the inner ones
+    mgr.remove_label(outer)
+    assert mgr.get_label(0x150) is None
+    assert mgr.get_label(0x144) is inner
+    assert mgr.get_label(0x184) is after
+
+
+def label_mgr_intersect_test():
+    mgr = LabelManager()
+    a = LabelRange("a", 0x100, 0x10)
+    b = LabelRange("b", 0x200, 0x20)
+    c = LabelRange("c", 0x000, 0x1000)
+    mgr.add_label(a)
+    mgr.add_label(b)
+    assert mgr.get_intersecting_labels(0x000, 0x80) == []
+    assert mgr.get_intersecting_labels(0x108, 0x100) == [a, b]
+    assert mgr.get_intersecting_labels(0x220, 0x10) == [b]
+    mgr.add_label(c)
+    assert mgr.get_intersecting_labels(0x000, 0x80) == [c]
+    assert mgr.get_intersecting_labels(0x300, 0x10) == [c]
+
+
+def label_mgr_delete_within_test():
+    mgr = LabelManager()
+    puddle = LabelRange("puddle", 0x100, 0x100)
+    a = LabelRange("a", 0x100, 0x10)
+    b = LabelRange("b", 0x1F0, 0x10)
+    c = LabelRange("c", 0x1F8, 0x10)
+    d = LabelRange("d", 0x300, 0x10)
+    for l in (puddle, a, b, c, d):
+        mgr.add_label(l)
+    mgr.delete_labels_within(0x100, 0x100)
+    assert mgr.get_all_labels() == [c, d]
+    assert mgr.get_label(0x100) is None
+    assert mgr.get_label(0x1FC) is c
+    assert mgr.get_label(0x304) is d
+
+
+def label_mgr_delete_within_same_addr_test():
+    mgr = LabelManager()
+    mgr.block_size = 2
+    labels = [LabelRange("l%d" % i, 0x100, 0x10 + i) for i in range(8)]
+    labels += [LabelRange("x%d" % i, 0x80 + i, 0x4) for i in range(4)]
+    d = LabelRange("d", 0x300, 0x10)
+    for l in labels + [d]:
+        mgr.add_label(l)
+    # same start address spans several blocks
+    assert len(mgr._blocks) > 2
+    mgr.delete_labels_within(0x100, 0x100)
+    assert mgr.get_num_labels() == 5
+    assert mgr.get_all_labels() == labels[8:] + [d]
+    assert mgr.get_label(0x100) is None
+    assert mgr.get_label(0x304) is d
+
+
+def label_mgr_many_test():
+    mgr = LabelManager()
+    mgr.block_size = 4
+    labels = []
+    for i in range(100):
+        l = LabelRange("l%d" % i, (i * 37 % 100) * 0x10, 0x8)
+        labels.append(l)
+        mgr.add_label(l)
+    big = LabelRange("big", 0xFC, 0x204)
+    mgr.add_label(big)
+    assert mgr.get_num_labels() == 101
+    for l in labels:
+        assert mgr.get_label(l.addr + 4) is l
+    assert mgr.get_label(0x8) is None
+    assert mgr.get_label(0x108) is big
+    assert mgr.get_label(0x2F8) is big
+    assert mgr.get_label(0x308) is None
+    by_addr = dict((l.addr, l) for l in labels)
+    assert mgr.get_intersecting_labels(0x3F9, 0x10) == [by_addr[0x400]]
+    # remove every other label
+    for l in labels[::2]:
+        mgr.remove_label(l)
+    assert mgr.get_num_labels() == 51
+    for l in labels[1::2]:
+        assert mgr.get_label(l.addr) is l
+    for l in labels[::2]:
+        if 0xFC <= l.addr < 0x300:
+            assert mgr.get_label(l.addr) is big
+        else:
+            assert mgr.get_label(l.addr) is None
+    # range delete
+    mgr.delete_labels_within(0, 0x800)
+    assert mgr.get_label(0x108) is None
+    remain = [l for l in labels[1::2] if l.addr >= 0x800]
+    assert mgr.get_all_labels() == sorted(remain, key=lambda l: l.addr)
+    assert mgr.get_num_labels() == len(remain)
+
+
+def label_mgr_state_test():
+    mgr = LabelManager()
+    mgr.block_size = 4
+    labels = [LabelRange("l%d" % i, i * 0x10, 0x8) for i in range(10)]
+    for l in labels:
+        mgr.add_label(l)
+    state = mgr.get_state()
+    # modify
+    for l in labels[::2]:
+        mgr.remove_label(l)
+    mgr.add_label(LabelRange("new", 0x200, 0x10))
+    # restore
+    mgr.set_state(state)
+    assert mgr.get_num_labels() == 10
+    assert mgr.get_all_labels() == labels
+    for l in labels:
+        assert mgr.get_label(l.addr + 4) is l
+    assert mgr.get_label(0x200) is None
@@ -39,6 +39,25 @@ def libcore_create_lib_default_test():
     assert alloc.is_all_free()
 
 
+def libcore_create_lib_stub_code_test():
+    mem, traps, alloc, ctx = setup()
+    impl = VamosTestLibrary()
+    # create info for lib
+    date = datetime.date(2012, 11, 12)
+    info = LibInfo("vamostest.library", 42, 3, date)
+    # lib_cfg
+    Cfg = collections.namedtuple("Cfg", ["num_fake_funcs", "stub_gen"])
+    lib_cfg = Cfg(0, "code")
+    # create lib
+    creator = LibCreator(alloc, traps)
+    vlib = creator.create_lib(info, ctx, impl, lib_cfg)
+    stub_gen = creator.stub_gens["code"]
+    assert stub_gen.get_source("Add")
+    # free lib
+    vlib.free()
+    assert alloc.is_all_free()
+
+
 def libcore_create_lib_fake_with_fd_test():
     mem, traps, alloc, ctx = setup()
     impl = None
@@ -76,8 +95,8 @@ def libcore_create_lib_fake_without_fd_cfg_test():
     date = datetime.date(2012, 11, 12)
     info = LibInfo("foo.library", 42, 3, date)
     # lib_cfg
-    Cfg = collections.namedtuple("Cfg", ["num_fake_funcs"])
-    lib_cfg = Cfg(10)
+    Cfg = collections.namedtuple("Cfg", ["num_fake_funcs", "stub_gen"])
+    lib_cfg = Cfg(10, "closure")
     # create lib
     creator = LibCreator(alloc, traps)
     lib = creator.create_lib(info, ctx, impl, lib_cfg)
@@ -167,8 +167,8 @@ def libcore_mgr_make_fake_without_fd_cfg_test():
     machine, alloc, mgr = setup_env()
     exec_vlib = mgr.bootstrap_exec()
     # lib_cfg
-    Cfg = collections.namedtuple("Cfg", ["num_fake_funcs"])
-    lib_cfg = Cfg(10)
+    Cfg = collections.namedtuple("Cfg", ["num_fake_funcs", "stub_gen"])
+    lib_cfg = Cfg(10, "closure")
     # make vamos test lib
     test_vlib = mgr.make_lib_name("foo.library", lib_cfg=lib_cfg)
     assert test_vlib is None
@@ -42,3 +42,31 @@ def libcore_patch_multi_trap_test(capsys):
     p.cleanup()
     assert traps.get_num_traps() == 0
     assert alloc.is_all_free()
+
+
+def libcore_patch_metrics_test(capsys):
+    name = "vamostest.library"
+    impl = VamosTestLibrary()
+    fd = read_lib_fd(name)
+    machine = MockMachine()
+    ctx = LibCtx(machine)
+    scanner = LibImplScanner()
+    scan = scanner.scan(name, impl, fd)
+    stub = LibStubGen().gen_stub(scan, ctx)
+    alloc = MemoryAlloc(ctx.mem)
+    traps = machine.get_traps()
+    metrics = machine.get_metrics()
+    p = LibPatcherMultiTrap(alloc, traps, stub, metrics)
+    base_addr = 0x100
+    p.patch_jump_table(base_addr)
+    # trigger trap of PrintHello
+    func_addr = base_addr - fd.get_func_by_name("PrintHello").get_bias()
+    trap_addr = ctx.mem.r32(func_addr + 2)
+    traps.trigger(ctx.mem.r16(trap_addr))
+    captured = capsys.readouterr()
+    assert captured.out.strip().split("\n") == ["VamosTest: PrintHello()"]
+    # call is counted for the lib
+    data = metrics.get_data()
+    assert data["libs"][name]["calls"] == 1
+    assert data["counts"]["traps"] == 1
+    p.cleanup()
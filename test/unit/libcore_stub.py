@@ -1,7 +1,7 @@
 import logging
 import pytest
 
-from amitools.vamos.libcore import LibStubGen, LibCtx, LibImplScanner
+from amitools.vamos.libcore import LibStubGen, LibStubCodeGen, LibCtx, LibImplScanner
 from amitools.vamos.lib.VamosTestLibrary import VamosTestLibrary
 from amitools.vamos.machine import MockMachine
 from amitools.vamos.libcore import LibProfileData
@@ -80,6 +80,11 @@ def _check_log_fake(caplog):
     ]
 
 
+stub_gens = pytest.mark.parametrize(
+    "gen_cls", [LibStubGen, LibStubCodeGen], ids=lambda c: c.name
+)
+
+
 def _create_ctx():
     machine = MockMachine()
     # prepare PrintString()
@@ -96,11 +101,12 @@ def _create_scan():
     return scanner.scan(name, impl, fd, True)
 
 
-def libcore_stub_gen_base_test(capsys):
+@stub_gens
+def libcore_stub_gen_base_test(capsys, gen_cls):
     scan = _create_scan()
     ctx = _create_ctx()
     # create stub
-    gen = LibStubGen()
+    gen = gen_cls()
     stub = gen.gen_stub(scan, ctx)
     _check_stub(stub)
     # call func
@@ -122,30 +128,33 @@ def libcore_stub_gen_base_test(capsys):
     assert cap.out.strip() == "VamosTest: PrintString('hello, world!')"
 
 
-def libcore_stub_gen_profile_test():
+@stub_gens
+def libcore_stub_gen_profile_test(gen_cls):
     scan = _create_scan()
     ctx = _create_ctx()
     profile = LibProfileData(scan.get_fd())
     # create stub
-    gen = LibStubGen()
+    gen = gen_cls()
     stub = gen.gen_stub(scan, ctx, profile)
     _check_stub(stub)
     # call func
     stub.PrintHello()
     stub.Dummy()
-    stub.Swap()
+    # profiled stubs of all generators return nothing
+    assert stub.Swap() is None
     stub.PrintString()
     _check_profile(scan.get_fd(), profile)
 
 
-def libcore_stub_gen_log_test(caplog):
+@stub_gens
+def libcore_stub_gen_log_test(caplog, gen_cls):
     caplog.set_level(logging.INFO)
     scan = _create_scan()
     ctx = _create_ctx()
     log_missing = logging.getLogger("missing")
     log_valid = logging.getLogger("valid")
     # create stub
-    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid)
+    gen = gen_cls(log_missing=log_missing, log_valid=log_valid)
     stub = gen.gen_stub(scan, ctx)
     _check_stub(stub)
     # call func
@@ -156,7 +165,8 @@ def libcore_stub_gen_log_test(caplog):
     _check_log(caplog)
 
 
-def libcore_stub_gen_log_profile_test(caplog):
+@stub_gens
+def libcore_stub_gen_log_profile_test(caplog, gen_cls):
     caplog.set_level(logging.INFO)
     scan = _create_scan()
     ctx = _create_ctx()
@@ -164,7 +174,7 @@ def libcore_stub_gen_log_profile_test(caplog):
     log_valid = logging.getLogger("valid")
     profile = LibProfileData(scan.get_fd())
     # create stub
-    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid)
+    gen = gen_cls(log_missing=log_missing, log_valid=log_valid)
     stub = gen.gen_stub(scan, ctx, profile)
     _check_stub(stub)
     # call func
@@ -176,11 +186,12 @@ def libcore_stub_gen_log_profile_test(caplog):
     _check_profile(scan.get_fd(), profile)
 
 
-def libcore_stub_gen_exc_default_test():
+@stub_gens
+def libcore_stub_gen_exc_default_test(gen_cls):
     scan = _create_scan()
     ctx = _create_ctx()
     # create stub
-    gen = LibStubGen()
+    gen = gen_cls()
     stub = gen.gen_stub(scan, ctx)
     _check_stub(stub)
     # call func
@@ -190,7 +201,8 @@ def libcore_stub_gen_exc_default_test():
         stub.RaiseError()
 
 
-def libcore_stub_gen_multi_arg_test(caplog):
+@stub_gens
+def libcore_stub_gen_multi_arg_test(caplog, gen_cls):
     caplog.set_level(logging.INFO)
     scan = _create_scan()
     ctx = _create_ctx()
@@ -198,7 +210,7 @@ def libcore_stub_gen_multi_arg_test(caplog):
     log_valid = logging.getLogger("valid")
     profile = LibProfileData(scan.get_fd())
     # create stub
-    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid)
+    gen = gen_cls(log_missing=log_missing, log_valid=log_valid)
     stub = gen.gen_stub(scan, ctx, profile)
     _check_stub(stub)
     # call func
@@ -280,3 +292,33 @@ def libcore_stub_gen_fake_log_profile_test(caplog):
     stub.PrintString()
     _check_log_fake(caplog)
     _check_profile(fd, profile)
+
+
+def libcore_stub_code_gen_source_test():
+    scan = _create_scan()
+    ctx = _create_ctx()
+    profile = LibProfileData(scan.get_fd())
+    gen = LibStubCodeGen()
+    stub = gen.gen_stub(scan, ctx, profile)
+    _check_stub(stub)
+    # int return: only d0 is set
+    src = gen.get_source("Add")
+    assert "cpu.r_reg(0)" in src
+    assert "cpu.r_reg(1)" in src
+    assert "type(res)" not in src
+    assert "prof.count" in src
+    # tuple return: d0 and d1 are set
+    src = gen.get_source("Swap")
+    assert "res[1]" in src
+    assert "type(res)" not in src
+    # no annotation: decide at runtime
+    src = gen.get_source("PrintHello")
+    assert "type(res)" in src
+    # call
+    ctx.cpu.w_reg(REG_D0, 21)
+    ctx.cpu.w_reg(REG_D1, 10)
+    stub.Add()
+    assert ctx.cpu.r_reg(REG_D0) == 31
+    stub.Swap()
+    assert ctx.cpu.r_reg(REG_D0) == 10
+    assert ctx.cpu.r_reg(REG_D1) == 31
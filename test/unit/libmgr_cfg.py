@@ -9,23 +9,27 @@ def libmgr_cfg_lib_default_test():
     assert lc.get_force_version() is None
     assert lc.get_expunge_mode() == LibCfg.EXPUNGE_MODE_LAST_CLOSE
     assert lc.get_num_fake_funcs() == 0
+    assert lc.get_stub_gen() == LibCfg.STUB_GEN_CLOSURE
     txt = str(lc)
     assert (
         txt
-        == "LibCfg(create_mode=auto, force_version=None, expunge_mode=last_close, num_fake_funcs=0)"
+        == "LibCfg(create_mode=auto, force_version=None, expunge_mode=last_close, num_fake_funcs=0, stub_gen=closure)"
     )
 
 
 def libmgr_cfg_lib_custom_test():
-    lc = LibCfg(LibCfg.CREATE_MODE_OFF, 1, LibCfg.EXPUNGE_MODE_NO_MEM, 42)
+    lc = LibCfg(
+        LibCfg.CREATE_MODE_OFF, 1, LibCfg.EXPUNGE_MODE_NO_MEM, 42, LibCfg.STUB_GEN_CODE
+    )
     assert lc.get_create_mode() == LibCfg.CREATE_MODE_OFF
     assert lc.get_force_version() is 1
     assert lc.get_expunge_mode() == LibCfg.EXPUNGE_MODE_NO_MEM
     assert lc.get_num_fake_funcs() == 42
+    assert lc.get_stub_gen() == LibCfg.STUB_GEN_CODE
     txt = str(lc)
     assert (
         txt
-        == "LibCfg(create_mode=off, force_version=1, expunge_mode=no_mem, num_fake_funcs=42)"
+        == "LibCfg(create_mode=off, force_version=1, expunge_mode=no_mem, num_fake_funcs=42, stub_gen=code)"
     )
 
 
@@ -34,6 +38,8 @@ def libmgr_cfg_lib_fail_test():
         lc = LibCfg(create_mode="bla")
     with pytest.raises(ValueError):
         lc = LibCfg(expunge_mode="foo")
+    with pytest.raises(ValueError):
+        lc = LibCfg(stub_gen="bar")
 
 
 def libmgr_cfg_lib_eq_test():
@@ -42,6 +48,8 @@ def libmgr_cfg_lib_eq_test():
     assert lc1 == lc2
     lc3 = LibCfg(force_version=1)
     assert lc1 != lc3
+    lc4 = LibCfg(stub_gen=LibCfg.STUB_GEN_CODE)
+    assert lc1 != lc4
 
 
 def libmgr_cfg_mgr_lib_test():
@@ -95,6 +103,7 @@ def libmgr_cfg_mgr_from_dict_default_test():
                             "version": 23,
                             "expunge": "shutdown",
                             "num_fake_funcs": 1,
+                            "stub": "closure",
                         }
                     )
                 }
@@ -107,6 +116,7 @@ def libmgr_cfg_mgr_from_dict_default_test():
                             "version": 42,
                             "expunge": "last_close",
                             "num_fake_funcs": 2,
+                            "stub": "closure",
                         }
                     )
                 }
@@ -140,6 +150,7 @@ def get_custom_cfg():
                             "version": 23,
                             "expunge": "shutdown",
                             "num_fake_funcs": 1,
+                            "stub": "closure",
                         }
                     ),
                     "foo.library": ConfigDict(
@@ -148,6 +159,7 @@ def get_custom_cfg():
                             "version": 42,
                             "expunge": "last_close",
                             "num_fake_funcs": 2,
+                            "stub": "closure",
                         }
                     ),
                     "libs/foo.library": ConfigDict(
@@ -156,6 +168,7 @@ def get_custom_cfg():
                             "version": 43,
                             "expunge": "last_close",
                             "num_fake_funcs": 10,
+                            "stub": "closure",
                         }
                     ),
                 }
@@ -168,6 +181,7 @@ def get_custom_cfg():
                             "version": 42,
                             "expunge": "last_close",
                             "num_fake_funcs": 3,
+                            "stub": "closure",
                         }
                     ),
                     "bar.device": ConfigDict(
@@ -176,6 +190,7 @@ def get_custom_cfg():
                             "version": 23,
                             "expunge": "shutdown",
                             "num_fake_funcs": 4,
+                            "stub": "closure",
                         }
                     ),
                     "devs/bar.device": ConfigDict(
@@ -184,6 +199,7 @@ def get_custom_cfg():
                             "version": 43,
                             "expunge": "last_close",
                             "num_fake_funcs": 11,
+                            "stub": "closure",
                         }
                     ),
                 }
@@ -281,11 +297,11 @@ def libmgr_cfg_dump_test(capsys):
     captured = capsys.readouterr()
     assert captured.out.splitlines() == [
         "libs config:",
-        "  default: LibCfg(create_mode=fake, force_version=23, expunge_mode=shutdown, num_fake_funcs=1)",
-        "  lib 'foo.library': LibCfg(create_mode=amiga, force_version=42, expunge_mode=last_close, num_fake_funcs=2)",
-        "  lib 'libs/foo.library': LibCfg(create_mode=vamos, force_version=43, expunge_mode=last_close, num_fake_funcs=10)",
+        "  default: LibCfg(create_mode=fake, force_version=23, expunge_mode=shutdown, num_fake_funcs=1, stub_gen=closure)",
+        "  lib 'foo.library': LibCfg(create_mode=amiga, force_version=42, expunge_mode=last_close, num_fake_funcs=2, stub_gen=closure)",
+        "  lib 'libs/foo.library': LibCfg(create_mode=vamos, force_version=43, expunge_mode=last_close, num_fake_funcs=10, stub_gen=closure)",
         "devs config:",
-        "  default: LibCfg(create_mode=amiga, force_version=42, expunge_mode=last_close, num_fake_funcs=3)",
-        "  dev 'bar.device': LibCfg(create_mode=fake, force_version=23, expunge_mode=shutdown, num_fake_funcs=4)",
-        "  dev 'devs/bar.device': LibCfg(create_mode=vamos, force_version=43, expunge_mode=last_close, num_fake_funcs=11)",
+        "  default: LibCfg(create_mode=amiga, force_version=42, expunge_mode=last_close, num_fake_funcs=3, stub_gen=closure)",
+        "  dev 'bar.device': LibCfg(create_mode=fake, force_version=23, expunge_mode=shutdown, num_fake_funcs=4, stub_gen=closure)",
+        "  dev 'devs/bar.device': LibCfg(create_mode=vamos, force_version=43, expunge_mode=last_close, num_fake_funcs=11, stub_gen=closure)",
     ]
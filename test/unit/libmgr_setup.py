@@ -1,4 +1,8 @@
+import pytest
 from amitools.vamos.libmgr import SetupLibManager
+from amitools.vamos.libmgr.snapshot import ObjectSnapshot
+from amitools.vamos.libcore import LibImpl
+from amitools.vamos.error import VamosInternalError
 from amitools.vamos.machine import Machine, MemoryMap
 from amitools.vamos.path import PathManager
 from amitools.vamos.cfgcore import ConfigDict
@@ -16,3 +20,72 @@ def libmgr_setup_default_test():
     slm.open_base_libs()
     slm.close_base_libs()
     slm.cleanup()
+
+
+def libmgr_setup_snapshot_test():
+    machine = Machine()
+    mem_map = MemoryMap(machine)
+    mem_map.setup_ram_allocator()
+    scheduler = Scheduler(machine)
+    path_mgr = PathManager()
+    alloc = mem_map.get_alloc()
+    start_free = alloc.get_free_bytes()
+    slm = SetupLibManager(machine, mem_map, scheduler, path_mgr)
+    slm.setup()
+    slm.open_base_libs()
+    vlib_mgr = slm.lib_mgr.vlib_mgr
+    # take snapshot
+    lib_snap = slm.snapshot()
+    map_snap = mem_map.snapshot()
+    machine_snap = machine.snapshot()
+    free_bytes = alloc.get_free_bytes()
+    num_labels = alloc.get_label_mgr().get_num_labels()
+    vlibs = dict(vlib_mgr.addr_vlib)
+    # change state
+    addr = slm.lib_mgr.open_lib("vamostest.library")
+    assert addr != 0
+    mem = alloc.alloc_memory(1024, label="bla")
+    assert alloc.get_free_bytes() < free_bytes
+    assert vlib_mgr.addr_vlib != vlibs
+    file_mgr = slm.dos_impl.file_mgr
+    fh = file_mgr.open(None, "NIL:", "rb")
+    assert fh
+    # restore
+    slm.restore(lib_snap)
+    mem_map.restore(map_snap)
+    machine.restore(machine_snap)
+    assert alloc.get_free_bytes() == free_bytes
+    assert alloc.get_label_mgr().get_num_labels() == num_labels
+    assert vlib_mgr.addr_vlib == vlibs
+    # files opened after the snapshot are closed
+    assert fh.obj.closed
+    assert fh.b_addr not in file_mgr.files_by_b_addr
+    # snapshot is reusable
+    addr = slm.lib_mgr.open_lib("vamostest.library")
+    assert addr != 0
+    slm.restore(lib_snap)
+    mem_map.restore(map_snap)
+    machine.restore(machine_snap)
+    # shutdown as usual
+    slm.close_base_libs()
+    slm.cleanup()
+    assert alloc.get_free_bytes() == start_free
+
+
+def libmgr_setup_snapshot_no_hooks_test():
+    machine = Machine()
+    mem_map = MemoryMap(machine)
+    mem_map.setup_ram_allocator()
+    scheduler = Scheduler(machine)
+    path_mgr = PathManager()
+    slm = SetupLibManager(machine, mem_map, scheduler, path_mgr)
+    slm.setup()
+    slm.open_base_libs()
+    # an impl with state but without hooks can't be captured
+    addr = slm.lib_mgr.open_lib("vamostest.library")
+    impl = slm.lib_mgr.get_vlib_by_addr(addr).get_impl()
+    impl.__class__ = type("NoHooksImpl", (LibImpl,), {})
+    with pytest.raises(VamosInternalError):
+        slm.snapshot()
+    with pytest.raises(VamosInternalError):
+        ObjectSnapshot([object()])
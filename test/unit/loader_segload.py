@@ -1,3 +1,5 @@
+import os
+from amitools.binfmt.Relocate import Relocate
 from amitools.vamos.loader import SegmentLoader
 from amitools.vamos.machine import MockMemory
 from amitools.vamos.mem import MemoryAlloc
@@ -98,3 +100,68 @@ def loader_segload_unregister(mem_alloc):
     assert not loader.unload_seglist(baddr)
     assert loader.shutdown() == 0
     assert alloc.is_all_free()
+
+
+def read_seglist(mem, info):
+    return [mem.r_block(seg.get_addr(), seg.get_size()) for seg in info.seglist]
+
+
+def loader_segload_image_cache_test(buildlibnix, mem_alloc):
+    mem, alloc = mem_alloc
+    lib_file = buildlibnix.make_lib("testnix")
+    loader = SegmentLoader(alloc)
+    # the file was just built
+    loader.racy_delta = -1
+    info1 = loader.int_load_sys_seglist(lib_file)
+    assert loader.get_image_cache_stats()["misses"] == 1
+    # second load uses the cached image at other addresses
+    info2 = loader.int_load_sys_seglist(lib_file)
+    assert loader.get_image_cache_stats()["hits"] == 1
+    assert info2.bin_img is info1.bin_img
+    addrs = info2.seglist.get_all_addrs()
+    assert addrs != info1.seglist.get_all_addrs()
+    datas = Relocate(info2.bin_img).relocate(addrs)
+    for seg, data in zip(info2.seglist, datas):
+        assert mem.r_block(seg.get_addr(), len(data)) == data
+    info1.seglist.free()
+    info2.seglist.free()
+    assert loader.shutdown() == 0
+    assert alloc.is_all_free()
+
+
+def loader_segload_resident_test(buildlibnix, mem_alloc):
+    mem, alloc = mem_alloc
+    lib_file = buildlibnix.make_lib("testnix")
+    loader = SegmentLoader(alloc, resident=[os.path.basename(lib_file).upper()])
+    loader.racy_delta = -1
+    baddr = loader.load_sys_seglist(lib_file)
+    assert baddr > 0
+    # all loads share the resident seglist
+    assert loader.load_sys_seglist(lib_file) == baddr
+    info = loader.get_info(baddr)
+    assert info.resident
+    assert info.users == 2
+    assert loader.unload_seglist(baddr)
+    assert loader.unload_seglist(baddr)
+    # stays loaded without users
+    assert loader.get_info(baddr) is info
+    assert info.users == 0
+    assert loader.load_sys_seglist(lib_file) == baddr
+    assert loader.unload_seglist(baddr)
+    # residents are no orphans
+    assert loader.shutdown() == 0
+    assert alloc.is_all_free()
+
+
+def loader_segload_disk_cache_test(buildlibnix, mem_alloc, tmpdir):
+    mem, alloc = mem_alloc
+    lib_file = buildlibnix.make_lib("testnix")
+    for i in range(2):
+        # a fresh loader finds the parsed image on disk
+        loader = SegmentLoader(alloc, image_cache_size=0)
+        loader.set_disk_cache(str(tmpdir))
+        info = loader.int_load_sys_seglist(lib_file)
+        assert info
+        info.seglist.free()
+        assert loader.get_disk_cache_stats() == {"hits": i, "misses": 1 - i}
+    assert alloc.is_all_free()
@@ -1,5 +1,6 @@
 from machine68k import CPUType
 from amitools.vamos.machine import Machine
+from amitools.vamos.machine.regs import REG_D0
 from amitools.vamos.machine.opcodes import *
 from amitools.vamos.error import *
 from amitools.vamos.log import log_machine
@@ -217,6 +218,48 @@ def machine_machine_run_addr_exc_test():
     m.cleanup()
 
 
+def machine_machine_snapshot_test():
+    m, cpu, mem, code, stack = create_machine()
+    mem.w16(code, op_rts)
+    cpu.w_reg(REG_D0, 42)
+    snap = m.snapshot()
+    # modify ram, cpu and add a trap
+    mem.w16(code, op_nop)
+    cpu.w_reg(REG_D0, 23)
+    a = []
+
+    def trap(op, pc):
+        a.append(pc)
+
+    addr = m.setup_quick_trap(trap)
+    # restore
+    m.restore(snap)
+    assert mem.r16(code) == op_rts
+    assert mem.r16(addr) == 0
+    assert cpu.r_reg(REG_D0) == 42
+    rs = m.run(code, stack)
+    assert rs.done
+    m.cleanup()
+
+
+def machine_machine_snapshot_cycles_test():
+    m, cpu, mem, code, stack = create_machine()
+    for i in range(1000):
+        mem.w16(code + i * 2, op_nop)
+    # the fresh cpu still has the cycles of the reset pending
+    snap = m.snapshot()
+    rs = m.run(code, stack, max_cycles=2000)
+    cycles = rs.cycles
+    pc = cpu.r_pc()
+    # each run after a restore sees the same cpu
+    for i in range(2):
+        m.restore(snap)
+        rs = m.run(code, stack, max_cycles=2000)
+        assert rs.cycles == cycles
+        assert cpu.r_pc() == pc
+    m.cleanup()
+
+
 def machine_machine_cfg_test():
     cfg = ConfigDict(
         {"cpu": "68020", "ram_size": 2048, "max_cycles": 128, "cycles_per_run": 2000}
@@ -229,3 +272,58 @@ def machine_machine_cfg_test():
     assert m.max_cycles == 128
     assert m.cycles_per_run == 2000
     assert m.get_label_mgr()
+
+
+def machine_machine_sampler_test():
+    m, cpu, mem, code, stack = create_machine()
+    pcs = []
+    m.set_sampler(pcs.append)
+    # endless loop: bra.s self
+    mem.w16(code, 0x60FE)
+    rs = m.run(code, stack, max_cycles=10000, cycles_per_run=1000)
+    assert not rs.done
+    assert pcs == [code] * 10
+    # sample every 5 slices
+    pcs.clear()
+    m.set_sampler(pcs.append, 5000)
+    rs = m.run(code, stack, max_cycles=10000, cycles_per_run=1000)
+    assert pcs == [code] * 2
+    m.set_sampler(None)
+    m.cleanup()
+
+
+def machine_machine_adaptive_slices_test():
+    m, cpu, mem, code, stack = create_machine()
+    m.set_adaptive_slices(True)
+    # endless loop: bra.s self
+    mem.w16(code, 0x60FE)
+    rs = m.run(code, stack, max_cycles=100000, cycles_per_run=1000)
+    assert not rs.done
+    # slices double without traps and end at max_cycles
+    assert 100000 <= rs.cycles < 100100
+    sizes = list(m.get_metrics().slice_sizes)
+    assert sizes[:6] == [1000, 2000, 4000, 8000, 16000, 32000]
+    # the last slice only runs the cycles left
+    assert len(sizes) == 7
+    assert 36900 < sizes[6] <= 37000
+    m.cleanup()
+
+
+def machine_machine_adaptive_slices_trap_test():
+    m, cpu, mem, code, stack = create_machine()
+    m.set_adaptive_slices(True)
+    metrics = m.get_metrics()
+    calls = []
+    addr = m.setup_quick_trap(
+        metrics.wrap_trap("test.library", lambda op, pc: calls.append(pc))
+    )
+    # loop: jsr trap.w ; bra.s loop
+    mem.w16(code, 0x4EB8)
+    mem.w16(code + 2, addr)
+    mem.w16(code + 4, 0x60FA)
+    rs = m.run(code, stack, max_cycles=10000, cycles_per_run=1000)
+    assert not rs.done
+    assert len(calls) > 0
+    # a trap in each slice keeps the slices small
+    assert max(metrics.slice_sizes) == 1000
+    m.cleanup()
@@ -0,0 +1,68 @@
+import io
+import pytest
+from amitools.vamos.machine import MockMemory, MemoryIO
+
+
+class BlockMemory(object):
+    """a memory without a RAM view"""
+
+    def __init__(self, mem):
+        self.mem = mem
+
+    def get_ram_size_bytes(self):
+        return self.mem.get_ram_size_bytes()
+
+    def r_block(self, addr, size):
+        return self.mem.r_block(addr, size)
+
+    def w_block(self, addr, data):
+        assert type(data) is not memoryview
+        self.mem.w_block(addr, data)
+
+
+def machine_memio_view_test():
+    mem = MockMemory(size_kib=1)
+    mio = MemoryIO(mem)
+    assert mio.has_view()
+    view = mio.get_view(0x100, 4)
+    view[:] = b"abcd"
+    assert mem.r_block(0x100, 4) == b"abcd"
+    mio.write_block(0x200, b"hello")
+    assert mem.r_block(0x200, 5) == b"hello"
+    data = mio.read_block(0x200, 5)
+    assert type(data) is memoryview
+    assert data == b"hello"
+    # range checks
+    with pytest.raises(ValueError):
+        mio.get_view(0x3FF, 2)
+    with pytest.raises(ValueError):
+        mio.write_block(-1, b"a")
+    with pytest.raises(ValueError):
+        mio.read_block(0x400, 1)
+
+
+def machine_memio_block_test():
+    mem = MockMemory(size_kib=1)
+    mio = MemoryIO(BlockMemory(mem))
+    assert not mio.has_view()
+    assert mio.get_view(0x100, 4) is None
+    mio.write_block(0x200, memoryview(b"hello"))
+    assert mio.read_block(0x200, 5) == b"hello"
+
+
+def machine_memio_read_into_test():
+    data = bytes(range(64))
+    for mio in (
+        MemoryIO(MockMemory(size_kib=1)),
+        MemoryIO(BlockMemory(MockMemory(size_kib=1))),
+    ):
+        fobj = io.BytesIO(data)
+        assert mio.read_into(0x100, 16, fobj.readinto, fobj.read) == 16
+        assert mio.read_block(0x100, 16) == data[:16]
+        # short read
+        assert mio.read_into(0x200, 100, fobj.readinto, fobj.read) == 48
+        assert mio.read_block(0x200, 48) == data[16:]
+        assert mio.read_into(0x300, 10, fobj.readinto, fobj.read) == 0
+        # errors are passed through
+        err = lambda *args: -1
+        assert mio.read_into(0x100, 16, err, err) == -1
@@ -6,8 +6,11 @@ def machine_memmap_parse_config_test():
     machine = Machine()
     mm = MemoryMap(machine)
     old_base = mm.get_old_dos_guard_base()
-    cfg = ConfigDict({"hw_access": "ignore", "old_dos_guard": True})
+    cfg = ConfigDict(
+        {"hw_access": "ignore", "old_dos_guard": True, "mem_alloc": "best_fit"}
+    )
     assert mm.parse_config(cfg)
     assert mm.get_old_dos_guard_base() != old_base
     assert mm.get_hw_access().mode == HWAccess.MODE_IGNORE
     assert mm.get_alloc()
+    assert mm.get_alloc().get_free_list().name == "best_fit"
@@ -0,0 +1,101 @@
+import json
+import pytest
+from amitools.vamos.machine import Machine, RunMetrics
+from amitools.vamos.machine.metrics import CAT_CPU, CAT_IO
+from amitools.vamos.machine.opcodes import op_rts
+
+
+def machine_metrics_time_test():
+    m = RunMetrics()
+    m.enter(CAT_CPU)
+    m.enter("dos.library")
+    # nested run inside trap
+    m.enter(CAT_CPU)
+    with m.get_io_timer():
+        pass
+    m.leave()
+    m.leave()
+    m.leave()
+    assert m.stack == []
+    data = m.get_data()
+    times = data["time"]
+    assert sum(times.values()) == pytest.approx(data["wall_time"])
+    assert times["io"] > 0.0
+
+
+def machine_metrics_trap_test():
+    m = RunMetrics()
+    calls = []
+
+    def func(op, pc):
+        calls.append((op, pc))
+        assert m.cur == "dos.library"
+        return 42
+
+    def fail(op, pc):
+        raise ValueError("fail")
+
+    trap = m.wrap_trap("dos.library", func)
+    assert trap(1, 2) == 42
+    assert trap(3, 4) == 42
+    assert calls == [(1, 2), (3, 4)]
+    trap = m.wrap_trap("exec.library", fail)
+    with pytest.raises(ValueError):
+        trap(5, 6)
+    assert m.stack == []
+    data = m.get_data()
+    assert data["counts"]["traps"] == 3
+    assert data["libs"]["dos.library"]["calls"] == 2
+    assert data["libs"]["exec.library"]["calls"] == 1
+
+
+def machine_metrics_counter_test(tmpdir):
+    m = RunMetrics()
+    m.add_counter("files", lambda: 3)
+    m.add_run(0)
+    m.add_run(2)
+    m.add_run(1)
+    path = str(tmpdir / "metrics.json")
+    m.save_json_file(path)
+    with open(path) as fh:
+        data = json.load(fh)
+    counts = data["counts"]
+    assert counts["files"] == 3
+    assert counts["runs"] == 3
+    assert counts["max_nesting"] == 2
+
+
+def machine_metrics_disabled_test():
+    m = RunMetrics(enabled=False)
+
+    def func(op, pc):
+        return 42
+
+    # traps and I/O are neither wrapped nor timed
+    assert m.wrap_trap("dos.library", func) is func
+    with m.get_io_timer():
+        pass
+    assert m.get_data()["time"]["io"] == 0.0
+    # adaptive slices only need the number of traps
+    m.count_traps = True
+    trap = m.wrap_trap("dos.library", func)
+    assert trap(1, 2) == 42
+    data = m.get_data()
+    assert data["counts"]["traps"] == 1
+    assert data["libs"] == {}
+
+
+def machine_metrics_run_test():
+    machine = Machine(metrics=True)
+    mem = machine.get_mem()
+    code = machine.get_ram_begin()
+    mem.w16(code, op_rts)
+    rs = machine.run(code, machine.get_scratch_top())
+    machine.cleanup()
+    data = machine.get_metrics().get_data()
+    assert data["counts"]["runs"] == 1
+    assert data["counts"]["cycles"] == rs.cycles
+    assert data["counts"]["slices"] == 1
+    # slice sizes are only recorded for adaptive runs
+    assert data["slices"] == {}
+    assert data["time"]["cpu"] > 0.0
@@ -0,0 +1,89 @@
+from amitools.vamos.machine import Machine, MemWatch, MemWatchList
+
+
+def machine_watch_matches_test():
+    w = MemWatch(0x1000, 4, None, "W", (1, 2))
+    assert w.matches("W", 2, 0x1000)
+    assert w.matches("W", 1, 0x1002)
+    # straddling access
+    assert w.matches("W", 2, 0x0FFE)
+    assert not w.matches("W", 1, 0x0FFE)
+    assert not w.matches("W", 2, 0x1004)
+    # mode and width filter
+    assert not w.matches("R", 2, 0x1000)
+    assert not w.matches("W", 0, 0x1000)
+
+
+def machine_watch_list_test():
+    hits = []
+
+    def func(*args):
+        hits.append(args)
+
+    wl = MemWatchList()
+    w1 = MemWatch(0x1000, 0x10, func, "R")
+    w2 = MemWatch(0x3000, 2, func)
+    wl.add(w1)
+    wl.add(w2)
+    assert len(wl) == 2
+    assert wl.trace("R", 2, 0x2000) == 0
+    assert wl.trace("W", 1, 0x1000, 42) == 0
+    wl.trace("R", 1, 0x1000)
+    wl.trace("W", 2, 0x2FFE, 0x12345678)
+    assert hits == [("R", 1, 0x1000, 0), ("W", 2, 0x2FFE, 0x12345678)]
+    wl.remove(w2)
+    assert len(wl) == 1
+    hits.clear()
+    wl.trace("W", 2, 0x2FFE, 0x12345678)
+    assert hits == []
+
+
+def machine_watch_run_test():
+    m = Machine(raise_on_main_run=False)
+    mem = m.get_mem()
+    code = m.get_ram_begin()
+    stack = m.get_scratch_top()
+    var = code + 0x100
+    # count to 16 and store the counter in var
+    prog = "7000" "5280" "23c0%08x" "0c8000000010" "66f0" "4e75" % var
+    mem.w_block(code, bytes.fromhex(prog))
+    hits = []
+
+    def func(*args):
+        hits.append(args)
+
+    watch = MemWatch(var, 4, func, "W")
+    m.add_mem_watch(watch)
+    rs = m.run(code, stack)
+    assert rs.error is None
+    assert hits == [("W", 2, var, i) for i in range(1, 17)]
+    # no more trace without watch
+    m.remove_mem_watch(watch)
+    hits.clear()
+    m.run(code, stack)
+    assert hits == []
+    m.cleanup()
+
+
+def machine_watch_with_trace_hook_test():
+    m = Machine(raise_on_main_run=False)
+    mem = m.get_mem()
+    code = m.get_ram_begin()
+    stack = m.get_scratch_top()
+    mem.w16(code, 0x4E75)
+    hits = []
+    trace = []
+
+    def hit_func(*args):
+        hits.append(args)
+
+    def trace_func(*args):
+        trace.append(args)
+        return 0
+
+    m.set_cpu_mem_trace_hook(trace_func)
+    m.add_mem_watch(MemWatch(code, 2, hit_func, "R", (1,)))
+    m.run(code, stack)
+    assert hits == [("R", 1, code, 0x4E75)]
+    assert trace[0] == ("R", 1, code, 0x4E75)
+    m.cleanup()
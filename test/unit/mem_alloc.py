@@ -1,20 +1,99 @@
+import pytest
 from amitools.vamos.machine import MockMemory
 from amitools.vamos.mem import MemoryAlloc
+from amitools.vamos.error import VamosInternalError
 
+free_lists = pytest.mark.parametrize("free_list", ["first_fit", "best_fit"])
 
-def mem_alloc_base_test():
+
+@free_lists
+def mem_alloc_base_test(free_list):
     mem = MockMemory()
-    alloc = MemoryAlloc(mem)
+    alloc = MemoryAlloc(mem, free_list=free_list)
     assert alloc.is_all_free()
     addr = alloc.alloc_mem(1024)
     alloc.free_mem(addr, 1024)
     assert alloc.is_all_free()
 
 
-def mem_alloc_nonbase4_test():
+@free_lists
+def mem_alloc_nonbase4_test(free_list):
     mem = MockMemory()
-    alloc = MemoryAlloc(mem)
+    alloc = MemoryAlloc(mem, free_list=free_list)
     assert alloc.is_all_free()
     addr = alloc.alloc_mem(1021)
     alloc.free_mem(addr, 1021)
     assert alloc.is_all_free()
+
+
+@free_lists
+def mem_alloc_merge_test(free_list):
+    mem = MockMemory()
+    alloc = MemoryAlloc(mem, free_list=free_list)
+    total = alloc.get_free_bytes()
+    addrs = [alloc.alloc_mem(100) for i in range(10)]
+    assert alloc.get_free_bytes() == total - 10 * 100
+    # free every other block and then the rest
+    for addr in addrs[::2]:
+        alloc.free_mem(addr, 100)
+    assert alloc.get_free_list().get_num_chunks() == 6
+    assert alloc.largest_chunk() == total - 10 * 100
+    for addr in addrs[1::2]:
+        alloc.free_mem(addr, 100)
+    assert alloc.is_all_free()
+    assert alloc.get_free_list().get_num_chunks() == 1
+    assert alloc.available() == total
+    assert alloc.largest_chunk() == total
+
+
+@free_lists
+def mem_alloc_out_of_mem_test(free_list):
+    mem = MockMemory()
+    alloc = MemoryAlloc(mem, 0x1000, 0x1000, free_list=free_list)
+    assert alloc.alloc_mem(0x1000) == 0x1000
+    assert alloc.alloc_mem(4, except_on_fail=False) == 0
+    with pytest.raises(VamosInternalError):
+        alloc.alloc_mem(4)
+
+
+@free_lists
+def mem_alloc_state_test(free_list):
+    mem = MockMemory()
+    alloc = MemoryAlloc(mem, free_list=free_list)
+    a = alloc.alloc_mem(100)
+    b = alloc.alloc_mem(200)
+    alloc.free_mem(a, 100)
+    free = alloc.get_free_bytes()
+    state = alloc.get_state()
+    chunks = alloc.get_free_list().get_chunks()
+    # modify
+    c = alloc.alloc_mem(300)
+    alloc.free_mem(b, 200)
+    # restore
+    alloc.set_state(state)
+    assert alloc.get_free_bytes() == free
+    assert alloc.get_free_list().get_chunks() == chunks
+    # state is still valid: b is allocated
+    alloc.free_mem(b, 200)
+    assert alloc.is_all_free()
+    assert alloc.get_free_list().get_num_chunks() == 1
+
+
+def mem_alloc_best_fit_test():
+    mem = MockMemory()
+    alloc = MemoryAlloc(mem, 0x1000, 0x2000, free_list="best_fit")
+    a = alloc.alloc_mem(0x100)
+    b = alloc.alloc_mem(0x10)
+    c = alloc.alloc_mem(0x20)
+    d = alloc.alloc_mem(0x10)
+    alloc.free_mem(a, 0x100)
+    alloc.free_mem(c, 0x20)
+    # the smaller hole is taken
+    assert alloc.alloc_mem(0x20) == c
+    assert alloc.alloc_mem(0x80) == a
+
+
+def mem_alloc_invalid_free_list_test():
+    mem = MockMemory()
+    with pytest.raises(VamosInternalError):
+        MemoryAlloc(mem, free_list="bla")
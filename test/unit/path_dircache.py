@@ -0,0 +1,52 @@
+import os
+from amitools.vamos.path import DirCache
+
+
+def make_old(path):
+    # avoid the racy time window of a just changed dir
+    os.utime(path, (1000000, 1000000))
+
+
+def path_dircache_names_test(tmpdir):
+    dc = DirCache()
+    path = str(tmpdir)
+    tmpdir.join("Foo").write("")
+    tmpdir.mkdir("BAR")
+    make_old(path)
+    assert dc.get_names(path) == {"foo": "Foo", "bar": "BAR"}
+    assert dc.find_name(path, "FOO") == "Foo"
+    assert dc.find_name(path, "baz") is None
+    assert dc.get_stats() == {"hits": 2, "misses": 1, "entries": 1}
+    # no dirs
+    assert dc.get_names(str(tmpdir.join("Foo"))) is None
+    assert dc.get_names(str(tmpdir.join("baz"))) is None
+
+
+def path_dircache_mtime_test(tmpdir):
+    dc = DirCache()
+    path = str(tmpdir)
+    tmpdir.join("Foo").write("")
+    make_old(path)
+    assert dc.find_name(path, "foo") == "Foo"
+    # external change updates mtime
+    tmpdir.join("Bar").write("")
+    assert dc.find_name(path, "bar") == "Bar"
+    assert dc.get_stats()["misses"] == 2
+    # listing of a just changed dir is not kept
+    assert dc.find_name(path, "bar") == "Bar"
+    assert dc.get_stats() == {"hits": 0, "misses": 3, "entries": 0}
+
+
+def path_dircache_invalidate_test(tmpdir):
+    dc = DirCache()
+    path = str(tmpdir)
+    sub = tmpdir.mkdir("sub")
+    make_old(str(sub))
+    make_old(path)
+    assert dc.find_name(path, "SUB") == "sub"
+    assert dc.find_name(str(sub), "x") is None
+    assert dc.get_stats()["entries"] == 2
+    dc.invalidate(str(sub.join("x")))
+    assert dc.get_stats()["entries"] == 1
+    dc.invalidate(str(sub) + "/")
+    assert dc.get_stats()["entries"] == 0
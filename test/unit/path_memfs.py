@@ -0,0 +1,109 @@
+import os
+import pytest
+from amitools.vamos.path import MemBackend
+
+
+def create_fs(max_size=None):
+    fs = MemBackend("mem:ram", max_size)
+    assert fs.setup()
+    return fs
+
+
+def path_memfs_file_test():
+    fs = create_fs()
+    with fs.open("mem:ram/foo", "wb+") as fh:
+        assert fh.write(b"hello, world!") == 13
+        fh.seek(7)
+        assert fh.read(5) == b"world"
+        fh.seek(0, 2)
+        assert fh.tell() == 13
+        # write after a gap
+        fh.seek(15)
+        fh.write(b"!")
+        fh.truncate(16)
+    assert fs.isfile("mem:ram/foo")
+    assert fs.get_used_size() == 16
+    with fs.open("mem:ram/FOO", "rb") as fh:
+        assert fh.read() == b"hello, world!\0\0!"
+        # no fd in memory
+        with pytest.raises(OSError):
+            fh.fileno()
+    # append
+    with fs.open("mem:ram/foo", "ab") as fh:
+        fh.write(b"?")
+    assert fs.stat("mem:ram/foo").st_size == 17
+    # truncate
+    with fs.open("mem:ram/foo", "wb") as fh:
+        pass
+    assert fs.get_used_size() == 0
+    # missing
+    with pytest.raises(FileNotFoundError):
+        fs.open("mem:ram/bar", "rb")
+    with pytest.raises(FileNotFoundError):
+        fs.open("mem:ram/bar/baz", "wb")
+
+
+def path_memfs_dir_test():
+    fs = create_fs()
+    fs.mkdir("mem:ram/Dir")
+    with pytest.raises(FileExistsError):
+        fs.mkdir("mem:ram/dir")
+    assert fs.isdir("mem:ram/dir")
+    assert fs.get_names("mem:ram") == {"dir": "Dir"}
+    fs.makedirs("mem:ram/dir/a/b")
+    fs.open("mem:ram/dir/a/b/c", "wb").close()
+    entries = fs.scandir("mem:ram/dir/a/b")
+    assert [e.name for e in entries] == ["c"]
+    assert entries[0].path == "mem:ram/dir/a/b/c"
+    assert entries[0].is_file()
+    # can't remove dir with contents
+    with pytest.raises(OSError):
+        fs.rmdir("mem:ram/dir/a/b")
+    with pytest.raises(IsADirectoryError):
+        fs.remove("mem:ram/dir/a/b")
+    fs.remove("mem:ram/dir/a/b/c")
+    fs.rmdir("mem:ram/dir/a/b")
+    assert fs.listdir("mem:ram/dir/a") == []
+    # not my path
+    assert not fs.exists("mem:foo/dir")
+    assert not fs.exists("/dir")
+
+
+def path_memfs_rename_test():
+    fs = create_fs()
+    fs.makedirs("mem:ram/a/b")
+    with fs.open("mem:ram/a/b/foo", "wb") as fh:
+        fh.write(b"abc")
+    with fs.open("mem:ram/bar", "wb") as fh:
+        fh.write(b"xy")
+    fs.rename("mem:ram/a/b/foo", "mem:ram/Foo")
+    assert fs.get_names("mem:ram")["foo"] == "Foo"
+    # replace file
+    fs.rename("mem:ram/foo", "mem:ram/bar")
+    assert fs.listdir("mem:ram") == ["a", "bar"]
+    assert fs.get_used_size() == 3
+    # not into itself
+    with pytest.raises(OSError):
+        fs.rename("mem:ram/a", "mem:ram/a/b/c")
+
+
+def path_memfs_protect_test():
+    fs = create_fs()
+    fs.open("mem:ram/foo", "wb").close()
+    assert fs.access("mem:ram/foo", os.W_OK)
+    fs.chmod("mem:ram/foo", 0o444)
+    assert not fs.access("mem:ram/foo", os.W_OK)
+    with pytest.raises(PermissionError):
+        fs.open("mem:ram/foo", "rb+")
+    fs.utime("mem:ram/foo", (1000, 1000))
+    assert fs.stat("mem:ram/foo").st_mtime == 1000
+
+
+def path_memfs_size_test():
+    fs = create_fs(max_size=10)
+    with fs.open("mem:ram/foo", "wb") as fh:
+        fh.write(b"0123456789")
+        with pytest.raises(OSError):
+            fh.write(b"!")
+    fs.remove("mem:ram/foo")
+    assert fs.get_used_size() == 0
@@ -1,3 +1,4 @@
+import pytest
 import os
 from amitools.vamos.path import VolumeManager, resolve_sys_path
 from amitools.vamos.cfgcore import ConfigDict
@@ -169,3 +170,50 @@ def path_volume_temp_test(tmpdir):
     v.shutdown()
     # now temp is gone
     assert not tmpdir.join("bla").check()
+
+
+def path_volume_ami_to_sys_cache_test(tmpdir):
+    v = VolumeManager()
+    mp = tmpdir.mkdir("bla")
+    my_path = str(mp)
+    sub = mp.mkdir("Foo")
+    for p in (my_path, str(sub)):
+        os.utime(p, (1000000, 1000000))
+    assert v.add_volume("my:" + my_path)
+    a2s = v.ami_to_sys_path
+    for i in range(3):
+        assert a2s("my:foo/bar") == os.path.join(my_path, "Foo", "bar")
+    assert v.get_dir_cache().get_stats() == {"hits": 4, "misses": 2, "entries": 2}
+    # vamos renames a dir
+    os.rename(str(sub), os.path.join(my_path, "Baz"))
+    v.invalidate_sys_path(str(sub))
+    assert a2s("my:baz") == os.path.join(my_path, "Baz")
+
+
+def path_volume_mem_test(tmpdir):
+    v = VolumeManager()
+    assert v.setup()
+    dump_path = str(tmpdir.join("dump"))
+    vol = v.add_volume("ram:?mem,size=1,dump=" + dump_path)
+    assert vol
+    assert vol.get_path() == "mem:ram"
+    backend = v.get_backend("mem:ram/foo")
+    assert backend is vol.get_backend()
+    assert v.get_backend(str(tmpdir)) is not backend
+    # create some files
+    assert vol.create_rel_sys_path("t") == "mem:ram/t"
+    with backend.open("mem:ram/t/Foo", "wb") as fh:
+        fh.write(b"hello")
+    # size limit is 1 KiB
+    with backend.open("mem:ram/t/big", "wb") as fh:
+        with pytest.raises(OSError):
+            fh.write(bytes(2000))
+    # case insensitive
+    assert v.ami_to_sys_path("RAM:T/foo") == "mem:ram/t/Foo"
+    assert v.ami_to_sys_path("ram:t/bar") == "mem:ram/t/bar"
+    assert v.sys_to_ami_path("mem:ram/t/Foo") == "ram:t/Foo"
+    # no dir on host
+    assert not tmpdir.join("ram").check()
+    # dump on shutdown
+    v.shutdown()
+    assert tmpdir.join("dump", "t", "Foo").read() == "hello"
@@ -0,0 +1,21 @@
+from amitools.vamos.profiler import CacheProfiler
+from amitools.vamos.cfgcore import ConfigDict
+
+
+def profiler_caches_test():
+    stats = {"hits": 10, "misses": 2}
+    prof = CacheProfiler(enabled=True)
+    prof.add_cache("foo", lambda: stats)
+    prof.add_cache("bar", lambda: {"hits": 0, "misses": 0})
+    prof.setup()
+    stats = {"hits": 13, "misses": 3}
+    prof.shutdown()
+    # only lookups while profiling are counted
+    assert prof.get_data() == {"foo": {"hits": 3, "misses": 1}}
+    # merge old data
+    prof.set_data(ConfigDict({"foo": {"hits": 1, "misses": 1}}))
+    assert prof.get_stats("foo") == {"hits": 4, "misses": 2}
+    lines = []
+    prof.dump(lines.append)
+    assert len(lines) == 1
+    assert lines[0].startswith("foo")
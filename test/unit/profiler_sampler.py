@@ -0,0 +1,101 @@
+import logging
+from amitools.vamos.profiler import PCSampleProfiler, MainProfiler
+from amitools.vamos.machine import MockMachine
+from amitools.vamos.label import LabelRange, LabelSegment
+from amitools.vamos.cfgcore import ConfigDict
+from amitools.binfmt.BinImage import Segment, SymbolTable, Symbol, SEGMENT_TYPE_CODE
+
+
+def create_sampler():
+    machine = MockMachine()
+    label_mgr = machine.get_label_mgr()
+    # a code segment with two symbols
+    seg = Segment(SEGMENT_TYPE_CODE, 0x100)
+    symtab = SymbolTable()
+    symtab.add_symbol(Symbol(0, b"_start"))
+    symtab.add_symbol(Symbol(0x40, b"_main"))
+    seg.set_symtab(symtab)
+    seg_label = LabelSegment("prog_0:code", 0x1000, 0x108, seg)
+    label_mgr.add_label(seg_label)
+    label_mgr.add_label(LabelRange("data", 0x2000, 0x100))
+    prof = PCSampleProfiler(machine, enabled=True)
+    prof.setup()
+    assert machine.sampler == prof.sample
+    return prof, machine, label_mgr, seg_label
+
+
+def profiler_sampler_resolve_test():
+    prof, machine, label_mgr, _ = create_sampler()
+    for pc in (0x1008, 0x1010, 0x1048, 0x1048, 0x1060, 0x2010, 0x3000):
+        machine.sampler(pc)
+    prof.shutdown()
+    assert machine.sampler is None
+    assert prof.get_num_samples() == 7
+    assert prof.get_funcs() == [
+        ("prog_0:code:_main", 3),
+        ("prog_0:code:_start", 2),
+        ("?? @003000", 1),
+        ("data", 1),
+    ]
+    assert prof.get_segments() == [("prog_0:code", 5), ("??", 1), ("data", 1)]
+    assert prof.get_data() == {
+        "num_samples": 7,
+        "funcs": {
+            "prog_0:code:_start": 2,
+            "prog_0:code:_main": 3,
+            "data": 1,
+            "?? @003000": 1,
+        },
+        "segments": {"prog_0:code": 5, "data": 1, "??": 1},
+    }
+
+
+def profiler_sampler_remove_label_test():
+    prof, machine, label_mgr, seg_label = create_sampler()
+    machine.sampler(0x1050)
+    # samples are resolved before the segment is unloaded
+    label_mgr.remove_label(seg_label)
+    machine.sampler(0x1050)
+    prof.shutdown()
+    assert prof.get_segments() == [("??", 1), ("prog_0:code", 1)]
+
+
+def profiler_sampler_disabled_test():
+    machine = MockMachine()
+    prof = PCSampleProfiler(machine)
+    prof.setup()
+    assert machine.sampler is None
+    prof.shutdown()
+    assert prof.get_data() == {}
+
+
+def profiler_sampler_main_test(caplog, tmpdir):
+    caplog.set_level(logging.INFO, "prof")
+    path = str(tmpdir.join("prof.json"))
+    cfg = ConfigDict(
+        {
+            "enabled": True,
+            "samples": {"enabled": True, "interval": 1000, "top": 1},
+            "output": {"dump": True, "file": path, "append": True},
+        }
+    )
+    for i in range(2):
+        machine = MockMachine()
+        mp = MainProfiler()
+        assert mp.parse_config(cfg)
+        prof = PCSampleProfiler(machine)
+        assert mp.add_profiler(prof)
+        mp.setup()
+        machine.sampler(0x100)
+        machine.sampler(0x200)
+        mp.shutdown()
+    # data was appended
+    assert prof.get_num_samples() == 4
+    assert caplog.record_tuples[-6:] == [
+        ("prof", logging.INFO, "----- profiler 'samples' -----"),
+        ("prof", logging.INFO, "4 samples"),
+        ("prof", logging.INFO, "flat:"),
+        ("prof", logging.INFO, "       2   50.00%  ?? @000100"),
+        ("prof", logging.INFO, "by segment:"),
+        ("prof", logging.INFO, "       4  100.00%  ??"),
+    ]
@@ -1,5 +1,5 @@
 import logging
-from amitools.vamos.trace import TraceManager
+from amitools.vamos.trace import TraceManager, TraceReader, TraceDecoder
 from amitools.vamos.label import *
 from amitools.vamos.machine import *
 from amitools.vamos.libstructs import NodeStruct, LibraryStruct
@@ -124,6 +124,125 @@ def trace_mgr_int_mem_test(caplog):
     check_log("mem_int", caplog.record_tuples)
 
 
+def decode_ring(path):
+    reader = TraceReader(path)
+    assert reader.read() is None
+    decoder = TraceDecoder(reader)
+    return [(chn, logging.INFO, line) for chn, line in decoder.decode()]
+
+
+def trace_mgr_ring_mem_test(tmpdir):
+    path = str(tmpdir.join("trace"))
+    tm = setup_tm()
+    assert tm.setup_ring(path, 100)
+    tm.setup_cpu_mem_trace()
+    tm.ring_cpu_mem("R", 2, 0)
+    tm.ring_cpu_mem("W", 1, 4, 23)
+    tm.ring_cpu_mem("R", 2, 0x100)
+    tm.ring_cpu_mem("W", 1, 0x120, 42)
+    tm.ring_cpu_mem("R", 2, 0x200)
+    tm.ring_cpu_mem("W", 1, 0x208, 21)
+    tm.ring_cpu_mem("R", 1, 0x300)
+    tm.ring_cpu_mem("R", 1, 0x320)
+    tm.ring_cpu_mem("R", 1, 0x400 - 36)
+    tm.ring_cpu_mem("R", 1, 0x420)
+    tm.shutdown()
+    # decoded offline like the log
+    check_log("mem", decode_ring(path))
+
+
+def trace_mgr_ring_int_mem_test(tmpdir):
+    path = str(tmpdir.join("trace"))
+    tm = setup_tm()
+    assert tm.setup_ring(path, 100)
+    tm.setup_vamos_ram_trace()
+    tm.trace_int_mem("R", 2, 0x100)
+    tm.trace_int_block("R", 0x100, 0x20)
+    tm.shutdown()
+    assert decode_ring(path) == [
+        (
+            "mem_int",
+            logging.INFO,
+            "R(4): 000100: 00000000          [@000100 +000000 range] ",
+        ),
+        (
+            "mem_int",
+            logging.INFO,
+            "R(B): 000100: +000020           [@000100 +000000 range] ",
+        ),
+    ]
+
+
+def trace_mgr_ring_instr_test(tmpdir):
+    path = str(tmpdir.join("trace"))
+    machine = Machine()
+    mem = machine.get_mem()
+    code = machine.get_ram_begin()
+    stack = machine.get_scratch_top()
+    # count to 16 in a loop
+    mem.w_block(code, bytes.fromhex("7000" "5280" "0c8000000010" "66f6") + b"\x4e\x75")
+    tm = TraceManager(machine)
+    assert tm.setup_ring(path, 1000)
+    tm.setup_cpu_instr_trace(True)
+    machine.run(code, stack)
+    tm.shutdown()
+    machine.cleanup()
+    lines = [x[2] for x in decode_ring(path)]
+    # 4 lines per instr: regs and code. the last is the exit trap of run()
+    assert len(lines) == (2 + 16 * 3 + 1) * 4
+    assert lines[0].startswith("PC=%08x  SR=" % code)
+    assert "%06x    moveq   #$0, D0 " % code in lines[3]
+    assert "%06x    rts " % (code + 12) in lines[-5]
+
+
+def trace_mgr_parse_watch_test():
+    pw = TraceManager.parse_watch
+    assert pw("0x1000") == (0x1000, 1, "RW", (0, 1, 2))
+    assert pw("4096+16") == (0x1000, 16, "RW", (0, 1, 2))
+    assert pw("0x1000+0x10/w") == (0x1000, 16, "W", (0, 1, 2))
+    assert pw("0x1000/R24") == (0x1000, 1, "R", (1, 2))
+    assert pw("foo") is None
+    assert pw("0x1000+0") is None
+    assert pw("0x1000/x") is None
+
+
+def trace_mgr_parse_config_watch_test():
+    cfg = ConfigDict({"vamos_ram": False, "memory": False, "instr": False})
+    machine = MockMachine()
+    tm = TraceManager(machine)
+    cfg.watch = ["0x1000+4/w"]
+    assert tm.parse_config(cfg)
+    assert len(machine.mem_watches) == 1
+    watch = machine.mem_watches[0]
+    assert (watch.addr, watch.size, watch.modes) == (0x1000, 4, "W")
+    cfg.watch = ["bla"]
+    assert not tm.parse_config(cfg)
+
+
+def trace_mgr_ring_watch_test(tmpdir):
+    path = str(tmpdir.join("trace"))
+    machine = Machine()
+    mem = machine.get_mem()
+    code = machine.get_ram_begin()
+    stack = machine.get_scratch_top()
+    var = code + 0x100
+    machine.get_label_mgr().add_label(LabelRange("var", var, 4))
+    # count to 16 and store the counter in var
+    prog = "7000" "5280" "23c0%08x" "0c8000000010" "66f0" "4e75" % var
+    mem.w_block(code, bytes.fromhex(prog))
+    tm = TraceManager(machine)
+    assert tm.setup_ring(path, 100)
+    tm.add_mem_watch(var, 4, "W")
+    machine.run(code, stack)
+    tm.shutdown()
+    machine.cleanup()
+    lines = [x[2] for x in decode_ring(path)]
+    # only the 16 stores of the counter are traced
+    assert len(lines) == 16
+    for i, line in enumerate(lines, 1):
+        assert line == "W(4): %06x: %08x          [@%06x +000000 var] " % (var, i, var)
+
+
 def trace_mgr_int_block_test(caplog):
     caplog.set_level(logging.INFO)
     tm = setup_tm()
@@ -0,0 +1,97 @@
+from amitools.vamos.trace.ring import (
+    TraceRing,
+    TraceReader,
+    KIND_INSTR,
+    KIND_REGS,
+    KIND_MEM,
+    KIND_INT_BLOCK,
+)
+
+
+def read_trace(path):
+    reader = TraceReader(path)
+    assert reader.read() is None
+    return reader
+
+
+def trace_ring_records_test(tmpdir):
+    path = str(tmpdir.join("trace"))
+    ring = TraceRing(path, 16, cpu_name="68020")
+    assert ring.open()
+    regs = list(range(18))
+    ring.add_regs(regs)
+    ring.add_instr(0x1000, b"\x4e\x75")
+    ring.add_mem(KIND_MEM, "W", 2, 0x2000, -1)
+    ring.add_mem(KIND_INT_BLOCK, "F", 0, 0x3000, 0x100)
+    assert ring.get_num_events() == 9
+    assert ring.close([{"name": "foo", "addr": 0, "size": 4}])
+    reader = read_trace(path)
+    assert reader.cpu_name == "68020"
+    assert reader.closed
+    assert reader.get_num_records() == 9
+    assert reader.labels == [{"name": "foo", "addr": 0, "size": 4}]
+    assert list(reader.get_records()) == [
+        (KIND_REGS, regs),
+        (KIND_INSTR, 0x1000, b"\x4e\x75"),
+        (KIND_MEM, "W", 2, 0x2000, 0xFFFFFFFF),
+        (KIND_INT_BLOCK, "F", 0x3000, 0x100),
+    ]
+
+
+def trace_ring_wrap_test(tmpdir):
+    path = str(tmpdir.join("trace"))
+    ring = TraceRing(path, 8)
+    assert ring.open()
+    for i in range(20):
+        ring.add_instr(i, b"")
+    assert ring.close()
+    reader = read_trace(path)
+    assert reader.get_num_records() == 8
+    pcs = [r[1] for r in reader.get_records()]
+    assert pcs == list(range(12, 20))
+    # only the last events
+    pcs = [r[1] for r in reader.get_records(3)]
+    assert pcs == [17, 18, 19]
+
+
+def trace_ring_partial_regs_test(tmpdir):
+    path = str(tmpdir.join("trace"))
+    ring = TraceRing(path, 8)
+    assert ring.open()
+    # the regs of the first instr are overwritten partly
+    for i in range(2):
+        ring.add_regs([i] * 18)
+        ring.add_instr(i, b"")
+    assert ring.close()
+    reader = read_trace(path)
+    assert list(reader.get_records()) == [
+        (KIND_INSTR, 0, b""),
+        (KIND_REGS, [1] * 18),
+        (KIND_INSTR, 1, b""),
+    ]
+
+
+def trace_ring_mmap_crash_test(tmpdir):
+    path = str(tmpdir.join("trace"))
+    for num in (5, 13):
+        ring = TraceRing(path, 8, use_mmap=True)
+        assert ring.open()
+        for i in range(num):
+            ring.add_instr(i, b"")
+        # vamos crashed: no close() but the data is in the file
+        ring.buf.flush()
+        reader = read_trace(path)
+        assert not reader.closed
+        pcs = [r[1] for r in reader.get_records()]
+        assert pcs == list(range(max(0, num - 8), num))
+        ring.close()
+
+
+def trace_ring_invalid_test(tmpdir):
+    path = str(tmpdir.join("trace"))
+    assert not TraceRing(path, 0).open()
+    tmpdir.join("foo").write("hello")
+    reader = TraceReader(str(tmpdir.join("foo")))
+    assert reader.read() == "no trace file"
+    reader = TraceReader(str(tmpdir.join("bar")))
+    assert reader.read().startswith("can't read")
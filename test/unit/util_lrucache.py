@@ -0,0 +1,19 @@
+from amitools.util import LRUCache
+
+
+def util_lrucache_get_put_test():
+    c = LRUCache(2)
+    assert c.get("a") is None
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1
+    # b is dropped as a was used last
+    c.put("c", 3)
+    assert "b" not in c
+    assert c.get("b", 42) == 42
+    assert c.get("a") == 1
+    assert c.get("c") == 3
+    assert len(c) == 2
+    assert c.get_stats() == {"hits": 3, "misses": 2, "entries": 2}
+    c.clear()
+    assert len(c) == 0
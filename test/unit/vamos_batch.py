@@ -0,0 +1,95 @@
+import os
+import pytest
+from amitools.vamos.batch import run_batch, BatchWorker
+from amitools.vamos.main import RET_CODE_CONFIG_ERROR
+from amitools.vamos.error import VamosInternalError
+
+
+def get_args(tmpdir):
+    return ["-c", "test.vamosrc", "--vols-base-dir", str(tmpdir)]
+
+
+jobs = [
+    ["bin/test_hello_sc"],
+    "bin/proc_args_sc a 'b c'",
+    ["bin/test_hello_sc"],
+    ["bin/not_found"],
+    ["bin/test_hello_sc"],
+]
+
+
+def check_results(results):
+    assert len(results) == len(jobs)
+    hello = b"VamosTest: PrintHello()\n"
+    assert [r.exit_code for r in results] == [0, 0, 0, RET_CODE_CONFIG_ERROR, 0]
+    assert results[0].stdout == hello
+    assert results[0].cycles > 0
+    assert results[1].args == ["bin/proc_args_sc", "a", "b c"]
+    assert results[1].stdout == b'a0:"a \\"b c\\"\\n"\nin:"a \\"b c\\"\\n"\n'
+    assert results[2].stdout == hello
+    assert results[3].stdout == b""
+    assert b"failed loading binary" in results[3].stderr
+    assert results[4].stdout == hello
+
+
+@pytest.mark.parametrize("num_workers", [0, 1, 2])
+def vamos_batch_run_test(tmpdir, num_workers):
+    results = run_batch(jobs, args=get_args(tmpdir), num_workers=num_workers)
+    check_results(results)
+    # each run of the same job takes the same cycles
+    assert results[2].cycles == results[0].cycles
+    assert results[4].cycles == results[0].cycles
+
+
+@pytest.mark.parametrize("num_workers", [0, 1])
+def vamos_batch_worker_raises_test(tmpdir, monkeypatch, num_workers):
+    def restore(self):
+        raise VamosInternalError("restore failed")
+
+    monkeypatch.setattr(BatchWorker, "_restore", restore)
+    hello = ["bin/test_hello_sc"]
+    results = run_batch([hello] * 3, args=get_args(tmpdir), num_workers=num_workers)
+    # the worker is set up again after the failed job
+    assert [r.exit_code for r in results] == [0, RET_CODE_CONFIG_ERROR, 0]
+    assert b"restore failed" in results[1].stderr
+    assert results[2].stdout == b"VamosTest: PrintHello()\n"
+
+
+def vamos_batch_worker_dies_test(tmpdir, monkeypatch):
+    run_job = BatchWorker.run_job
+
+    def die(self, args):
+        if args == ["bin/not_found"]:
+            os._exit(3)
+        return run_job(self, args)
+
+    monkeypatch.setattr(BatchWorker, "run_job", die)
+    results = run_batch(jobs, args=get_args(tmpdir), num_workers=1)
+    codes = [r.exit_code for r in results]
+    assert codes == [0, 0, 0] + [RET_CODE_CONFIG_ERROR] * 2
+    assert b"exit code 3" in results[3].stderr
+
+
+def vamos_batch_config_error_test(tmpdir):
+    args = get_args(tmpdir) + ["--ram-size", "foo"]
+    results = run_batch(jobs, args=args, num_workers=0)
+    assert [r.exit_code for r in results] == [RET_CODE_CONFIG_ERROR] * len(jobs)
+
+
+def vamos_batch_worker_test(tmpdir):
+    worker = BatchWorker(args=get_args(tmpdir))
+    try:
+        assert worker.setup()
+        alloc = worker.session.mem_map.get_alloc()
+        free = alloc.get_free_bytes()
+        res = worker.run_job(["bin/test_hello_sc"])
+        assert res.exit_code == 0
+        res = worker.run_job(["bin/test_raise_sc"])
+        assert res.exit_code == 1
+        # state is restored before next job
+        res = worker.run_job(["bin/test_hello_sc"])
+        assert res.exit_code == 0
+        worker._restore()
+        assert alloc.get_free_bytes() == free
+    finally:
+        worker.shutdown()
@@ -0,0 +1,58 @@
+import os
+import socket
+from amitools.vamos.client import (
+    send_request,
+    recv_request,
+    send_reply,
+    recv_reply,
+    get_socket_path,
+    REPLY_REJECTED,
+)
+
+
+def vamos_client_socket_path_test(monkeypatch):
+    monkeypatch.delenv("VAMOS_SERVER", raising=False)
+    assert get_socket_path() == os.path.expanduser("~/.vamos/server.sock")
+    assert get_socket_path("/tmp/bla.sock") == "/tmp/bla.sock"
+    monkeypatch.setenv("VAMOS_SERVER", "/tmp/foo.sock")
+    assert get_socket_path() == "/tmp/foo.sock"
+
+
+def vamos_client_request_test():
+    a, b = socket.socketpair()
+    r, w = os.pipe()
+    try:
+        args = ["-c", "my.vamosrc", "bin/hello", "a b"]
+        env = {"HOME": "/home/bla", "PATH": "/bin"}
+        send_request(a, args, "/tmp", env, [w, w, w])
+        got_args, got_cwd, got_env, fds = recv_request(b)
+        assert got_args == args
+        assert got_cwd == "/tmp"
+        assert got_env == env
+        assert len(fds) == 3
+        # passed fd refers to our pipe
+        os.write(fds[1], b"hello")
+        assert os.read(r, 5) == b"hello"
+        for fd in fds:
+            os.close(fd)
+        # reply
+        send_reply(b, 42)
+        assert recv_reply(a) == 42
+        send_reply(b, REPLY_REJECTED)
+        assert recv_reply(a) == REPLY_REJECTED
+    finally:
+        a.close()
+        b.close()
+        os.close(r)
+        os.close(w)
+
+
+def vamos_client_vamosc_error_test(monkeypatch, capsys):
+    from amitools.tools import vamosc
+
+    def run(self, args):
+        raise EOFError("vamos server: connection closed")
+
+    monkeypatch.setattr(vamosc.VamosClient, "run", run)
+    assert vamosc.main(["bin/hello"]) == 1
+    assert "connection closed" in capsys.readouterr().err
@@ -121,3 +121,35 @@ def vamos_log_setup_levels_fail2_test(caplog):
     )
     assert not log_setup(log_cfg)
     assert caplog.record_tuples == [("config", logging.ERROR, "invalid log level: foo")]
+
+
+class StrCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __str__(self):
+        self.count += 1
+        return "obj"
+
+
+def vamos_log_channel_test(caplog):
+    assert isinstance(log_dos, LogChannel)
+    obj = StrCounter()
+    log_dos.setLevel(logging.WARN)
+    assert not log_dos.isEnabledFor(logging.INFO)
+    # disabled calls do not format their arguments
+    log_dos.debug("debug %s", obj)
+    log_dos.info("info %s", obj)
+    assert obj.count == 0
+    log_dos.warning("warn %s", obj)
+    assert obj.count > 0
+    # enable channel
+    log_dos.setLevel(logging.DEBUG)
+    log_dos.debug("debug %s", obj)
+    assert caplog.record_tuples == [
+        ("dos", logging.WARN, "warn obj"),
+        ("dos", logging.DEBUG, "debug obj"),
+    ]
+    # without own level the parent level is used
+    log_dos.setLevel(logging.NOTSET)
+    assert "info" not in log_dos.__dict__
@@ -0,0 +1,60 @@
+import os
+import threading
+from amitools.vamos.cfg import VamosMainParser
+from amitools.vamos.session import VamosSession
+from amitools.vamos.server import VamosServer
+from amitools.vamos.client import VamosClient, REPLY_REJECTED
+
+
+def run_server(tmpdir, client_args, cwd=None):
+    vols_dir = str(tmpdir.join("volumes"))
+    sock_path = str(tmpdir.join("vamos.sock"))
+    args = ["-c", os.path.abspath("test.vamosrc"), "--vols-base-dir", vols_dir]
+    args += ["-V", "work:."]
+    mp = VamosMainParser(proc=False)
+    assert mp.parse(None, args)
+    session = VamosSession(mp)
+    result = {}
+    try:
+        assert session.setup()
+        server = VamosServer(session, socket_path=sock_path)
+        server.open()
+        r, w = os.pipe()
+
+        def client():
+            c = VamosClient(sock_path)
+            result["ret"] = c.run(args + client_args, cwd=cwd, fds=(0, w, w))
+            os.close(w)
+
+        t = threading.Thread(target=client)
+        t.start()
+        server.serve(max_requests=1)
+        t.join()
+        server.close()
+        with os.fdopen(r, "rb") as fobj:
+            result["out"] = fobj.read()
+        session.close_libs()
+    finally:
+        session.close_paths()
+    session.cleanup()
+    return result
+
+
+def vamos_server_run_test(tmpdir):
+    res = run_server(tmpdir, ["bin/test_hello_sc"])
+    assert res["ret"] == 0
+    assert res["out"] == b"VamosTest: PrintHello()\n"
+
+
+def vamos_server_reject_test(tmpdir):
+    res = run_server(tmpdir, ["--ram-size", "1024", "bin/test_hello_sc"])
+    assert res["ret"] == REPLY_REJECTED
+    assert res["out"] == b""
+
+
+def vamos_server_other_cwd_test(tmpdir):
+    # the relative volume path of the server config is another dir here
+    other_dir = tmpdir.mkdir("other")
+    res = run_server(tmpdir, ["bin/test_hello_sc"], cwd=str(other_dir))
+    assert res["ret"] == REPLY_REJECTED
+    assert res["out"] == b""